@@ -0,0 +1,368 @@
+'''
+Kommandozeile fuer Importe und Wartung ohne Oberflaeche, z.B. fuer naechtliche
+Verarbeitung per cron oder Aufgabenplanung:
+
+    python -m dlswws import --type kassenjournal --export-date 01.03.2023 journal_03.csv
+    python -m dlswws batch importe.txt --jobs 4 --json
+    python -m dlswws status
+    python -m dlswws hashmodus binaer
+    python -m dlswws betragsmodus ganzzahl
+    python -m dlswws archiviere 2022
+    python -m dlswws wartung
+
+Es werden keine GUI-Module geladen.
+
+Exitcodes: 0 = alles importiert, 1 = mindestens eine Datei mit Fehler, 2 = Aufruf- oder Konfigurationsfehler
+'''
+import json
+import sys
+import traceback
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Deque, List, Sequence, Tuple
+
+from controller.import_lauf import IMPORT_TYPEN, importer_klasse, lade, schreibe, status_klasse
+from model.db_manager import BETRAG_DEZIMAL, BETRAG_GANZZAHL, HASH_BINAER, HASH_TEXT, DbManager
+from model.log_level import LogLevel
+
+EXIT_OK = 0
+EXIT_IMPORTFEHLER = 1
+EXIT_AUFRUFFEHLER = 2
+
+
+def exportdatum(wert: str) -> date:
+    '''Wandelt das Exportdatum im Format TT.MM.JJJJ oder JJJJ-MM-TT um'''
+    for fmt in ('%d.%m.%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(wert, fmt).date()
+        except ValueError:
+            pass
+    raise ArgumentTypeError(f"ungueltiges Exportdatum '{wert}', erwartet TT.MM.JJJJ oder JJJJ-MM-TT")
+
+
+def erzeuge_parser() -> ArgumentParser:
+    '''Baut den Parser fuer die Kommandozeile'''
+
+    parser = ArgumentParser(prog='dlswws', description='DLS-Datawarehouse ohne Oberflaeche')
+    parser.add_argument('--db', help='SQLITE-Datenbank, Standard ist die Datenbank aus ~/.dlswws.ini')
+    befehle = parser.add_subparsers(dest='befehl', required=True)
+
+    imp = befehle.add_parser('import', help='importiert eine oder mehrere Dateien eines Typs')
+    imp.add_argument('--type', dest='typ', required=True, choices=sorted(IMPORT_TYPEN), help='Importtyp')
+    imp.add_argument('--export-date', dest='exportdatum', required=True, type=exportdatum,
+                     help='Exportdatum der Dateien (TT.MM.JJJJ)')
+    imp.add_argument('dateien', nargs='+', help='zu importierende Dateien, sie werden in dieser Reihenfolge geschrieben')
+    _optionen_import(imp)
+
+    batch = befehle.add_parser(
+        'batch', help="importiert alle Dateien einer Liste mit Zeilen 'typ;exportdatum;datei'")
+    batch.add_argument('liste', help="Textdatei, eine Datei je Zeile, Leerzeilen und Zeilen mit '#' werden ignoriert")
+    _optionen_import(batch)
+
+    befehle.add_parser('init', help='legt die fehlenden Tabellen an')
+
+    status = befehle.add_parser('status', help='zeigt den Stand der Importe')
+    status.add_argument('--json', action='store_true', help='Ausgabe als JSON')
+
+    hashmodus = befehle.add_parser('hashmodus', help='stellt die Speicherform der Hashes um')
+    hashmodus.add_argument('modus', choices=[HASH_TEXT, HASH_BINAER],
+                           help=f"'{HASH_BINAER}': 16 Bytes und WITHOUT ROWID-Tabellen, '{HASH_TEXT}': 32 Hex-Zeichen")
+
+    betragsmodus = befehle.add_parser('betragsmodus', help='stellt die Speicherform der Betraege und Mengen um')
+    betragsmodus.add_argument('modus', choices=[BETRAG_DEZIMAL, BETRAG_GANZZAHL],
+                              help=f"'{BETRAG_GANZZAHL}': Cent und Tausendstel als INTEGER, '{BETRAG_DEZIMAL}': Dezimalzahlen")
+
+    archiv = befehle.add_parser('archiviere', help='verschiebt das Kassenjournal eines abgeschlossenen Jahres in eine eigene Datei')
+    archiv.add_argument('jahr', type=int, help='Geschaeftsjahr, z.B. 2022')
+
+    wartung = befehle.add_parser('wartung', help='analysiert geaenderte Tabellen, gibt freie Seiten frei und kuerzt das WAL')
+    wartung.add_argument('--json', action='store_true', help='Messwerte als JSON-Zeile ausgeben')
+
+    return parser
+
+
+def _optionen_import(parser: ArgumentParser) -> None:
+    '''Gemeinsame Optionen der Import-Befehle'''
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Anzahl Dateien, die parallel eingelesen werden. Geschrieben wird immer nacheinander.')
+    parser.add_argument('--json', action='store_true', help='Messwerte je Datei als JSON-Zeile ausgeben')
+    parser.add_argument('--weiter-bei-fehler', action='store_true',
+                        help='nach einem Fehler die restlichen Dateien trotzdem importieren')
+    parser.add_argument('--ohne-wartung', action='store_true',
+                        help='keine Wartung der Datenbank nach den Importen (siehe Befehl wartung)')
+
+
+def lese_batchliste(liste: str) -> List[Tuple[str, date, str]]:
+    '''Liest die Batchliste, relative Dateinamen beziehen sich auf das Verzeichnis der Liste'''
+    auftraege = []
+    basis = Path(liste).resolve().parent
+    with open(liste, encoding='utf8') as f:
+        for nr, zeile in enumerate(f, start=1):
+            zeile = zeile.strip()
+            if not zeile or zeile.startswith('#'):
+                continue
+            teile = [t.strip() for t in zeile.split(';')]
+            if len(teile) != 3 or teile[0] not in IMPORT_TYPEN:
+                raise ArgumentTypeError(f"{liste}, Zeile {nr}: erwartet 'typ;exportdatum;datei'")
+            auftraege.append((teile[0], exportdatum(teile[1]), str(basis / teile[2])))
+    return auftraege
+
+
+def fuehre_importe_aus(db_manager: DbManager, auftraege: Sequence[Tuple[str, date, str]], jobs: int,
+                       als_json: bool, weiter_bei_fehler: bool, mit_wartung: bool = True) -> int:
+    '''
+    Importiert die Dateien. Mit 'jobs' > 1 werden die Dateien parallel eingelesen (load_file),
+    geschrieben werden sie in der Reihenfolge der Auftraege, da sich die Satelliten
+    auf den jeweils vorherigen Stand beziehen. Es werden hoechstens 'jobs' Dateien im Voraus
+    eingelesen, damit nicht alle Dateien eines grossen Batches gleichzeitig im Speicher liegen.
+    Wurde mindestens eine Datei geschrieben, folgt mit 'mit_wartung' die Wartung der Datenbank.
+    '''
+    exitcode = EXIT_OK
+    geschrieben = False
+    jobs = max(jobs, 1)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        geladen: Deque[Future] = deque()
+        ausstehend = iter(auftraege)
+
+        def lies_naechste() -> None:
+            '''Startet das Einlesen des naechsten Auftrags'''
+            auftrag = next(ausstehend, None)
+            if auftrag:
+                typ, export_date, datei = auftrag
+                geladen.append(pool.submit(_lade, importer_klasse(typ)(db_manager, datei, export_date)))
+
+        for _ in range(jobs):
+            lies_naechste()
+
+        abbruch = False
+        for typ, export_date, datei in auftraege:
+            if abbruch:
+                _ausgabe(als_json, typ, export_date, datei, 'uebersprungen', None, [], 0.0)
+                continue
+            imp, fehler = geladen.popleft().result()
+            lies_naechste()
+            if not fehler:
+                try:
+                    schreibe(imp, db_manager)
+                    geschrieben = True
+                except Exception as e:
+                    fehler = e
+            dauer = sum(m.dauer for m in imp.protokoll.stufen)
+            _ausgabe(als_json, typ, export_date, datei, 'fehler' if fehler else 'ok', fehler, imp.protokoll.messungen, dauer)
+            if fehler:
+                # fuer unbeaufsichtigte Laeufe mit vollstaendigem Traceback
+                _log(LogLevel.ERROR, f"Import {typ} '{datei}' mit Fehler beendet: {_fehlertext(fehler)}\n"
+                     + ''.join(traceback.format_exception(fehler)).rstrip())
+            else:
+                _log(LogLevel.INFO, f"Import {typ} '{datei}' abgeschlossen")
+            # die eingelesenen Daten werden nicht mehr gebraucht
+            imp.df = None
+            if fehler:
+                exitcode = EXIT_IMPORTFEHLER
+                abbruch = not weiter_bei_fehler
+            if abbruch:
+                for future in geladen:
+                    future.cancel()
+                geladen.clear()
+    if geschrieben and mit_wartung:
+        warte_datenbank(db_manager, als_json)
+    return exitcode
+
+
+def warte_datenbank(db_manager: DbManager, als_json: bool) -> int:
+    '''Fuehrt die Wartung der Datenbank aus und gibt die Messwerte je Aktion aus'''
+    from model.wartung import ERGEBNISSE, fuehre_wartung_aus
+
+    protokoll = fuehre_wartung_aus(db_manager)
+    dauer = sum(m.dauer for m in protokoll.stufen)
+    if als_json:
+        print(json.dumps({
+            'typ': 'wartung',
+            'dauer': round(dauer, 4),
+            'messungen': [{
+                'stufe': m.stufe,
+                'schritt': m.schritt,
+                'dauer': round(m.dauer, 4),
+                'anzahl': m.zeilen_geschrieben
+            } for m in protokoll.messungen]
+        }), flush=True)
+    else:
+        print(f'wartung in {dauer:.2f} s', flush=True)
+        for m in protokoll.messungen:
+            if m.schritt:
+                print(f'  {m.schritt}: {m.dauer:.2f} s, {m.zeilen_geschrieben} {ERGEBNISSE[m.schritt]}', flush=True)
+    _log(LogLevel.INFO, f'Wartung in {dauer:.2f} s abgeschlossen')
+    return EXIT_OK
+
+
+def _lade(imp) -> Tuple[object, Exception]:
+    '''Liest die Datei eines Importers ein, Fehler werden zurueckgegeben statt geworfen'''
+    try:
+        lade(imp)
+        return imp, None
+    except Exception as e:
+        return imp, e
+
+
+def _fehlertext(fehler: Exception) -> str:
+    '''Typ und Meldung einer Ausnahme, z.B. "KeyError: 'Bon-Nr.'" '''
+    meldung = str(fehler)
+    return f'{type(fehler).__name__}: {meldung}' if meldung else type(fehler).__name__
+
+
+def _ausgabe(als_json: bool, typ: str, export_date: date, datei: str, status: str, fehler: Exception,
+             messungen: list, dauer: float) -> None:
+    '''Gibt das Ergebnis eines Imports aus'''
+    if als_json:
+        print(json.dumps({
+            'typ': typ,
+            'exportdatum': export_date.isoformat(),
+            'datei': datei,
+            'status': status,
+            'fehler': _fehlertext(fehler) if fehler else None,
+            'fehlertyp': type(fehler).__name__ if fehler else None,
+            'dauer': round(dauer, 4),
+            'messungen': [{
+                'stufe': m.stufe,
+                'schritt': m.schritt,
+                'dauer': round(m.dauer, 4),
+                'cpu_zeit': round(m.cpu_zeit, 4),
+                'zeilen_gelesen': m.zeilen_gelesen,
+                'zeilen_geschrieben': m.zeilen_geschrieben,
+                'speicher_peak': m.speicher_peak
+            } for m in messungen]
+        }), flush=True)
+        return
+
+    print(f"{typ} {export_date.strftime('%d.%m.%Y')} '{datei}': {status}"
+          + (f' ({_fehlertext(fehler)})' if fehler else f' in {dauer:.2f} s'), flush=True)
+    for m in messungen:
+        if not m.schritt:
+            print(f'  {m}', flush=True)
+
+
+def zeige_status(db_manager: DbManager, als_json: bool) -> int:
+    '''Gibt je Importtyp das Datum der letzten Importdatei und den Zeitpunkt des letzten Imports aus'''
+    stand = dict()
+    for typ in IMPORT_TYPEN:
+        status = status_klasse(typ)(db_manager)
+        letzte_datei, letzter_import = status.letzte_datei, status.letzter_import
+        stand[typ] = {
+            'letzte_datei': letzte_datei.date().isoformat() if letzte_datei else None,
+            'letzter_import': letzter_import.isoformat(timespec='seconds') if letzter_import else None
+        }
+
+    if als_json:
+        print(json.dumps(stand))
+    else:
+        for typ, werte in stand.items():
+            if werte['letzter_import']:
+                print(f"{typ:20} Datei vom {werte['letzte_datei'] or 'unbekannt':10}  importiert {werte['letzter_import']}")
+            else:
+                print(f'{typ:20} Kein Import vorhanden')
+    return EXIT_OK
+
+
+def stelle_hashmodus_um(dbfile: str, modus: str) -> int:
+    '''Stellt die Speicherform der Hashes um und gibt die Groesse der Datenbank davor und danach aus'''
+    from model.hash_modus import stelle_um
+
+    vorher = Path(dbfile).stat().st_size
+    if not stelle_um(dbfile, modus == HASH_BINAER):
+        print(f"Die Hashes sind bereits im Modus '{modus}' gespeichert")
+        return EXIT_OK
+    nachher = Path(dbfile).stat().st_size
+    print(f"Hashes auf '{modus}' umgestellt, Datenbank {vorher / 2**20:.1f} MB -> {nachher / 2**20:.1f} MB")
+    _log(LogLevel.INFO, f"Hashmodus auf '{modus}' umgestellt")
+    return EXIT_OK
+
+
+def stelle_betragsmodus_um(dbfile: str, modus: str) -> int:
+    '''Stellt die Speicherform der Betraege und Mengen um und gibt die Groesse der Datenbank davor und danach aus'''
+    from model.betrag_modus import stelle_um
+
+    vorher = Path(dbfile).stat().st_size
+    if not stelle_um(dbfile, modus == BETRAG_GANZZAHL):
+        print(f"Die Betraege sind bereits im Modus '{modus}' gespeichert")
+        return EXIT_OK
+    nachher = Path(dbfile).stat().st_size
+    print(f"Betraege auf '{modus}' umgestellt, Datenbank {vorher / 2**20:.1f} MB -> {nachher / 2**20:.1f} MB")
+    _log(LogLevel.INFO, f"Betragsmodus auf '{modus}' umgestellt")
+    return EXIT_OK
+
+
+def archiviere(db_manager: DbManager, jahr: int) -> int:
+    '''Archiviert das Jahr und gibt die Anzahl der verschobenen Zeilen aus'''
+    from model.archiv import archiviere_jahr
+
+    try:
+        ergebnis = archiviere_jahr(db_manager, jahr)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return EXIT_AUFRUFFEHLER
+    print(f'Jahr {ergebnis.jahr} nach {ergebnis.datei} archiviert: {ergebnis.bons} Bons, '
+          f'{ergebnis.positionen} Positionen, {ergebnis.journalzeilen} Journalzeilen')
+    _log(LogLevel.INFO, f'Jahr {ergebnis.jahr} nach {ergebnis.datei} archiviert')
+    return EXIT_OK
+
+
+def _log(level: LogLevel, message: str) -> None:
+    '''Schreibt die Nachricht in die Logdatei der Anwendung'''
+    from settings import LOG_FILE
+
+    ts = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    with open(LOG_FILE, mode='at') as log_file:
+        log_file.write(f'{ts} - {level.name} - cli - {message}\n')
+
+
+def main(argv: Sequence[str] = None) -> int:
+    '''Einstieg der Kommandozeile, liefert den Exitcode'''
+    from settings import check_configfile, create_tables, get_dbconfig
+
+    parser = erzeuge_parser()
+    args: Namespace = parser.parse_args(argv)
+
+    dbfile = args.db
+    if not dbfile:
+        check_configfile()
+        dbfile = get_dbconfig()
+    if not dbfile:
+        print('Es ist keine Datenbank konfiguriert, bitte --db angeben', file=sys.stderr)
+        return EXIT_AUFRUFFEHLER
+
+    create_tables(dbfile)
+    if args.befehl == 'init':
+        return EXIT_OK
+
+    if args.befehl == 'hashmodus':
+        return stelle_hashmodus_um(dbfile, args.modus)
+    if args.befehl == 'betragsmodus':
+        return stelle_betragsmodus_um(dbfile, args.modus)
+
+    db_manager = DbManager(dbfile)
+    if args.befehl == 'status':
+        return zeige_status(db_manager, args.json)
+    if args.befehl == 'archiviere':
+        return archiviere(db_manager, args.jahr)
+    if args.befehl == 'wartung':
+        return warte_datenbank(db_manager, args.json)
+
+    if args.befehl == 'import':
+        auftraege = [(args.typ, args.exportdatum, str(Path(datei).resolve())) for datei in args.dateien]
+    else:
+        try:
+            auftraege = lese_batchliste(args.liste)
+        except (OSError, ArgumentTypeError) as e:
+            print(e, file=sys.stderr)
+            return EXIT_AUFRUFFEHLER
+
+    fehlend = [datei for _, _, datei in auftraege if not Path(datei).is_file()]
+    if fehlend:
+        print(f"Dateien nicht gefunden: {', '.join(fehlend)}", file=sys.stderr)
+        return EXIT_AUFRUFFEHLER
+
+    return fuehre_importe_aus(db_manager, auftraege, args.jobs, args.json, args.weiter_bei_fehler,
+                              not args.ohne_wartung)
@@ -0,0 +1,75 @@
+from importlib import import_module
+from typing import Callable, Dict, Tuple, Type
+
+from model.db_manager import DbManager
+
+IMPORT_TYPEN: Dict[str, Tuple[str, str, str]] = {
+    'kassenjournal': ('model.kassenjournal', 'KassenjournalImporter', 'KassenjournalStatus'),
+    'warengruppen': ('model.warengruppen', 'WarengruppenImporter', 'WarengruppenStatus'),
+    'kunden': ('model.kunden', 'KundenImporter', 'KundenStatus'),
+    'artikel': ('model.artikel', 'ArtikelImporter', 'ArtikelStatus'),
+    'pfand': ('model.pfand', 'PfandImporter', 'PfandStatus'),
+    'lieferanten': ('model.lieferanten', 'LieferantenImporter', 'LieferantenStatus'),
+    'mehrfach-ean': ('model.mehrfach_ean', 'MehrfachEanImporter', 'MehrfachEanStatus'),
+    'lieferantenartikel': ('model.scs_lief_artikel', 'SCSLieferantenArtikelImporter', 'SCSLieferantenArtikelStatus'),
+    'presseartikel': ('model.presseartikel', 'PresseArtikelImporter', 'PresseArtikelStatus')
+}
+'''Importtyp -> (Modul, Importer-Klasse, Status-Klasse). Die Module werden erst bei Bedarf geladen.'''
+
+
+def importer_klasse(typ: str) -> Type:
+    '''Liefert die Importer-Klasse zum Importtyp'''
+    modul, importer, _ = IMPORT_TYPEN[typ]
+    return getattr(import_module(modul), importer)
+
+
+def status_klasse(typ: str) -> Type:
+    '''Liefert die Status-Klasse zum Importtyp'''
+    modul, _, status = IMPORT_TYPEN[typ]
+    return getattr(import_module(modul), status)
+
+
+def lade(imp) -> None:
+    '''Fuehrt die Stufe 'load_file' gemessen aus. Die Stufe greift nicht auf die Datenbank zu.'''
+    with imp.protokoll.messe('load_file'):
+        imp.load_file()
+
+
+def schreibe(imp, db_manager: DbManager, melde: Callable[[object], None] = None) -> None:
+    '''
+    Fuehrt die Stufen 'write_data' und 'post_process' gemessen aus. Danach werden
+    die Messwerte aller Stufen an 'melde' uebergeben und in 'import_log_t' gespeichert,
+    auch wenn eine Stufe mit einem Fehler abbricht.
+    '''
+    melde = melde or _ignoriere
+    try:
+        melde(f"Datei '{imp.import_file}' geladen. Schreiben gestartet...")
+        with imp.protokoll.messe('write_data'):
+            imp.write_data()
+        melde(f"Datei '{imp.import_file}' geschrieben. Nachverarbeitung gestartet...")
+        with imp.protokoll.messe('post_process'):
+            imp.post_process()
+        melde(f"Datei '{imp.import_file}' Nachverarbeitung abgeschlossen")
+    finally:
+        _protokolliere(imp, db_manager, melde)
+
+
+def importiere(imp, db_manager: DbManager, melde: Callable[[object], None] = None) -> None:
+    '''Fuehrt alle Stufen des Imports einer Datei nacheinander aus'''
+    try:
+        lade(imp)
+    except Exception:
+        _protokolliere(imp, db_manager, melde or _ignoriere)
+        raise
+    schreibe(imp, db_manager, melde)
+
+
+def _protokolliere(imp, db_manager: DbManager, melde: Callable[[object], None]) -> None:
+    '''Meldet die Messwerte der Stufen und speichert sie'''
+    for messung in imp.protokoll.stufen:
+        melde(messung)
+    imp.protokoll.speichere(db_manager)
+
+
+def _ignoriere(_) -> None:
+    pass
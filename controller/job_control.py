@@ -1,13 +1,17 @@
 from pathlib import Path
-from queue import Queue
+from queue import Empty, Queue
 from threading import Thread
 from tkinter.filedialog import askopenfilename
-from typing import List, Protocol, Tuple, Type
+from typing import Callable, List, Protocol, Tuple, Type
 
 from controller.controller import Controller
+from controller.import_lauf import importiere
 from model.db_manager import DbManager
 from model.errors import DatenImportError
+from model.fortschritt import Fortschritt
+from model.import_log import ImportProtokoll, Messung
 from model.log_level import LogLevel
+from model.wartung import fuehre_wartung_aus
 from view.select_datum_frm import SelectDateWidget
 from datetime import date, datetime
 
@@ -17,6 +21,9 @@ class Importer(Protocol):
     Interface für Importer
     '''
 
+    protokoll: ImportProtokoll
+    '''Sammelt die Messwerte der Stufen und Schritte des Imports'''
+
     @property
     def import_file(self) -> str:
         '''Liefert die zu importierende Datei zurück'''
@@ -27,6 +34,10 @@ class Importer(Protocol):
         '''Setzt die zu importierende Datei'''
         ...
 
+    def add_listener(self, listener: Callable[[Fortschritt], None]) -> None:
+        '''Registriert einen Listener fuer die Fortschrittsmeldungen der Stufen'''
+        ...
+
     def write_data(self) -> None:
         '''
         Schreibt die gelesenen Daten in die Datenbank.
@@ -59,6 +70,14 @@ class JobOwner(Protocol):
         '''Wird vom Job nach Beendigung aufgerufen'''
         ...
 
+    def log_message(self, msg: str) -> None:
+        '''Nimmt Nachrichten zum Ablauf des Jobs entgegen, z.B. die Messwerte der Importstufen'''
+        ...
+
+    def zeige_fortschritt(self, fortschritt: Fortschritt) -> None:
+        '''Zeigt den aktuellen Fortschritt des Jobs an'''
+        ...
+
 
 class ImportJobController():
     '''Job Controller für den Import von Dateien'''
@@ -113,12 +132,26 @@ class ImportJobController():
         self.application.after(1, lambda: self.monitor(worker, queue))
 
     def monitor(self, worker: Thread, queue: Queue) -> None:
-        '''Ueberwacht den Thread und schreibt das Log'''
-        if worker.is_alive():
-            if not queue.empty():
-                msg = queue.get()
-                self.application.log_message(LogLevel.INFO, msg)
+        '''
+        Ueberwacht den Thread und schreibt das Log. Bei jedem Aufruf werden alle
+        anstehenden Nachrichten abgeholt, von den Fortschrittsmeldungen wird nur
+        die neueste angezeigt.
+        '''
+        laeuft = worker.is_alive()
+        fortschritt = None
+        while True:
+            try:
+                msg = queue.get_nowait()
+            except Empty:
+                break
+            if isinstance(msg, Fortschritt):
+                fortschritt = msg
+            else:
+                self._verarbeite_nachricht(msg)
+        if fortschritt:
+            self.job_owner.zeige_fortschritt(fortschritt)
 
+        if laeuft:
             self.application.after(50, lambda: self.monitor(worker, queue))
         else:
             if self.e:
@@ -129,6 +162,13 @@ class ImportJobController():
                     LogLevel.INFO, f"Import abgeschlossen: '{self.filename}")
             self.job_owner.done()
 
+    def _verarbeite_nachricht(self, msg) -> None:
+        '''Messwerte gehen an den JobOwner, alle anderen Nachrichten in das Log der Anwendung'''
+        if isinstance(msg, Messung):
+            self.job_owner.log_message(f"{datetime.now().strftime('%d.%m.%Y %H:%M:%S')} - {msg}")
+        else:
+            self.application.log_message(LogLevel.INFO, msg)
+
     def _run_import(self, importer_clzz: Type[Importer], db_man: DbManager, files: List[str], queue: Queue, app: Controller, export_date: date) -> None:
         '''Soll in einem Thread ausgeführt werden, verarbeitet die Dateien'''
 
@@ -136,12 +176,9 @@ class ImportJobController():
         try:
             for file in files:
                 imp = importer_clzz(db_man, file, export_date)
-                imp.load_file()
-                queue.put(f"Datei '{file}' geladen. Schreiben gestartet...")
-                imp.write_data()
-                queue.put(
-                    f"Datei '{file}' geschrieben. Nachverarbeitung gestartet...")
-                imp.post_process()
-                queue.put(f"Datei '{file}' Nachverarbeitung abgeschlossen")
+                imp.add_listener(queue.put)
+                importiere(imp, db_man, queue.put)
+            queue.put('Wartung der Datenbank gestartet...')
+            fuehre_wartung_aus(db_man, queue.put)
         except Exception as e:
             self.e = e
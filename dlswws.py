@@ -1,11 +1,27 @@
-from tkinter.messagebox import showerror, showinfo
+import sys
 
-from settings import (check_configfile, create_tables,
-                      get_dbconfig, set_highdpi, set_lang, get_config, select_database)
-from view.main_window import MainWindow
+from startprofil import profil_aus_argumenten
 
 
 def main() -> None:
+    '''Startet die Oberflaeche, mit Argumenten die Kommandozeile (siehe cli.py)'''
+    profil = profil_aus_argumenten()
+
+    if sys.argv[1:]:
+        from cli import main as cli_main
+        exitcode = cli_main(sys.argv[1:])
+        if profil:
+            profil.marke('Kommandozeile')
+            profil.ausgeben()
+        sys.exit(exitcode)
+
+    from tkinter.messagebox import showerror, showinfo
+
+    from settings import (check_configfile, create_tables,
+                          get_dbconfig, set_highdpi, set_lang, get_config, select_database)
+    from view.main_window import MainWindow
+    if profil:
+        profil.marke('Module laden')
 
     set_lang()
     set_highdpi()
@@ -21,12 +37,22 @@ def main() -> None:
                   message='Es wurde keine Datenbank ausgewählt. Deshalb wird die Anwendung nun beendet')
         return
     create_tables()
+    if profil:
+        profil.marke('Konfiguration und Schema')
 
     if new_database_set:
         showinfo('Neustart erforderlich', 'Das Programm wird nun beenden. Bitte die Anwendung nun neu starten, um die Änderung wirksam werden zu lassen.')
         return
 
     main_win = MainWindow(get_config())
+    if profil:
+        profil.marke('Hauptfenster aufbauen')
+
+        def fenster_sichtbar() -> None:
+            profil.marke('Fenster anzeigen')
+            profil.ausgeben()
+
+        main_win.after_idle(fenster_sichtbar)
     main_win.mainloop()
 
 
@@ -0,0 +1,297 @@
+'''
+Jahresarchive des Kassenjournals. Die Tabellen aus 'ARCHIV_TABELLEN' wachsen mit jedem Import, ein
+abgeschlossenes Geschaeftsjahr aendert sich aber nicht mehr. 'archiviere_jahr' verschiebt seine
+Zeilen in eine eigene Datei neben der Datenbank ('<name>_<jahr>.db') und traegt sie in
+'archiv_jahr_t' ein. Abfragen haengen mit 'haenge_an' nur die Jahre ihres Zeitraums schreibgeschuetzt
+an (Schema 'archiv_<jahr>') und lesen ueber die temporaeren Sichten 'jahre_<tabelle>', die die
+Tabelle der Datenbank und die angehaengten Archive zusammenfassen. Die Archivdateien werden danach
+nicht mehr geschrieben und koennen wie ein Backup abgelegt oder zwischengespeichert werden.
+
+Verdichtungen (Umsatz, Traffic, Warenkorb, Kundenstatistik), Stornoverweise, Kalender und Zahlungen
+bleiben in der Datenbank. Importe in ein archiviertes Jahr werden abgewiesen. Storniert ein spaeterer
+Bon einen archivierten Bon, bleibt 'netto' im Archiv unveraendert, die Sicht 'jahre_kassenbons_t'
+liefert es fuer diese Bons aus 'storno_link_t' als 0.
+
+Die Archive bleiben an der Verbindung haengen, bis sie geschlossen wird, die Sichten bis zum
+naechsten Aufruf von 'haenge_an'.
+
+Jedes Archiv haelt in seiner 'einstellung_t' die Speicherform seiner Hashes und Betraege (siehe
+model.hash_modus, model.betrag_modus). Die Umstellungen der Datenbank stellen die Archive mit um
+('haenge_beschreibbar_an'), 'haenge_an' weist Archive in anderer Speicherform ab.
+'''
+from datetime import date, datetime
+from pathlib import Path
+import re
+from typing import Callable, Dict, Iterable, List, NamedTuple
+
+from sqlalchemy import Connection, text
+
+from model.db_manager import BETRAG_DEZIMAL, BETRAG_GANZZAHL, HASH_BINAER, HASH_TEXT, DbManager
+from model.errors import DatenImportError
+
+ARCHIV_TABELLEN = ('kassenjournal_t', 'kassenbons_t', 'kassenbons_pos_t')
+'''Tabellen, deren Zeilen jahresweise archiviert werden'''
+
+SICHT_PRAEFIX = 'jahre_'
+'''Praefix der temporaeren Sichten ueber Datenbank und angehaengte Archive'''
+
+SQL_JAHR = {
+    'kassenbons_t': 'WHERE bon_datum >= :von AND bon_datum < :bis',
+    'kassenjournal_t': 'WHERE bon_abschluss >= :von AND bon_abschluss < :bis',
+    # die Positionen gehoeren zu den bereits kopierten Bons
+    'kassenbons_pos_t': 'WHERE hash_bon IN (SELECT b.hash FROM {schema}.kassenbons_t AS b)'
+}
+'''Auswahl der Zeilen eines Jahres je Tabelle, die Bons muessen vor den Positionen kopiert werden'''
+
+
+MODI = {'hash_modus': HASH_TEXT, 'betrag_modus': BETRAG_DEZIMAL}
+'''Einstellungen der Speicherform, die ein Archiv von der Datenbank uebernimmt, mit ihrem Standard'''
+
+
+class ArchivJahr(NamedTuple):
+    '''Ergebnis einer Archivierung'''
+    jahr: int
+    datei: str
+    bons: int
+    positionen: int
+    journalzeilen: int
+
+
+def archiv_datei(dbfile: str, jahr: int) -> Path:
+    '''Pfad der Archivdatei eines Jahres neben der Datenbank'''
+    pfad = Path(dbfile)
+    return pfad.with_name(f'{pfad.stem}_{jahr}{pfad.suffix}')
+
+
+def archiv_schema(jahr: int) -> str:
+    '''Schemaname eines angehaengten Jahres'''
+    return f'archiv_{int(jahr)}'
+
+
+def archivierte_jahre(conn: Connection) -> Dict[int, str]:
+    '''Archivierte Jahre mit ihrer Datei, aufsteigend'''
+    zeilen = conn.execute(text('SELECT a.jahr, a.datei FROM archiv_jahr_t AS a ORDER BY a.jahr'))
+    return {jahr: datei for jahr, datei in zeilen}
+
+
+def pruefe_jahre(conn: Connection, jahre: Iterable[int]) -> None:
+    '''Wirft DatenImportError, wenn eines der Jahre archiviert ist'''
+    archiviert = archivierte_jahre(conn)
+    betroffen = sorted({int(jahr) for jahr in jahre} & set(archiviert))
+    if betroffen:
+        raise DatenImportError(
+            f"Die Daten betreffen die archivierten Jahre {', '.join(map(str, betroffen))}. "
+            'Archivierte Jahre werden nicht mehr importiert.')
+
+
+def _hauptdatei(conn: Connection) -> str:
+    '''Datei des Schemas 'main' der Verbindung'''
+    for _, name, datei in conn.execute(text('PRAGMA database_list')):
+        if name == 'main':
+            return datei
+
+
+def _angehaengt(conn: Connection) -> List[str]:
+    '''Namen der angehaengten Schemas (ohne main und temp)'''
+    return [name for _, name, _ in conn.execute(text('PRAGMA database_list')) if name not in ('main', 'temp')]
+
+
+def angehaengte_archive(conn: Connection) -> List[str]:
+    '''Schemas der angehaengten Archive, das juengste Jahr zuerst'''
+    return sorted((schema for schema in _angehaengt(conn) if schema.startswith('archiv_')), reverse=True)
+
+
+def _spalten(conn: Connection, schema: str, tabelle: str) -> List[str]:
+    '''Spalten einer Tabelle im Schema'''
+    return [zeile[1] for zeile in conn.execute(text(f'PRAGMA {schema}.table_info({tabelle})'))]
+
+
+def modi(conn: Connection, schema: str = 'main') -> Dict[str, str]:
+    '''Speicherform der Hashes und Betraege im Schema, ohne Eintrag gilt der Standard aus MODI'''
+    werte = dict(MODI)
+    vorhanden = conn.execute(text(
+        f"SELECT COUNT(*) FROM {schema}.sqlite_master WHERE type = 'table' AND name = 'einstellung_t'")).scalar()
+    if vorhanden:
+        zeilen = conn.execute(text(f'SELECT e.name, e.wert FROM {schema}.einstellung_t AS e'))
+        werte.update((name, wert) for name, wert in zeilen if name in MODI)
+    return werte
+
+
+def speichere_modus(conn: Connection, schema: str, name: str, wert: str) -> None:
+    '''Speichert eine Einstellung aus MODI in der 'einstellung_t' des Schemas'''
+    conn.execute(text(f'CREATE TABLE IF NOT EXISTS {schema}.einstellung_t (name VARCHAR(40) PRIMARY KEY, wert VARCHAR(255))'))
+    conn.execute(text(f'INSERT OR REPLACE INTO {schema}.einstellung_t (name, wert) VALUES (:name, :wert)'),
+                 {'name': name, 'wert': wert})
+
+
+def _erzeuge_sichten(conn: Connection) -> None:
+    '''
+    Legt die Sichten 'jahre_<tabelle>' ueber die Tabelle der Datenbank und alle angehaengten
+    Archive neu an. Es gelten die Spalten der Datenbank, fehlt eine in einem aelteren Archiv,
+    ist sie dort leer.
+    '''
+    archive = sorted(angehaengte_archive(conn))
+    for tabelle in ARCHIV_TABELLEN:
+        spalten = _spalten(conn, 'main', tabelle)
+        teile = [f"SELECT {', '.join(spalten)} FROM main.{tabelle}"]
+        for schema in archive:
+            vorhanden = set(_spalten(conn, schema, tabelle))
+            ausdruecke = [s if s in vorhanden else f'NULL AS {s}' for s in spalten]
+            if tabelle == 'kassenbons_t' and 'netto' in vorhanden:
+                # das Archiv wird nicht mehr geschrieben, spaetere Stornos stehen nur in 'storno_link_t'
+                ausdruecke[spalten.index('netto')] = (
+                    'CASE WHEN hash IN (SELECT sl.hash_bon FROM main.storno_link_t AS sl) THEN 0 ELSE netto END AS netto')
+            teile.append(f"SELECT {', '.join(ausdruecke)} FROM {schema}.{tabelle}")
+        conn.execute(text(f'DROP VIEW IF EXISTS temp.{SICHT_PRAEFIX}{tabelle}'))
+        conn.execute(text(f"CREATE TEMP VIEW {SICHT_PRAEFIX}{tabelle} AS {' UNION ALL '.join(teile)}"))
+
+
+def haenge_an(conn: Connection, von: date = None, bis: date = None) -> List[int]:
+    '''
+    Haengt die archivierten Jahre zwischen 'von' und 'bis' (einschliesslich, ohne Angabe alle)
+    schreibgeschuetzt an die Verbindung an und legt die Sichten 'jahre_<tabelle>' an. Bereits
+    angehaengte Jahre bleiben angehaengt. Liefert die angehaengten Jahre.
+    '''
+    angehaengt = set(_angehaengt(conn))
+    modi_db = modi(conn)
+    jahre = []
+    for jahr, datei in archivierte_jahre(conn).items():
+        if (von and jahr < von.year) or (bis and jahr > bis.year):
+            continue
+        schema = archiv_schema(jahr)
+        if schema not in angehaengt:
+            conn.exec_driver_sql(f"ATTACH DATABASE '{_archiv_pfad(conn, jahr, datei).as_uri()}?mode=ro' AS {schema}")
+            if modi(conn, schema) != modi_db:
+                conn.exec_driver_sql(f'DETACH DATABASE {schema}')
+                raise ValueError(f'Das Archiv des Jahres {jahr} ({datei}) speichert Hashes oder Betraege '
+                                 'in einer anderen Form als die Datenbank.')
+        jahre.append(jahr)
+    _erzeuge_sichten(conn)
+    return jahre
+
+
+def _archiv_pfad(conn: Connection, jahr: int, datei: str) -> Path:
+    '''Pfad der Archivdatei neben der Datenbank, wirft FileNotFoundError, wenn sie fehlt'''
+    pfad = (Path(_hauptdatei(conn)).parent / datei).resolve()
+    if not pfad.is_file():
+        raise FileNotFoundError(f'Archiv des Jahres {jahr} fehlt: {pfad}')
+    return pfad
+
+
+def haenge_beschreibbar_an(conn: Connection) -> List[str]:
+    '''
+    Haengt alle archivierten Jahre beschreibbar an die Verbindung an, fuer die Umstellung der
+    Speicherform zusammen mit der Datenbank in einer Transaktion. Liefert die Schemas, abgehaengt
+    werden sie nach dem Commit mit 'haenge_ab'.
+    '''
+    schemas = []
+    for jahr, datei in archivierte_jahre(conn).items():
+        schema = archiv_schema(jahr)
+        conn.exec_driver_sql(f"ATTACH DATABASE '{_archiv_pfad(conn, jahr, datei).as_uri()}' AS {schema}")
+        schemas.append(schema)
+    return schemas
+
+
+def haenge_ab(conn: Connection, schemas: Iterable[str]) -> None:
+    '''Haengt die Schemas ab'''
+    for schema in schemas:
+        conn.exec_driver_sql(f'DETACH DATABASE {schema}')
+
+
+def baue_tabelle_um(conn: Connection, schema: str, tabelle: str, ausdruck: Callable[[str], str]) -> None:
+    '''
+    Legt eine Archivtabelle mit der aktuellen Definition aus der Datenbank neu an und uebernimmt
+    ihre Zeilen, jede Spalte ueber den SQL-Ausdruck 'ausdruck(spalte)'.
+    '''
+    alt = f'{tabelle}__alt'
+    # die Indizes behalten beim Umbenennen ihren Namen, die neue Tabelle legt sie wieder an
+    indizes = conn.execute(text(f'''
+        SELECT m.name FROM {schema}.sqlite_master AS m
+        WHERE m.type = 'index' AND m.tbl_name = :tabelle AND m.sql IS NOT NULL
+        '''), {'tabelle': tabelle}).scalars().all()
+    for index in indizes:
+        conn.execute(text(f'DROP INDEX {schema}.{index}'))
+    conn.execute(text(f'ALTER TABLE {schema}.{tabelle} RENAME TO {alt}'))
+    _lege_tabellen_an(conn, schema, (tabelle,))
+    vorhanden = set(_spalten(conn, schema, alt))
+    spalten = [s for s in _spalten(conn, schema, tabelle) if s in vorhanden]
+    conn.execute(text(f'''
+        INSERT INTO {schema}.{tabelle} ({', '.join(spalten)})
+        SELECT {', '.join(ausdruck(s) for s in spalten)} FROM {schema}.{alt}
+        '''))
+    conn.execute(text(f'DROP TABLE {schema}.{alt}'))
+
+
+def _lege_tabellen_an(conn: Connection, schema: str, tabellen: Iterable[str] = ARCHIV_TABELLEN) -> None:
+    '''Legt die Archivtabellen samt Indizes im Schema mit der Definition aus der Datenbank an'''
+    for tabelle in tabellen:
+        definitionen = conn.execute(text('''
+            SELECT m.type, m.sql FROM main.sqlite_master AS m
+            WHERE m.tbl_name = :tabelle AND m.sql IS NOT NULL
+            ORDER BY m.type DESC
+            '''), {'tabelle': tabelle}).all()
+        for art, sql in definitionen:
+            if art == 'table':
+                sql = re.sub(r'^CREATE TABLE\s+', f'CREATE TABLE {schema}.', sql, count=1)
+            else:
+                sql = re.sub(r'^CREATE (UNIQUE )?INDEX\s+', f'CREATE \\1INDEX {schema}.', sql, count=1)
+            conn.execute(text(sql))
+
+
+def archiviere_jahr(db_manager: DbManager, jahr: int) -> ArchivJahr:
+    '''
+    Verschiebt die Zeilen des Jahres aus den ARCHIV_TABELLEN in seine Archivdatei und traegt es in
+    'archiv_jahr_t' ein. Nur abgeschlossene Jahre (vor dem laufenden) koennen archiviert werden,
+    eine vorhandene Archivdatei wird nicht ueberschrieben.
+    '''
+    jahr = int(jahr)
+    if jahr >= date.today().year:
+        raise ValueError(f'Das Jahr {jahr} ist nicht abgeschlossen.')
+    datei = archiv_datei(db_manager.dbfile, jahr)
+    schema = archiv_schema(jahr)
+
+    with db_manager.get_engine().connect() as conn:
+        if jahr in archivierte_jahre(conn):
+            raise ValueError(f'Das Jahr {jahr} ist bereits archiviert.')
+        if datei.exists():
+            raise ValueError(f'Die Archivdatei {datei} ist bereits vorhanden.')
+
+        conn.exec_driver_sql(f"ATTACH DATABASE '{datei.resolve().as_uri()}' AS {schema}")
+        try:
+            _lege_tabellen_an(conn, schema)
+            speichere_modus(conn, schema, 'hash_modus', HASH_BINAER if db_manager.hash_binaer else HASH_TEXT)
+            speichere_modus(conn, schema, 'betrag_modus', BETRAG_GANZZAHL if db_manager.betrag_ganzzahl else BETRAG_DEZIMAL)
+            grenzen = {'von': f'{jahr}-01-01', 'bis': f'{jahr + 1}-01-01'}
+            anzahl = {}
+            for tabelle in ('kassenbons_t', 'kassenbons_pos_t', 'kassenjournal_t'):
+                spalten = ', '.join(_spalten(conn, 'main', tabelle))
+                auswahl = SQL_JAHR[tabelle].format(schema=schema)
+                anzahl[tabelle] = conn.execute(text(f'''
+                    INSERT INTO {schema}.{tabelle} ({spalten})
+                    SELECT {spalten} FROM main.{tabelle} {auswahl}
+                    '''), grenzen).rowcount
+            # das Archiv wird nicht mehr geschrieben, die Statistik fuer den Planer also nur jetzt erstellt
+            conn.execute(text(f'ANALYZE {schema}'))
+            # die Positionen werden ueber die Bons ausgewaehlt und deshalb vor ihnen geloescht
+            for tabelle in ('kassenbons_pos_t', 'kassenbons_t', 'kassenjournal_t'):
+                auswahl = SQL_JAHR[tabelle].format(schema=schema)
+                conn.execute(text(f'DELETE FROM main.{tabelle} {auswahl}'), grenzen)
+
+            ergebnis = ArchivJahr(jahr, datei.name, anzahl['kassenbons_t'], anzahl['kassenbons_pos_t'],
+                                  anzahl['kassenjournal_t'])
+            conn.execute(text(f'''
+                INSERT INTO archiv_jahr_t (jahr, datei, archiviert_ts, bons, positionen, journalzeilen, max_bon_id)
+                VALUES (:jahr, :datei, :ts, :bons, :positionen, :journalzeilen,
+                        (SELECT MAX(b.id) FROM {schema}.kassenbons_t AS b))
+                '''), dict(ergebnis._asdict(), ts=datetime.now()))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            conn.exec_driver_sql(f'DETACH DATABASE {schema}')
+            datei.unlink(missing_ok=True)
+            raise
+        conn.exec_driver_sql(f'DETACH DATABASE {schema}')
+
+    with db_manager.get_engine().connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text('VACUUM'))
+    return ergebnis
@@ -0,0 +1,128 @@
+'''
+Volltextsuche ueber den aktuellen Artikelstamm (inkl. Presseartikel) mit SQLite FTS5.
+Die virtuelle Tabelle 'artikel_fts' enthaelt je Artikel die Texte des gueltigen Satelliten
+und wird von den Artikel-Importern fuer die geaenderten Artikel nachgefuehrt.
+'''
+import re
+from typing import List, NamedTuple
+
+from sqlalchemy import Connection, text
+
+from model.db_manager import DbManager
+
+SQL_FTS = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS artikel_fts USING fts5(
+    hash UNINDEXED,
+    art_nr,
+    art_bez,
+    bontext,
+    notizen,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+'''
+'''Suchindex, 'prefix' beschleunigt Suchen nach Wortanfaengen mit 2 und 3 Zeichen'''
+
+SQL_BELADE = '''
+INSERT INTO artikel_fts (hash, art_nr, art_bez, bontext, notizen)
+SELECT
+    h.hash,
+    h.art_nr,
+    s.art_bez,
+    s.bontext,
+    s.notizen
+
+FROM hub_artikel_t AS h
+
+JOIN sat_artikel_t AS s
+    ON	s.hash = h.hash
+    AND s.gueltig = 1
+
+{filter}
+'''
+
+GEWICHTE = (0.0, 2.0, 10.0, 5.0, 1.0)
+'''Gewichte fuer bm25 je Spalte (hash, art_nr, art_bez, bontext, notizen)'''
+
+
+def erzeuge_suchindex(conn: Connection) -> None:
+    '''Migration: legt den Suchindex an und befuellt ihn mit dem aktuellen Artikelstamm'''
+    conn.execute(text(SQL_FTS))
+    conn.execute(text('DELETE FROM artikel_fts'))
+    conn.execute(text(SQL_BELADE.format(filter='')))
+
+
+def aktualisiere_suchindex(conn: Connection) -> int:
+    '''
+    Ersetzt die Eintraege im Suchindex fuer alle Artikel, die im laufenden Import einen neuen
+    Satelliteneintrag erhalten haben (Zwischentabelle 'temp_artikel_t'). Liefert die Anzahl
+    neu indizierter Artikel.
+    '''
+    conn.execute(text('DROP TABLE IF EXISTS temp.suchindex_hash_t'))
+    conn.execute(text('''
+        CREATE TEMP TABLE suchindex_hash_t AS
+        SELECT DISTINCT s.hash
+
+        FROM temp_artikel_t AS t
+
+        JOIN sat_artikel_t AS s
+            ON	s.hash = t.hash
+            AND s.eintrag_ats = t.eintrag_ts
+        '''))
+    conn.execute(text('DELETE FROM artikel_fts WHERE hash IN (SELECT hash FROM temp.suchindex_hash_t)'))
+    zeilen = conn.execute(text(SQL_BELADE.format(
+        filter='WHERE h.hash IN (SELECT hash FROM temp.suchindex_hash_t)'))).rowcount
+    conn.execute(text('DROP TABLE temp.suchindex_hash_t'))
+    return zeilen
+
+
+class Treffer(NamedTuple):
+    '''Ein Artikel aus der Suche, 'rang' ist der bm25-Wert (kleiner = besser)'''
+    art_nr: str
+    art_bez: str
+    bontext: str
+    rang: float
+
+
+class Artikelsuche():
+    '''Sucht Artikel nach Wortanfaengen in Artikelnummer, Bezeichnung, Bontext und Notizen'''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    @staticmethod
+    def abfrage(suchtext: str) -> str:
+        '''
+        Baut aus der Eingabe eine FTS5-Abfrage: jedes Wort wird als Wortanfang gesucht,
+        alle Worte muessen vorkommen. Sonderzeichen der FTS5-Syntax werden entfernt.
+        '''
+        woerter = [w for w in re.split(r'[^\w]+', suchtext) if w]
+        return ' '.join(f'"{w}"*' for w in woerter)
+
+    def suche(self, suchtext: str, anzahl: int = 50) -> List[Treffer]:
+        '''Liefert die besten 'anzahl' Artikel zum Suchtext, nach Relevanz sortiert'''
+        abfrage = self.abfrage(suchtext)
+        if not abfrage:
+            return []
+
+        sql = f'''
+        SELECT
+            f.art_nr,
+            f.art_bez,
+            f.bontext,
+            bm25(artikel_fts, {', '.join(str(g) for g in GEWICHTE)}) AS rang
+
+        FROM artikel_fts AS f
+
+        WHERE artikel_fts MATCH :abfrage
+
+        ORDER BY rang
+
+        LIMIT :anzahl
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            result = conn.execute(text(sql), {'abfrage': abfrage, 'anzahl': anzahl}).fetchall()
+        conn.close()
+        return [Treffer(*zeile) for zeile in result]
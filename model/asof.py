@@ -0,0 +1,130 @@
+'''
+Zugriff auf die Satelliten zu einem Stichtag (as-of join). Ein Satelliteneintrag ist an
+einem Tag d gueltig, wenn gueltig_adtm <= d < gueltig_edtm gilt, der aktuelle Eintrag hat
+gueltig_edtm = 2099-12-31.
+
+Fuer einen einzelnen Stichtag sucht 'AsOf.gueltig_am' die Eintraege per Bereichssuche ueber
+den Index (hash, gueltig_adtm, gueltig_edtm). Fuer viele Zeilen mit jeweils eigenem Datum
+(z.B. Verkaeufe) laedt 'AsOf.versionen' die Historie einmal und 'verbinde_asof' ordnet sie
+sortiert mit pandas.merge_asof zu.
+'''
+from datetime import date
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Connection, text
+
+from model.db_manager import DbManager
+
+SATELLITEN: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'sat_artikel_t': ('hub_artikel_t', ('art_nr',)),
+    'sat_warengruppen_t': ('hub_warengruppen_t', ('wgr',)),
+    'sat_kunden_t': ('hub_kunden_t', ('kdnr',)),
+    'sat_pfand_t': ('hub_pfand_t', ('art_nr',)),
+    'sat_lieferanten_t': ('hub_lieferanten_t', ('lief_nr',)),
+    'sat_mean_t': ('hub_mean_t', ('ean_m',)),
+    'sat_scs_liefart_t': ('hub_scs_liefart_t', ('ean', 'lief_nr'))
+}
+'''Satellit -> (Hub, Geschaeftsschluessel des Hubs)'''
+
+
+def index_name(sat: str) -> str:
+    '''Name des Index (hash, gueltig_adtm, gueltig_edtm) eines Satelliten'''
+    return f'ix_{sat}_gueltigkeit'
+
+
+def erzeuge_indizes(conn: Connection) -> None:
+    '''Migration: legt den Gueltigkeitsindex fuer alle Satelliten einer bestehenden Datenbank an'''
+    for sat in SATELLITEN:
+        conn.execute(text(
+            f'CREATE INDEX IF NOT EXISTS {index_name(sat)} ON {sat} (hash, gueltig_adtm, gueltig_edtm)'))
+
+
+class AsOf():
+    '''Liefert die Satelliteneintraege, die zu einem Stichtag gueltig waren, mit dem Geschaeftsschluessel des Hubs'''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def gueltig_am(self, sat: str, stichtag: date, spalten: Sequence[str]) -> pd.DataFrame:
+        '''
+        Liefert je Hub-Eintrag den am Stichtag gueltigen Eintrag des Satelliten mit dem
+        Geschaeftsschluessel und den Spalten 'spalten'. Schluessel ohne gueltigen Eintrag fehlen.
+        Betraege und Mengen sind Dezimalzahlen, auch im ganzzahligen Betragsmodus.
+        '''
+        hub, schluessel = SATELLITEN[sat]
+        sql = f'''
+        SELECT
+            {', '.join([f'h.{s}' for s in schluessel] + [f's.{s}' for s in spalten])}
+
+        FROM {hub} AS h
+
+        JOIN {sat} AS s
+            ON	s.hash = h.hash
+            AND s.gueltig_adtm <= :stichtag
+            AND s.gueltig_edtm > :stichtag
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            df = pd.read_sql_query(text(sql), conn, params={'stichtag': stichtag})
+        conn.close()
+        return self.db_manager.entskaliere(df, sat)
+
+    def versionen(self, sat: str, spalten: Sequence[str], von: date = None, bis: date = None) -> pd.DataFrame:
+        '''
+        Liefert alle Eintraege des Satelliten mit Geschaeftsschluessel, gueltig_adtm, gueltig_edtm
+        und den Spalten 'spalten'. Mit 'von'/'bis' nur die Eintraege, die in diesem Zeitraum
+        gueltig waren. Betraege und Mengen sind Dezimalzahlen. Ergebnis fuer 'verbinde_asof'.
+        '''
+        hub, schluessel = SATELLITEN[sat]
+        sql = f'''
+        SELECT
+            {', '.join([f'h.{s}' for s in schluessel] + ['s.gueltig_adtm', 's.gueltig_edtm']
+                       + [f's.{s}' for s in spalten])}
+
+        FROM {hub} AS h
+
+        JOIN {sat} AS s
+            ON	s.hash = h.hash
+
+        WHERE s.gueltig_adtm <= :bis
+            AND s.gueltig_edtm > :von
+            AND s.gueltig_adtm < s.gueltig_edtm
+        '''
+        params = {'von': von or date.min, 'bis': bis or date.max}
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            df = pd.read_sql_query(text(sql), conn, params=params)
+        conn.close()
+        return self.db_manager.entskaliere(df, sat)
+
+
+def verbinde_asof(df: pd.DataFrame, df_versionen: pd.DataFrame, datum: str, schluessel: Sequence[str]) -> pd.DataFrame:
+    '''
+    Ergaenzt jede Zeile von 'df' um die Spalten des Satelliteneintrags (aus 'AsOf.versionen'),
+    der fuer ihren Schluessel am Datum in Spalte 'datum' gueltig war. Beide Seiten werden nach
+    dem Datum sortiert und mit pandas.merge_asof in einem Durchlauf zugeordnet. Zeilen ohne
+    gueltigen Eintrag erhalten NaN. Die Reihenfolge von 'df' bleibt erhalten.
+    '''
+    schluessel = list(schluessel)
+    spalten = [s for s in df_versionen.columns if s not in schluessel]
+
+    # merge_asof verlangt fuer beide Seiten dieselbe Aufloesung der Zeitstempel
+    links = df.assign(_pos=np.arange(len(df)), _datum=pd.to_datetime(df[datum]).astype('datetime64[ns]'))
+    rechts = df_versionen.assign(
+        gueltig_adtm=pd.to_datetime(df_versionen['gueltig_adtm']).astype('datetime64[ns]'),
+        gueltig_edtm=pd.to_datetime(df_versionen['gueltig_edtm']).astype('datetime64[ns]'))
+
+    ergebnis = pd.merge_asof(
+        links.sort_values('_datum'), rechts.sort_values('gueltig_adtm'),
+        left_on='_datum', right_on='gueltig_adtm', by=schluessel, direction='backward')
+
+    # der letzte Eintrag vor dem Datum kann bereits abgelaufen sein
+    abgelaufen = (ergebnis['_datum'] >= ergebnis['gueltig_edtm']).to_numpy()
+    ergebnis.loc[abgelaufen, spalten] = np.nan
+
+    ergebnis = ergebnis.sort_values('_pos').drop(columns=['_pos', '_datum'])
+    ergebnis.index = df.index
+    return ergebnis
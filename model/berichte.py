@@ -0,0 +1,165 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+from sqlalchemy import text
+
+from model.db_manager import CENT, DbManager, sql_dezimal
+
+WOCHENTAGE = ('Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So')
+
+
+def schreibe_bestellhilfe(df_prognose: pd.DataFrame, datei: str) -> None:
+    '''
+    Schreibt die Bedarfsprognose (siehe model.prognose.Bedarfsprognose.berechne) als Excel-Datei:
+    Blatt 'Bestellhilfe' mit der aufgerundeten Prognose je Artikel und Tag, Blatt 'Details'
+    mit Mittelwerten, Quantilen und Trend je Artikel und Tag.
+    '''
+    df = df_prognose.copy()
+    df['tag'] = [f'{WOCHENTAGE[w - 1]} {d:%d.%m.}' for w, d in zip(df['wtag'], df['datum'])]
+    df['art_bez'] = df['art_bez'].fillna('')
+    # auf ganze Stueck aufrunden, 2.04 wird dabei noch zu 2
+    df['stueck'] = np.ceil(df['prognose'].astype(float).round(1))
+
+    df_uebersicht = df.set_index(['wgr', 'art_nr', 'art_bez', 'tag'])['stueck'].unstack('tag')
+    df_uebersicht = df_uebersicht[list(dict.fromkeys(df['tag']))].reset_index()
+
+    df_details = df.drop(columns=['tag', 'stueck']).round(2)
+
+    with pd.ExcelWriter(datei, engine='openpyxl') as writer:
+        df_uebersicht.to_excel(writer, sheet_name='Bestellhilfe', index=False, freeze_panes=(1, 3))
+        df_details.to_excel(writer, sheet_name='Details', index=False, freeze_panes=(1, 3))
+        for blatt in writer.sheets.values():
+            for spalte in blatt.columns:
+                breite = max(len(str(zelle.value or '')) for zelle in spalte)
+                blatt.column_dimensions[spalte[0].column_letter].width = min(breite + 2, 50)
+
+
+ARTIKELDATEI_SPALTEN = (
+    ('art_nr', 'Artikelnummer', 16, '@'),
+    ('art_bez', 'Bezeichnung', 40, None),
+    ('bontext', 'Bontext', 24, None),
+    ('wgr', 'Warengruppe', 12, '@'),
+    ('mengeneinheit', 'Mengeneinheit', 14, None),
+    ('mengenfaktor', 'Mengenfaktor', 13, '0.000'),
+    ('vk_brutto', 'VK brutto', 12, '#,##0.00 €'),
+    ('preiseinheit', 'Preiseinheit', 12, '0'),
+    ('kurzcode', 'Kurzcode', 10, '@'),
+    ('mehrfach_ean', 'Mehrfach-EANs', 40, '@'),
+    ('quelle', 'Quelle', 26, None),
+    ('gueltig_adtm', 'gültig ab', 12, None)
+)
+'''(Spalte der Abfrage, Ueberschrift, Breite, Zahlenformat) der Artikeldatei fuer die Inventur'''
+
+BLOCKGROESSE = 5_000
+'''Zeilen, die je Block aus der Datenbank geholt und geschrieben werden'''
+
+
+def schreibe_artikeldatei(db_manager: DbManager, datei: str) -> int:
+    '''
+    Schreibt den aktuellen Artikelstamm (Hub mit gueltigem Satelliten, Mehrfach-EANs und Preis)
+    als Excel-Datei fuer die Inventur. Die Zeilen werden blockweise aus dem Cursor in eine
+    write-only Arbeitsmappe gestreamt, der Speicherbedarf haengt also nicht von der Anzahl
+    der Artikel ab. Liefert die Anzahl geschriebener Artikel.
+    '''
+    sql = f'''
+    SELECT
+        {', '.join(spalte for spalte, _, _, _ in ARTIKELDATEI_SPALTEN)}
+
+    FROM (
+        SELECT
+            h.art_nr,
+            s.art_bez,
+            s.bontext,
+            s.wgr,
+            s.mengeneinheit,
+            s.mengenfaktor,
+            {sql_dezimal('s.vk_brutto', CENT, db_manager.betrag_ganzzahl)} AS vk_brutto,
+            s.preiseinheit,
+            s.kurzcode,
+            mean.mehrfach_ean,
+            h.quelle,
+            s.gueltig_adtm
+
+        FROM hub_artikel_t AS h
+
+        JOIN sat_artikel_t AS s
+            ON	s.hash = h.hash
+            AND s.gueltig = 1
+
+        LEFT JOIN (
+            SELECT
+                sm.ean_h,
+                group_concat(hm.ean_m, ', ') AS mehrfach_ean
+
+            FROM hub_mean_t AS hm
+
+            JOIN sat_mean_t AS sm
+                ON	sm.hash = hm.hash
+                AND sm.gueltig = 1
+
+            GROUP BY sm.ean_h
+        ) AS mean
+            ON	mean.ean_h = h.art_nr
+    )
+
+    ORDER BY wgr, art_nr
+    '''
+    mappe = Workbook(write_only=True)
+    blatt = mappe.create_sheet('Artikel')
+    blatt.freeze_panes = 'B2'
+
+    stile = []
+    for i, (spalte, _, breite, zahlenformat) in enumerate(ARTIKELDATEI_SPALTEN, start=1):
+        blatt.column_dimensions[get_column_letter(i)].width = breite
+        stil = None
+        if zahlenformat:
+            stil = NamedStyle(name=f'artikeldatei_{spalte}', number_format=zahlenformat)
+            mappe.add_named_style(stil)
+        stile.append(stil)
+
+    kopf_stil = NamedStyle(name='artikeldatei_kopf', font=Font(bold=True), fill=PatternFill('solid', fgColor='DDDDDD'))
+    mappe.add_named_style(kopf_stil)
+    blatt.append([_zelle(blatt, ueberschrift, kopf_stil) for _, ueberschrift, _, _ in ARTIKELDATEI_SPALTEN])
+
+    anzahl = 0
+    conn = db_manager.get_engine().connect()
+    with conn:
+        result = conn.execute(text(sql))
+        while zeilen := result.fetchmany(BLOCKGROESSE):
+            for zeile in zeilen:
+                blatt.append([_zelle(blatt, wert, stil) if stil and wert is not None else wert
+                              for wert, stil in zip(zeile, stile)])
+            anzahl += len(zeilen)
+    conn.close()
+
+    mappe.save(datei)
+    return anzahl
+
+
+def _zelle(blatt, wert, stil: NamedStyle) -> WriteOnlyCell:
+    '''Erzeugt eine Zelle mit vordefiniertem Stil fuer ein write-only Arbeitsblatt'''
+    zelle = WriteOnlyCell(blatt, value=wert)
+    zelle.style = stil.name
+    return zelle
+
+
+def schreibe_lieferantenartikel(df_lieferantenartikel: pd.DataFrame, stichtag: date, datei: str) -> None:
+    '''
+    Schreibt die Lieferantenartikel zum Stichtag (siehe model.inventur.Inventur.lieferantenartikel)
+    als Excel-Datei fuer die Nachbearbeitung der Inventur, ein Blatt je Stichtag.
+    '''
+    df = df_lieferantenartikel.copy()
+    df['ek_netto'] = df['ek_netto'].astype(float)
+    df['vk_brutto'] = df['vk_brutto'].astype(float)
+
+    with pd.ExcelWriter(datei, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name=f'Stand {stichtag:%d.%m.%Y}', index=False, freeze_panes=(1, 4))
+        for blatt in writer.sheets.values():
+            for spalte in blatt.columns:
+                breite = max(len(str(zelle.value or '')) for zelle in spalte)
+                blatt.column_dimensions[spalte[0].column_letter].width = min(breite + 2, 50)
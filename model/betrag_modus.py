@@ -0,0 +1,71 @@
+'''
+Speicherform der Betraege und Mengen. Standard sind Dezimalzahlen in NUMERIC-Spalten, die SQLite
+als REAL (Gleitkomma) ablegt, Summen darueber sind also nur bis auf Rundungsfehler genau. Im
+ganzzahligen Modus stehen Preise und Summen in Cent, Mengen und Einkaufspreise in Tausendsteln
+als INTEGER in den Tabellen aus 'GANZZAHL_SPALTEN' (Kassenjournal, Bons, Positionen, Zahlungen und
+die Satelliten mit Preisen). Die Importer rechnen beim Schreiben der Zwischentabellen um
+(DbManager.skaliere), Auswertungen rechnen erst das Ergebnis zurueck (sql_dezimal, ganzzahlig).
+Der Modus steht in 'einstellung_t' und wird von DbManager beim Oeffnen der Datenbank gelesen.
+Die Jahresarchive (model.archiv) werden mit umgerechnet.
+'''
+from typing import Dict
+
+from sqlalchemy import Connection, text
+
+from model.archiv import ARCHIV_TABELLEN, haenge_ab, haenge_beschreibbar_an, modi, speichere_modus
+from model.db_manager import BETRAG_DEZIMAL, BETRAG_GANZZAHL, GANZZAHL_SPALTEN, DbManager
+
+
+def _nachkommastellen(faktor: int) -> int:
+    '''Nachkommastellen eines Faktors (100 -> 2)'''
+    return len(str(faktor)) - 1
+
+
+def _rechne_um(conn: Connection, tabelle: str, spalten: Dict[str, int], ganzzahl: bool) -> None:
+    '''Rechnet die Spalten (Spalte -> Faktor) der Tabelle in die Speicherform 'ganzzahl' um'''
+    if ganzzahl:
+        zuweisungen = [f'{s} = CAST(ROUND({s} * {f}) AS INTEGER)' for s, f in spalten.items()]
+    else:
+        zuweisungen = [f'{s} = ROUND({s} / {f}.0, {_nachkommastellen(f)})' for s, f in spalten.items()]
+    conn.execute(text(f"UPDATE {tabelle} SET {', '.join(zuweisungen)}"))
+
+
+def stelle_um(dbfile: str, ganzzahl: bool = True) -> bool:
+    '''
+    Rechnet die Betraege und Mengen aller Tabellen aus GANZZAHL_SPALTEN in die Speicherform
+    'ganzzahl' um, ebenso die Tabellen der Jahresarchive in derselben Transaktion. Liefert False,
+    wenn die Datenbank bereits in dieser Form vorliegt. Die Spalten behalten ihren deklarierten
+    Typ, NUMERIC speichert ganze Zahlen als INTEGER. Danach werden Datenbank und Archive mit
+    VACUUM verkleinert. Das Schema muss aktuell sein (settings.create_tables).
+    '''
+    if DbManager(dbfile).betrag_ganzzahl == ganzzahl:
+        return False
+
+    ziel = DbManager(dbfile, betrag_ganzzahl=ganzzahl)
+    modus = BETRAG_GANZZAHL if ganzzahl else BETRAG_DEZIMAL
+    with ziel.get_engine().connect() as conn:
+        vorhanden = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars())
+        for tabelle, spalten in GANZZAHL_SPALTEN.items():
+            if tabelle in vorhanden:
+                _rechne_um(conn, tabelle, spalten, ganzzahl)
+
+        archive = haenge_beschreibbar_an(conn)
+        for schema in archive:
+            # ein Archiv, das bereits in der Zielform vorliegt, wuerde sonst doppelt umgerechnet
+            if modi(conn, schema)['betrag_modus'] != modus:
+                for tabelle in ARCHIV_TABELLEN:
+                    _rechne_um(conn, f'{schema}.{tabelle}', GANZZAHL_SPALTEN[tabelle], ganzzahl)
+                speichere_modus(conn, schema, 'betrag_modus', modus)
+
+        conn.execute(text('INSERT OR REPLACE INTO einstellung_t (name, wert) VALUES (:name, :wert)'),
+                     {'name': 'betrag_modus', 'wert': modus})
+        conn.commit()
+        haenge_ab(conn, archive)
+
+    with ziel.get_engine().connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text('VACUUM'))
+        for schema in haenge_beschreibbar_an(conn):
+            conn.execute(text(f'VACUUM {schema}'))
+            haenge_ab(conn, [schema])
+    ziel.get_engine().dispose()
+    return True
@@ -0,0 +1,192 @@
+'''
+Prozessweite Caches auf Stammdaten. Ein Cache haengt an den Quellen, aus denen seine Daten stammen,
+und gilt als veraltet, sobald sich deren Generation in 'import_generation_t' aendert (siehe
+model.import_status.melde_import). Importe im eigenen Prozess verwerfen den Cache sofort nach
+ihrem Commit, Importe anderer Prozesse (z.B. per Kommandozeile) fallen beim naechsten Abgleich
+mit der Datenbank auf, der hoechstens alle PRUEFINTERVALL Sekunden stattfindet.
+'''
+from abc import ABC, abstractmethod
+from threading import Lock
+from time import monotonic, perf_counter
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from model.db_manager import DbManager
+from model.import_status import lies_generation, lokale_generation
+
+PRUEFINTERVALL = 5.0
+'''Sekunden, nach denen ein Cache die Generation in der Datenbank erneut prueft'''
+
+
+class CacheStatistik(NamedTuple):
+    '''Zugriffszahlen eines Caches'''
+    treffer: int
+    fehlschlaege: int
+    ladevorgaenge: int
+    ladezeit: float
+    generation: int
+
+
+class GenerationsCache(ABC):
+    '''
+    Basis der Caches: laedt die Daten mit '_lade' beim ersten Zugriff und erneut, sobald sich die
+    Generation einer der QUELLEN geaendert hat. Je Datenbank gibt es eine Instanz ('fuer'), die
+    auch aus Hintergrund-Threads genutzt wird. Treffer und Fehlschlaege zaehlen die abgeleiteten
+    Klassen deshalb mit '_zaehle'.
+    '''
+
+    QUELLEN: Tuple[str, ...] = ()
+
+    _instanzen: Dict[Tuple[type, str], 'GenerationsCache'] = dict()
+    _instanzen_sperre = Lock()
+
+    def __init__(self, db_manager: DbManager, pruefintervall: float = PRUEFINTERVALL) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+        self.pruefintervall = pruefintervall
+        self._sperre = Lock()
+        self._zaehler_sperre = Lock()
+        self._werte: Any = None
+        self._generation: int = None
+        self._lokale_generation: int = None
+        self._geprueft = 0.0
+        self.treffer = 0
+        self.fehlschlaege = 0
+        self.ladevorgaenge = 0
+        self.ladezeit = 0.0
+
+    @classmethod
+    def fuer(cls, db_manager: DbManager) -> 'GenerationsCache':
+        '''Liefert die gemeinsame Instanz fuer die Datenbank des DbManagers'''
+        schluessel = (cls, db_manager.dbfile)
+        with cls._instanzen_sperre:
+            instanz = cls._instanzen.get(schluessel)
+            if instanz is None:
+                instanz = cls._instanzen[schluessel] = cls(db_manager)
+            return instanz
+
+    def verwerfe(self) -> None:
+        '''Verwirft die geladenen Daten, der naechste Zugriff laedt sie neu'''
+        with self._sperre:
+            self._werte = None
+
+    @property
+    def werte(self) -> Any:
+        '''Die aktuellen Daten des Caches, bei Bedarf neu geladen'''
+        with self._sperre:
+            if self._werte is None or self._ist_veraltet():
+                beginn = perf_counter()
+                conn = self.db_manager.get_engine().connect()
+                with conn:
+                    # Generation vor den Daten lesen, ein paralleler Import fuehrt so hoechstens zum erneuten Laden
+                    self._generation = lies_generation(conn, self.QUELLEN)
+                    self._werte = self._lade(conn)
+                conn.close()
+                self._geprueft = monotonic()
+                self._lokale_generation = lokale_generation()
+                self.ladevorgaenge += 1
+                self.ladezeit += perf_counter() - beginn
+            return self._werte
+
+    def _ist_veraltet(self) -> bool:
+        '''Prueft die Generation in der Datenbank nach einem Import im Prozess oder nach Ablauf des Intervalls'''
+        lokal = lokale_generation()
+        if lokal == self._lokale_generation and monotonic() - self._geprueft < self.pruefintervall:
+            return False
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            generation = lies_generation(conn, self.QUELLEN)
+        conn.close()
+        self._geprueft = monotonic()
+        self._lokale_generation = lokal
+        return generation != self._generation
+
+    @abstractmethod
+    def _lade(self, conn) -> Any:
+        '''Laedt die Daten des Caches'''
+
+    def _zaehle(self, treffer: int = 0, fehlschlaege: int = 0) -> None:
+        '''Zaehlt Treffer und Fehlschlaege, auch bei gleichzeitigen Zugriffen mehrerer Threads'''
+        with self._zaehler_sperre:
+            self.treffer += treffer
+            self.fehlschlaege += fehlschlaege
+
+    @property
+    def statistik(self) -> CacheStatistik:
+        '''Treffer, Fehlschlaege, Ladevorgaenge, gesamte Ladezeit in Sekunden und geladene Generation'''
+        with self._sperre, self._zaehler_sperre:
+            return CacheStatistik(self.treffer, self.fehlschlaege, self.ladevorgaenge, self.ladezeit, self._generation)
+
+
+class Artikel(NamedTuple):
+    '''Aktueller Stand eines Artikels aus 'sat_artikel_t' '''
+    art_nr: str
+    art_bez: str
+    bontext: str
+    wgr: str
+    mengeneinheit: str
+    mengenfaktor: float
+    vk_brutto: float
+    preiseinheit: int
+    kurzcode: str
+
+
+class ArtikelCache(GenerationsCache):
+    '''
+    Haelt den aktuellen Artikelstamm (Hub mit gueltigem Satelliten) im Speicher. Die Spalten liegen
+    als Arrays vor, ein Index ordnet jeder Artikelnummer ihre Zeile zu. Einzelne Artikel liefert
+    'artikel', ganze Spalten von Artikelnummern loest 'attribute' ohne Schleife auf.
+    '''
+
+    QUELLEN = ('scs_export_artikel', 'scs_export_presseartikel')
+
+    def _lade(self, conn) -> Tuple[Dict[str, int], pd.Index, Dict[str, np.ndarray]]:
+        '''Laedt die Artikel: Artikelnummer -> Zeile (fuer Einzelzugriffe), Index (fuer Spalten), Spalten'''
+        sql = f'''
+        SELECT
+            {', '.join('h.art_nr' if f == 'art_nr' else f's.{f}' for f in Artikel._fields)}
+
+        FROM hub_artikel_t AS h
+
+        JOIN sat_artikel_t AS s
+            ON	s.hash = h.hash
+            AND s.gueltig = 1
+
+        ORDER BY h.art_nr
+        '''
+        df = pd.read_sql_query(text(sql), conn).drop_duplicates('art_nr', keep='last')
+        df = self.db_manager.entskaliere(df, 'sat_artikel_t')
+        index = pd.Index(df['art_nr'])
+        spalten = {spalte: df[spalte].to_numpy(dtype=object) for spalte in Artikel._fields}
+        return dict(zip(index, range(len(index)))), index, spalten
+
+    def artikel(self, art_nr: str) -> Optional[Artikel]:
+        '''Liefert den aktuellen Stand des Artikels oder None, wenn er unbekannt ist'''
+        zeilen, _, spalten = self.werte
+        zeile = zeilen.get(art_nr)
+        if zeile is None:
+            self._zaehle(fehlschlaege=1)
+            return None
+        self._zaehle(treffer=1)
+        return Artikel(*(spalten[f][zeile] for f in Artikel._fields))
+
+    def attribute(self, art_nrn: pd.Series, felder: Sequence[str] = Artikel._fields) -> pd.DataFrame:
+        '''
+        Liefert zu jeder Artikelnummer der Spalte die Felder des Artikels, mit dem Index der Spalte.
+        Unbekannte Artikelnummern erhalten leere Werte.
+        '''
+        _, index, spalten = self.werte
+        zeilen = index.get_indexer(art_nrn)
+        bekannt = zeilen >= 0
+        anzahl_bekannt = int(bekannt.sum())
+        self._zaehle(anzahl_bekannt, len(zeilen) - anzahl_bekannt)
+
+        df = pd.DataFrame(index=art_nrn.index)
+        for feld in felder:
+            werte = np.full(len(zeilen), None, dtype=object)
+            werte[bekannt] = spalten[feld][zeilen[bekannt]]
+            df[feld] = werte
+        return df
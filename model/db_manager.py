@@ -1,11 +1,21 @@
+from hashlib import md5
 from pathlib import Path
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, List
 
-from sqlalchemy import (TIMESTAMP, URL, BigInteger, Boolean, Column, Date,
-                        DateTime, Engine, Integer, MetaData, Numeric, String,
-                        Table, create_engine)
+from sqlalchemy import (TIMESTAMP, URL, BigInteger, Boolean, Column, Connection, Date,
+                        DateTime, Engine, Float, Index, Integer, LargeBinary, MetaData, Numeric,
+                        String, Table, create_engine, text)
+from sqlalchemy.exc import OperationalError
 
-def concat(df: pd.DataFrame):
+if TYPE_CHECKING:
+    from datetime import date
+
+    # pandas wird erst von den Importern geladen, das verkuerzt den Programmstart
+    import numpy as np
+    import pandas as pd
+
+
+def concat(df: 'pd.DataFrame'):
     '''Bereitet ein DataFrame so auf, dass es einfacher gehasht werden kann'''
     res = None
     for i, col in enumerate(df.columns):
@@ -15,34 +25,193 @@ def concat(df: pd.DataFrame):
             res += ':' + df[col].astype(str).str.strip()
     return res
 
+
+HASH_TEXT = 'text'
+'''Hashes als 32 Hex-Zeichen (Standard)'''
+
+HASH_BINAER = 'binaer'
+'''Hashes als 16 Bytes, Hubs, Satelliten und Bewegungsdaten als WITHOUT ROWID-Tabellen'''
+
+
+def hashe(werte: 'pd.Series', binaer: bool = False) -> 'pd.Series':
+    '''Liefert den md5 jedes Textes der Spalte, als Hex-Text oder mit 'binaer' als 16 Bytes'''
+    if binaer:
+        return werte.map(lambda s: md5(s.encode('utf-8')).digest())
+    return werte.map(lambda s: md5(s.encode('utf-8')).hexdigest())
+
+
+def lies_hash_binaer(conn: Connection) -> bool:
+    '''Prueft, ob die Datenbank die Hashes binaer speichert'''
+    try:
+        modus = conn.execute(text("SELECT e.wert FROM einstellung_t AS e WHERE e.name = 'hash_modus'")).scalar()
+    except OperationalError:
+        # Datenbank vor Einfuehrung der Einstellungen
+        return False
+    return modus == HASH_BINAER
+
+
+BETRAG_DEZIMAL = 'dezimal'
+'''Betraege und Mengen als Dezimalzahlen (Standard, SQLite speichert sie als REAL)'''
+
+BETRAG_GANZZAHL = 'ganzzahl'
+'''Betraege in Cent, Mengen und Einkaufspreise in Tausendsteln als INTEGER'''
+
+CENT = 100
+'''Faktor der Betraege im Modus BETRAG_GANZZAHL'''
+
+MILLI = 1000
+'''Faktor der Mengen und Einkaufspreise (drei Nachkommastellen) im Modus BETRAG_GANZZAHL'''
+
+GANZZAHL_SPALTEN: Dict[str, Dict[str, int]] = {
+    'kassenjournal_t': {'bon_summe': CENT, 'menge': MILLI, 'preis_einzel': CENT, 'preis_gesamt': CENT},
+    'temp_kassenjournal_t': {'bon_summe': CENT, 'menge': MILLI, 'preis_einzel': CENT, 'preis_gesamt': CENT},
+    'kassenbons_t': {'bon_summe': CENT},
+    'temp_kassenbons_t': {'bon_summe': CENT},
+    'kassenbons_pos_t': {'menge': MILLI, 'preis_einzel': CENT, 'preis_gesamt': CENT},
+    'temp_kassenbons_pos_t': {'menge': MILLI, 'preis_einzel': CENT, 'preis_gesamt': CENT},
+    'zahlungen_t': {'betrag': CENT},
+    'sat_artikel_t': {'vk_brutto': CENT},
+    'temp_artikel_t': {'vk_brutto': CENT},
+    'sat_pfand_t': {'pfand_brutto': CENT},
+    'temp_pfand_t': {'pfand_brutto': CENT},
+    'sat_scs_liefart_t': {'ek_netto': MILLI},
+    'temp_scs_liefart_t': {'ek_netto': MILLI}
+}
+'''
+Tabelle -> Spalte -> Faktor der Spalten, die im Modus BETRAG_GANZZAHL als ganze Vielfache von
+1/Faktor gespeichert werden. Verdichtete Tabellen (Umsaetze, Traffic, ...) bleiben dezimal.
+'''
+
+
+def skaliere(df: 'pd.DataFrame', tabelle: str, ganzzahl: bool = False) -> 'pd.DataFrame':
+    '''
+    Rechnet die Betraege und Mengen eines DataFrames fuer 'tabelle' vor dem Schreiben in ganze
+    Einheiten um (Kopie). Ohne 'ganzzahl' bleibt das DataFrame unveraendert.
+    '''
+    if not ganzzahl:
+        return df
+    import numpy as np
+    import pandas as pd
+    spalten = {spalte: faktor for spalte, faktor in GANZZAHL_SPALTEN.get(tabelle, {}).items() if spalte in df.columns}
+    return df.assign(**{
+        spalte: pd.array(np.rint(pd.to_numeric(df[spalte]).to_numpy(dtype=float) * faktor), dtype='Int64')
+        for spalte, faktor in spalten.items()})
+
+
+def entskaliere(df: 'pd.DataFrame', tabelle: str, ganzzahl: bool = False) -> 'pd.DataFrame':
+    '''Gegenstueck zu 'skaliere': rechnet gelesene Betraege und Mengen in Dezimalzahlen um (Kopie)'''
+    if not ganzzahl:
+        return df
+    import pandas as pd
+    spalten = {spalte: faktor for spalte, faktor in GANZZAHL_SPALTEN.get(tabelle, {}).items() if spalte in df.columns}
+    return df.assign(**{spalte: pd.to_numeric(df[spalte]).astype(float) / faktor for spalte, faktor in spalten.items()})
+
+
+def ganzzahlig(werte: 'pd.Series', faktor: int, ganzzahl: bool = False) -> 'np.ndarray':
+    '''
+    Liefert gelesene Betraege oder Mengen als int64-Array in Vielfachen von 1/faktor, in beiden
+    Speicherformen. Summen darueber sind exakt. Leere Werte zaehlen als 0.
+    '''
+    import numpy as np
+    import pandas as pd
+    werte = pd.to_numeric(werte).fillna(0).to_numpy(dtype=float)
+    return np.rint(werte if ganzzahl else werte * faktor).astype(np.int64)
+
+
+def sql_dezimal(ausdruck: str, faktor: int, ganzzahl: bool = False) -> str:
+    '''SQL-Ausdruck, der einen gespeicherten Betrag oder eine Summe davon als Dezimalzahl liefert'''
+    return f'({ausdruck}) / {faktor}.0' if ganzzahl else ausdruck
+
+
+def lies_betrag_ganzzahl(conn: Connection) -> bool:
+    '''Prueft, ob die Datenbank Betraege und Mengen ganzzahlig speichert'''
+    try:
+        modus = conn.execute(text("SELECT e.wert FROM einstellung_t AS e WHERE e.name = 'betrag_modus'")).scalar()
+    except OperationalError:
+        return False
+    return modus == BETRAG_GANZZAHL
+
+
 class DbManager():
     '''Managed die Datenbankverbindung'''
 
-    def __init__(self, dbfile: str) -> None:
+    def __init__(self, dbfile: str, hash_binaer: bool = None, betrag_ganzzahl: bool = None) -> None:
         self.dbfile = dbfile
         self.meta_data = None
         self.tables = dict()
+        self._engine: Engine = None
+        self.hash_binaer = self._lies_hash_modus() if hash_binaer is None else hash_binaer
+        self.betrag_ganzzahl = self._lies_betrag_modus() if betrag_ganzzahl is None else betrag_ganzzahl
         self.get_metadata()
 
+    def _lies_hash_modus(self) -> bool:
+        '''Liest die Speicherform der Hashes aus der Datenbank, neue Datenbanken speichern sie als Text'''
+        if not Path(self.dbfile).is_file():
+            return False
+        with self.get_engine().connect() as conn:
+            return lies_hash_binaer(conn)
+
+    def _lies_betrag_modus(self) -> bool:
+        '''Liest die Speicherform der Betraege aus der Datenbank, neue Datenbanken speichern sie dezimal'''
+        if not Path(self.dbfile).is_file():
+            return False
+        with self.get_engine().connect() as conn:
+            return lies_betrag_ganzzahl(conn)
+
+    def hashe(self, werte: 'pd.Series') -> 'pd.Series':
+        '''Liefert die Hashes der Texte in der Speicherform dieser Datenbank'''
+        return hashe(werte, self.hash_binaer)
+
+    def skaliere(self, df: 'pd.DataFrame', tabelle: str) -> 'pd.DataFrame':
+        '''Rechnet die Betraege und Mengen fuer 'tabelle' in die Speicherform dieser Datenbank um'''
+        return skaliere(df, tabelle, self.betrag_ganzzahl)
+
+    def entskaliere(self, df: 'pd.DataFrame', tabelle: str) -> 'pd.DataFrame':
+        '''Rechnet gelesene Betraege und Mengen aus 'tabelle' in Dezimalzahlen um'''
+        return entskaliere(df, tabelle, self.betrag_ganzzahl)
+
+    def ganzzahlig(self, werte: 'pd.Series', faktor: int) -> 'np.ndarray':
+        '''Liefert gelesene Betraege oder Mengen als int64-Array in Vielfachen von 1/faktor'''
+        return ganzzahlig(werte, faktor, self.betrag_ganzzahl)
+
     def get_engine(self) -> Engine:
         '''
-        Erzeugt eine Datenbankverbindung.
+        Liefert die Engine zur Datenbank. Sie wird beim ersten Aufruf erzeugt und danach
+        mit ihrem Connection-Pool wiederverwendet, auch aus Hintergrund-Threads.
         '''
-        url = URL.create(
-            drivername='sqlite',
-            database=self.dbfile
-        )
+        if not self._engine:
+            url = URL.create(
+                drivername='sqlite',
+                database=self.dbfile
+            )
+            # URI-Dateinamen erlauben schreibgeschuetzt angehaengte Archive, siehe model.archiv
+            self._engine = create_engine(url, echo=False, connect_args={'uri': True})
+        return self._engine
 
-        engine = create_engine(url, echo=False)
-        return engine
+    def haenge_archive_an(self, conn: Connection, von: 'date' = None, bis: 'date' = None) -> List[int]:
+        '''
+        Haengt die archivierten Jahre des Zeitraums an die Verbindung an und legt die Sichten
+        'jahre_<tabelle>' ueber Datenbank und Archive an, siehe model.archiv.haenge_an.
+        '''
+        from model.archiv import haenge_an
+        return haenge_an(conn, von, bis)
 
     def get_metadata(self) -> MetaData:
         'liefert die Metadaten zur Datenbank. Lazy-Init.'
         if not self.meta_data:
             self.meta_data = MetaData()
+            # Speicherform der Hashes, siehe model.hash_modus
+            binaer = self.hash_binaer
+            hash_typ = LargeBinary(16) if binaer else String(40)
+            ohne_rowid = {'sqlite_with_rowid': False} if binaer else {}
+            Table(
+                'einstellung_t', self.meta_data,
+                Column('name', String(40), primary_key=True),
+                Column('wert', String(255))
+            )
             Table(
                 'kassenjournal_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('kasse_nr', Integer(), index=True),
                 Column('bon_nr', BigInteger(), index=True),
@@ -69,7 +238,7 @@ class DbManager():
             )
             Table(
                 'temp_kassenjournal_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('kasse_nr', Integer(), index=True),
                 Column('bon_nr', BigInteger(), index=True),
@@ -96,7 +265,7 @@ class DbManager():
             )
             Table(
                 'kassenbons_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('kasse_nr', Integer()),
                 Column('bon_nr', BigInteger(), index=True),
@@ -107,11 +276,17 @@ class DbManager():
                 Column('kdnr', String(255), index=True),
                 Column('bon_summe', Numeric(18, 2)),
                 Column('tse_info', String(255)),
-                Column('storno_ref', Integer())
+                Column('storno_ref', Integer()),
+                Column('netto', Boolean(), nullable=False, server_default='1'),
+                Column('id', Integer(), index=True, unique=True),
+                Column('kunde_id', Integer(), index=True),
+                Column('datum_id', Integer(), index=True),
+                Column('tag_nr', Integer(), index=True),
+                Index('ix_kassenbons_t_netto', 'netto', 'bon_datum')
             )
             Table(
                 'temp_kassenbons_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('kasse_nr', Integer()),
                 Column('bon_nr', BigInteger(), index=True),
@@ -126,9 +301,9 @@ class DbManager():
             )
             Table(
                 'temp_kassenbons_pos_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
-                Column('hash_bon', String(40)),
-                Column('hash_fuehrend', String(40)),
+                Column('hash', hash_typ, primary_key=True),
+                Column('hash_bon', hash_typ),
+                Column('hash_fuehrend', hash_typ),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('kasse_nr', Integer()),
                 Column('bon_nr', BigInteger()),
@@ -147,9 +322,9 @@ class DbManager():
             )
             Table(
                 'kassenbons_pos_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
-                Column('hash_bon', String(40), index=True),
-                Column('hash_fuehrend', String(40), index=True),
+                Column('hash', hash_typ, primary_key=True),
+                Column('hash_bon', hash_typ, index=True),
+                Column('hash_fuehrend', hash_typ, index=True),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('kasse_nr', Integer()),
                 Column('bon_nr', BigInteger(), index=True),
@@ -164,7 +339,99 @@ class DbManager():
                 Column('preis_gesamt', Numeric(18, 2)),
                 Column('wgr', String(40), index=True),
                 Column('wgr_bez', String(50)),
-                Column('ma_id', Integer())
+                Column('ma_id', Integer()),
+                Column('bon_id', Integer(), index=True),
+                Column('artikel_id', Integer(), index=True),
+                Column('wgr_id', Integer(), index=True)
+            )
+            Table(
+                'umsatz_tag_artikel_t', self.meta_data,
+                Column('bon_datum', Date(), primary_key=True),
+                Column('art_nr', String(40), primary_key=True, index=True),
+                Column('wgr', String(40), primary_key=True, index=True),
+                Column('menge', Numeric(18, 3)),
+                Column('umsatz', Numeric(18, 2)),
+                Column('anz_bons', Integer()),
+                Column('tag_nr', Integer(), index=True)
+            )
+            Table(
+                'kunden_statistik_t', self.meta_data,
+                Column('kdnr', String(255), primary_key=True),
+                Column('erster_besuch', Date()),
+                Column('letzter_besuch', Date(), index=True),
+                Column('anz_besuche', Integer()),
+                Column('anz_bons', Integer()),
+                Column('umsatz', Numeric(18, 2)),
+                Column('besuche_4w', Integer()),
+                Column('besuche_13w', Integer()),
+                Column('besuche_52w', Integer()),
+                Column('mittlerer_abstand', Float()),
+                Column('stand_datum', Date())
+            )
+            Table(
+                'traffic_stunde_t', self.meta_data,
+                Column('datum', Date(), primary_key=True),
+                Column('stunde', Integer(), primary_key=True),
+                Column('wtag', Integer()),
+                Column('bons', Integer()),
+                Column('umsatz', Numeric(18, 2)),
+                Column('artikel', Numeric(18, 3)),
+                Column('kunden', Integer())
+            )
+            Table(
+                'warenkorb_monat_t', self.meta_data,
+                Column('monat', String(7), primary_key=True),
+                Column('bons', Integer())
+            )
+            Table(
+                'warenkorb_artikel_t', self.meta_data,
+                Column('monat', String(7), primary_key=True),
+                Column('art_nr', String(40), primary_key=True),
+                Column('bons', Integer()),
+                sqlite_with_rowid=False
+            )
+            Table(
+                'warenkorb_paar_t', self.meta_data,
+                Column('monat', String(7), primary_key=True),
+                Column('art_nr_a', String(40), primary_key=True),
+                Column('art_nr_b', String(40), primary_key=True),
+                Column('bons', Integer()),
+                sqlite_with_rowid=False
+            )
+            Table(
+                'warenkorb_top_t', self.meta_data,
+                Column('art_nr', String(40), primary_key=True),
+                Column('rang', Integer(), primary_key=True),
+                Column('partner', String(40)),
+                Column('bons', Integer()),
+                Column('support', Float()),
+                Column('konfidenz', Float()),
+                Column('lift', Float()),
+                Column('von_monat', String(7)),
+                Column('bis_monat', String(7))
+            )
+            Table(
+                'storno_link_t', self.meta_data,
+                Column('hash_storno', hash_typ, primary_key=True),
+                Column('hash_bon', hash_typ, index=True),
+                Column('kasse_nr', Integer()),
+                Column('bon_nr', BigInteger()),
+                Column('storno_ref', BigInteger()),
+                Column('bon_datum', Date(), index=True)
+            )
+            Table(
+                'zahlungen_t', self.meta_data,
+                Column('hash', hash_typ, primary_key=True),
+                Column('hash_bon', hash_typ, index=True),
+                Column('kasse_nr', Integer()),
+                Column('bon_nr', BigInteger()),
+                Column('zeitpunkt', DateTime()),
+                Column('datum', Date(), index=True),
+                Column('zahlart', String(20)),
+                Column('karte', Boolean()),
+                Column('betrag', Numeric(18, 2)),
+                Column('text', String(255)),
+                Index('ix_zahlungen_t_karte', 'karte', 'datum', 'zahlart', 'betrag')
             )
             Table(
                 'kalender_t', self.meta_data,
@@ -173,7 +440,9 @@ class DbManager():
                 Column('monat', Integer()),
                 Column('tag', Integer()),
                 Column('wtag', Integer()),
-                Column('kw', Integer())
+                Column('kw', Integer()),
+                Column('id', Integer(), index=True, unique=True),
+                Column('tag_nr', Integer(), index=True, unique=True)
             )
             Table(
                 'temp_kalender_t', self.meta_data,
@@ -186,18 +455,20 @@ class DbManager():
             )
             Table(
                 'hub_warengruppen_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ats', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('zuletzt_gesehen', TIMESTAMP()),
                 Column('quelle', String(255)),
-                Column('wgr', String(40), index=True)
+                Column('wgr', String(40), index=True),
+                Column('id', Integer(), index=True, unique=True),
+                **ohne_rowid
             )
             Table(
                 'sat_warengruppen_t', self.meta_data,
-                Column('hash', String(40), index=True),
-                Column('hash_diff', String(40)),
-                Column('eintrag_ats', TIMESTAMP()),
+                Column('hash', hash_typ, primary_key=binaer, index=not binaer),
+                Column('hash_diff', hash_typ),
+                Column('eintrag_ats', TIMESTAMP(), primary_key=binaer),
                 Column('eintrag_ets', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('gueltig_edtm', Date()),
@@ -207,15 +478,17 @@ class DbManager():
                 Column('mwst_kz', String(2)),
                 Column('mwst_satz', Numeric(5, 2)),
                 Column('rabatt_kz', String(1)),
-                Column('fsk_kz', String(12))
+                Column('fsk_kz', String(12)),
+                Index('ix_sat_warengruppen_t_gueltigkeit', 'hash', 'gueltig_adtm', 'gueltig_edtm'),
+                **ohne_rowid
             )
             Table(
                 'temp_warengruppen_t', self.meta_data,
                 Column('quelle', String(255)),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('export_datum', Date()),
-                Column('hash', String(40), primary_key=True),
-                Column('hash_diff', String(40)),
+                Column('hash', hash_typ, primary_key=True),
+                Column('hash_diff', hash_typ),
                 Column('wgr', String(40)),
                 Column('wgr_bez', String(255)),
                 Column('mwst_kz', String(2)),
@@ -228,41 +501,45 @@ class DbManager():
                 Column('quelle', String(255)),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('export_datum', Date()),
-                Column('hash', String(40), primary_key=True),
-                Column('hash_diff', String(40)),
+                Column('hash', hash_typ, primary_key=True),
+                Column('hash_diff', hash_typ),
                 Column('kdnr', String(255)),
                 Column('kd_name', String(255)),
                 Column('rabatt_satz', Numeric(5, 2))
             )
             Table(
                 'hub_kunden_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ats', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('zuletzt_gesehen', TIMESTAMP()),
                 Column('quelle', String(255)),
-                Column('kdnr', String(255), index=True)
+                Column('kdnr', String(255), index=True),
+                Column('id', Integer(), index=True, unique=True),
+                **ohne_rowid
             )
             Table(
                 'sat_kunden_t', self.meta_data,
-                Column('hash', String(40), index=True),
-                Column('hash_diff', String(40)),
-                Column('eintrag_ats', TIMESTAMP()),
+                Column('hash', hash_typ, primary_key=binaer, index=not binaer),
+                Column('hash_diff', hash_typ),
+                Column('eintrag_ats', TIMESTAMP(), primary_key=binaer),
                 Column('eintrag_ets', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('gueltig_edtm', Date()),
                 Column('gueltig', Boolean(create_constraint=True)),
                 Column('quelle', String(255)),
                 Column('kd_name', String(255)),
-                Column('rabatt_satz', Numeric(5, 2))
+                Column('rabatt_satz', Numeric(5, 2)),
+                Index('ix_sat_kunden_t_gueltigkeit', 'hash', 'gueltig_adtm', 'gueltig_edtm'),
+                **ohne_rowid
             )
             Table(
                 'temp_artikel_t', self.meta_data,
                 Column('quelle', String(255)),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('export_datum', Date()),
-                Column('hash', String(40), primary_key=True),
-                Column('hash_diff', String(40)),
+                Column('hash', hash_typ, primary_key=True),
+                Column('hash_diff', hash_typ),
                 Column('art_nr', String(40)),
                 Column('idx', Integer()),
                 Column('scs_pool_id', BigInteger()),
@@ -283,18 +560,20 @@ class DbManager():
             )
             Table(
                 'hub_artikel_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ats', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('zuletzt_gesehen', Date()),
                 Column('quelle', String(255)),
-                Column('art_nr', String(255), index=True)
+                Column('art_nr', String(255), index=True),
+                Column('id', Integer(), index=True, unique=True),
+                **ohne_rowid
             )
             Table(
                 'sat_artikel_t', self.meta_data,
-                Column('hash', String(40), index=True),
-                Column('hash_diff', String(40)),
-                Column('eintrag_ats', TIMESTAMP()),
+                Column('hash', hash_typ, primary_key=binaer, index=not binaer),
+                Column('hash_diff', hash_typ),
+                Column('eintrag_ats', TIMESTAMP(), primary_key=binaer),
                 Column('eintrag_ets', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('gueltig_edtm', Date()),
@@ -315,15 +594,17 @@ class DbManager():
                 Column('rabatt_kz', String(1)),
                 Column('preisgebunden_kz', String(1)),
                 Column('fsk_kz', String(1)),
-                Column('notizen', String(255))
+                Column('notizen', String(255)),
+                Index('ix_sat_artikel_t_gueltigkeit', 'hash', 'gueltig_adtm', 'gueltig_edtm'),
+                **ohne_rowid
             )
             Table(
                 'temp_pfand_t', self.meta_data,
                 Column('quelle', String(255)),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('export_datum', Date()),
-                Column('hash', String(40), primary_key=True),
-                Column('hash_diff', String(40)),
+                Column('hash', hash_typ, primary_key=True),
+                Column('hash_diff', hash_typ),
                 Column('art_nr', String(40)),
                 Column('pfand_bez', String(255)),
                 Column('pfand_brutto', Numeric(18, 2)),
@@ -333,18 +614,20 @@ class DbManager():
             )
             Table(
                 'hub_pfand_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ats', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('zuletzt_gesehen', TIMESTAMP()),
                 Column('quelle', String(255)),
-                Column('art_nr', String(255), index=True)
+                Column('art_nr', String(255), index=True),
+                Column('id', Integer(), index=True, unique=True),
+                **ohne_rowid
             )
             Table(
                 'sat_pfand_t', self.meta_data,
-                Column('hash', String(40), index=True),
-                Column('hash_diff', String(40)),
-                Column('eintrag_ats', TIMESTAMP()),
+                Column('hash', hash_typ, primary_key=binaer, index=not binaer),
+                Column('hash_diff', hash_typ),
+                Column('eintrag_ats', TIMESTAMP(), primary_key=binaer),
                 Column('eintrag_ets', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('gueltig_edtm', Date()),
@@ -354,15 +637,17 @@ class DbManager():
                 Column('pfand_brutto', Numeric(18, 2)),
                 Column('hinweispflicht', String(40)),
                 Column('wgr', String(40)),
-                Column('wgr_bez', String(255))
+                Column('wgr_bez', String(255)),
+                Index('ix_sat_pfand_t_gueltigkeit', 'hash', 'gueltig_adtm', 'gueltig_edtm'),
+                **ohne_rowid
             )
             Table(
                 'temp_lieferanten_t', self.meta_data,
                 Column('quelle', String(255)),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('export_datum', Date()),
-                Column('hash', String(40), primary_key=True),
-                Column('hash_diff', String(40)),
+                Column('hash', hash_typ, primary_key=True),
+                Column('hash_diff', hash_typ),
                 Column('lief_nr', String(40)),
                 Column('lief_kdnr', String(255)),
                 Column('lief_name', String(255)),
@@ -372,18 +657,20 @@ class DbManager():
             )
             Table(
                 'hub_lieferanten_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ats', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('zuletzt_gesehen', TIMESTAMP()),
                 Column('quelle', String(255)),
-                Column('lief_nr', String(40), index=True)
+                Column('lief_nr', String(40), index=True),
+                Column('id', Integer(), index=True, unique=True),
+                **ohne_rowid
             )
             Table(
                 'sat_lieferanten_t', self.meta_data,
-                Column('hash', String(40), index=True),
-                Column('hash_diff', String(40)),
-                Column('eintrag_ats', TIMESTAMP()),
+                Column('hash', hash_typ, primary_key=binaer, index=not binaer),
+                Column('hash_diff', hash_typ),
+                Column('eintrag_ats', TIMESTAMP(), primary_key=binaer),
                 Column('eintrag_ets', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('gueltig_edtm', Date()),
@@ -393,46 +680,52 @@ class DbManager():
                 Column('lief_name', String(255)),
                 Column('ek_art_uebernahme', String(12)),
                 Column('ist_hauptlief', String(12)),
-                Column('art_import_logik', String(12))
+                Column('art_import_logik', String(12)),
+                Index('ix_sat_lieferanten_t_gueltigkeit', 'hash', 'gueltig_adtm', 'gueltig_edtm'),
+                **ohne_rowid
             )
             Table(
                 'temp_mean_t', self.meta_data,
                 Column('quelle', String(255)),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('export_datum', Date()),
-                Column('hash', String(40), primary_key=True),
-                Column('hash_diff', String(40)),
+                Column('hash', hash_typ, primary_key=True),
+                Column('hash_diff', hash_typ),
                 Column('ean_m', String(40)),
                 Column('ean_h', String(40))
             )
             Table(
                 'hub_mean_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ats', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('zuletzt_gesehen', TIMESTAMP()),
                 Column('quelle', String(255)),
                 Column('ean_m', String(40), index=True),
+                Column('id', Integer(), index=True, unique=True),
+                **ohne_rowid
             )
             Table(
                 'sat_mean_t', self.meta_data,
-                Column('hash', String(40), index=True),
-                Column('hash_diff', String(40)),
-                Column('eintrag_ats', TIMESTAMP()),
+                Column('hash', hash_typ, primary_key=binaer, index=not binaer),
+                Column('hash_diff', hash_typ),
+                Column('eintrag_ats', TIMESTAMP(), primary_key=binaer),
                 Column('eintrag_ets', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('gueltig_edtm', Date()),
                 Column('gueltig', Boolean(create_constraint=True)),
                 Column('quelle', String(255)),
-                Column('ean_h', String(40))
+                Column('ean_h', String(40)),
+                Index('ix_sat_mean_t_gueltigkeit', 'hash', 'gueltig_adtm', 'gueltig_edtm'),
+                **ohne_rowid
             )
             Table(
                 'temp_scs_liefart_t', self.meta_data,
                 Column('quelle', String(255)),
                 Column('eintrag_ts', TIMESTAMP()),
                 Column('export_datum', Date()),
-                Column('hash', String(40), primary_key=True),
-                Column('hash_diff', String(40)),
+                Column('hash', hash_typ, primary_key=True),
+                Column('hash_diff', hash_typ),
                 Column('ean', String(40)),
                 Column('lief_nr', String(40)),
                 Column('lief_art_nr', String(40)),
@@ -440,26 +733,128 @@ class DbManager():
             )
             Table(
                 'hub_scs_liefart_t', self.meta_data,
-                Column('hash', String(40), primary_key=True),
+                Column('hash', hash_typ, primary_key=True),
                 Column('eintrag_ats', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('zuletzt_gesehen', TIMESTAMP()),
                 Column('quelle', String(255)),
                 Column('ean', String(40), index=True),
                 Column('lief_nr', String(40), index=True),
+                Column('id', Integer(), index=True, unique=True),
+                **ohne_rowid
             )
             Table(
                 'sat_scs_liefart_t', self.meta_data,
-                Column('hash', String(40), index=True),
-                Column('hash_diff', String(40)),
-                Column('eintrag_ats', TIMESTAMP()),
+                Column('hash', hash_typ, primary_key=binaer, index=not binaer),
+                Column('hash_diff', hash_typ),
+                Column('eintrag_ats', TIMESTAMP(), primary_key=binaer),
                 Column('eintrag_ets', TIMESTAMP()),
                 Column('gueltig_adtm', Date()),
                 Column('gueltig_edtm', Date()),
                 Column('gueltig', Boolean(create_constraint=True)),
                 Column('quelle', String(255)),
                 Column('lief_art_nr', String(40)),
-                Column('ek_netto', Numeric(18, 3))
+                Column('ek_netto', Numeric(18, 3)),
+                Index('ix_sat_scs_liefart_t_gueltigkeit', 'hash', 'gueltig_adtm', 'gueltig_edtm'),
+                **ohne_rowid
+            )
+            Table(
+                'archiv_jahr_t', self.meta_data,
+                Column('jahr', Integer(), primary_key=True, autoincrement=False),
+                Column('datei', String(255)),
+                Column('archiviert_ts', TIMESTAMP()),
+                Column('bons', Integer()),
+                Column('positionen', Integer()),
+                Column('journalzeilen', Integer()),
+                Column('max_bon_id', Integer())
+            )
+            Table(
+                'import_log_t', self.meta_data,
+                Column('id', Integer(), primary_key=True, autoincrement=True),
+                Column('lauf_ts', TIMESTAMP(), index=True),
+                Column('importer', String(255)),
+                Column('datei', String(1024)),
+                Column('stufe', String(40)),
+                Column('schritt', String(255)),
+                Column('dauer', Float()),
+                Column('cpu_zeit', Float()),
+                Column('zeilen_gelesen', Integer()),
+                Column('zeilen_geschrieben', Integer()),
+                Column('speicher_peak', BigInteger())
+            )
+            Table(
+                'import_status_t', self.meta_data,
+                Column('quelle', String(255), primary_key=True),
+                Column('letzte_datei', Date()),
+                Column('letzter_import', TIMESTAMP()),
+                Column('letzte_aenderung', TIMESTAMP()),
+                Column('zeilen_datei', Integer()),
+                Column('zeilen_geaendert', Integer())
+            )
+            Table(
+                'import_monate_t', self.meta_data,
+                Column('quelle', String(255), primary_key=True),
+                Column('monat', String(7), primary_key=True)
+            )
+            Table(
+                'import_generation_t', self.meta_data,
+                Column('quelle', String(255), primary_key=True),
+                Column('generation', Integer(), nullable=False)
+            )
+            Table(
+                'pit_artikel_t', self.meta_data,
+                Column('hash', hash_typ, primary_key=True),
+                Column('datum', Date(), primary_key=True, index=True),
+                Column('sat_eintrag_ats', TIMESTAMP()),
+                sqlite_with_rowid=False
             )
+            Table(
+                'pit_warengruppen_t', self.meta_data,
+                Column('hash', hash_typ, primary_key=True),
+                Column('datum', Date(), primary_key=True, index=True),
+                Column('sat_eintrag_ats', TIMESTAMP()),
+                sqlite_with_rowid=False
+            )
+            Table(
+                'pit_kunden_t', self.meta_data,
+                Column('hash', hash_typ, primary_key=True),
+                Column('datum', Date(), primary_key=True, index=True),
+                Column('sat_eintrag_ats', TIMESTAMP()),
+                sqlite_with_rowid=False
+            )
+            Table(
+                'pit_pfand_t', self.meta_data,
+                Column('hash', hash_typ, primary_key=True),
+                Column('datum', Date(), primary_key=True, index=True),
+                Column('sat_eintrag_ats', TIMESTAMP()),
+                sqlite_with_rowid=False
+            )
+            Table(
+                'pit_lieferanten_t', self.meta_data,
+                Column('hash', hash_typ, primary_key=True),
+                Column('datum', Date(), primary_key=True, index=True),
+                Column('sat_eintrag_ats', TIMESTAMP()),
+                sqlite_with_rowid=False
+            )
+            Table(
+                'pit_mean_t', self.meta_data,
+                Column('hash', hash_typ, primary_key=True),
+                Column('datum', Date(), primary_key=True, index=True),
+                Column('sat_eintrag_ats', TIMESTAMP()),
+                sqlite_with_rowid=False
+            )
+            Table(
+                'pit_scs_liefart_t', self.meta_data,
+                Column('hash', hash_typ, primary_key=True),
+                Column('datum', Date(), primary_key=True, index=True),
+                Column('sat_eintrag_ats', TIMESTAMP()),
+                sqlite_with_rowid=False
+            )
+
+            if self.betrag_ganzzahl:
+                # Speicherform der Betraege, siehe model.betrag_modus
+                for name, spalten in GANZZAHL_SPALTEN.items():
+                    for spalte in spalten:
+                        self.meta_data.tables[name].c[spalte].type = BigInteger()
 
         return self.meta_data
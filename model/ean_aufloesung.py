@@ -0,0 +1,99 @@
+'''
+Aufloesung von Mehrfach-EANs auf die Haupt-EAN. Die gueltigen Zuordnungen ean_m -> ean_h aus
+'hub_mean_t'/'sat_mean_t' werden einmal je Datenbank geladen und im Speicher gehalten,
+Ketten (A -> B -> C) werden dabei direkt auf ihr Ende aufgeloest.
+'''
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Connection, text
+
+from model.cache import GenerationsCache
+from model.db_manager import DbManager
+
+
+class EanAufloesung(GenerationsCache):
+    '''
+    Loest Artikelnummern (EANs) ueber die Mehrfach-EANs auf die Haupt-EAN auf. Je Datenbank gibt es
+    eine Instanz ('fuer'), die Zuordnung wird beim ersten Zugriff geladen und nach jedem Import
+    der Mehrfach-EANs neu geladen.
+    '''
+
+    QUELLEN = ('scs_export_mehrfach-ean',)
+
+    def __init__(self, db_manager: DbManager, *args, **kwargs) -> None:
+        super().__init__(db_manager, *args, **kwargs)
+        self.zyklen: List[List[str]] = []
+
+    @property
+    def zuordnung(self) -> Dict[str, str]:
+        '''Mehrfach-EAN -> Haupt-EAN, bereits ueber alle Stufen aufgeloest'''
+        return self.werte
+
+    def _lade(self, conn: Connection) -> Dict[str, str]:
+        '''Laedt die gueltigen Zuordnungen und loest Ketten und Zyklen auf'''
+        sql = '''
+        SELECT
+            hm.ean_m,
+            sm.ean_h
+
+        FROM hub_mean_t AS hm
+
+        JOIN sat_mean_t AS sm
+            ON	sm.hash = hm.hash
+            AND sm.gueltig = 1
+
+        WHERE hm.ean_m <> sm.ean_h
+        '''
+        direkt = dict(conn.execute(text(sql)).fetchall())
+
+        aufgeloest: Dict[str, str] = dict()
+        zyklen = []
+        for ean in direkt:
+            if ean in aufgeloest:
+                continue
+            # der Kette folgen, bis eine EAN keine Mehrfach-EAN mehr ist oder schon aufgeloest wurde
+            pfad = [ean]
+            gesehen = {ean}
+            ziel = direkt[ean]
+            while ziel in direkt and ziel not in aufgeloest and ziel not in gesehen:
+                pfad.append(ziel)
+                gesehen.add(ziel)
+                ziel = direkt[ziel]
+            if ziel in gesehen:
+                # Zyklus: alle EANs im Zyklus zeigen auf die kleinste EAN des Zyklus
+                zyklus = pfad[pfad.index(ziel):]
+                zyklen.append(zyklus)
+                ziel = min(zyklus)
+            else:
+                ziel = aufgeloest.get(ziel, ziel)
+            for e in pfad:
+                aufgeloest[e] = ziel
+        self.zyklen = zyklen
+        return aufgeloest
+
+    def aufloesen(self, ean: str) -> str:
+        '''Liefert die Haupt-EAN zur EAN, EANs ohne Zuordnung bleiben unveraendert'''
+        zuordnung = self.zuordnung
+        if ean in zuordnung:
+            self._zaehle(treffer=1)
+            return zuordnung[ean]
+        self._zaehle(fehlschlaege=1)
+        return ean
+
+    def aufloesen_serie(self, eans: pd.Series) -> pd.Series:
+        '''
+        Loest eine ganze Spalte auf. Nachgeschlagen wird nur je unterschiedlicher EAN,
+        die Ergebnisse werden ueber die Codes aus 'factorize' auf die Zeilen verteilt.
+        '''
+        codes, werte = pd.factorize(eans)
+        zuordnung = self.zuordnung
+        gefunden = np.array([w in zuordnung for w in werte], dtype=bool)
+        # factorize kennzeichnet fehlende Werte mit -1, sie greifen so auf das angehaengte None zu
+        ziele = np.array([zuordnung.get(w, w) for w in werte] + [None], dtype=object)
+        ergebnis = pd.Series(ziele[codes], index=eans.index, name=eans.name, dtype=object)
+
+        treffer = int(gefunden[codes[codes >= 0]].sum())
+        self._zaehle(treffer, len(eans) - treffer)
+        return ergebnis
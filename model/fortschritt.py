@@ -0,0 +1,79 @@
+import time
+from typing import TYPE_CHECKING, Callable, Dict, NamedTuple, Set
+
+from sqlalchemy import Connection
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class Fortschritt(NamedTuple):
+    '''Fortschrittsereignis einer Stufe eines Imports'''
+
+    importer: str
+    stufe: str
+    erledigt: int
+    gesamt: int
+    durchsatz: float
+    '''verarbeitete Zeilen pro Sekunde seit Beginn der Stufe'''
+
+    @property
+    def anteil(self) -> float:
+        '''Anteil der erledigten Zeilen zwischen 0 und 1'''
+        if not self.gesamt:
+            return 0.0
+        return min(self.erledigt / self.gesamt, 1.0)
+
+    @property
+    def restzeit(self) -> float:
+        '''geschaetzte Restdauer der Stufe in Sekunden, None solange noch kein Durchsatz bekannt ist'''
+        if not self.durchsatz:
+            return None
+        return max(self.gesamt - self.erledigt, 0) / self.durchsatz
+
+
+class FortschrittMelder():
+    '''
+    Meldet den Fortschritt der Stufen eines Importers an die registrierten Listener.
+    Ein Listener ist eine Funktion, die ein 'Fortschritt'-Ereignis entgegennimmt, z.B. 'Queue.put'.
+    '''
+
+    def __init__(self, importer: str, listeners: Set[Callable[[Fortschritt], None]]) -> None:
+        self.importer = importer
+        self.listeners = listeners
+        self._start: Dict[str, float] = dict()
+
+    def melde(self, stufe: str, erledigt: int, gesamt: int) -> None:
+        '''Meldet den Stand der Stufe. Der Durchsatz wird ab der ersten Meldung der Stufe gerechnet.'''
+        if not self.listeners:
+            return
+
+        jetzt = time.perf_counter()
+        start = self._start.setdefault(stufe, jetzt)
+        dauer = jetzt - start
+        durchsatz = erledigt / dauer if dauer > 0 else 0.0
+
+        ereignis = Fortschritt(self.importer, stufe, erledigt, gesamt, durchsatz)
+        for listener in list(self.listeners):
+            listener(ereignis)
+
+
+def zaehle_zeilen(datei: str) -> int:
+    '''Zaehlt die Datenzeilen einer Textdatei (ohne Kopfzeile), ohne sie zu parsen'''
+    zeilen = 0
+    with open(datei, mode='rb') as f:
+        while block := f.read(1024 * 1024):
+            zeilen += block.count(b'\n')
+    return max(zeilen - 1, 0)
+
+
+def schreibe_in_bloecken(df: 'pd.DataFrame', tabelle: str, conn: Connection, melder: FortschrittMelder = None,
+                         stufe: str = 'write_data', blockgroesse: int = 10_000) -> None:
+    '''Haengt das DataFrame blockweise an die Tabelle an und meldet nach jedem Block den Fortschritt'''
+    gesamt = len(df)
+    if melder:
+        melder.melde(stufe, 0, gesamt)
+    for start in range(0, gesamt, blockgroesse):
+        df.iloc[start:start + blockgroesse].to_sql(tabelle, conn, if_exists='append', index=False)
+        if melder:
+            melder.melde(stufe, min(start + blockgroesse, gesamt), gesamt)
@@ -0,0 +1,121 @@
+'''
+Speicherform der Hashes. Standard sind 32 Hex-Zeichen in VARCHAR-Spalten und Tabellen mit rowid,
+in denen jeder Schluessel in der Tabelle und im Index des Primaerschluessels steht. Im binaeren
+Modus sind die Hashes 16 Bytes lang, Hubs, Satelliten (Schluessel hash, eintrag_ats) und die
+Bewegungsdaten sind WITHOUT ROWID-Tabellen, die Zeilen liegen also direkt im Primaerschluessel.
+Der Modus steht in 'einstellung_t' und wird von DbManager beim Oeffnen der Datenbank gelesen.
+Die Jahresarchive (model.archiv) werden mit umgestellt.
+'''
+import pandas as pd
+from sqlalchemy import Connection, text
+
+from model.archiv import ARCHIV_TABELLEN, baue_tabelle_um, haenge_ab, haenge_beschreibbar_an, speichere_modus
+from model.db_manager import HASH_BINAER, HASH_TEXT, DbManager
+
+
+def _unhex(wert):
+    '''Hex-Text -> Bytes, andere Werte bleiben unveraendert'''
+    return bytes.fromhex(wert) if isinstance(wert, str) else wert
+
+
+def _hex(wert):
+    '''Bytes -> Hex-Text, andere Werte bleiben unveraendert'''
+    return wert.hex() if isinstance(wert, bytes) else wert
+
+
+def _vorhandene_spalten(conn: Connection, tabelle: str) -> list:
+    '''Spalten der Tabelle in der Datenbank'''
+    return [zeile[1] for zeile in conn.execute(text(f'PRAGMA table_info({tabelle})'))]
+
+
+def stelle_um(dbfile: str, binaer: bool = True) -> bool:
+    '''
+    Baut alle Tabellen mit Hash-Spalten in der Speicherform 'binaer' neu auf und uebernimmt die
+    Daten, ebenso die Tabellen der Jahresarchive in derselben Transaktion. Liefert False, wenn die
+    Datenbank bereits in dieser Form vorliegt. Danach werden Datenbank und Archive mit VACUUM
+    verkleinert. Das Schema muss aktuell sein (settings.create_tables).
+    '''
+    if DbManager(dbfile).hash_binaer == binaer:
+        return False
+
+    ziel = DbManager(dbfile, hash_binaer=binaer)
+    umwandlung = 'unhex_py' if binaer else 'hex_py'
+    modus = HASH_BINAER if binaer else HASH_TEXT
+    with ziel.get_engine().connect() as conn:
+        sqlite = conn.connection.driver_connection
+        sqlite.create_function('unhex_py', 1, _unhex, deterministic=True)
+        sqlite.create_function('hex_py', 1, _hex, deterministic=True)
+
+        vorhanden = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars())
+        archive = haenge_beschreibbar_an(conn)
+        for tabelle in ziel.meta_data.sorted_tables:
+            hash_spalten = {c.name for c in tabelle.columns if c.name.startswith('hash')}
+            if not hash_spalten or tabelle.name not in vorhanden:
+                continue
+            alt = f'{tabelle.name}__alt'
+            conn.execute(text(f'ALTER TABLE {tabelle.name} RENAME TO {alt}'))
+            # die Indizes behalten beim Umbenennen ihren Namen, die neue Tabelle legt sie wieder an
+            indizes = conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t AND sql IS NOT NULL"),
+                {'t': alt}).scalars().all()
+            for index in indizes:
+                conn.execute(text(f'DROP INDEX {index}'))
+            tabelle.create(conn)
+
+            spalten = [c.name for c in tabelle.columns if c.name in set(_vorhandene_spalten(conn, alt))]
+            ausdruecke = [f'{umwandlung}({s})' if s in hash_spalten else s for s in spalten]
+            conn.execute(text(f'''
+                INSERT INTO {tabelle.name} ({', '.join(spalten)})
+                SELECT {', '.join(ausdruecke)} FROM {alt}
+                '''))
+            conn.execute(text(f'DROP TABLE {alt}'))
+
+        # die Archivtabellen uebernehmen die eben angelegten Definitionen der Datenbank
+        for schema in archive:
+            for tabelle in ARCHIV_TABELLEN:
+                baue_tabelle_um(conn, schema, tabelle,
+                                lambda s: f'{umwandlung}({s})' if s.startswith('hash') else s)
+            speichere_modus(conn, schema, 'hash_modus', modus)
+
+        if 'artikel_fts' in vorhanden:
+            conn.execute(text(f'UPDATE artikel_fts SET hash = {umwandlung}(hash)'))
+        conn.execute(text('INSERT OR REPLACE INTO einstellung_t (name, wert) VALUES (:name, :wert)'),
+                     {'name': 'hash_modus', 'wert': modus})
+        conn.commit()
+        haenge_ab(conn, archive)
+
+    with ziel.get_engine().connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text('VACUUM'))
+        for schema in haenge_beschreibbar_an(conn):
+            conn.execute(text(f'VACUUM {schema}'))
+            haenge_ab(conn, [schema])
+    ziel.get_engine().dispose()
+    return True
+
+
+def speicherbelegung(db_manager: DbManager) -> pd.DataFrame:
+    '''
+    Liefert die Belegung der Datenbankdatei je Tabelle und Index aus 'dbstat'. Spalten: name,
+    tabelle, art ('table' oder 'index'), seiten, bytes (belegte Seiten), nutzdaten (davon Inhalt).
+    '''
+    sql = '''
+    SELECT
+        d.name,
+        m.tbl_name AS tabelle,
+        m.type AS art,
+        COUNT(*) AS seiten,
+        SUM(d.pgsize) AS bytes,
+        SUM(d.payload) AS nutzdaten
+
+    FROM dbstat AS d
+
+    JOIN sqlite_master AS m
+        ON	m.name = d.name
+
+    GROUP BY d.name, m.tbl_name, m.type
+
+    ORDER BY bytes DESC
+    '''
+    with db_manager.get_engine().connect() as conn:
+        return pd.read_sql_query(text(sql), conn)
+
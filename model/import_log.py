@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Event, Thread
+from typing import Callable, Iterator, List
+
+from sqlalchemy import Connection, Table, text
+
+from model.db_manager import DbManager
+
+
+def aktueller_speicher() -> int:
+    '''Liefert den aktuell belegten Arbeitsspeicher (Resident Set Size) des Prozesses in Bytes'''
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t)
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize
+
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # z.B. macOS, dort gibt es kein /proc
+        return 0
+
+
+class Messung():
+    '''Messwerte einer Stufe bzw. eines einzelnen Schrittes eines Imports'''
+
+    def __init__(self, stufe: str, schritt: str = None) -> None:
+        self.stufe = stufe
+        self.schritt = schritt
+        self.dauer: float = 0.0
+        self.cpu_zeit: float = 0.0
+        self.zeilen_gelesen: int = 0
+        self.zeilen_geschrieben: int = 0
+        self.speicher_peak: int = 0
+
+    def __str__(self) -> str:
+        name = f'{self.stufe}/{self.schritt}' if self.schritt else self.stufe
+        return (f'{name}: {self.dauer:.2f} s (CPU {self.cpu_zeit:.2f} s), '
+                f'{self.zeilen_gelesen} Zeilen gelesen, {self.zeilen_geschrieben} Zeilen geschrieben, '
+                f'Speicherspitze {self.speicher_peak / 1024 / 1024:.1f} MB')
+
+
+class ImportProtokoll():
+    '''
+    Sammelt je Stufe (load_file, write_data, post_process) und je SQL-Schritt
+    eines Imports Laufzeit, CPU-Zeit, gelesene und geschriebene Zeilen sowie
+    die Speicherspitze des Prozesses. Die Messwerte werden anschliessend in
+    'import_log_t' gespeichert.
+    '''
+
+    ABTASTINTERVALL = 0.02
+    '''Sekunden zwischen zwei Abtastungen des Speichers'''
+
+    def __init__(self, importer: str, datei: str) -> None:
+        self.importer = importer
+        self.datei = datei
+        self.lauf_ts = datetime.now()
+        self.messungen: List[Messung] = []
+        self._offen: List[Messung] = []
+        self._abtastung: Thread = None
+        self._abtastung_ende: Event = None
+
+    @contextmanager
+    def messe(self, stufe: str, schritt: str = None) -> Iterator[Messung]:
+        '''
+        Misst den umschlossenen Block. Der Speicher wird waehrend der Messung in einem
+        Hintergrund-Thread abgetastet, das ist deutlich guenstiger als tracemalloc.
+        '''
+        messung = Messung(stufe, schritt)
+        messung.speicher_peak = aktueller_speicher()
+        self._offen.append(messung)
+        if len(self._offen) == 1:
+            self._starte_abtastung()
+
+        start = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield messung
+        finally:
+            messung.dauer = time.perf_counter() - start
+            messung.cpu_zeit = time.thread_time() - start_cpu
+            self._taste_speicher_ab()
+            self._offen.pop()
+            self.messungen.append(messung)
+            if not self._offen:
+                self._stoppe_abtastung()
+
+    def _starte_abtastung(self) -> None:
+        '''Startet den Thread, der den Speicher fuer alle offenen Messungen abtastet'''
+        self._abtastung_ende = Event()
+
+        def abtasten() -> None:
+            while not self._abtastung_ende.wait(self.ABTASTINTERVALL):
+                self._taste_speicher_ab()
+
+        self._abtastung = Thread(target=abtasten, daemon=True)
+        self._abtastung.start()
+
+    def _stoppe_abtastung(self) -> None:
+        '''Beendet den Abtast-Thread'''
+        self._abtastung_ende.set()
+        self._abtastung.join()
+
+    def _taste_speicher_ab(self) -> None:
+        '''Uebernimmt den aktuellen Speicher als Spitze in alle offenen Messungen'''
+        speicher = aktueller_speicher()
+        for messung in list(self._offen):
+            messung.speicher_peak = max(messung.speicher_peak, speicher)
+
+    def schritt(self, funktion: Callable[[Connection], int], conn: Connection) -> int:
+        '''
+        Fuehrt einen Verarbeitungsschritt aus und misst ihn. Liefert der Schritt
+        eine Zeilenzahl, wird diese als geschriebene Zeilen gezaehlt und zurueckgegeben.
+        '''
+        stufe = self._offen[-1].stufe if self._offen else 'post_process'
+        with self.messe(stufe, funktion.__name__.lstrip('_')) as messung:
+            zeilen = funktion(conn)
+            if zeilen and zeilen > 0:
+                messung.zeilen_geschrieben = zeilen
+        if self._offen:
+            self._offen[-1].zeilen_geschrieben += messung.zeilen_geschrieben
+        return messung.zeilen_geschrieben
+
+    def zaehle(self, gelesen: int = 0, geschrieben: int = 0) -> None:
+        '''Zaehlt Zeilen fuer die gerade laufende Messung'''
+        if self._offen:
+            self._offen[-1].zeilen_gelesen += gelesen
+            self._offen[-1].zeilen_geschrieben += geschrieben
+
+    @property
+    def stufen(self) -> List[Messung]:
+        '''Liefert die Messungen der Stufen ohne die einzelnen Schritte'''
+        return [m for m in self.messungen if not m.schritt]
+
+    def speichere(self, db_manager: DbManager) -> None:
+        '''Schreibt alle Messungen in die Tabelle 'import_log_t' '''
+        if not self.messungen:
+            return
+
+        tab_log: Table = db_manager.meta_data.tables['import_log_t']
+        conn = db_manager.get_engine().connect()
+        with conn:
+            conn.execute(tab_log.insert(), [
+                {
+                    'lauf_ts': self.lauf_ts,
+                    'importer': self.importer,
+                    'datei': self.datei,
+                    'stufe': m.stufe,
+                    'schritt': m.schritt,
+                    'dauer': m.dauer,
+                    'cpu_zeit': m.cpu_zeit,
+                    'zeilen_gelesen': m.zeilen_gelesen,
+                    'zeilen_geschrieben': m.zeilen_geschrieben,
+                    'speicher_peak': m.speicher_peak
+                } for m in self.messungen
+            ])
+            conn.commit()
+        conn.close()
+
+
+class ImportLogStatus():
+    '''Holt die protokollierten Messwerte der letzten Importe'''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def letzte_laeufe(self, anzahl: int = 10) -> List[tuple]:
+        '''
+        Liefert die Stufen der letzten Importlaeufe, neueste zuerst:
+        (lauf_ts, importer, datei, stufe, dauer, cpu_zeit, zeilen_gelesen, zeilen_geschrieben, speicher_peak)
+        '''
+        SQL = """
+        SELECT
+            l.lauf_ts,
+            l.importer,
+            l.datei,
+            l.stufe,
+            l.dauer,
+            l.cpu_zeit,
+            l.zeilen_gelesen,
+            l.zeilen_geschrieben,
+            l.speicher_peak
+
+        FROM import_log_t AS l
+
+        JOIN (
+            SELECT DISTINCT lauf_ts, importer FROM import_log_t ORDER BY lauf_ts DESC LIMIT :anzahl
+        ) AS lauf
+            ON  lauf.lauf_ts = l.lauf_ts
+            AND lauf.importer = l.importer
+
+        WHERE l.schritt IS NULL
+
+        ORDER BY l.lauf_ts DESC, l.id
+        """
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            result = conn.execute(text(SQL), {'anzahl': anzahl}).fetchall()
+        conn.close()
+        return result
@@ -0,0 +1,199 @@
+from datetime import date, datetime
+from threading import Lock
+from typing import Iterable, List
+
+from sqlalchemy import Connection, Row, event, text
+
+from model.db_manager import DbManager
+
+HUBS = ('hub_warengruppen_t', 'hub_kunden_t', 'hub_artikel_t', 'hub_pfand_t',
+        'hub_lieferanten_t', 'hub_mean_t', 'hub_scs_liefart_t')
+'''Hubs, aus denen der Stand der Stammdaten-Importe bei der Migration uebernommen wird'''
+
+QUELLE_KASSENJOURNAL = 'scs_export_kassenjournal'
+
+_lokale_generation = 0
+_lokale_generation_sperre = Lock()
+
+
+def melde_import(conn: Connection, quelle: str, export_datum: date, eintrag_ts: datetime,
+                 zeilen_datei: int, zeilen_geaendert: int, monate: Iterable[str] = ()) -> None:
+    '''
+    Haelt den Stand der Quelle in 'import_status_t' und 'import_monate_t' fest. Wird von den
+    Importern am Ende von 'post_process' in derselben Transaktion aufgerufen, damit der Stand
+    nur mit den Daten zusammen gespeichert wird. 'letzte_aenderung' wird nur gesetzt,
+    wenn der Import tatsaechlich Zeilen eingefuegt oder historisiert hat.
+    '''
+    sql = '''
+    INSERT INTO import_status_t (quelle, letzte_datei, letzter_import, letzte_aenderung, zeilen_datei, zeilen_geaendert)
+    VALUES (
+        :quelle,
+        :export_datum,
+        :eintrag_ts,
+        CASE WHEN :zeilen_geaendert > 0 THEN :eintrag_ts END,
+        :zeilen_datei,
+        :zeilen_geaendert
+    )
+    ON CONFLICT (quelle) DO UPDATE SET
+        letzte_datei = MAX(COALESCE(import_status_t.letzte_datei, excluded.letzte_datei), excluded.letzte_datei),
+        letzter_import = excluded.letzter_import,
+        letzte_aenderung = COALESCE(excluded.letzte_aenderung, import_status_t.letzte_aenderung),
+        zeilen_datei = excluded.zeilen_datei,
+        zeilen_geaendert = excluded.zeilen_geaendert
+    '''
+    conn.execute(text(sql), {
+        'quelle': quelle,
+        'export_datum': export_datum,
+        'eintrag_ts': eintrag_ts,
+        'zeilen_datei': zeilen_datei,
+        'zeilen_geaendert': zeilen_geaendert
+    })
+
+    monate = [{'quelle': quelle, 'monat': monat} for monat in monate]
+    if monate:
+        conn.execute(text('INSERT OR IGNORE INTO import_monate_t (quelle, monat) VALUES (:quelle, :monat)'), monate)
+
+    if zeilen_geaendert > 0:
+        erhoehe_generation(conn, quelle)
+
+
+def erhoehe_generation(conn: Connection, quelle: str) -> None:
+    '''
+    Erhoeht die Generation der Quelle in 'import_generation_t', Caches auf diesen Daten
+    sind damit veraltet. Im eigenen Prozess erfahren die Caches das direkt nach dem Commit
+    ueber 'lokale_generation', andere Prozesse beim naechsten Abgleich mit der Datenbank.
+    '''
+    conn.execute(text('''
+    INSERT INTO import_generation_t (quelle, generation) VALUES (:quelle, 1)
+    ON CONFLICT (quelle) DO UPDATE SET generation = import_generation_t.generation + 1
+    '''), {'quelle': quelle})
+    event.listen(conn, 'commit', _erhoehe_lokale_generation, once=True)
+
+
+def _erhoehe_lokale_generation(conn: Connection) -> None:
+    '''Wird nach dem Commit eines Imports mit Aenderungen aufgerufen'''
+    global _lokale_generation
+    with _lokale_generation_sperre:
+        _lokale_generation += 1
+
+
+def lokale_generation() -> int:
+    '''Zaehler der in diesem Prozess abgeschlossenen Importe mit Aenderungen'''
+    return _lokale_generation
+
+
+def lies_generation(conn: Connection, quellen: Iterable[str]) -> int:
+    '''Summe der Generationen der Quellen, sie aendert sich mit jedem Import einer der Quellen'''
+    quellen = list(quellen)
+    params = {f'quelle_{i}': q for i, q in enumerate(quellen)}
+    filter_quelle = ', '.join(f':quelle_{i}' for i in range(len(quellen))) or 'NULL'
+    return conn.execute(text(f'''
+    SELECT COALESCE(SUM(g.generation), 0) FROM import_generation_t AS g WHERE g.quelle IN ({filter_quelle})
+    '''), params).scalar()
+
+
+def uebernimm_bestand(conn: Connection) -> None:
+    '''
+    Migration: fuellt 'import_status_t' und 'import_monate_t' aus den bereits geladenen Daten.
+    Als Zeitpunkt des letzten Imports dient das juengste Eintragsdatum im Hub bzw. in den Bons.
+    '''
+    for hub in HUBS:
+        conn.execute(text(f'''
+        INSERT OR IGNORE INTO import_status_t (quelle, letzte_datei, letzter_import, letzte_aenderung)
+        SELECT
+            h.quelle,
+            date(MAX(h.zuletzt_gesehen)),
+            MAX(h.eintrag_ats),
+            MAX(h.eintrag_ats)
+
+        FROM {hub} AS h
+
+        WHERE h.quelle IS NOT NULL
+
+        GROUP BY h.quelle
+        '''))
+
+    conn.execute(text('''
+    INSERT OR IGNORE INTO import_status_t (quelle, letzter_import, letzte_aenderung)
+    SELECT
+        :quelle,
+        MAX(bons.eintrag_ts),
+        MAX(bons.eintrag_ts)
+
+    FROM kassenbons_t AS bons
+
+    HAVING COUNT(*) > 0
+    '''), {'quelle': QUELLE_KASSENJOURNAL})
+
+    conn.execute(text('''
+    INSERT OR IGNORE INTO import_monate_t (quelle, monat)
+    SELECT DISTINCT
+        :quelle,
+        strftime('%Y-%m', bons.bon_datum)
+
+    FROM kassenbons_t AS bons
+    '''), {'quelle': QUELLE_KASSENJOURNAL})
+
+
+def _als_datetime(wert: str) -> datetime:
+    '''Wandelt einen gespeicherten Zeitpunkt bzw. ein Datum um'''
+    if not wert:
+        return None
+    return datetime.fromisoformat(wert)
+
+
+class ImportStatus():
+    '''Liest den Stand der Importe je Quelle aus 'import_status_t', ohne die Datentabellen zu durchsuchen'''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def eintrag(self, quelle: str) -> Row:
+        '''
+        Liefert den Stand der Quelle:
+        (letzte_datei, letzter_import, letzte_aenderung, zeilen_datei, zeilen_geaendert) oder None
+        '''
+        SQL = """
+        SELECT
+            s.letzte_datei,
+            s.letzter_import,
+            s.letzte_aenderung,
+            s.zeilen_datei,
+            s.zeilen_geaendert
+
+        FROM import_status_t AS s
+
+        WHERE s.quelle = :quelle
+        """
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            result = conn.execute(text(SQL), {'quelle': quelle}).fetchone()
+        conn.close()
+        return result
+
+    def letzte_datei(self, quelle: str) -> datetime:
+        '''Exportdatum der juengsten importierten Datei'''
+        eintrag = self.eintrag(quelle)
+        return _als_datetime(eintrag.letzte_datei) if eintrag else None
+
+    def letzter_import(self, quelle: str) -> datetime:
+        '''Zeitpunkt des letzten Imports, auch wenn er nichts veraendert hat'''
+        eintrag = self.eintrag(quelle)
+        return _als_datetime(eintrag.letzter_import) if eintrag else None
+
+    def letzte_aenderung(self, quelle: str) -> datetime:
+        '''Zeitpunkt des letzten Imports, der Daten eingefuegt oder historisiert hat'''
+        eintrag = self.eintrag(quelle)
+        return _als_datetime(eintrag.letzte_aenderung) if eintrag else None
+
+    def monate(self, quelle: str) -> List[str]:
+        '''Liefert die importierten Monate der Quelle im Format JJJJ-MM'''
+        SQL = """
+        SELECT m.monat FROM import_monate_t AS m WHERE m.quelle = :quelle ORDER BY m.monat
+        """
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            result = conn.execute(text(SQL), {'quelle': quelle}).fetchall()
+        conn.close()
+        return [mon[0] for mon in result]
@@ -0,0 +1,39 @@
+from datetime import date
+
+import pandas as pd
+
+from model.asof import AsOf
+from model.db_manager import DbManager
+from model.ean_aufloesung import EanAufloesung
+
+
+class Inventur():
+    '''Stellt die Daten der Berichte zur Inventur zusammen'''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def lieferantenartikel(self, stichtag: date) -> pd.DataFrame:
+        '''
+        Liefert die Lieferantenartikel mit Einkaufspreis, Artikelstamm und Lieferant, jeweils
+        in der am Stichtag gueltigen Fassung. Spalten: lief_nr, lief_name, lief_art_nr, ean,
+        art_nr, art_bez, wgr, wgr_bez, mengeneinheit, ek_netto, vk_brutto. 'art_nr' ist die
+        Haupt-EAN zur 'ean' des Lieferanten. Lieferantenartikel ohne Artikelstamm bleiben mit
+        leeren Artikelspalten erhalten.
+        '''
+        asof = AsOf(self.db_manager)
+        df_liefart = asof.gueltig_am('sat_scs_liefart_t', stichtag, ['lief_art_nr', 'ek_netto'])
+        df_artikel = asof.gueltig_am('sat_artikel_t', stichtag, ['art_bez', 'wgr', 'mengeneinheit', 'vk_brutto'])
+        df_wgr = asof.gueltig_am('sat_warengruppen_t', stichtag, ['wgr_bez'])
+        df_lief = asof.gueltig_am('sat_lieferanten_t', stichtag, ['lief_name'])
+
+        # Lieferanten fuehren Artikel teils unter einer Mehrfach-EAN
+        df_liefart['art_nr'] = EanAufloesung.fuer(self.db_manager).aufloesen_serie(df_liefart['ean'])
+
+        df = df_liefart.merge(df_artikel, on='art_nr', how='left')
+        df = df.merge(df_wgr, on='wgr', how='left')
+        df = df.merge(df_lief, on='lief_nr', how='left')
+        df = df[['lief_nr', 'lief_name', 'lief_art_nr', 'ean', 'art_nr', 'art_bez', 'wgr', 'wgr_bez',
+                 'mengeneinheit', 'ek_netto', 'vk_brutto']]
+        return df.sort_values(['lief_nr', 'lief_art_nr', 'ean'], ignore_index=True)
@@ -1,12 +1,26 @@
 from datetime import date, datetime
-from hashlib import md5
 from typing import List
 
 import pandas as pd
 import numpy as np
 from sqlalchemy import Engine, Table, join, select, text, Connection
 
+from model.archiv import pruefe_jahre
 from model.db_manager import DbManager
+from model.fortschritt import FortschrittMelder, schreibe_in_bloecken, zaehle_zeilen
+from model.import_log import ImportProtokoll
+from model.import_status import QUELLE_KASSENJOURNAL, ImportStatus, melde_import
+from model.kunden_statistik import aktualisiere_kunden_statistik
+from model.pit import aktualisiere_pit_tage
+from model.schluessel import aktualisiere_schluessel, ergaenze_fremdschluessel
+from model.storno import aktualisiere_stornos
+from model.traffic import aktualisiere_traffic_tage
+from model.umsatz import aktualisiere_umsatz_tage
+from model.warenkorb import aktualisiere_warenkorb
+from model.zahlungen import schreibe_zahlungen
+from model.zeitcode import ergaenze_tag_nr
+
+QUELLE = QUELLE_KASSENJOURNAL
 
 
 def date_parser(ds: str) -> datetime:
@@ -16,6 +30,9 @@ def date_parser(ds: str) -> datetime:
 class KassenjournalImporter():
     '''Uebernimmt den Import des Kassenjournals in die Datenbank'''
 
+    BLOCKGROESSE = 10_000
+    '''Zeilen je Block beim Einlesen und Verarbeiten, nach jedem Block wird der Fortschritt gemeldet'''
+
     def __init__(self, db_manager: DbManager, import_file: str, export_date: date) -> None:
         self.db_manager = db_manager
         self.import_file = import_file
@@ -24,6 +41,13 @@ class KassenjournalImporter():
         self.tab_kj: Table = None
         self.tab_kjt: Table = None
         self.export_date: date = export_date
+        self.protokoll = ImportProtokoll(self.__class__.__name__, import_file)
+        self.fortschritt = FortschrittMelder(self.__class__.__name__, self._listeners)
+        self.ts = datetime.now()
+
+    def add_listener(self, listener) -> None:
+        '''Registriert einen Listener fuer die Fortschrittsmeldungen'''
+        self._listeners.add(listener)
 
     def write_data(self) -> None:
         '''
@@ -40,12 +64,13 @@ class KassenjournalImporter():
 
         conn = self.db_manager.get_engine().connect()
         with conn:
+            pruefe_jahre(conn, self.df.bon_abschluss.dt.year.unique())
             conn.execute(self.tab_kjt.delete())
             conn.execute(self.tab_bons_temp.delete())
             conn.execute(self.tab_bon_pos_temp.delete())
 
-            self.df.to_sql(self.tab_kjt.name, conn,
-                           if_exists='append', index=False)
+            schreibe_in_bloecken(self.db_manager.skaliere(self.df, self.tab_kjt.name), self.tab_kjt.name, conn, self.fortschritt)
+            self.protokoll.zaehle(geschrieben=len(self.df))
             conn.commit()
         conn.close()
 
@@ -55,9 +80,12 @@ class KassenjournalImporter():
         muss dann die Uebertragung in die Zieltabelle mittels ::update_table gestartet werden.
         '''
 
-        ts = datetime.now()
-        df = pd.read_csv(
-            self.import_file, sep=';', decimal=',', encoding='utf8',
+        ts = self.ts
+        gesamt = zaehle_zeilen(self.import_file)
+        self.fortschritt.melde('load_file', 0, gesamt)
+        bloecke = []
+        with pd.read_csv(
+            self.import_file, sep=';', decimal=',', encoding='utf8', chunksize=self.BLOCKGROESSE,
             usecols=['Kassen-Nr.', 'Bon-Nr.', 'Zeitpunkt', 'Beginn', 'Verkäufer', 'Kunden-Nr.', 'Bon-Summe', 'Typ', 'Artikelnummer',
                      'Bezeichnung', 'Warengruppe', 'MwSt.-Satz', 'Mengenfaktor', 'Menge', 'Preis', 'Gesamt', 'Infotext', 'Stornoreferenz', 'TSE-Info'],
             dtype={
@@ -76,7 +104,12 @@ class KassenjournalImporter():
                 'Stornoreferenz': str,
                 'TSE-Info': str
             },
-        ).rename(columns={
+        ) as reader:
+            for block in reader:
+                bloecke.append(block)
+                self.fortschritt.melde('load_file', sum(len(b) for b in bloecke), gesamt)
+
+        df = pd.concat(bloecke, ignore_index=True).rename(columns={
             'Kassen-Nr.': 'kasse_nr',
             'Bon-Nr.': 'bon_nr',
             'Beginn': 'bon_beginn',
@@ -112,26 +145,40 @@ class KassenjournalImporter():
         df['bon_abschluss'] = pd.to_datetime(
             df['bon_abschluss'], format='%d.%m.%Y %H:%M:%S')
         df['hash'] = (df['kasse_nr'].astype(str) + ":" + df['bon_nr'].astype(str) + ":" +
-                      df['pos'].astype(str)).apply(lambda data: md5(data.encode('utf-8')).hexdigest())
+                      df['pos'].astype(str)).pipe(self.db_manager.hashe)
         df['bon_typ'] = df['typ'].str.split('|', expand=True)[0].str.strip()
         df['pos_typ'] = df['typ'].str.split('|', expand=True)[1].str.strip()
 
+        self.protokoll.zaehle(gelesen=len(df))
         self.df = df
 
     def post_process(self) -> None:
         '''Nach der Beladung der Zwischentabelle wird mittels dieser Methode die Beladung der Zieltabellen gestartet.'''
         conn = self.db_manager.get_engine().connect()
         with conn:
-            self._fuelle_kassenjournal(conn)
-            self._belade_bons_temp(conn)
-            self._belade_bons(conn)
-            self._belade_bon_pos_temp(conn)
-            self._belade_bon_pos(conn)
-            self._belade_kalender(conn)
+            # Stornoverweise und Kundenstatistik lesen die Bons aller Jahre
+            self.db_manager.haenge_archive_an(conn)
+            self.protokoll.schritt(self._fuelle_kassenjournal, conn)
+            self.protokoll.schritt(self._belade_zahlungen, conn)
+            self.protokoll.schritt(self._belade_bons_temp, conn)
+            neue_bons = self.protokoll.schritt(self._belade_bons, conn)
+            self.protokoll.schritt(aktualisiere_stornos, conn)
+            self.protokoll.schritt(self._belade_bon_pos_temp, conn)
+            self.protokoll.schritt(self._belade_bon_pos, conn)
+            self.protokoll.schritt(self._belade_kalender, conn)
+            self.protokoll.schritt(self._vergebe_schluessel, conn)
+            self.protokoll.schritt(aktualisiere_umsatz_tage, conn)
+            self.protokoll.schritt(ergaenze_tag_nr, conn)
+            self.protokoll.schritt(aktualisiere_traffic_tage, conn)
+            self.protokoll.schritt(aktualisiere_warenkorb, conn)
+            self.protokoll.schritt(aktualisiere_pit_tage, conn)
+            self.protokoll.schritt(aktualisiere_kunden_statistik, conn)
+            melde_import(conn, QUELLE, self.export_date, self.ts, len(self.df), neue_bons,
+                         monate=self.df.bon_abschluss.dt.strftime('%Y-%m').unique())
             conn.commit()
         conn.close()
 
-    def _fuelle_kassenjournal(self, conn: Connection) -> None:
+    def _fuelle_kassenjournal(self, conn: Connection) -> int:
         '''Zieltabelle der Kassenjournale fuellen.'''
 
         sql = '''
@@ -169,9 +216,13 @@ class KassenjournalImporter():
 
         WHERE kj.hash IS NULL
         '''
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
+
+    def _belade_zahlungen(self, conn: Connection) -> int:
+        '''Die Zahlungszeilen der gelesenen Daten klassifizieren und in die Zahlungen schreiben'''
+        return schreibe_zahlungen(conn, self.df)
 
-    def _belade_bons_temp(self, conn: Connection) -> None:
+    def _belade_bons_temp(self, conn: Connection) -> int:
         '''Aus der Kassenjournal-Zwischentabelle wird die Kassenbons-Zwischentabelle befuellt'''
 
         sql = '''
@@ -243,7 +294,7 @@ class KassenjournalImporter():
         '''
         df_bon_zwischen = pd.read_sql_query(text(sql), conn)
         df_bon_zwischen['hash'] = (df_bon_zwischen['kasse_nr'].astype(
-            str) + ":" + df_bon_zwischen['bon_nr'].astype(str)).apply(lambda data: md5(data.encode('utf-8')).hexdigest())
+            str) + ":" + df_bon_zwischen['bon_nr'].astype(str)).pipe(self.db_manager.hashe)
         df_bon_zwischen['eintrag_ts'] = pd.to_datetime(
             df_bon_zwischen.eintrag_ts)
         df_bon_zwischen['bon_beginn'] = pd.to_datetime(
@@ -254,15 +305,26 @@ class KassenjournalImporter():
             df_bon_zwischen.bon_abschluss).dt.date
 
         conn.execute(self.tab_bons_temp.delete())
-        df_bon_zwischen.to_sql(self.tab_bons_temp.name,
-                               conn, index=False, if_exists='append')
+        schreibe_in_bloecken(df_bon_zwischen, self.tab_bons_temp.name, conn, self.fortschritt, 'belade_bons_temp')
+        return len(df_bon_zwischen)
 
-    def _belade_bons(self, conn: Connection) -> None:
+    def _belade_bons(self, conn: Connection) -> int:
         '''Aus der Kassenbons-Zwischentabelle wird die Kassenbons-Zieltabelle befuellt'''
         sql = '''
-        INSERT INTO kassenbons_t
+        INSERT INTO kassenbons_t (hash, eintrag_ts, kasse_nr, bon_nr, bon_typ, bon_beginn, bon_abschluss, bon_datum, kdnr, bon_summe, tse_info, storno_ref)
         SELECT
-            bt.*
+            bt.hash,
+            bt.eintrag_ts,
+            bt.kasse_nr,
+            bt.bon_nr,
+            bt.bon_typ,
+            bt.bon_beginn,
+            bt.bon_abschluss,
+            bt.bon_datum,
+            bt.kdnr,
+            bt.bon_summe,
+            bt.tse_info,
+            bt.storno_ref
             
         FROM temp_kassenbons_t AS bt
 
@@ -271,9 +333,9 @@ class KassenjournalImporter():
 
         WHERE b.hash IS NULL
         '''
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
 
-    def _belade_bon_pos_temp(self, conn: Connection) -> None:
+    def _belade_bon_pos_temp(self, conn: Connection) -> int:
         '''Aus der Kassenjournal-Zwischentabelle wird die Kassenpositionen-Zwischentabelle befuellt'''
 
         sql = 'SELECT kjt.* FROM temp_kassenjournal_t AS kjt ORDER BY kjt.kasse_nr, kjt.bon_nr, kjt.pos'
@@ -292,7 +354,7 @@ class KassenjournalImporter():
             ~(df['wgr'].astype(str).str.contains('fehlt', case=False)), "0:0")
 
         df['hash_bon'] = (df['kasse_nr'].astype(str) + ":" + df['bon_nr'].astype(str)
-                          ).apply(lambda data: md5(data.encode('utf-8')).hexdigest())
+                          ).pipe(self.db_manager.hashe)
 
         df = df.drop(
             columns=[
@@ -304,6 +366,8 @@ class KassenjournalImporter():
         df['hash_fuehrend'] = None
         old_pos = None
         for i in range(len(df)):
+            if i % self.BLOCKGROESSE == 0:
+                self.fortschritt.melde('belade_bon_pos_temp', i, len(df))
             if not old_pos:
                 old_pos = df.loc[i, "hash"]
 
@@ -313,16 +377,33 @@ class KassenjournalImporter():
             else:
                 df.loc[i, 'hash_fuehrend'] = old_pos
         conn.execute(self.tab_bon_pos_temp.delete())
-        df.to_sql(self.tab_bon_pos_temp.name, conn,
-                  index=False, if_exists='append')
+        schreibe_in_bloecken(df, self.tab_bon_pos_temp.name, conn, self.fortschritt, 'schreibe_bon_pos_temp')
+        return len(df)
 
-    def _belade_bon_pos(self, conn: Connection) -> None:
+    def _belade_bon_pos(self, conn: Connection) -> int:
         '''Aus der Bonpositionen-Zwischentabelle wird die Bonpositionen-Zieltabelle befuellt'''
 
         sql = '''
-        INSERT INTO kassenbons_pos_t
+        INSERT INTO kassenbons_pos_t (hash, hash_bon, hash_fuehrend, eintrag_ts, kasse_nr, bon_nr, pos, pos_typ, art_nr, art_bez, mwst_satz, mengenfaktor, menge, preis_einzel, preis_gesamt, wgr, wgr_bez, ma_id)
         SELECT
-            bt.*
+            bt.hash,
+            bt.hash_bon,
+            bt.hash_fuehrend,
+            bt.eintrag_ts,
+            bt.kasse_nr,
+            bt.bon_nr,
+            bt.pos,
+            bt.pos_typ,
+            bt.art_nr,
+            bt.art_bez,
+            bt.mwst_satz,
+            bt.mengenfaktor,
+            bt.menge,
+            bt.preis_einzel,
+            bt.preis_gesamt,
+            bt.wgr,
+            bt.wgr_bez,
+            bt.ma_id
             
         FROM temp_kassenbons_pos_t AS bt
 
@@ -331,9 +412,9 @@ class KassenjournalImporter():
 
         WHERE b.hash IS NULL
         '''
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
 
-    def _belade_kalender(self, conn: Connection) -> None:
+    def _belade_kalender(self, conn: Connection) -> int:
         '''
         Laedt die vergebenen Datuemer in den Bons, ermittelt dazu Jahr, Monat, Tag, Wochentag und Kalenderwoche und schreibt diese in die Kalender-Zwischentabelle
         '''
@@ -369,7 +450,15 @@ class KassenjournalImporter():
             
         WHERE k.datum IS NULL
         """
-        conn.execute(text(sql_upd))
+        return conn.execute(text(sql_upd)).rowcount
+
+    def _vergebe_schluessel(self, conn: Connection) -> int:
+        '''
+        Vergibt die Nummern der neuen Kalendertage und Bons und traegt die Fremdschluessel der
+        Bons und Positionen nach
+        '''
+        zeilen = aktualisiere_schluessel(conn, 'kalender_t') + aktualisiere_schluessel(conn, 'kassenbons_t')
+        return zeilen + ergaenze_fremdschluessel(conn)
 
 class KassenjournalStatus():
     '''Holt Informationen zu den gespeicherten Kassenjournaldaten'''
@@ -381,21 +470,7 @@ class KassenjournalStatus():
     @property
     def monate(self) -> List[str]:
         '''Liefert eine Liste der importierten Monate'''
-
-        SQL = """
-        SELECT DISTINCT
-            strftime('%Y-%m', bons.bon_datum) as monat
-            
-        FROM kassenbons_t AS bons
-
-        ORDER BY 1
-        """
-        result = None
-        conn = self.db_manager.get_engine().connect()
-        with conn:
-            result = conn.execute(text(SQL))
-        conn.close()
-        return [mon[0] for mon in result] or []
+        return ImportStatus(self.db_manager).monate(QUELLE)
 
     @property
     def letzte_aenderung(self) -> datetime:
@@ -404,17 +479,14 @@ class KassenjournalStatus():
         Wurde also ein Import ausgeführt, der keine Veränderung bewirkte, 
         weil z.B. ein Protokoll mehrfach importiert wurde, wird auch keine Änderung dokumentiert
         '''
-        SQL = """
-        SELECT
-            MAX(datetime(bons.eintrag_ts)) as zeitpunkt
-            
-        FROM kassenbons_t AS bons
-        """
-        conn = self.db_manager.get_engine().connect()
-        with conn:
-            result = conn.execute(text(SQL)).fetchone()
-            if result[0]:
-                return datetime.strptime(result[0], '%Y-%m-%d %H:%M:%S')
-            else:
-                return None
-        conn.close()
+        return ImportStatus(self.db_manager).letzte_aenderung(QUELLE)
+
+    @property
+    def letzte_datei(self) -> datetime:
+        '''Ermittelt das Exportdatum des jüngsten importierten Kassenjournals'''
+        return ImportStatus(self.db_manager).letzte_datei(QUELLE)
+
+    @property
+    def letzter_import(self) -> datetime:
+        '''Ermittelt den Zeitpunkt des letzten Imports'''
+        return ImportStatus(self.db_manager).letzter_import(QUELLE)
@@ -2,9 +2,15 @@ import pandas as pd
 import numpy as np
 from sqlalchemy import Connection, Table, text
 from datetime import datetime, date
-from hashlib import md5
 
 from model.db_manager import DbManager
+from model.fortschritt import FortschrittMelder, schreibe_in_bloecken
+from model.import_log import ImportProtokoll
+from model.import_status import ImportStatus, melde_import
+from model.pit import aktualisiere_pit_schluessel
+from model.schluessel import aktualisiere_schluessel
+
+QUELLE = 'scs_export_kunden'
 
 
 class KundenImporter():
@@ -17,8 +23,14 @@ class KundenImporter():
         self.df: pd.DataFrame = None
         self.tab_temp: Table = None
         self.export_date: date = export_date
+        self.protokoll = ImportProtokoll(self.__class__.__name__, import_file)
+        self.fortschritt = FortschrittMelder(self.__class__.__name__, self._listeners)
         self.ts = datetime.now()
 
+    def add_listener(self, listener) -> None:
+        '''Registriert einen Listener fuer die Fortschrittsmeldungen'''
+        self._listeners.add(listener)
+
     def write_data(self) -> None:
         '''
         Schreibt die gelesenen Daten in die Datenbank.
@@ -30,8 +42,8 @@ class KundenImporter():
         with conn:
             conn.execute(self.tab_temp.delete())
 
-            self.df.to_sql(self.tab_temp.name, conn,
-                           if_exists='append', index=False)
+            schreibe_in_bloecken(self.df, self.tab_temp.name, conn, self.fortschritt)
+            self.protokoll.zaehle(geschrieben=len(self.df))
             conn.commit()
         conn.close()
 
@@ -54,10 +66,11 @@ class KundenImporter():
         df_kdn['rabatt_satz'] = df_kdn['rabatt_satz'].astype(np.float64)
         df_kdn['eintrag_ts'] = pd.to_datetime(self.ts)
         df_kdn['export_datum'] = pd.to_datetime(self.export_date)
-        df_kdn['quelle'] = 'scs_export_kunden'
-        df_kdn['hash'] = df_kdn['kdnr'].astype(str).apply(lambda s: md5(s.encode('utf-8')).hexdigest())
-        df_kdn['hash_diff'] = (df_kdn['kd_name'].astype(str) + ':' + df_kdn['rabatt_satz'].astype(str)).apply(lambda s: md5(s.encode('utf-8')).hexdigest())
+        df_kdn['quelle'] = QUELLE
+        df_kdn['hash'] = df_kdn['kdnr'].astype(str).pipe(self.db_manager.hashe)
+        df_kdn['hash_diff'] = (df_kdn['kd_name'].astype(str) + ':' + df_kdn['rabatt_satz'].astype(str)).pipe(self.db_manager.hashe)
 
+        self.protokoll.zaehle(gelesen=len(df_kdn))
         self.df = df_kdn
 
     def post_process(self) -> None:
@@ -65,14 +78,17 @@ class KundenImporter():
 
         conn = self.db_manager.get_engine().connect()
         with conn:
-            self._belade_hub(conn)
-            self._update_zuletzt_gesehen(conn)
-            self._loesche_ungueltige_sat(conn)
-            self._fuege_neue_sat_ein(conn)
+            geaendert = self.protokoll.schritt(self._belade_hub, conn)
+            self.protokoll.schritt(self._vergebe_ids, conn)
+            self.protokoll.schritt(self._update_zuletzt_gesehen, conn)
+            geaendert += self.protokoll.schritt(self._loesche_ungueltige_sat, conn)
+            geaendert += self.protokoll.schritt(self._fuege_neue_sat_ein, conn)
+            self.protokoll.schritt(self._aktualisiere_pit, conn)
+            melde_import(conn, QUELLE, self.export_date, self.ts, len(self.df), geaendert)
             conn.commit()
         conn.close()
 
-    def _belade_hub(self, conn: Connection) -> None:
+    def _belade_hub(self, conn: Connection) -> int:
         '''belaedt erstmal den HUB'''
 
         sql = '''
@@ -94,9 +110,9 @@ class KundenImporter():
 
         '''
 
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
 
-    def _loesche_ungueltige_sat(self, conn: Connection) -> None:
+    def _loesche_ungueltige_sat(self, conn: Connection) -> int:
         '''
         Setzt Eintraege in 'sat_kunden_t' ungueltig, fuer die aktualisierte Eintraege
         vorhanden sind. Bestehende Eintraege, die nicht in der Eingabedatei vorkommen, bleiben
@@ -121,9 +137,9 @@ class KundenImporter():
             AND 	t.hash_diff <> s.hash_diff
         )
         '''
-        conn.execute(text(sql), {'gueltig_ets': self.ts, 'gueltig_edtm': self.export_date})
+        return conn.execute(text(sql), {'gueltig_ets': self.ts, 'gueltig_edtm': self.export_date}).rowcount
 
-    def _fuege_neue_sat_ein(self, conn: Connection) -> None:
+    def _fuege_neue_sat_ein(self, conn: Connection) -> int:
         '''
         Fuegt neue Eintraege aus in 'sat_kunden_t' ein bzw. Eintraege, fuer die aktuellere
         Daten vorhanden sind.
@@ -150,9 +166,9 @@ class KundenImporter():
 
         WHERE s.hash IS NULL
         '''
-        conn.execute(text(sql), {'gueltig_adtm': self.export_date})
+        return conn.execute(text(sql), {'gueltig_adtm': self.export_date}).rowcount
 
-    def _update_zuletzt_gesehen(self, conn: Connection) -> None:
+    def _update_zuletzt_gesehen(self, conn: Connection) -> int:
         '''Setzt das 'zuletzt_gesehen'-Datum im HUB'''
         sql = '''
         UPDATE hub_kunden_t
@@ -168,7 +184,15 @@ class KundenImporter():
         ) AS bas
         WHERE bas.hash = hub_kunden_t.hash
         '''
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
+
+    def _vergebe_ids(self, conn: Connection) -> int:
+        '''Vergibt die Nummern der neuen Hub-Eintraege und traegt die Fremdschluessel auf sie nach'''
+        return aktualisiere_schluessel(conn, 'hub_kunden_t')
+
+    def _aktualisiere_pit(self, conn: Connection) -> int:
+        '''Berechnet die PIT-Tabelle fuer die geaenderten Eintraege neu'''
+        return aktualisiere_pit_schluessel(conn, 'sat_kunden_t')
 
 
 class KundenStatus():
@@ -182,16 +206,11 @@ class KundenStatus():
     def letzte_datei(self) -> datetime:
         '''
         Ermittelt das Datum der Datei mit dem jüngsten Import in der Datenbank.
-        Dazu wird das neueste 'zuletzt_gesehen'-Datum ermittelt
+        Der Stand wird beim Import in 'import_status_t' festgehalten.
         '''
-        SQL = """
-        SELECT MAX(h.zuletzt_gesehen) AS zeitpunkt FROM hub_kunden_t AS h
-        """
-        conn = self.db_manager.get_engine().connect()
-        with conn:
-            result = conn.execute(text(SQL)).fetchone()
-            if result[0]:
-                return datetime.strptime(result[0], '%Y-%m-%d %H:%M:%S.%f')
-            else:
-                return None
-        conn.close()
+        return ImportStatus(self.db_manager).letzte_datei(QUELLE)
+
+    @property
+    def letzter_import(self) -> datetime:
+        '''Ermittelt den Zeitpunkt des letzten Imports'''
+        return ImportStatus(self.db_manager).letzter_import(QUELLE)
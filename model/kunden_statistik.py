@@ -0,0 +1,152 @@
+'''
+Besuchshaeufigkeit je Kunde. 'kunden_statistik_t' haelt je Kundennummer erste und letzte
+Einkaufstage, Anzahl Besuche (Tage mit Einkauf), Bons und Umsatz, die Besuche der letzten
+4, 13 und 52 Wochen sowie den mittleren Abstand zwischen zwei Besuchen. Die gleitenden
+Werte beziehen sich auf 'stand_datum', den juengsten Bontag beim Berechnen der Zeile.
+Bons ohne Kunde (kdnr 0 oder leer) zaehlen nicht.
+'''
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Connection, text
+
+from model.db_manager import CENT, DbManager, ganzzahlig, lies_betrag_ganzzahl
+
+FENSTER_WOCHEN = (4, 13, 52)
+'''Zeitfenster der gleitenden Besuchszahlen in Wochen'''
+
+SQL_BONS = '''
+SELECT
+    b.kdnr,
+    b.bon_datum,
+    b.bon_summe
+
+FROM {bons} AS b
+
+WHERE b.kdnr IS NOT NULL
+    AND b.kdnr NOT IN ('', '0')
+    {filter}
+'''
+
+
+def berechne_kunden_statistik(df_bons: pd.DataFrame, stand_datum: date, ganzzahl: bool = False) -> pd.DataFrame:
+    '''
+    Berechnet die Statistik aus den Bons (kdnr, bon_datum, bon_summe) fuer alle enthaltenen
+    Kunden in einem Durchlauf je Kennzahl. Liefert eine Zeile je Kunde mit den Spalten
+    von 'kunden_statistik_t'. 'ganzzahl' ist die Speicherform der Bonsummen.
+    '''
+    df = df_bons.assign(bon_datum=pd.to_datetime(df_bons['bon_datum']),
+                        bon_summe=ganzzahlig(df_bons['bon_summe'], CENT, ganzzahl))
+    stand = pd.Timestamp(stand_datum)
+
+    # ein Besuch ist ein Tag mit mindestens einem Bon
+    df_besuche = df.groupby(['kdnr', 'bon_datum'], sort=False).size().reset_index(name='anz_bons')
+    alter = (stand - df_besuche['bon_datum']).dt.days.to_numpy()
+
+    je_kunde = df_besuche.groupby('kdnr')
+    df_stat = pd.DataFrame({
+        'erster_besuch': je_kunde['bon_datum'].min(),
+        'letzter_besuch': je_kunde['bon_datum'].max(),
+        'anz_besuche': je_kunde.size(),
+        'anz_bons': je_kunde['anz_bons'].sum(),
+        'umsatz': df.groupby('kdnr')['bon_summe'].sum() / CENT
+    })
+    for wochen in FENSTER_WOCHEN:
+        im_fenster = pd.Series((alter >= 0) & (alter < wochen * 7), index=df_besuche.index)
+        df_stat[f'besuche_{wochen}w'] = im_fenster.groupby(df_besuche['kdnr']).sum()
+
+    # mittlerer Abstand = Spanne zwischen erstem und letztem Besuch / Anzahl Abstaende
+    spanne = (df_stat['letzter_besuch'] - df_stat['erster_besuch']).dt.days
+    abstaende = df_stat['anz_besuche'] - 1
+    df_stat['mittlerer_abstand'] = np.where(abstaende > 0, spanne / abstaende.where(abstaende > 0, 1), np.nan)
+
+    df_stat['erster_besuch'] = df_stat['erster_besuch'].dt.strftime('%Y-%m-%d')
+    df_stat['letzter_besuch'] = df_stat['letzter_besuch'].dt.strftime('%Y-%m-%d')
+    df_stat['stand_datum'] = stand.strftime('%Y-%m-%d')
+    return df_stat.rename_axis('kdnr').reset_index()
+
+
+def _bons(conn: Connection) -> str:
+    '''Die Sicht der Bons ueber Datenbank und Jahresarchive, wenn sie angelegt ist (model.archiv), sonst 'kassenbons_t' '''
+    sicht = conn.execute(text(
+        "SELECT m.name FROM sqlite_temp_master AS m WHERE m.type = 'view' AND m.name = 'jahre_kassenbons_t'")).scalar()
+    return sicht or 'kassenbons_t'
+
+
+def _schreibe(conn: Connection, filter_bons: str) -> int:
+    '''Berechnet die Kunden aus den Bons mit dem Filter neu und ersetzt ihre Zeilen'''
+    stand_datum = conn.execute(text('SELECT MAX(b.bon_datum) FROM kassenbons_t AS b')).scalar()
+    if not stand_datum:
+        return 0
+    df_bons = pd.read_sql_query(text(SQL_BONS.format(bons=_bons(conn), filter=filter_bons)), conn)
+    df_stat = berechne_kunden_statistik(df_bons, date.fromisoformat(stand_datum), lies_betrag_ganzzahl(conn))
+
+    conn.execute(text(f'''
+        DELETE FROM kunden_statistik_t
+        WHERE kdnr IN (SELECT b.kdnr FROM kassenbons_t AS b WHERE 1 = 1 {filter_bons})
+        '''))
+    df_stat.to_sql('kunden_statistik_t', conn, if_exists='append', index=False)
+    return len(df_stat)
+
+
+def aktualisiere_kunden_statistik(conn: Connection) -> int:
+    '''
+    Berechnet die Statistik fuer alle Kunden neu, die in den Bons des laufenden Imports
+    (temp_kassenbons_t) vorkommen, jeweils aus ihrer gesamten Historie in 'kassenbons_t' und
+    den angehaengten Jahresarchiven.
+    '''
+    return _schreibe(conn, 'AND b.kdnr IN (SELECT DISTINCT bt.kdnr FROM temp_kassenbons_t AS bt)')
+
+
+def uebernimm_bestand(conn: Connection) -> None:
+    '''Migration: berechnet die Statistik fuer alle Kunden'''
+    conn.execute(text('DELETE FROM kunden_statistik_t'))
+    _schreibe(conn, '')
+
+
+class KundenFrequenz():
+    '''Liest die Besuchshaeufigkeit der Kunden aus 'kunden_statistik_t' '''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def je_kunde(self, min_besuche: int = 1) -> pd.DataFrame:
+        '''
+        Liefert eine Zeile je Kunde mit mindestens 'min_besuche' Besuchen, mit dem aktuellen
+        Namen aus dem Kundenstamm, nach Anzahl Besuche absteigend sortiert.
+        '''
+        sql = '''
+        SELECT
+            ks.kdnr,
+            s.kd_name,
+            ks.erster_besuch,
+            ks.letzter_besuch,
+            ks.anz_besuche,
+            ks.anz_bons,
+            ks.umsatz,
+            ks.besuche_4w,
+            ks.besuche_13w,
+            ks.besuche_52w,
+            ks.mittlerer_abstand,
+            ks.stand_datum
+
+        FROM kunden_statistik_t AS ks
+
+        LEFT JOIN hub_kunden_t AS h
+            ON	h.kdnr = ks.kdnr
+
+        LEFT JOIN sat_kunden_t AS s
+            ON	s.hash = h.hash
+            AND s.gueltig = 1
+
+        WHERE ks.anz_besuche >= :min_besuche
+
+        ORDER BY ks.anz_besuche DESC, ks.kdnr
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            df = pd.read_sql_query(text(sql), conn, params={'min_besuche': min_besuche})
+        conn.close()
+        return df
@@ -2,9 +2,15 @@ import pandas as pd
 import numpy as np
 from sqlalchemy import Connection, Table, text
 from datetime import datetime, date
-from hashlib import md5
 
 from model.db_manager import DbManager, concat
+from model.fortschritt import FortschrittMelder, schreibe_in_bloecken
+from model.import_log import ImportProtokoll
+from model.import_status import ImportStatus, melde_import
+from model.pit import aktualisiere_pit_schluessel
+from model.schluessel import aktualisiere_schluessel
+
+QUELLE = 'scs_export_mehrfach-ean'
 
 class MehrfachEanImporter():
     '''Uebernimmt den Import der Mehrfach-EANs in die Datenbank'''
@@ -16,8 +22,14 @@ class MehrfachEanImporter():
         self.df: pd.DataFrame = None
         self.tab_temp: Table = None
         self.export_date: date = export_date
+        self.protokoll = ImportProtokoll(self.__class__.__name__, import_file)
+        self.fortschritt = FortschrittMelder(self.__class__.__name__, self._listeners)
         self.ts = datetime.now()
 
+    def add_listener(self, listener) -> None:
+        '''Registriert einen Listener fuer die Fortschrittsmeldungen'''
+        self._listeners.add(listener)
+
     def write_data(self) -> None:
         '''
         Schreibt die gelesenen Daten in die Datenbank.
@@ -29,8 +41,8 @@ class MehrfachEanImporter():
         with conn:
             conn.execute(self.tab_temp.delete())
 
-            self.df.to_sql(self.tab_temp.name, conn,
-                           if_exists='append', index=False)
+            schreibe_in_bloecken(self.df, self.tab_temp.name, conn, self.fortschritt)
+            self.protokoll.zaehle(geschrieben=len(self.df))
             conn.commit()
         conn.close()
 
@@ -49,12 +61,13 @@ class MehrfachEanImporter():
             columns={'Mehrfach-EAN': 'ean_m', 'Haupt-EAN': 'ean_h'}
         ).drop_duplicates()
 
-        df['hash'] = df['ean_m'].astype(str).apply(lambda s: md5(s.encode('utf-8')).hexdigest() )
-        df['hash_diff'] = df['ean_h'].astype(str).apply(lambda s: md5(s.encode('utf-8')).hexdigest() )
+        df['hash'] = df['ean_m'].astype(str).pipe(self.db_manager.hashe)
+        df['hash_diff'] = df['ean_h'].astype(str).pipe(self.db_manager.hashe)
         df['eintrag_ts'] = pd.to_datetime(self.ts)
-        df['quelle'] = 'scs_export_mehrfach-ean'
+        df['quelle'] = QUELLE
         df['export_datum'] = pd.to_datetime(self.export_date)
 
+        self.protokoll.zaehle(gelesen=len(df))
         self.df = df
 
     def post_process(self) -> None:
@@ -62,14 +75,17 @@ class MehrfachEanImporter():
 
         conn = self.db_manager.get_engine().connect()
         with conn:
-            self._belade_hub(conn)
-            self._update_zuletzt_gesehen(conn)
-            self._loesche_ungueltige_sat(conn)
-            self._fuege_neue_sat_ein(conn)
+            geaendert = self.protokoll.schritt(self._belade_hub, conn)
+            self.protokoll.schritt(self._vergebe_ids, conn)
+            self.protokoll.schritt(self._update_zuletzt_gesehen, conn)
+            geaendert += self.protokoll.schritt(self._loesche_ungueltige_sat, conn)
+            geaendert += self.protokoll.schritt(self._fuege_neue_sat_ein, conn)
+            self.protokoll.schritt(self._aktualisiere_pit, conn)
+            melde_import(conn, QUELLE, self.export_date, self.ts, len(self.df), geaendert)
             conn.commit()
         conn.close()
 
-    def _belade_hub(self, conn: Connection) -> None:
+    def _belade_hub(self, conn: Connection) -> int:
         '''belaedt erstmal den HUB'''
 
         sql = '''
@@ -90,9 +106,9 @@ class MehrfachEanImporter():
         WHERE h.hash IS NULL
         '''
 
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
 
-    def _loesche_ungueltige_sat(self, conn: Connection) -> None:
+    def _loesche_ungueltige_sat(self, conn: Connection) -> int:
         '''
         Setzt Eintraege ungueltig, fuer die aktualisierte Eintraege
         vorhanden sind. Bestehende Eintraege, die nicht in der Eingabedatei vorkommen, bleiben
@@ -118,9 +134,9 @@ class MehrfachEanImporter():
             AND 	t.hash_diff <> s.hash_diff
         )
         '''
-        conn.execute(text(sql), {'gueltig_ets': self.ts, 'gueltig_edtm': self.export_date})
+        return conn.execute(text(sql), {'gueltig_ets': self.ts, 'gueltig_edtm': self.export_date}).rowcount
 
-    def _fuege_neue_sat_ein(self, conn: Connection) -> None:
+    def _fuege_neue_sat_ein(self, conn: Connection) -> int:
         '''
         Fuegt neue Eintraege aus der temp. Tabelle ein bzw. Eintraege, fuer die aktuellere
         Daten vorhanden sind.
@@ -147,9 +163,9 @@ class MehrfachEanImporter():
 
         WHERE s.hash IS NULL
         '''
-        conn.execute(text(sql), {'gueltig_adtm': self.export_date})
+        return conn.execute(text(sql), {'gueltig_adtm': self.export_date}).rowcount
 
-    def _update_zuletzt_gesehen(self, conn: Connection) -> None:
+    def _update_zuletzt_gesehen(self, conn: Connection) -> int:
         '''Setzt das 'zuletzt_gesehen'-Datum im HUB'''
         sql = '''
         UPDATE hub_mean_t
@@ -165,7 +181,15 @@ class MehrfachEanImporter():
         ) AS bas
         WHERE bas.hash = hub_mean_t.hash
         '''
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
+
+    def _vergebe_ids(self, conn: Connection) -> int:
+        '''Vergibt die Nummern der neuen Hub-Eintraege und traegt die Fremdschluessel auf sie nach'''
+        return aktualisiere_schluessel(conn, 'hub_mean_t')
+
+    def _aktualisiere_pit(self, conn: Connection) -> int:
+        '''Berechnet die PIT-Tabelle fuer die geaenderten Eintraege neu'''
+        return aktualisiere_pit_schluessel(conn, 'sat_mean_t')
 
 
 class MehrfachEanStatus():
@@ -179,16 +203,11 @@ class MehrfachEanStatus():
     def letzte_datei(self) -> datetime:
         '''
         Ermittelt das Datum der Datei mit dem jüngsten Import in der Datenbank.
-        Dazu wird das neueste 'zuletzt_gesehen'-Datum ermittelt
+        Der Stand wird beim Import in 'import_status_t' festgehalten.
         '''
-        SQL = """
-        SELECT MAX(h.zuletzt_gesehen) AS zeitpunkt FROM hub_mean_t AS h
-        """
-        conn = self.db_manager.get_engine().connect()
-        with conn:
-            result = conn.execute(text(SQL)).fetchone()
-            if result[0]:
-                return datetime.strptime(result[0], '%Y-%m-%d %H:%M:%S.%f')
-            else:
-                return None
-        conn.close()
+        return ImportStatus(self.db_manager).letzte_datei(QUELLE)
+
+    @property
+    def letzter_import(self) -> datetime:
+        '''Ermittelt den Zeitpunkt des letzten Imports'''
+        return ImportStatus(self.db_manager).letzter_import(QUELLE)
@@ -0,0 +1,104 @@
+'''
+Point-in-time-Tabellen (PIT) der Satelliten. Je Satellit 'sat_xyz_t' gibt es 'pit_xyz_t' mit
+einer Zeile je Hub-Schluessel und Verkaufstag aus 'kalender_t': (hash, datum, sat_eintrag_ats).
+'sat_eintrag_ats' verweist auf den an diesem Tag gueltigen Satelliteneintrag, historische
+Abfragen werden so zu Gleichheitsverknuepfungen statt Bereichsbedingungen:
+
+    JOIN pit_artikel_t AS pa
+        ON	pa.hash = h.hash
+        AND pa.datum = b.bon_datum
+    JOIN sat_artikel_t AS sa
+        ON	sa.hash = pa.hash
+        AND sa.eintrag_ats = pa.sat_eintrag_ats
+
+Die Tabellen werden nach jedem Import nur fuer die geaenderten Schluessel (Stammdaten) bzw.
+die Tage des Journals (Kassenjournal) neu berechnet.
+'''
+from sqlalchemy import Connection, text
+
+from model.asof import SATELLITEN
+
+SQL_PIT = '''
+INSERT OR REPLACE INTO {pit} (hash, datum, sat_eintrag_ats)
+SELECT
+    s.hash,
+    k.datum,
+    s.eintrag_ats
+
+FROM {sat} AS s
+
+JOIN {tage} AS k
+    ON	k.datum >= s.gueltig_adtm
+    AND k.datum < s.gueltig_edtm
+
+{filter}
+'''
+'''Ordnet jedem Tag den gueltigen Satelliteneintrag zu, 'tage' ist eine Tabelle mit Spalte 'datum' '''
+
+
+def pit_tabelle(sat: str) -> str:
+    '''Name der PIT-Tabelle zum Satelliten, z.B. 'sat_artikel_t' -> 'pit_artikel_t' '''
+    return 'pit_' + sat[len('sat_'):]
+
+
+def temp_tabelle(sat: str) -> str:
+    '''Name der Zwischentabelle des Imports zum Satelliten, z.B. 'sat_artikel_t' -> 'temp_artikel_t' '''
+    return 'temp_' + sat[len('sat_'):]
+
+
+def aktualisiere_pit_schluessel(conn: Connection, sat: str) -> int:
+    '''
+    Berechnet die PIT-Tabelle des Satelliten fuer alle Schluessel neu, die im laufenden Import
+    einen neuen Satelliteneintrag erhalten haben (erkennbar am Zeitstempel der Zwischentabelle).
+    Liefert die Anzahl geschriebener Zeilen.
+    '''
+    pit = pit_tabelle(sat)
+    conn.execute(text('DROP TABLE IF EXISTS temp.pit_schluessel_t'))
+    conn.execute(text(f'''
+        CREATE TEMP TABLE pit_schluessel_t AS
+        SELECT DISTINCT s.hash
+
+        FROM {temp_tabelle(sat)} AS t
+
+        JOIN {sat} AS s
+            ON	s.hash = t.hash
+            AND s.eintrag_ats = t.eintrag_ts
+        '''))
+    conn.execute(text(f'DELETE FROM {pit} WHERE hash IN (SELECT hash FROM temp.pit_schluessel_t)'))
+    zeilen = conn.execute(text(SQL_PIT.format(
+        pit=pit, sat=sat, tage='kalender_t',
+        filter='WHERE s.hash IN (SELECT hash FROM temp.pit_schluessel_t)'))).rowcount
+    conn.execute(text('DROP TABLE temp.pit_schluessel_t'))
+    return zeilen
+
+
+def aktualisiere_pit_tage(conn: Connection) -> int:
+    '''
+    Berechnet alle PIT-Tabellen fuer die Tage neu, die in den Bons des laufenden Imports
+    (temp_kassenbons_t) vorkommen. Muss nach dem Beladen von 'kalender_t' laufen.
+    '''
+    conn.execute(text('DROP TABLE IF EXISTS temp.pit_tage_t'))
+    conn.execute(text('''
+        CREATE TEMP TABLE pit_tage_t AS
+        SELECT DISTINCT k.datum
+
+        FROM kalender_t AS k
+
+        JOIN temp_kassenbons_t AS bt
+            ON	bt.bon_datum = k.datum
+        '''))
+    zeilen = 0
+    for sat in SATELLITEN:
+        pit = pit_tabelle(sat)
+        conn.execute(text(f'DELETE FROM {pit} WHERE datum IN (SELECT datum FROM temp.pit_tage_t)'))
+        zeilen += conn.execute(text(SQL_PIT.format(pit=pit, sat=sat, tage='temp.pit_tage_t', filter=''))).rowcount
+    conn.execute(text('DROP TABLE temp.pit_tage_t'))
+    return zeilen
+
+
+def uebernimm_bestand(conn: Connection) -> None:
+    '''Migration: berechnet alle PIT-Tabellen aus den bestehenden Satelliten und Verkaufstagen'''
+    for sat in SATELLITEN:
+        pit = pit_tabelle(sat)
+        conn.execute(text(f'DELETE FROM {pit}'))
+        conn.execute(text(SQL_PIT.format(pit=pit, sat=sat, tage='kalender_t', filter='')))
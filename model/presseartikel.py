@@ -2,9 +2,16 @@ import pandas as pd
 import numpy as np
 from sqlalchemy import Connection, Table, text
 from datetime import datetime, date
-from hashlib import md5
 
+from model.artikelsuche import aktualisiere_suchindex
 from model.db_manager import DbManager, concat
+from model.fortschritt import FortschrittMelder, schreibe_in_bloecken
+from model.import_log import ImportProtokoll
+from model.import_status import ImportStatus, melde_import
+from model.pit import aktualisiere_pit_schluessel
+from model.schluessel import aktualisiere_schluessel
+
+QUELLE = 'scs_export_presseartikel'
 
 
 class PresseArtikelImporter():
@@ -18,8 +25,14 @@ class PresseArtikelImporter():
         self.df_liefart: pd.DataFrame = None
         self.tab_temp: Table = None
         self.export_date: date = export_date
+        self.protokoll = ImportProtokoll(self.__class__.__name__, import_file)
+        self.fortschritt = FortschrittMelder(self.__class__.__name__, self._listeners)
         self.ts = datetime.now()
 
+    def add_listener(self, listener) -> None:
+        '''Registriert einen Listener fuer die Fortschrittsmeldungen'''
+        self._listeners.add(listener)
+
     def write_data(self) -> None:
         '''
         Schreibt die gelesenen Daten in die Datenbank.
@@ -33,11 +46,10 @@ class PresseArtikelImporter():
             conn.execute(self.tab_temp_artikel.delete())
             conn.execute(self.tab_temp_liefart.delete())
 
-            self.df_artikel.to_sql(self.tab_temp_artikel.name, conn,
-                                   if_exists='append', index=False)
+            schreibe_in_bloecken(self.db_manager.skaliere(self.df_artikel, self.tab_temp_artikel.name), self.tab_temp_artikel.name, conn, self.fortschritt)
 
-            self.df_liefart.to_sql(self.tab_temp_liefart.name, conn,
-                                   if_exists='append', index=False)
+            schreibe_in_bloecken(self.db_manager.skaliere(self.df_liefart, self.tab_temp_liefart.name), self.tab_temp_liefart.name, conn, self.fortschritt)
+            self.protokoll.zaehle(geschrieben=len(self.df_artikel) + len(self.df_liefart))
             conn.commit()
         conn.close()
 
@@ -62,11 +74,12 @@ class PresseArtikelImporter():
             }
         )
         df['eintrag_ts'] = pd.to_datetime(self.ts)
-        df['quelle'] = 'scs_export_presseartikel'
+        df['quelle'] = QUELLE
         df['export_datum'] = pd.to_datetime(self.export_date)
 
         self.df_artikel = self._lade_artikel(df)
         self.df_liefart = self._lade_liefart(df)
+        self.protokoll.zaehle(gelesen=len(df))
 
     def _lade_artikel(self, df: pd.DataFrame) -> pd.DataFrame:
         '''
@@ -88,12 +101,11 @@ class PresseArtikelImporter():
             df_artikel['mwst_kz'] == '4', '9998:0', df_artikel['wgr'])
         df_artikel['wgr'] = np.where(
             df_artikel['mwst_kz'] == '0', '9997:0', df_artikel['wgr'])
-        df_artikel['hash'] = df['art_nr'].apply(
-            lambda s: md5(s.encode('utf-8')).hexdigest())
+        df_artikel['hash'] = df['art_nr'].pipe(self.db_manager.hashe)
         df_artikel['hash_diff'] = concat(
             df_artikel[['art_bez', 'vk_brutto', 'fsk_kz',
                         'scs_pool_id', 'mengenfaktor', 'preiseinheit', 'wgr']]
-        ).apply(lambda s: md5(s.encode('utf-8')).hexdigest())
+        ).pipe(self.db_manager.hashe)
         df_artikel = df_artikel.drop(columns=['mwst_kz'])
 
         return df_artikel.copy()
@@ -108,10 +120,8 @@ class PresseArtikelImporter():
         df_liefart['lief_art_nr'] = df_liefart['art_nr']
         df_liefart = df_liefart.rename(columns={'art_nr': 'ean'})
 
-        df_liefart['hash'] = concat(df_liefart[['ean', 'lief_nr']]).apply(
-            lambda s: md5(s.encode('utf-8')).hexdigest())
-        df_liefart['hash_diff'] = concat(df_liefart[['lief_art_nr', 'ek_netto']]).apply(
-            lambda s: md5(s.encode('utf-8')).hexdigest())
+        df_liefart['hash'] = concat(df_liefart[['ean', 'lief_nr']]).pipe(self.db_manager.hashe)
+        df_liefart['hash_diff'] = concat(df_liefart[['lief_art_nr', 'ek_netto']]).pipe(self.db_manager.hashe)
 
         return df_liefart.copy()
 
@@ -120,42 +130,42 @@ class PresseArtikelImporter():
 
         conn = self.db_manager.get_engine().connect()
         with conn:
-            self._belade_hub(conn)
-            self._update_zuletzt_gesehen(conn)
-            self._loesche_ungueltige_sat(conn)
-            self._fuege_neue_sat_ein(conn)
+            geaendert = self.protokoll.schritt(self._belade_hub, conn)
+            self.protokoll.schritt(self._vergebe_ids, conn)
+            self.protokoll.schritt(self._update_zuletzt_gesehen, conn)
+            geaendert += self.protokoll.schritt(self._loesche_ungueltige_sat, conn)
+            geaendert += self.protokoll.schritt(self._fuege_neue_sat_ein, conn)
+            self.protokoll.schritt(self._aktualisiere_pit, conn)
+            self.protokoll.schritt(aktualisiere_suchindex, conn)
+            melde_import(conn, QUELLE, self.export_date, self.ts, len(self.df_artikel), geaendert)
             conn.commit()
         conn.close()
 
-    def _belade_hub(self, conn: Connection) -> None:
+    def _belade_hub(self, conn: Connection) -> int:
         '''belaedt erstmal den HUB'''
 
-        self._artikel_belade_hub(conn)
-        self._liefart_belade_hub(conn)
+        return self._artikel_belade_hub(conn) + self._liefart_belade_hub(conn)
 
-    def _loesche_ungueltige_sat(self, conn: Connection) -> None:
+    def _loesche_ungueltige_sat(self, conn: Connection) -> int:
         '''
         Setzt Eintraege in 'sat_kunden_t' ungueltig, fuer die aktualisierte Eintraege
         vorhanden sind. Bestehende Eintraege, die nicht in der Eingabedatei vorkommen, bleiben
         unberuehrt.
         '''
-        self._artikel_loesche_ungueltige_sat(conn)
-        self._liefart_loesche_ungueltige_sat(conn)
+        return self._artikel_loesche_ungueltige_sat(conn) + self._liefart_loesche_ungueltige_sat(conn)
 
-    def _fuege_neue_sat_ein(self, conn: Connection) -> None:
+    def _fuege_neue_sat_ein(self, conn: Connection) -> int:
         '''
         Fuegt neue Eintraege aus in 'sat_kunden_t' ein bzw. Eintraege, fuer die aktuellere
         Daten vorhanden sind.
         '''
-        self._artikel_fuege_neue_sat_ein(conn)
-        self._liefart_fuege_neue_sat_ein(conn)
+        return self._artikel_fuege_neue_sat_ein(conn) + self._liefart_fuege_neue_sat_ein(conn)
 
-    def _update_zuletzt_gesehen(self, conn: Connection) -> None:
+    def _update_zuletzt_gesehen(self, conn: Connection) -> int:
         '''Setzt das 'zuletzt_gesehen'-Datum im HUB'''
-        self._artikel_update_zuletzt_gesehen(conn)
-        self._liefart_update_zuletzt_gesehen(conn)
+        return self._artikel_update_zuletzt_gesehen(conn) + self._liefart_update_zuletzt_gesehen(conn)
 
-    def _artikel_belade_hub(self, conn: Connection) -> None:
+    def _artikel_belade_hub(self, conn: Connection) -> int:
         '''belaedt erstmal den HUB'''
 
         sql = '''
@@ -176,9 +186,9 @@ class PresseArtikelImporter():
         WHERE h.hash IS NULL
         '''
 
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
 
-    def _artikel_loesche_ungueltige_sat(self, conn: Connection) -> None:
+    def _artikel_loesche_ungueltige_sat(self, conn: Connection) -> int:
         '''
         Setzt Eintraege in 'sat_kunden_t' ungueltig, fuer die aktualisierte Eintraege
         vorhanden sind. Bestehende Eintraege, die nicht in der Eingabedatei vorkommen, bleiben
@@ -204,9 +214,9 @@ class PresseArtikelImporter():
             AND 	t.hash_diff <> s.hash_diff
         )
         '''
-        conn.execute(text(sql), {'gueltig_ets': self.ts, 'gueltig_edtm': self.export_date})
+        return conn.execute(text(sql), {'gueltig_ets': self.ts, 'gueltig_edtm': self.export_date}).rowcount
 
-    def _artikel_fuege_neue_sat_ein(self, conn: Connection) -> None:
+    def _artikel_fuege_neue_sat_ein(self, conn: Connection) -> int:
         '''
         Fuegt neue Eintraege aus in 'sat_kunden_t' ein bzw. Eintraege, fuer die aktuellere
         Daten vorhanden sind.
@@ -248,9 +258,9 @@ class PresseArtikelImporter():
 
         WHERE s.hash IS NULL
         '''
-        conn.execute(text(sql), {'gueltig_adtm': self.export_date})
+        return conn.execute(text(sql), {'gueltig_adtm': self.export_date}).rowcount
 
-    def _artikel_update_zuletzt_gesehen(self, conn: Connection) -> None:
+    def _artikel_update_zuletzt_gesehen(self, conn: Connection) -> int:
         '''Setzt das 'zuletzt_gesehen'-Datum im HUB'''
         sql = '''
         UPDATE hub_artikel_t
@@ -266,9 +276,9 @@ class PresseArtikelImporter():
         ) AS bas
         WHERE bas.hash = hub_artikel_t.hash
         '''
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
 
-    def _liefart_belade_hub(self, conn: Connection) -> None:
+    def _liefart_belade_hub(self, conn: Connection) -> int:
         '''belaedt erstmal den HUB'''
 
         sql = '''
@@ -290,9 +300,9 @@ class PresseArtikelImporter():
         WHERE h.hash IS NULL
         '''
 
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
 
-    def _liefart_loesche_ungueltige_sat(self, conn: Connection) -> None:
+    def _liefart_loesche_ungueltige_sat(self, conn: Connection) -> int:
         '''
         Setzt Eintraege ungueltig, fuer die aktualisierte Eintraege
         vorhanden sind. Bestehende Eintraege, die nicht in der Eingabedatei vorkommen, bleiben
@@ -318,9 +328,9 @@ class PresseArtikelImporter():
             AND 	t.hash_diff <> s.hash_diff
         )
         '''
-        conn.execute(text(sql), {'gueltig_ets': self.ts, 'gueltig_edtm': self.export_date})
+        return conn.execute(text(sql), {'gueltig_ets': self.ts, 'gueltig_edtm': self.export_date}).rowcount
 
-    def _liefart_fuege_neue_sat_ein(self, conn: Connection) -> None:
+    def _liefart_fuege_neue_sat_ein(self, conn: Connection) -> int:
         '''
         Fuegt neue Eintraege aus der temp. Tabelle ein bzw. Eintraege, fuer die aktuellere
         Daten vorhanden sind.
@@ -348,9 +358,9 @@ class PresseArtikelImporter():
 
         WHERE s.hash IS NULL
         '''
-        conn.execute(text(sql), {'gueltig_adtm': self.export_date})
+        return conn.execute(text(sql), {'gueltig_adtm': self.export_date}).rowcount
 
-    def _liefart_update_zuletzt_gesehen(self, conn: Connection) -> None:
+    def _liefart_update_zuletzt_gesehen(self, conn: Connection) -> int:
         '''Setzt das 'zuletzt_gesehen'-Datum im HUB'''
         sql = '''
         UPDATE hub_scs_liefart_t
@@ -366,7 +376,15 @@ class PresseArtikelImporter():
         ) AS bas
         WHERE bas.hash = hub_scs_liefart_t.hash
         '''
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
+
+    def _vergebe_ids(self, conn: Connection) -> int:
+        '''Vergibt die Nummern der neuen Artikel und Lieferantenartikel und traegt die Fremdschluessel auf sie nach'''
+        return aktualisiere_schluessel(conn, 'hub_artikel_t') + aktualisiere_schluessel(conn, 'hub_scs_liefart_t')
+
+    def _aktualisiere_pit(self, conn: Connection) -> int:
+        '''Berechnet die PIT-Tabellen der Artikel und Lieferantenartikel fuer die geaenderten Eintraege neu'''
+        return aktualisiere_pit_schluessel(conn, 'sat_artikel_t') + aktualisiere_pit_schluessel(conn, 'sat_scs_liefart_t')
 
 
 class PresseArtikelStatus():
@@ -380,16 +398,11 @@ class PresseArtikelStatus():
     def letzte_datei(self) -> datetime:
         '''
         Ermittelt das Datum der Datei mit dem jüngsten Import in der Datenbank.
-        Dazu wird das neueste 'zuletzt_gesehen'-Datum ermittelt
+        Der Stand wird beim Import in 'import_status_t' festgehalten.
         '''
-        SQL = """
-        SELECT MAX(h.zuletzt_gesehen) AS zeitpunkt FROM hub_artikel_t AS h WHERE h.quelle = 'scs_export_presseartikel'
-        """
-        conn = self.db_manager.get_engine().connect()
-        with conn:
-            result = conn.execute(text(SQL)).fetchone()
-            if result[0]:
-                return datetime.strptime(result[0], '%Y-%m-%d %H:%M:%S.%f')
-            else:
-                return None
-        conn.close()
+        return ImportStatus(self.db_manager).letzte_datei(QUELLE)
+
+    @property
+    def letzter_import(self) -> datetime:
+        '''Ermittelt den Zeitpunkt des letzten Imports'''
+        return ImportStatus(self.db_manager).letzter_import(QUELLE)
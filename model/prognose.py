@@ -0,0 +1,155 @@
+from datetime import date, timedelta
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from model.db_manager import DbManager
+from model.ean_aufloesung import EanAufloesung
+from model.zeitcode import tag_nr
+
+WOCHEN = 8
+'''Anzahl Wochen Verkaufshistorie, auf denen die Prognose beruht'''
+
+TAGE = 7
+'''Anzahl Tage nach dem Stichtag, fuer die prognostiziert wird'''
+
+QUANTILE = (0.5, 0.8)
+'''Quantile der Tagesmengen je Wochentag, z.B. 0.8 = an 4 von 5 gleichen Wochentagen hat diese Menge gereicht'''
+
+
+class Bedarfsprognose():
+    '''
+    Prognostiziert den Tagesbedarf je Artikel und Wochentag aus den Verkaeufen der letzten Wochen.
+    Grundlage ist eine Matrix Artikel x Verkaufstag (aus 'umsatz_tag_artikel_t', Verkaufstage aus
+    'kalender_t'), auf der Mittelwerte, Quantile und Trend fuer alle Artikel zugleich berechnet werden.
+    '''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def lade_tagesmatrix(self, wgr: Iterable[str], von: date, bis: date) -> Tuple[pd.DataFrame, np.ndarray, pd.DataFrame]:
+        '''
+        Liefert die Artikel (art_nr, art_bez, wgr), die Matrix der verkauften Mengen
+        (Artikel x Verkaufstag, 0 an Tagen ohne Verkauf) und die Verkaufstage (datum, wtag, tag_nr)
+        im Zeitraum von 'von' bis 'bis'. Tage, an denen kein einziger Bon erfasst wurde
+        (Ruhetage), fehlen in 'kalender_t' und zaehlen daher nicht als Tag ohne Verkauf.
+        Verkaeufe unter einer Mehrfach-EAN werden der Haupt-EAN zugerechnet.
+        '''
+        wgr = list(wgr)
+        params = {'von': tag_nr(von), 'bis': tag_nr(bis)}
+        params.update({f'wgr_{i}': w for i, w in enumerate(wgr)})
+        filter_wgr = ', '.join(f':wgr_{i}' for i in range(len(wgr))) or 'NULL'
+
+        sql_tage = '''
+        SELECT k.datum, k.wtag, k.tag_nr FROM kalender_t AS k WHERE k.tag_nr BETWEEN :von AND :bis ORDER BY k.tag_nr
+        '''
+        sql_umsatz = f'''
+        SELECT
+            u.art_nr,
+            u.wgr,
+            u.tag_nr,
+            u.menge
+
+        FROM umsatz_tag_artikel_t AS u
+
+        WHERE u.tag_nr BETWEEN :von AND :bis
+            AND u.wgr IN ({filter_wgr})
+        '''
+        sql_artikel = '''
+        SELECT
+            h.art_nr,
+            s.art_bez
+
+        FROM hub_artikel_t AS h
+
+        JOIN sat_artikel_t AS s
+            ON	s.hash = h.hash
+            AND s.gueltig = 1
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            df_tage = pd.read_sql_query(text(sql_tage), conn, params=params)
+            df_umsatz = pd.read_sql_query(text(sql_umsatz), conn, params=params)
+            df_bez = pd.read_sql_query(text(sql_artikel), conn)
+        conn.close()
+
+        # Verkaeufe ueber Mehrfach-EANs zaehlen beim Hauptartikel
+        df_umsatz['art_nr'] = EanAufloesung.fuer(self.db_manager).aufloesen_serie(df_umsatz['art_nr'])
+
+        # Zeilen = Artikel nach Artikelnummer sortiert, Spalten = Verkaufstage
+        df_umsatz = df_umsatz.sort_values(['art_nr', 'tag_nr'])
+        zeilen, art_nrn = pd.factorize(df_umsatz['art_nr'], sort=True)
+        spalten = np.searchsorted(df_tage['tag_nr'].to_numpy(), df_umsatz['tag_nr'].to_numpy())
+
+        matrix = np.zeros((len(art_nrn), len(df_tage)))
+        np.add.at(matrix, (zeilen, spalten), df_umsatz['menge'].astype(float).to_numpy())
+
+        # je Artikel die Warengruppe des juengsten Verkaufstages
+        df_artikel = df_umsatz.groupby('art_nr', sort=True)['wgr'].last().reset_index()
+        df_artikel = df_artikel.merge(df_bez.drop_duplicates('art_nr'), on='art_nr', how='left')
+        return df_artikel[['art_nr', 'art_bez', 'wgr']], matrix, df_tage
+
+    def berechne(self, wgr: Iterable[str], stichtag: date = None, wochen: int = WOCHEN, tage: int = TAGE,
+                 quantile: Sequence[float] = QUANTILE) -> pd.DataFrame:
+        '''
+        Prognostiziert fuer die Artikel der Warengruppen den Bedarf der 'tage' Tage nach dem Stichtag
+        (Standard: heute). Liefert je Artikel und Tag: art_nr, art_bez, wgr, datum, wtag, mittel,
+        die Quantile (q50, q80, ...), trend_woche (Veraenderung je Woche) und prognose.
+
+        Die Prognose ist der Mittelwert des Wochentags, fortgeschrieben mit dem Trend der Zeitreihe
+        ohne Wochentagsmuster (Kleinste-Quadrate-Gerade, fuer alle Artikel in einem Schritt).
+        '''
+        stichtag = stichtag or date.today()
+        von = stichtag - timedelta(weeks=wochen)
+        df_artikel, matrix, df_tage = self.lade_tagesmatrix(wgr, von, stichtag)
+
+        q_spalten = [f'q{round(q * 100)}' for q in quantile]
+        if not len(df_artikel) or not len(df_tage):
+            return pd.DataFrame(columns=['art_nr', 'art_bez', 'wgr', 'datum', 'wtag', 'mittel',
+                                         *q_spalten, 'trend_woche', 'prognose'])
+
+        wtag = df_tage['wtag'].to_numpy()
+        zeit = (df_tage['tag_nr'].to_numpy() - tag_nr(von)).astype(float)
+
+        # Kennzahlen je Wochentag (Spalte 0 = Montag), fuer Ruhetage bleibt NaN
+        anz_artikel = len(df_artikel)
+        mittel = np.full((anz_artikel, 7), np.nan)
+        quantil_werte = np.full((len(quantile), anz_artikel, 7), np.nan)
+        zeit_mittel = np.full(7, np.nan)
+        for tag in range(1, 8):
+            auswahl = wtag == tag
+            if not auswahl.any():
+                continue
+            mittel[:, tag - 1] = matrix[:, auswahl].mean(axis=1)
+            quantil_werte[:, :, tag - 1] = np.quantile(matrix[:, auswahl], quantile, axis=1)
+            zeit_mittel[tag - 1] = zeit[auswahl].mean()
+
+        # Trend: Steigung der um das Wochentagsmuster bereinigten Mengen ueber die Zeit
+        rest = matrix - mittel[:, wtag - 1]
+        zeit_zentriert = zeit - zeit.mean()
+        nenner = (zeit_zentriert ** 2).sum()
+        steigung = rest @ zeit_zentriert / nenner if nenner else np.zeros(anz_artikel)
+
+        # Prognosetage: alle Artikel x alle Tage ohne Schleife ueber die Artikel
+        datum = pd.date_range(stichtag + timedelta(days=1), periods=tage, freq='D')
+        ziel_wtag = datum.isocalendar().day.to_numpy(dtype=int) - 1
+        ziel_zeit = (datum - pd.Timestamp(von)).days.to_numpy(dtype=float)
+
+        prognose = mittel[:, ziel_wtag] + steigung[:, None] * (ziel_zeit - zeit_mittel[ziel_wtag])[None, :]
+
+        df = pd.DataFrame({
+            'art_nr': np.repeat(df_artikel['art_nr'].to_numpy(), tage),
+            'art_bez': np.repeat(df_artikel['art_bez'].to_numpy(), tage),
+            'wgr': np.repeat(df_artikel['wgr'].to_numpy(), tage),
+            'datum': np.tile(datum.date, anz_artikel),
+            'wtag': np.tile(ziel_wtag + 1, anz_artikel),
+            'mittel': mittel[:, ziel_wtag].ravel()
+        })
+        for spalte, werte in zip(q_spalten, quantil_werte):
+            df[spalte] = werte[:, ziel_wtag].ravel()
+        df['trend_woche'] = np.repeat(steigung * 7, tage)
+        df['prognose'] = np.clip(prognose.ravel(), 0, None)
+        return df
@@ -0,0 +1,81 @@
+from importlib import import_module
+import sqlite3
+from typing import Dict
+
+from sqlalchemy import Connection, text
+
+from model.db_manager import DbManager
+
+SCHEMA_VERSION = 17
+'''
+Version des Datenbankschemas. Sie wird in 'PRAGMA user_version' der Datenbank gespeichert
+und muss bei jeder Aenderung an Tabellen oder Indizes erhoeht werden.
+'''
+
+MIGRATIONEN: Dict[int, str] = {
+    2: 'model.import_status.uebernimm_bestand',
+    3: 'model.umsatz.uebernimm_bestand',
+    4: 'model.asof.erzeuge_indizes',
+    5: 'model.pit.uebernimm_bestand',
+    7: 'model.artikelsuche.erzeuge_suchindex',
+    8: 'model.kunden_statistik.uebernimm_bestand',
+    9: 'model.zahlungen.uebernimm_bestand',
+    10: 'model.traffic.uebernimm_bestand',
+    11: 'model.warenkorb.uebernimm_bestand',
+    12: 'model.storno.erweitere_bons',
+    14: 'model.schluessel.erweitere_tabellen',
+    15: 'model.zeitcode.erweitere_tabellen',
+    17: 'model.wartung.richte_auto_vacuum_ein'
+}
+'''
+Schema-Version -> Migration (Modul.Funktion mit einer Connection als Parameter), die nach
+'create_all' ausgefuehrt wird, um eine bestehende Datenbank auf diese Version zu bringen
+(z.B. ALTER TABLE oder Befuellen neuer Tabellen). Neue Tabellen legt bereits 'create_all' an.
+Die Module werden erst geladen, wenn eine Migration ansteht.
+'''
+
+SQLITE_MINDESTVERSION = (3, 33, 0)
+'''
+Mindestversion der SQLite-Bibliothek von Python: die Ersatzschluessel (model.schluessel) und die
+Importe aktualisieren Tabellen mit 'UPDATE ... FROM', das SQLite erst ab Version 3.33 kennt.
+'''
+
+
+def pruefe_sqlite_version(version: str = sqlite3.sqlite_version) -> None:
+    '''Bricht mit einer Meldung ab, wenn die SQLite-Bibliothek aelter als SQLITE_MINDESTVERSION ist'''
+    if tuple(int(teil) for teil in version.split('.')[:3]) < SQLITE_MINDESTVERSION:
+        mindestens = '.'.join(map(str, SQLITE_MINDESTVERSION))
+        raise RuntimeError(f'SQLite {version} ist zu alt, benoetigt wird mindestens Version {mindestens} '
+                           f'(UPDATE ... FROM). Bitte Python mit einer neueren SQLite-Bibliothek verwenden.')
+
+
+def gespeicherte_version(conn: Connection) -> int:
+    '''Liefert die in der Datenbank gespeicherte Schema-Version'''
+    return conn.execute(text('PRAGMA user_version')).scalar()
+
+
+def aktualisiere_schema(db_manager: DbManager) -> bool:
+    '''
+    Legt fehlende Tabellen an und fuehrt die ausstehenden Migrationen aus. Entspricht die
+    gespeicherte Version bereits SCHEMA_VERSION, wird nur die Version gelesen und der
+    teure Abgleich mit 'create_all' uebersprungen. Liefert True, wenn das Schema geaendert wurde.
+    Vorher wird die Version der SQLite-Bibliothek geprueft (pruefe_sqlite_version).
+    '''
+    pruefe_sqlite_version()
+    engine = db_manager.get_engine()
+    with engine.connect() as conn:
+        version = gespeicherte_version(conn)
+    if version >= SCHEMA_VERSION:
+        # aktuell oder bereits von einer neueren Programmversion aktualisiert
+        return False
+
+    db_manager.get_metadata().create_all(engine)
+    with engine.connect() as conn:
+        for ziel in range(version + 1, SCHEMA_VERSION + 1):
+            if ziel in MIGRATIONEN:
+                modul, funktion = MIGRATIONEN[ziel].rsplit('.', 1)
+                getattr(import_module(modul), funktion)(conn)
+        # PRAGMA erlaubt keine gebundenen Parameter
+        conn.execute(text(f'PRAGMA user_version = {int(SCHEMA_VERSION)}'))
+        conn.commit()
+    return True
@@ -0,0 +1,115 @@
+'''
+Ganzzahlige Ersatzschluessel. Die Hubs, der Kalender und die Bons erhalten eine dichte Nummer 'id'
+(fortlaufend je Tabelle, neue Eintraege eines Imports nach ihrem fachlichen Schluessel sortiert).
+Bons und Bonpositionen tragen die Nummern als Fremdschluessel, Auswertungen verbinden sie so ueber
+Ganzzahlen statt ueber Hashes, Artikel- oder Kundennummern.
+
+Die Nummern werden nach jedem Import gesammelt vergeben. Verweist eine Position auf einen Artikel,
+der noch nicht im Stamm ist, bleibt ihr Fremdschluessel leer und wird nach dem Import des Artikels
+nachgetragen.
+'''
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import Connection, text
+
+ID_TABELLEN: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'hub_artikel_t': ('hash', ('art_nr',)),
+    'hub_warengruppen_t': ('hash', ('wgr',)),
+    'hub_kunden_t': ('hash', ('kdnr',)),
+    'hub_pfand_t': ('hash', ('art_nr',)),
+    'hub_lieferanten_t': ('hash', ('lief_nr',)),
+    'hub_mean_t': ('hash', ('ean_m',)),
+    'hub_scs_liefart_t': ('hash', ('ean', 'lief_nr')),
+    'kalender_t': ('datum', ('datum',)),
+    'kassenbons_t': ('hash', ('bon_abschluss', 'kasse_nr', 'bon_nr'))
+}
+'''Tabelle mit Spalte 'id' -> (Primaerschluessel, Sortierung neuer Nummern)'''
+
+FREMDSCHLUESSEL: Tuple[Tuple[str, str, str, str, str], ...] = (
+    ('kassenbons_t', 'kunde_id', 'kdnr', 'hub_kunden_t', 'kdnr'),
+    ('kassenbons_t', 'datum_id', 'bon_datum', 'kalender_t', 'datum'),
+    ('kassenbons_pos_t', 'bon_id', 'hash_bon', 'kassenbons_t', 'hash'),
+    ('kassenbons_pos_t', 'artikel_id', 'art_nr', 'hub_artikel_t', 'art_nr'),
+    ('kassenbons_pos_t', 'wgr_id', 'wgr', 'hub_warengruppen_t', 'wgr')
+)
+'''(Tabelle, Fremdschluessel, Spalte, Zieltabelle, Spalte des Ziels)'''
+
+ARCHIV_MAX_ID: Dict[str, str] = {
+    'kassenbons_t': 'SELECT MAX(a.max_bon_id) FROM archiv_jahr_t AS a'
+}
+'''Tabelle -> SQL der hoechsten Nummer in den Jahresarchiven (model.archiv), sie wird nicht neu vergeben'''
+
+
+def vergebe_ids(conn: Connection, tabelle: str) -> int:
+    '''Nummeriert alle Zeilen der Tabelle ohne 'id' im Anschluss an die hoechste vergebene Nummer'''
+    schluessel, reihenfolge = ID_TABELLEN[tabelle]
+    sql = f'''
+    WITH basis AS (
+        SELECT MAX(COALESCE(MAX(t.id), 0), COALESCE(({ARCHIV_MAX_ID.get(tabelle, 'NULL')}), 0)) AS max_id
+        FROM {tabelle} AS t
+    ),
+    neu AS (
+        SELECT
+            t.{schluessel} AS schluessel,
+            basis.max_id + ROW_NUMBER() OVER (ORDER BY {', '.join(f't.{s}' for s in reihenfolge)}) AS id
+
+        FROM {tabelle} AS t, basis
+
+        WHERE t.id IS NULL
+    )
+    UPDATE {tabelle}
+    SET id = neu.id
+
+    FROM neu
+
+    WHERE {tabelle}.{schluessel} = neu.schluessel
+    '''
+    return conn.execute(text(sql)).rowcount
+
+
+def ergaenze_fremdschluessel(conn: Connection, ziele: Iterable[str] = None) -> int:
+    '''
+    Traegt die leeren Fremdschluessel nach, deren Ziel inzwischen eine Nummer hat. Mit 'ziele'
+    nur die Fremdschluessel auf diese Tabellen. Liefert die Anzahl ergaenzter Werte.
+    '''
+    ziele = None if ziele is None else set(ziele)
+    zeilen = 0
+    for tabelle, fremdschluessel, spalte, ziel, ziel_spalte in FREMDSCHLUESSEL:
+        if ziele is not None and ziel not in ziele:
+            continue
+        sql = f'''
+        UPDATE {tabelle}
+        SET {fremdschluessel} = z.id
+
+        FROM {ziel} AS z
+
+        WHERE {tabelle}.{fremdschluessel} IS NULL
+            AND z.{ziel_spalte} = {tabelle}.{spalte}
+            AND z.id IS NOT NULL
+        '''
+        zeilen += conn.execute(text(sql)).rowcount
+    return zeilen
+
+
+def aktualisiere_schluessel(conn: Connection, tabelle: str) -> int:
+    '''Vergibt die Nummern der Tabelle und traegt die Fremdschluessel auf sie nach'''
+    vergebe_ids(conn, tabelle)
+    return ergaenze_fremdschluessel(conn, [tabelle])
+
+
+def erweitere_tabellen(conn: Connection) -> None:
+    '''
+    Migration: ergaenzt die Spalten 'id' und die Fremdschluessel samt Indizes in bestehenden
+    Tabellen und vergibt alle Nummern.
+    '''
+    spalten = [(tabelle, 'id', True) for tabelle in ID_TABELLEN]
+    spalten += [(tabelle, fremdschluessel, False) for tabelle, fremdschluessel, _, _, _ in FREMDSCHLUESSEL]
+    for tabelle, spalte, eindeutig in spalten:
+        vorhanden = [zeile[1] for zeile in conn.execute(text(f'PRAGMA table_info({tabelle})'))]
+        if spalte not in vorhanden:
+            conn.execute(text(f'ALTER TABLE {tabelle} ADD COLUMN {spalte} INTEGER'))
+        conn.execute(text(
+            f"CREATE {'UNIQUE ' if eindeutig else ''}INDEX IF NOT EXISTS ix_{tabelle}_{spalte} ON {tabelle} ({spalte})"))
+    for tabelle in ID_TABELLEN:
+        vergebe_ids(conn, tabelle)
+    ergaenze_fremdschluessel(conn)
@@ -0,0 +1,152 @@
+'''
+Stornoverweise zwischen Bons. Ein Bon mit Stornoreferenz storniert den Bon mit dieser Bonnummer
+auf derselben Kasse. 'storno_link_t' haelt je Stornobon den Hash des stornierten Bons (leer, solange
+dieser nicht importiert ist), 'kassenbons_t.netto' ist fuer beide Bons eines aufgeloesten Paares 0.
+Auswertungen ohne stornierte Bons filtern so ueber den Index 'ix_kassenbons_t_netto'. Verweise, die
+in der Datenbank keinen Bon finden, werden in den angehaengten Jahresarchiven gesucht (model.archiv).
+'''
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import Connection, text
+
+from model.archiv import angehaengte_archive
+from model.db_manager import CENT, DbManager, sql_dezimal
+
+SQL_VERWEISE = '''
+INSERT OR REPLACE INTO storno_link_t (hash_storno, hash_bon, kasse_nr, bon_nr, storno_ref, bon_datum)
+SELECT
+    s.hash,
+    (
+        -- Bonnummern koennen sich wiederholen, es gilt der juengste Bon vor dem Storno
+        SELECT b.hash
+
+        FROM kassenbons_t AS b
+
+        WHERE b.kasse_nr = s.kasse_nr
+            AND b.bon_nr = CAST(s.storno_ref AS INTEGER)
+            AND b.hash <> s.hash
+            AND b.bon_abschluss <= s.bon_abschluss
+
+        ORDER BY b.bon_abschluss DESC
+
+        LIMIT 1
+    ) AS hash_bon,
+    s.kasse_nr,
+    s.bon_nr,
+    CAST(s.storno_ref AS INTEGER),
+    s.bon_datum
+
+FROM kassenbons_t AS s
+
+WHERE s.storno_ref IS NOT NULL
+    AND s.storno_ref <> ''
+    {filter}
+'''
+
+SQL_VERWEISE_ARCHIV = '''
+UPDATE storno_link_t
+SET hash_bon = (
+    SELECT b.hash
+
+    FROM {schema}.kassenbons_t AS b
+
+    WHERE b.kasse_nr = storno_link_t.kasse_nr
+        AND b.bon_nr = storno_link_t.storno_ref
+        AND b.bon_abschluss <= (SELECT s.bon_abschluss FROM kassenbons_t AS s WHERE s.hash = storno_link_t.hash_storno)
+
+    ORDER BY b.bon_abschluss DESC
+
+    LIMIT 1
+)
+
+WHERE hash_bon IS NULL
+'''
+'''Sucht die offenen Verweise im Archiv eines Jahres, die Archive werden vom juengsten Jahr an durchsucht'''
+
+SQL_NETTO = '''
+UPDATE kassenbons_t
+SET netto = 0
+
+WHERE netto <> 0
+    AND hash IN (
+        SELECT sl.hash_storno FROM storno_link_t AS sl WHERE sl.hash_bon IS NOT NULL
+        UNION ALL
+        SELECT sl.hash_bon FROM storno_link_t AS sl WHERE sl.hash_bon IS NOT NULL
+    )
+'''
+'''Markiert Stornobons und stornierte Bons, Stornobons ohne gefundenen Bon zaehlen weiter'''
+
+
+def aktualisiere_stornos(conn: Connection) -> int:
+    '''
+    Loest die Stornoreferenzen der Bons des laufenden Imports (temp_kassenbons_t) auf und versucht
+    es erneut fuer alle bisher nicht aufgeloesten Verweise, deren Bon inzwischen importiert sein kann.
+    Der stornierte Bon kann in einem angehaengten Jahresarchiv liegen, dort bleibt er unveraendert.
+    Liefert die Anzahl neu als nicht netto markierter Bons der Datenbank.
+    '''
+    conn.execute(text(SQL_VERWEISE.format(filter='''
+        AND (s.hash IN (SELECT bt.hash FROM temp_kassenbons_t AS bt)
+            OR s.hash IN (SELECT sl.hash_storno FROM storno_link_t AS sl WHERE sl.hash_bon IS NULL))
+        ''')))
+    for schema in angehaengte_archive(conn):
+        conn.execute(text(SQL_VERWEISE_ARCHIV.format(schema=schema)))
+    return conn.execute(text(SQL_NETTO)).rowcount
+
+
+def erweitere_bons(conn: Connection) -> None:
+    '''Migration: ergaenzt 'kassenbons_t' um 'netto' und loest alle Stornoreferenzen auf'''
+    spalten = [zeile[1] for zeile in conn.execute(text('PRAGMA table_info(kassenbons_t)'))]
+    if 'netto' not in spalten:
+        conn.execute(text('ALTER TABLE kassenbons_t ADD COLUMN netto BOOLEAN NOT NULL DEFAULT 1'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_kassenbons_t_netto ON kassenbons_t (netto, bon_datum)'))
+    conn.execute(text('DELETE FROM storno_link_t'))
+    conn.execute(text(SQL_VERWEISE.format(filter='')))
+    conn.execute(text(SQL_NETTO))
+
+
+class StornoAbfrage():
+    '''Liefert die Stornos mit den stornierten Bons'''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def stornos(self, von: date, bis: date) -> pd.DataFrame:
+        '''
+        Liefert die Stornobons zwischen 'von' und 'bis' (einschliesslich) mit dem stornierten Bon.
+        Spalten: kasse_nr, bon_nr, bon_datum, bon_summe, storno_ref, bon_datum_storniert,
+        bon_summe_storniert. Die Spalten des stornierten Bons sind leer, wenn er nicht gefunden wurde.
+        Die Bons archivierter Jahre werden aus ihren Archiven gelesen.
+        '''
+        ganzzahl = self.db_manager.betrag_ganzzahl
+        sql = f'''
+        SELECT
+            sl.kasse_nr,
+            sl.bon_nr,
+            sl.bon_datum,
+            {sql_dezimal('s.bon_summe', CENT, ganzzahl)} AS bon_summe,
+            sl.storno_ref,
+            b.bon_datum AS bon_datum_storniert,
+            {sql_dezimal('b.bon_summe', CENT, ganzzahl)} AS bon_summe_storniert
+
+        FROM storno_link_t AS sl
+
+        JOIN jahre_kassenbons_t AS s
+            ON	s.hash = sl.hash_storno
+
+        LEFT JOIN jahre_kassenbons_t AS b
+            ON	b.hash = sl.hash_bon
+
+        WHERE sl.bon_datum BETWEEN :von AND :bis
+
+        ORDER BY sl.bon_datum, sl.kasse_nr, sl.bon_nr
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            # der stornierte Bon kann im Vorjahr liegen
+            self.db_manager.haenge_archive_an(conn, date(von.year - 1, 1, 1), bis)
+            df = pd.read_sql_query(text(sql), conn, params={
+                'von': von.strftime('%Y-%m-%d'), 'bis': bis.strftime('%Y-%m-%d')})
+        conn.close()
+        return df
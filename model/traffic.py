@@ -0,0 +1,168 @@
+'''
+Kundenverkehr je Tag und Stunde. 'traffic_stunde_t' haelt je Tag und Stunde (nach Bonabschluss)
+Anzahl Bons, Umsatz, verkaufte Artikel (Summe der Mengen) und Anzahl unterschiedlicher Kunden.
+Der Kassenjournal-Import berechnet die Tage seiner Bons neu, Auswertungen nach Wochentag und
+Stunde lesen nur noch diese Tabelle.
+'''
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import Connection, text
+
+from model.db_manager import CENT, MILLI, DbManager, ganzzahlig, lies_betrag_ganzzahl
+
+SQL_BONS = '''
+SELECT
+    b.bon_abschluss,
+    b.bon_summe,
+    b.kdnr,
+    COALESCE(p.artikel, 0) AS artikel
+
+FROM kassenbons_t AS b
+
+LEFT JOIN (
+    SELECT
+        p.hash_bon,
+        SUM(p.menge) AS artikel
+
+    FROM kassenbons_pos_t AS p
+
+    WHERE p.art_nr <> '-'
+        {filter_pos}
+
+    GROUP BY p.hash_bon
+) AS p
+    ON	p.hash_bon = b.hash
+
+WHERE 1 = 1
+    {filter}
+'''
+'''Bons mit Summe der Artikelmengen, Zeilen mit art_nr '-' sind Zahlungen und Infos'''
+
+WERTE = ('bons', 'umsatz', 'artikel', 'kunden')
+'''Kennzahlen je Stunde'''
+
+
+def berechne_traffic(df_bons: pd.DataFrame, ganzzahl: bool = False) -> pd.DataFrame:
+    '''
+    Verdichtet Bons (bon_abschluss, bon_summe, kdnr, artikel) auf Tag und Stunde. Liefert eine
+    Zeile je Tag und Stunde mit Bons mit den Spalten von 'traffic_stunde_t'. 'ganzzahl' ist die
+    Speicherform von Summe und Artikeln, summiert wird in beiden Faellen ganzzahlig.
+    '''
+    abschluss = pd.to_datetime(df_bons['bon_abschluss'])
+    kdnr = df_bons['kdnr'].astype(str)
+    df = pd.DataFrame({
+        'datum': abschluss.dt.normalize(),
+        'stunde': abschluss.dt.hour,
+        'bon_summe': ganzzahlig(df_bons['bon_summe'], CENT, ganzzahl),
+        'artikel': ganzzahlig(df_bons['artikel'], MILLI, ganzzahl),
+        # Bons ohne Kunde zaehlen nicht als Kunde, nunique ignoriert die leeren Werte
+        'kdnr': kdnr.where(~kdnr.isin(['', '0', 'None', 'nan']))
+    })
+    gruppen = df.groupby(['datum', 'stunde'], sort=True)
+    df_traffic = pd.DataFrame({
+        'bons': gruppen.size(),
+        'umsatz': gruppen['bon_summe'].sum() / CENT,
+        'artikel': gruppen['artikel'].sum() / MILLI,
+        'kunden': gruppen['kdnr'].nunique()
+    }).reset_index()
+    df_traffic['wtag'] = df_traffic['datum'].dt.dayofweek + 1
+    df_traffic['datum'] = df_traffic['datum'].dt.strftime('%Y-%m-%d')
+    return df_traffic[['datum', 'stunde', 'wtag', *WERTE]]
+
+
+def _schreibe(conn: Connection, filter_bons: str, filter_pos: str) -> int:
+    '''Verdichtet die Bons mit dem Filter und schreibt ihre Tage'''
+    df_bons = pd.read_sql_query(text(SQL_BONS.format(filter=filter_bons, filter_pos=filter_pos)), conn)
+    if df_bons.empty:
+        return 0
+    df_traffic = berechne_traffic(df_bons, lies_betrag_ganzzahl(conn))
+    df_traffic.to_sql('traffic_stunde_t', conn, if_exists='append', index=False)
+    return len(df_traffic)
+
+
+def aktualisiere_traffic_tage(conn: Connection) -> int:
+    '''
+    Berechnet 'traffic_stunde_t' fuer alle Tage neu, die in den Bons des laufenden Imports
+    (temp_kassenbons_t) vorkommen, jeweils mit allen Bons dieser Tage.
+    '''
+    conn.execute(text('DROP TABLE IF EXISTS temp.traffic_tage_t'))
+    conn.execute(text('CREATE TEMP TABLE traffic_tage_t AS SELECT DISTINCT bt.bon_datum FROM temp_kassenbons_t AS bt'))
+    conn.execute(text('DELETE FROM traffic_stunde_t WHERE datum IN (SELECT bon_datum FROM temp.traffic_tage_t)'))
+    zeilen = _schreibe(
+        conn,
+        'AND b.bon_datum IN (SELECT bon_datum FROM temp.traffic_tage_t)',
+        '''AND p.hash_bon IN (
+            SELECT b.hash FROM kassenbons_t AS b WHERE b.bon_datum IN (SELECT bon_datum FROM temp.traffic_tage_t))''')
+    conn.execute(text('DROP TABLE temp.traffic_tage_t'))
+    return zeilen
+
+
+def uebernimm_bestand(conn: Connection) -> None:
+    '''Migration: verdichtet alle bereits importierten Bons'''
+    conn.execute(text('DELETE FROM traffic_stunde_t'))
+    _schreibe(conn, '', '')
+
+
+class TrafficAbfrage():
+    '''Liefert den Kundenverkehr nach Wochentag und Stunde aus 'traffic_stunde_t' '''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def je_wochentag_stunde(self, von: date, bis: date) -> pd.DataFrame:
+        '''
+        Liefert je Wochentag (1 = Montag) und Stunde die Summen der Kennzahlen zwischen 'von' und
+        'bis' (einschliesslich) sowie 'anz_tage', die Anzahl der Tage dieses Wochentags mit Bons.
+        '''
+        sql = f'''
+        WITH tage AS (
+            SELECT
+                t.wtag,
+                COUNT(DISTINCT t.datum) AS anz_tage
+
+            FROM traffic_stunde_t AS t
+
+            WHERE t.datum BETWEEN :von AND :bis
+
+            GROUP BY t.wtag
+        )
+
+        SELECT
+            t.wtag,
+            t.stunde,
+            {', '.join(f'SUM(t.{w}) AS {w}' for w in WERTE)},
+            tage.anz_tage
+
+        FROM traffic_stunde_t AS t
+
+        JOIN tage
+            ON	tage.wtag = t.wtag
+
+        WHERE t.datum BETWEEN :von AND :bis
+
+        GROUP BY t.wtag, t.stunde
+
+        ORDER BY t.wtag, t.stunde
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            df = pd.read_sql_query(text(sql), conn, params={
+                'von': von.strftime('%Y-%m-%d'), 'bis': bis.strftime('%Y-%m-%d')})
+        conn.close()
+        return df
+
+    def heatmap(self, von: date, bis: date, wert: str = 'bons', mittel: bool = True) -> pd.DataFrame:
+        '''
+        Liefert eine Kennzahl aus WERTE als Tabelle mit den Stunden als Zeilen und den Wochentagen
+        (1 = Montag) als Spalten. Mit 'mittel' ist es der Durchschnitt je geoeffnetem Tag, sonst die Summe.
+        '''
+        df = self.je_wochentag_stunde(von, bis)
+        werte = df[wert].astype(float)
+        if mittel:
+            werte = werte / df['anz_tage']
+        return (df.assign(wert=werte)
+                .pivot(index='stunde', columns='wtag', values='wert')
+                .reindex(columns=range(1, 8))
+                .fillna(0.0))
@@ -0,0 +1,123 @@
+from datetime import date
+from typing import Iterable
+
+import pandas as pd
+from sqlalchemy import Connection, text
+
+from model.db_manager import CENT, MILLI, DbManager, lies_betrag_ganzzahl, sql_dezimal
+from model.zeitcode import als_iso, tag_nr
+
+SQL_VERDICHTUNG = '''
+INSERT INTO umsatz_tag_artikel_t (art_nr, wgr, bon_datum, menge, umsatz, anz_bons)
+SELECT
+    p.art_nr,
+    COALESCE(p.wgr, '0:0') AS wgr,
+    b.bon_datum,
+    {menge} AS menge,
+    {umsatz} AS umsatz,
+    COUNT(DISTINCT p.hash_bon) AS anz_bons
+
+FROM kassenbons_t AS b
+
+JOIN kassenbons_pos_t AS p
+    ON	p.hash_bon = b.hash
+
+WHERE p.art_nr <> '-'
+    {filter}
+
+GROUP BY p.art_nr, COALESCE(p.wgr, '0:0'), b.bon_datum
+'''
+'''Verdichtet die Artikelpositionen je Artikel, Warengruppe und Tag, Zeilen mit art_nr '-' sind Zahlungen und Infos'''
+
+
+def _sql_verdichtung(conn: Connection, filter: str) -> str:
+    '''SQL_VERDICHTUNG mit Filter, Menge und Umsatz werden unabhaengig von der Speicherform dezimal verdichtet'''
+    ganzzahl = lies_betrag_ganzzahl(conn)
+    return SQL_VERDICHTUNG.format(
+        filter=filter,
+        menge=sql_dezimal('SUM(p.menge)', MILLI, ganzzahl),
+        umsatz=sql_dezimal('SUM(p.preis_gesamt)', CENT, ganzzahl))
+
+ZEITRAEUME = {
+    'tag': ('u.bon_datum', 'u.bon_datum'),
+    'woche': ('k.tag_nr - (k.wtag - 1)', 'k.tag_nr - (k.wtag - 1)'),
+    'monat': ("printf('%04d-%02d', k.jahr, k.monat)", 'k.jahr, k.monat'),
+    'jahr': ('k.jahr', 'k.jahr')
+}
+'''
+Zeitraum -> (Ausdruck fuer die Spalte 'zeitraum', GROUP BY). Eine Woche wird mit ihrem Montag
+bezeichnet, gruppiert wird nach dessen Tagesnummer.
+'''
+
+
+def aktualisiere_umsatz_tage(conn: Connection) -> int:
+    '''
+    Berechnet 'umsatz_tag_artikel_t' fuer alle Tage neu, die in den Bons des laufenden
+    Imports (temp_kassenbons_t) vorkommen. Bereits vorhandene Bons dieser Tage werden dabei
+    mitgezaehlt, ein erneuter Import desselben Journals aendert also nichts.
+    '''
+    conn.execute(text('DROP TABLE IF EXISTS temp.umsatz_tage_t'))
+    conn.execute(text('CREATE TEMP TABLE umsatz_tage_t AS SELECT DISTINCT bt.bon_datum FROM temp_kassenbons_t AS bt'))
+    conn.execute(text('DELETE FROM umsatz_tag_artikel_t WHERE bon_datum IN (SELECT bon_datum FROM temp.umsatz_tage_t)'))
+    zeilen = conn.execute(text(_sql_verdichtung(
+        conn, 'AND b.bon_datum IN (SELECT bon_datum FROM temp.umsatz_tage_t)'))).rowcount
+    conn.execute(text('DROP TABLE temp.umsatz_tage_t'))
+    return zeilen
+
+
+def uebernimm_bestand(conn: Connection) -> None:
+    '''Migration: verdichtet alle bereits importierten Bons'''
+    conn.execute(text('DELETE FROM umsatz_tag_artikel_t'))
+    conn.execute(text(_sql_verdichtung(conn, '')))
+
+
+class UmsatzAbfrage():
+    '''Liefert Absatz und Umsatz je Artikel aus der Tagesverdichtung, wahlweise je Tag, Woche, Monat oder Jahr'''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def je_artikel(self, zeitraum: str, von: date, bis: date, wgr: Iterable[str] = None) -> pd.DataFrame:
+        '''
+        Liefert je Zeitraum ('tag', 'woche', 'monat' oder 'jahr') und Artikel die Spalten
+        zeitraum, art_nr, wgr, menge, umsatz, anz_bons und anz_tage (Tage mit Verkauf).
+        'wgr' schraenkt auf Warengruppen ein, z.B. ['1:0', '1:1'].
+        '''
+        spalte, gruppe = ZEITRAEUME[zeitraum]
+        params = {'von': tag_nr(von), 'bis': tag_nr(bis)}
+        filter_wgr = ''
+        if wgr is not None:
+            wgr = list(wgr)
+            params.update({f'wgr_{i}': w for i, w in enumerate(wgr)})
+            filter_wgr = f"AND u.wgr IN ({', '.join(f':wgr_{i}' for i in range(len(wgr))) or 'NULL'})"
+
+        sql = f'''
+        SELECT
+            {spalte} AS zeitraum,
+            u.art_nr,
+            u.wgr,
+            SUM(u.menge) AS menge,
+            SUM(u.umsatz) AS umsatz,
+            SUM(u.anz_bons) AS anz_bons,
+            COUNT(*) AS anz_tage
+
+        FROM umsatz_tag_artikel_t AS u
+
+        JOIN kalender_t AS k
+            ON	k.tag_nr = u.tag_nr
+
+        WHERE u.tag_nr BETWEEN :von AND :bis
+            {filter_wgr}
+
+        GROUP BY {gruppe}, u.art_nr, u.wgr
+
+        ORDER BY 1, u.art_nr
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            df = pd.read_sql_query(text(sql), conn, params=params)
+        conn.close()
+        if zeitraum == 'woche':
+            df['zeitraum'] = als_iso(df['zeitraum'])
+        return df
@@ -1,10 +1,16 @@
 from datetime import datetime, date
-from hashlib import md5
 
 import pandas as pd
 from sqlalchemy import Connection, Table, text
 
 from model.db_manager import DbManager
+from model.fortschritt import FortschrittMelder, schreibe_in_bloecken
+from model.import_log import ImportProtokoll
+from model.import_status import ImportStatus, melde_import
+from model.pit import aktualisiere_pit_schluessel
+from model.schluessel import aktualisiere_schluessel
+
+QUELLE = 'scs_export_warengruppen'
 
 
 class WarengruppenImporter():
@@ -17,8 +23,14 @@ class WarengruppenImporter():
         self.df: pd.DataFrame = None
         self.tab_temp: Table = None
         self.export_date: date = export_date
+        self.protokoll = ImportProtokoll(self.__class__.__name__, import_file)
+        self.fortschritt = FortschrittMelder(self.__class__.__name__, self._listeners)
         self.ts = datetime.now()
 
+    def add_listener(self, listener) -> None:
+        '''Registriert einen Listener fuer die Fortschrittsmeldungen'''
+        self._listeners.add(listener)
+
     def write_data(self) -> None:
         '''
         Schreibt die gelesenen Daten in die Datenbank.
@@ -30,8 +42,8 @@ class WarengruppenImporter():
         with conn:
             conn.execute(self.tab_temp.delete())
 
-            self.df.to_sql(self.tab_temp.name, conn,
-                           if_exists='append', index=False)
+            schreibe_in_bloecken(self.df, self.tab_temp.name, conn, self.fortschritt)
+            self.protokoll.zaehle(geschrieben=len(self.df))
             conn.commit()
         conn.close()
 
@@ -71,13 +83,13 @@ class WarengruppenImporter():
 
         df_wgr['mwst_satz'] = df_wgr['mwst_kz'].apply(mwst)
         df_wgr['hash_diff'] = (df_wgr['wgr_bez'] + ':' + df_wgr['mwst_kz'].astype(str) + ":" + df_wgr['mwst_satz'].astype(
-            str) + ':' + df_wgr['rabatt_kz'] + ':' + df_wgr['fsk_kz'].astype(str)).apply(lambda s: md5(s.encode('utf-8')).hexdigest())
-        df_wgr['hash'] = df_wgr['wgr'].apply(
-            lambda s: md5(s.encode('utf-8')).hexdigest())
-        df_wgr['quelle'] = 'scs_export_warengruppen'
+            str) + ':' + df_wgr['rabatt_kz'] + ':' + df_wgr['fsk_kz'].astype(str)).pipe(self.db_manager.hashe)
+        df_wgr['hash'] = df_wgr['wgr'].pipe(self.db_manager.hashe)
+        df_wgr['quelle'] = QUELLE
         df_wgr['mwst_kz'] = df_wgr['mwst_kz'].astype(str)
         df_wgr['fsk_kz'] = df_wgr['fsk_kz'].astype(str)
 
+        self.protokoll.zaehle(gelesen=len(df_wgr))
         self.df = df_wgr
 
     def post_process(self) -> None:
@@ -85,14 +97,17 @@ class WarengruppenImporter():
 
         conn = self.db_manager.get_engine().connect()
         with conn:
-            self._belade_hub(conn)
-            self._update_zuletzt_gesehen(conn)
-            self._loesche_ungueltige_sat(conn)
-            self._fuege_neue_sat_ein(conn)
+            geaendert = self.protokoll.schritt(self._belade_hub, conn)
+            self.protokoll.schritt(self._vergebe_ids, conn)
+            self.protokoll.schritt(self._update_zuletzt_gesehen, conn)
+            geaendert += self.protokoll.schritt(self._loesche_ungueltige_sat, conn)
+            geaendert += self.protokoll.schritt(self._fuege_neue_sat_ein, conn)
+            self.protokoll.schritt(self._aktualisiere_pit, conn)
+            melde_import(conn, QUELLE, self.export_date, self.ts, len(self.df), geaendert)
             conn.commit()
         conn.close()
 
-    def _belade_hub(self, conn: Connection) -> None:
+    def _belade_hub(self, conn: Connection) -> int:
         '''belaedt erstmal den HUB'''
 
         sql = '''
@@ -113,9 +128,9 @@ class WarengruppenImporter():
         WHERE h.hash IS NULL
         '''
 
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
 
-    def _loesche_ungueltige_sat(self, conn: Connection) -> None:
+    def _loesche_ungueltige_sat(self, conn: Connection) -> int:
         '''
         Setzt Eintraege in 'sat_warengruppen_t' ungueltig, fuer die aktualisierte Eintraege
         vorhanden sind. Bestehende Eintraege, die nicht in der Eingabedatei vorkommen, bleiben
@@ -141,9 +156,9 @@ class WarengruppenImporter():
             AND 	wt.hash_diff <> ws.hash_diff
         )
         '''
-        conn.execute(text(sql), {'eintrag_ets': self.ts, 'gueltig_edtm': self.export_date})
+        return conn.execute(text(sql), {'eintrag_ets': self.ts, 'gueltig_edtm': self.export_date}).rowcount
 
-    def _fuege_neue_sat_ein(self, conn: Connection) -> None:
+    def _fuege_neue_sat_ein(self, conn: Connection) -> int:
         '''
         Fuegt neue Eintraege aus in 'sat_warengruppen_t' ein bzw. Eintraege, fuer die aktuellere
         Daten vorhanden sind.
@@ -173,9 +188,9 @@ class WarengruppenImporter():
 
         WHERE ws.hash IS NULL
         '''
-        conn.execute(text(sql), {'gueltig_adtm': self.export_date})
+        return conn.execute(text(sql), {'gueltig_adtm': self.export_date}).rowcount
 
-    def _update_zuletzt_gesehen(self, conn: Connection) -> None:
+    def _update_zuletzt_gesehen(self, conn: Connection) -> int:
         '''Setzt das 'zuletzt_gesehen'-Datum im HUB'''
         sql = '''
         UPDATE hub_warengruppen_t
@@ -191,7 +206,15 @@ class WarengruppenImporter():
         ) AS bas
         WHERE bas.hash = hub_warengruppen_t.hash
         '''
-        conn.execute(text(sql))
+        return conn.execute(text(sql)).rowcount
+
+    def _vergebe_ids(self, conn: Connection) -> int:
+        '''Vergibt die Nummern der neuen Hub-Eintraege und traegt die Fremdschluessel auf sie nach'''
+        return aktualisiere_schluessel(conn, 'hub_warengruppen_t')
+
+    def _aktualisiere_pit(self, conn: Connection) -> int:
+        '''Berechnet die PIT-Tabelle fuer die geaenderten Eintraege neu'''
+        return aktualisiere_pit_schluessel(conn, 'sat_warengruppen_t')
 
 
 class WarengruppenStatus():
@@ -205,16 +228,11 @@ class WarengruppenStatus():
     def letzte_datei(self) -> datetime:
         '''
         Ermittelt das Datum der Datei mit dem jüngsten Import in der Datenbank.
-        Dazu wird das neueste 'zuletzt_gesehen'-Datum ermittelt
+        Der Stand wird beim Import in 'import_status_t' festgehalten.
         '''
-        SQL = """
-        SELECT MAX(hw.zuletzt_gesehen) AS zeitpunkt FROM hub_warengruppen_t AS hw
-        """
-        conn = self.db_manager.get_engine().connect()
-        with conn:
-            result = conn.execute(text(SQL)).fetchone()
-            if result[0]:
-                return datetime.strptime(result[0], '%Y-%m-%d %H:%M:%S.%f')
-            else:
-                return None
-        conn.close()
+        return ImportStatus(self.db_manager).letzte_datei(QUELLE)
+
+    @property
+    def letzter_import(self) -> datetime:
+        '''Ermittelt den Zeitpunkt des letzten Imports'''
+        return ImportStatus(self.db_manager).letzter_import(QUELLE)
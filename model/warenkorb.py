@@ -0,0 +1,276 @@
+'''
+Verbundkaeufe: welche Artikel werden zusammen gekauft. Je Monat werden die Bons als duenn besetzte
+Matrix Bon x Artikel (CSR: Zeilenzeiger 'indptr' und Spaltennummern 'indices') aufgebaut. Die
+Gemeinsamkeiten zweier Artikel sind die Eintraege von A^T A: die Diagonale ist die Anzahl Bons je
+Artikel, die Eintraege ausserhalb zaehlen die Bons mit beiden Artikeln. Sie werden ohne Selbst-Join
+direkt aus den Zeilen der Matrix gebildet und je Monat in 'warenkorb_monat_t', 'warenkorb_artikel_t'
+und 'warenkorb_paar_t' abgelegt. 'warenkorb_top_t' haelt daraus je Artikel die besten Partner der
+letzten ZEITRAUM_MONATE Monate mit Support, Konfidenz und Lift.
+'''
+from datetime import date
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Connection, text
+
+from model.db_manager import DbManager
+
+MAX_ARTIKEL_JE_BON = 100
+'''Bons mit mehr unterschiedlichen Artikeln (z.B. Grosseinkaeufe) bilden keine Paare, sie zaehlen nur je Artikel'''
+
+ZEITRAUM_MONATE = 12
+'''Monate, ueber die 'warenkorb_top_t' gebildet wird, bis einschliesslich zum juengsten Monat'''
+
+MIN_PAAR_BONS = 3
+'''Mindestanzahl gemeinsamer Bons eines Paares fuer 'warenkorb_top_t' und 'top_paare' '''
+
+TOP_PARTNER = 10
+'''Partner je Artikel in 'warenkorb_top_t' '''
+
+SQL_POSITIONEN = '''
+SELECT DISTINCT
+    p.hash_bon,
+    p.art_nr
+
+FROM kassenbons_t AS b
+
+JOIN kassenbons_pos_t AS p
+    ON	p.hash_bon = b.hash
+
+WHERE p.art_nr <> '-'
+    AND p.menge > 0
+    AND b.bon_datum >= :von
+    AND b.bon_datum < :bis
+'''
+'''Artikel je Bon eines Zeitraums, Zeilen mit art_nr '-' sind Zahlungen und Infos'''
+
+
+def inzidenzmatrix(zeilen: np.ndarray, spalten: np.ndarray, anzahl_zeilen: int) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Baut aus Paaren (Zeile, Spalte) die Matrix im CSR-Format: die Spalten der Zeile i stehen
+    aufsteigend und ohne Doppelte in indices[indptr[i]:indptr[i + 1]].
+    '''
+    reihenfolge = np.lexsort((spalten, zeilen))
+    zeilen = zeilen[reihenfolge]
+    spalten = spalten[reihenfolge]
+    neu = np.ones(len(zeilen), dtype=bool)
+    neu[1:] = (zeilen[1:] != zeilen[:-1]) | (spalten[1:] != spalten[:-1])
+    zeilen = zeilen[neu]
+    spalten = spalten[neu]
+
+    indptr = np.zeros(anzahl_zeilen + 1, dtype=np.int64)
+    np.cumsum(np.bincount(zeilen, minlength=anzahl_zeilen), out=indptr[1:])
+    return indptr, spalten.astype(np.int64)
+
+
+def kookkurrenz(indptr: np.ndarray, indices: np.ndarray, anzahl_spalten: int,
+                max_je_zeile: int = MAX_ARTIKEL_JE_BON) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Berechnet die Eintraege oberhalb der Diagonalen von A^T A fuer die CSR-Matrix A: liefert die
+    Spaltenpaare (a < b) und die Anzahl Zeilen, in denen beide vorkommen. Dazu wird jeder Eintrag
+    einer Zeile mit allen folgenden Eintraegen derselben Zeile gepaart und die Paare gezaehlt.
+    Zeilen mit mehr als 'max_je_zeile' Eintraegen bleiben unberuecksichtigt.
+    '''
+    laenge = np.diff(indptr)
+    zeile = np.repeat(np.arange(len(laenge)), laenge)
+    position = np.arange(len(indices))
+    # Anzahl der Eintraege hinter jedem Eintrag in seiner Zeile
+    folgende = indptr[zeile + 1] - position - 1
+    folgende[laenge[zeile] > max_je_zeile] = 0
+
+    anfang = np.cumsum(folgende) - folgende
+    links = np.repeat(position, folgende)
+    versatz = np.arange(int(folgende.sum())) - np.repeat(anfang, folgende)
+    rechts = links + 1 + versatz
+
+    schluessel = indices[links] * np.int64(anzahl_spalten) + indices[rechts]
+    paare, anzahl = np.unique(schluessel, return_counts=True)
+    return paare // anzahl_spalten, paare % anzahl_spalten, anzahl
+
+
+def _monatsgrenzen(monat: str) -> Tuple[str, str]:
+    '''Erster Tag des Monats 'YYYY-MM' und erster Tag des Folgemonats'''
+    beginn = pd.Period(monat, freq='M')
+    return beginn.start_time.strftime('%Y-%m-%d'), (beginn + 1).start_time.strftime('%Y-%m-%d')
+
+
+def berechne_monat(conn: Connection, monat: str) -> int:
+    '''Berechnet die Verbundkaeufe eines Monats ('YYYY-MM') neu, liefert die Anzahl Paare'''
+    for tabelle in ('warenkorb_monat_t', 'warenkorb_artikel_t', 'warenkorb_paar_t'):
+        conn.execute(text(f'DELETE FROM {tabelle} WHERE monat = :monat'), {'monat': monat})
+
+    von, bis = _monatsgrenzen(monat)
+    df = pd.read_sql_query(text(SQL_POSITIONEN), conn, params={'von': von, 'bis': bis})
+    if df.empty:
+        return 0
+
+    bon_ids, bons = pd.factorize(df['hash_bon'])
+    # sortiert, damit a < b bei den Nummern auch art_nr_a < art_nr_b bedeutet
+    art_ids, artikel = pd.factorize(df['art_nr'], sort=True)
+    indptr, indices = inzidenzmatrix(bon_ids, art_ids, len(bons))
+    a, b, anzahl = kookkurrenz(indptr, indices, len(artikel))
+
+    conn.execute(text('INSERT INTO warenkorb_monat_t (monat, bons) VALUES (:monat, :bons)'),
+                 {'monat': monat, 'bons': len(bons)})
+    je_artikel = np.bincount(indices, minlength=len(artikel))
+    pd.DataFrame({'monat': monat, 'art_nr': artikel, 'bons': je_artikel}).to_sql(
+        'warenkorb_artikel_t', conn, if_exists='append', index=False)
+    pd.DataFrame({'monat': monat, 'art_nr_a': artikel.take(a), 'art_nr_b': artikel.take(b), 'bons': anzahl}).to_sql(
+        'warenkorb_paar_t', conn, if_exists='append', index=False, chunksize=50_000)
+    return len(anzahl)
+
+
+def _kennzahlen(conn: Connection, von_monat: str, bis_monat: str, min_bons: int) -> pd.DataFrame:
+    '''
+    Summiert die Monate von 'von_monat' bis 'bis_monat' und liefert je Paar mit mindestens 'min_bons'
+    gemeinsamen Bons: art_nr_a, art_nr_b, bons, bons_a, bons_b und die Anzahl aller Bons 'bons_gesamt'.
+    '''
+    params = {'von': von_monat, 'bis': bis_monat, 'min_bons': min_bons}
+    bons_gesamt = conn.execute(text(
+        'SELECT COALESCE(SUM(m.bons), 0) FROM warenkorb_monat_t AS m WHERE m.monat BETWEEN :von AND :bis'),
+        params).scalar()
+    df_paare = pd.read_sql_query(text('''
+        SELECT
+            p.art_nr_a,
+            p.art_nr_b,
+            SUM(p.bons) AS bons
+
+        FROM warenkorb_paar_t AS p
+
+        WHERE p.monat BETWEEN :von AND :bis
+
+        GROUP BY p.art_nr_a, p.art_nr_b
+
+        HAVING SUM(p.bons) >= :min_bons
+        '''), conn, params=params)
+    df_artikel = pd.read_sql_query(text('''
+        SELECT
+            a.art_nr,
+            SUM(a.bons) AS bons
+
+        FROM warenkorb_artikel_t AS a
+
+        WHERE a.monat BETWEEN :von AND :bis
+
+        GROUP BY a.art_nr
+        '''), conn, params=params).set_index('art_nr')['bons']
+
+    df_paare['bons_a'] = df_artikel.reindex(df_paare['art_nr_a']).to_numpy()
+    df_paare['bons_b'] = df_artikel.reindex(df_paare['art_nr_b']).to_numpy()
+    df_paare['bons_gesamt'] = bons_gesamt
+    return df_paare
+
+
+def aktualisiere_top(conn: Connection) -> int:
+    '''Berechnet 'warenkorb_top_t' aus den letzten ZEITRAUM_MONATE Monaten neu'''
+    conn.execute(text('DELETE FROM warenkorb_top_t'))
+    bis_monat = conn.execute(text('SELECT MAX(m.monat) FROM warenkorb_monat_t AS m')).scalar()
+    if not bis_monat:
+        return 0
+    von_monat = str(pd.Period(bis_monat, freq='M') - (ZEITRAUM_MONATE - 1))
+    df = _kennzahlen(conn, von_monat, bis_monat, MIN_PAAR_BONS)
+
+    # jedes Paar in beiden Richtungen: Partner von a und Partner von b
+    df_top = pd.concat([
+        pd.DataFrame({'art_nr': df['art_nr_a'], 'partner': df['art_nr_b'], 'bons': df['bons'],
+                      'bons_art': df['bons_a'], 'bons_partner': df['bons_b']}),
+        pd.DataFrame({'art_nr': df['art_nr_b'], 'partner': df['art_nr_a'], 'bons': df['bons'],
+                      'bons_art': df['bons_b'], 'bons_partner': df['bons_a']})
+    ], ignore_index=True)
+    gesamt = df['bons_gesamt'].iloc[0] if len(df) else 0
+    df_top['support'] = df_top['bons'] / gesamt if gesamt else 0.0
+    df_top['konfidenz'] = df_top['bons'] / df_top['bons_art']
+    df_top['lift'] = df_top['bons'] * gesamt / (df_top['bons_art'] * df_top['bons_partner'])
+
+    df_top = df_top.sort_values(['art_nr', 'lift', 'bons', 'partner'], ascending=[True, False, False, True])
+    df_top['rang'] = df_top.groupby('art_nr').cumcount() + 1
+    df_top = df_top[df_top['rang'] <= TOP_PARTNER]
+    df_top = df_top.assign(von_monat=von_monat, bis_monat=bis_monat)[
+        ['art_nr', 'rang', 'partner', 'bons', 'support', 'konfidenz', 'lift', 'von_monat', 'bis_monat']]
+    df_top.to_sql('warenkorb_top_t', conn, if_exists='append', index=False, chunksize=50_000)
+    return len(df_top)
+
+
+def aktualisiere_warenkorb(conn: Connection) -> int:
+    '''
+    Berechnet die Verbundkaeufe aller Monate neu, die in den Bons des laufenden Imports
+    (temp_kassenbons_t) vorkommen, und danach 'warenkorb_top_t'. Liefert die Anzahl Paare der Monate.
+    '''
+    monate = conn.execute(text('''
+        SELECT DISTINCT substr(bt.bon_datum, 1, 7) FROM temp_kassenbons_t AS bt ORDER BY 1
+        ''')).scalars().all()
+    zeilen = sum(berechne_monat(conn, monat) for monat in monate)
+    aktualisiere_top(conn)
+    return zeilen
+
+
+def uebernimm_bestand(conn: Connection) -> None:
+    '''Migration: berechnet die Verbundkaeufe aller bereits importierten Monate'''
+    monate = conn.execute(text('''
+        SELECT DISTINCT substr(b.bon_datum, 1, 7) FROM kassenbons_t AS b ORDER BY 1
+        ''')).scalars().all()
+    for monat in monate:
+        berechne_monat(conn, monat)
+    aktualisiere_top(conn)
+
+
+class Warenkorb():
+    '''Liefert Verbundkaeufe aus den Monatsverdichtungen'''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def partner(self, art_nr: str) -> pd.DataFrame:
+        '''
+        Liefert die besten Partner des Artikels aus 'warenkorb_top_t' mit ihrer aktuellen Bezeichnung.
+        Spalten: rang, partner, art_bez, bons, support, konfidenz, lift, von_monat, bis_monat.
+        '''
+        sql = '''
+        SELECT
+            t.rang,
+            t.partner,
+            s.art_bez,
+            t.bons,
+            t.support,
+            t.konfidenz,
+            t.lift,
+            t.von_monat,
+            t.bis_monat
+
+        FROM warenkorb_top_t AS t
+
+        LEFT JOIN hub_artikel_t AS h
+            ON	h.art_nr = t.partner
+
+        LEFT JOIN sat_artikel_t AS s
+            ON	s.hash = h.hash
+            AND s.gueltig = 1
+
+        WHERE t.art_nr = :art_nr
+
+        ORDER BY t.rang
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            df = pd.read_sql_query(text(sql), conn, params={'art_nr': art_nr})
+        conn.close()
+        return df
+
+    def top_paare(self, von: date, bis: date, anzahl: int = 100, min_bons: int = MIN_PAAR_BONS,
+                  nach: str = 'lift') -> pd.DataFrame:
+        '''
+        Liefert die 'anzahl' besten Paare der Monate von 'von' bis 'bis' (einschliesslich), sortiert
+        nach 'lift', 'bons' oder 'konfidenz'. Spalten: art_nr_a, art_nr_b, bons, bons_a, bons_b,
+        support, konfidenz (b bei a), lift.
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            df = _kennzahlen(conn, von.strftime('%Y-%m'), bis.strftime('%Y-%m'), min_bons)
+        conn.close()
+        gesamt = df.pop('bons_gesamt')
+        df['support'] = df['bons'] / gesamt
+        df['konfidenz'] = df['bons'] / df['bons_a']
+        df['lift'] = df['bons'] * gesamt / (df['bons_a'] * df['bons_b'])
+        return df.sort_values([nach, 'bons'], ascending=False, ignore_index=True).head(anzahl)
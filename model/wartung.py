@@ -0,0 +1,175 @@
+'''
+Wartung der Datenbank nach Importen oder auf Anforderung. Die Importe aendern die Tabellen laufend
+und leeren die Zwischentabellen 'temp_*' vor jedem Lauf, ohne Wartung fehlen dem Planer die
+Statistiken in 'sqlite_stat1' und die frei gewordenen Seiten bleiben in der Datei. Die Wartung
+
+- analysiert die Tabellen, deren Zeilenzahl sich seit der letzten Analyse deutlich geaendert hat
+  (ANALYZE je Tabelle, danach PRAGMA optimize). Die Zeilenzahl wird aus der rowid geschaetzt, ein
+  COUNT(*) wuerde gerade die grossen Bewegungstabellen bei jeder Wartung vollstaendig lesen,
+- gibt die freien Seiten mit 'PRAGMA incremental_vacuum' an das Dateisystem zurueck, die Datenbank
+  steht dafuer seit Schema-Version 17 auf 'auto_vacuum = INCREMENTAL',
+- uebertraegt ein Write-Ahead-Log (falls eingeschaltet) in die Datenbank und kuerzt es.
+
+Jede Aktion wird gemessen und wie ein Import in 'import_log_t' gespeichert (Importer 'Wartung').
+'''
+from typing import Callable, Dict, Set
+
+from sqlalchemy import Connection, text
+
+from model.db_manager import DbManager
+from model.import_log import ImportProtokoll
+
+WARTUNG = 'Wartung'
+'''Name der Wartung in 'import_log_t' '''
+
+ABWEICHUNG = 0.1
+'''Relative Aenderung der Zeilenzahl, ab der eine Tabelle erneut analysiert wird'''
+
+ERGEBNISSE: Dict[str, str] = {
+    'analysiere': 'Tabellen analysiert',
+    'vakuumiere': 'Seiten freigegeben',
+    'checkpoint': 'Seiten aus dem WAL uebertragen'
+}
+'''Schritt -> Bedeutung der gelieferten Anzahl'''
+
+SCHAETZUNG_PRAEFIX = 'analyse_zeilen:'
+'''Praefix der Eintraege in 'einstellung_t' mit der geschaetzten Zeilenzahl bei der letzten Analyse'''
+
+AUTO_VACUUM_INKREMENTELL = 2
+'''Wert von 'PRAGMA auto_vacuum' fuer INCREMENTAL'''
+
+
+def _analysierte_tabellen(conn: Connection) -> Set[str]:
+    '''Tabellen mit Eintraegen in 'sqlite_stat1' '''
+    vorhanden = conn.execute(text(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")).scalar()
+    if not vorhanden:
+        return set()
+    return set(conn.execute(text('SELECT DISTINCT s.tbl FROM sqlite_stat1 AS s')).scalars())
+
+
+def _geschaetzte_zeilen(conn: Connection, tabelle: str) -> int:
+    '''
+    Zeilenzahl aus dem Bereich der rowid, das sind nur zwei Zugriffe auf den Anfang und das Ende der
+    Tabelle statt eines vollstaendigen COUNT(*). Geleerte Tabellen vergeben die rowid wieder ab 1,
+    nach Loeschungen innerhalb der Tabelle ist die Schaetzung zu hoch. Sie wird deshalb nur mit der
+    Schaetzung bei der letzten Analyse verglichen.
+    '''
+    von, bis = conn.execute(text(f'SELECT MIN(rowid), MAX(rowid) FROM "{tabelle}"')).one()
+    return 0 if bis is None else bis - von + 1
+
+
+def _gespeicherte_schaetzungen(conn: Connection) -> Dict[str, int]:
+    '''Geschaetzte Zeilenzahl je Tabelle bei der letzten Analyse aus 'einstellung_t' '''
+    zeilen = conn.execute(text('SELECT e.name, e.wert FROM einstellung_t AS e WHERE e.name LIKE :praefix'),
+                          {'praefix': f'{SCHAETZUNG_PRAEFIX}%'})
+    return {name[len(SCHAETZUNG_PRAEFIX):]: int(wert) for name, wert in zeilen}
+
+
+def geaenderte_tabellen(conn: Connection) -> Dict[str, int]:
+    '''
+    Tabellen ohne Statistik oder mit einer seit der letzten Analyse um mehr als ABWEICHUNG
+    geaenderten geschaetzten Zeilenzahl, jeweils mit der aktuellen Schaetzung. Leere Tabellen ohne
+    Statistik und virtuelle Tabellen (Volltextsuche) werden nicht analysiert. WITHOUT ROWID-Tabellen
+    (binaerer Hashmodus) haben keine rowid fuer die Schaetzung, sie werden nur ohne Statistik
+    ausgewaehlt und sonst 'PRAGMA optimize' ueberlassen.
+    '''
+    tabellen = conn.execute(text('''
+        SELECT m.name, m.sql LIKE '%WITHOUT ROWID%' FROM sqlite_master AS m
+        WHERE m.type = 'table'
+            AND m.name NOT LIKE 'sqlite_%'
+            AND m.sql NOT LIKE 'CREATE VIRTUAL TABLE%'
+        ORDER BY m.name
+        ''')).all()
+    analysiert = _analysierte_tabellen(conn)
+    schaetzungen = _gespeicherte_schaetzungen(conn)
+    geaendert = {}
+    for tabelle, ohne_rowid in tabellen:
+        if ohne_rowid:
+            if tabelle not in analysiert and conn.execute(
+                    text(f'SELECT EXISTS (SELECT 1 FROM "{tabelle}")')).scalar():
+                geaendert[tabelle] = None
+            continue
+        anzahl = _geschaetzte_zeilen(conn, tabelle)
+        vorher = schaetzungen.get(tabelle) if tabelle in analysiert else None
+        if vorher is None:
+            if anzahl:
+                geaendert[tabelle] = anzahl
+        elif abs(anzahl - vorher) > ABWEICHUNG * max(vorher, 1):
+            geaendert[tabelle] = anzahl
+    return geaendert
+
+
+def analysiere(conn: Connection) -> int:
+    '''Analysiert die geaenderten Tabellen und fuehrt 'PRAGMA optimize' aus, liefert die Anzahl Tabellen'''
+    tabellen = geaenderte_tabellen(conn)
+    for tabelle, anzahl in tabellen.items():
+        conn.execute(text(f'ANALYZE "{tabelle}"'))
+        if anzahl is not None:
+            # ON CONFLICT behaelt die rowid, die Schaetzung fuer 'einstellung_t' selbst bleibt so stabil
+            conn.execute(text('''
+                INSERT INTO einstellung_t (name, wert) VALUES (:name, :wert)
+                ON CONFLICT (name) DO UPDATE SET wert = excluded.wert
+                '''), {'name': f'{SCHAETZUNG_PRAEFIX}{tabelle}', 'wert': str(anzahl)})
+    # ab SQLite 3.46 prueft 0x10000 alle Tabellen, nicht nur die von dieser Verbindung abgefragten
+    conn.execute(text('PRAGMA optimize = 0x10002'))
+    return len(tabellen)
+
+
+def vakuumiere(conn: Connection) -> int:
+    '''Gibt die freien Seiten an das Dateisystem zurueck, liefert ihre Anzahl'''
+    if conn.execute(text('PRAGMA auto_vacuum')).scalar() != AUTO_VACUUM_INKREMENTELL:
+        return 0
+    frei = conn.execute(text('PRAGMA freelist_count')).scalar()
+    if frei:
+        # jeder Schritt der Anweisung gibt nur eine Seite frei, execute() fuehrt aber nur den ersten
+        # aus, executescript() dagegen bis zum Ende
+        conn.connection.driver_connection.executescript('PRAGMA incremental_vacuum')
+    return frei
+
+
+def checkpoint(conn: Connection) -> int:
+    '''
+    Uebertraegt das Write-Ahead-Log in die Datenbank und kuerzt es auf 0 Bytes. Liefert die Anzahl
+    uebertragener Seiten, ohne WAL 0.
+    '''
+    # TRUNCATE meldet nach dem Kuerzen 0 Seiten, die Anzahl liefert der vorherige Lauf ohne Warten
+    _, im_wal, uebertragen = conn.execute(text('PRAGMA wal_checkpoint(PASSIVE)')).one()
+    if im_wal > 0:
+        conn.execute(text('PRAGMA wal_checkpoint(TRUNCATE)')).one()
+    return max(uebertragen, 0)
+
+
+def fuehre_wartung_aus(db_manager: DbManager, melde: Callable[[object], None] = None) -> ImportProtokoll:
+    '''
+    Fuehrt alle Wartungsschritte gemessen aus, speichert die Messwerte in 'import_log_t' und
+    uebergibt jede Messung an 'melde'. Liefert das Protokoll.
+    '''
+    protokoll = ImportProtokoll(WARTUNG, db_manager.dbfile)
+    try:
+        with db_manager.get_engine().connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            with protokoll.messe('wartung'):
+                protokoll.schritt(analysiere, conn)
+                protokoll.schritt(vakuumiere, conn)
+                protokoll.schritt(checkpoint, conn)
+    finally:
+        if melde:
+            for messung in protokoll.messungen:
+                melde(messung)
+        protokoll.speichere(db_manager)
+    return protokoll
+
+
+def richte_auto_vacuum_ein(conn: Connection) -> None:
+    '''
+    Migration: stellt die Datenbank auf 'auto_vacuum = INCREMENTAL' um. Bei einer bestehenden
+    Datenbank wirkt das erst mit VACUUM, das ausserhalb einer Transaktion laufen muss, die
+    vorherigen Migrationen werden deshalb vorher festgeschrieben. Damit sie nach einem Fehler des
+    VACUUM (Platte voll, Datenbank gesperrt) nicht erneut laufen, wird dabei Version 16 gespeichert.
+    '''
+    if conn.execute(text('PRAGMA auto_vacuum')).scalar() == AUTO_VACUUM_INKREMENTELL:
+        return
+    conn.execute(text('PRAGMA user_version = 16'))
+    conn.commit()
+    conn.execute(text('PRAGMA auto_vacuum = INCREMENTAL'))
+    conn.execute(text('VACUUM'))
@@ -0,0 +1,174 @@
+'''
+Zahlungen aus dem Kassenjournal. Die Zahlungszeilen eines Bons (Positionstyp 'ZA') werden beim
+Import anhand ihrer Texte einer Zahlart zugeordnet und mit Betrag und Zeitpunkt in 'zahlungen_t'
+abgelegt. Auswertungen der Kartenzahlungen lesen dann nur noch den Index 'ix_zahlungen_t_karte'.
+'''
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Connection, text
+
+from model.db_manager import (CENT, DbManager, entskaliere, hashe, lies_betrag_ganzzahl, lies_hash_binaer,
+                              skaliere, sql_dezimal)
+
+POS_TYP_ZAHLUNG = 'ZA'
+'''Positionstyp der Zahlungszeilen im Kassenjournal'''
+
+ZAHLARTEN = (
+    ('girocard', r'girocard|\bec\b|ec-karte|maestro|v ?pay'),
+    ('kreditkarte', r'kredit|visa|master ?card|amex|american express|diners'),
+    ('gutschein', r'gutschein|coupon|wertbon'),
+    ('bar', r'\bbar\b|bargeld|rueckgeld|rückgeld|wechselgeld'),
+)
+'''
+Zahlart -> Muster (regulaerer Ausdruck, ohne Gross-/Kleinschreibung) fuer Bezeichnung und Infotext
+der Zahlungszeile. Die erste passende Zahlart gilt, 'EC-Karte girocard' ist also 'girocard'.
+'''
+
+ZAHLART_SONSTIGE = 'sonstige'
+'''Zahlart fuer Zahlungszeilen, auf die kein Muster passt'''
+
+KARTENZAHLARTEN = ('girocard', 'kreditkarte')
+'''Zahlarten, die als Kartenzahlung gelten'''
+
+SPALTEN = ('hash', 'hash_bon', 'kasse_nr', 'bon_nr', 'zeitpunkt', 'datum', 'zahlart', 'karte', 'betrag', 'text')
+
+SQL_JOURNAL = '''
+SELECT
+    kj.hash,
+    kj.kasse_nr,
+    kj.bon_nr,
+    kj.bon_abschluss,
+    kj.pos_typ,
+    kj.art_bez,
+    kj.infotext,
+    kj.preis_gesamt
+
+FROM kassenjournal_t AS kj
+
+WHERE kj.pos_typ = :pos_typ
+'''
+
+
+def klassifiziere(texte: pd.Series) -> pd.Series:
+    '''Ordnet jedem Text die erste passende Zahlart aus ZAHLARTEN zu, ohne Schleife ueber die Zeilen'''
+    texte = texte.fillna('').astype(str)
+    bedingungen = [texte.str.contains(muster, case=False, regex=True).to_numpy() for _, muster in ZAHLARTEN]
+    zahlarten = np.select(bedingungen, [zahlart for zahlart, _ in ZAHLARTEN], default=ZAHLART_SONSTIGE)
+    return pd.Series(zahlarten, index=texte.index, name='zahlart')
+
+
+def zahlungen_aus_journal(df_journal: pd.DataFrame, binaer: bool = False) -> pd.DataFrame:
+    '''
+    Waehlt aus Kassenjournalzeilen (hash, kasse_nr, bon_nr, bon_abschluss, pos_typ, art_bez,
+    infotext, preis_gesamt) die Zahlungszeilen aus und liefert sie mit den Spalten von 'zahlungen_t'.
+    'binaer' ist die Speicherform der Hashes (siehe model.db_manager.hashe).
+    '''
+    df = df_journal[df_journal['pos_typ'] == POS_TYP_ZAHLUNG]
+    art_bez = df['art_bez'].fillna('').astype(str)
+    infotext = df['infotext'].fillna('').astype(str)
+    # der Infotext wiederholt oft die Bezeichnung, dann reicht einer der beiden
+    texte = art_bez.where(art_bez == infotext, (art_bez + ' ' + infotext).str.strip())
+    zeitpunkt = pd.to_datetime(df['bon_abschluss'])
+
+    df_za = pd.DataFrame({
+        'hash': df['hash'],
+        'hash_bon': hashe(df['kasse_nr'].astype(str) + ':' + df['bon_nr'].astype(str), binaer),
+        'kasse_nr': df['kasse_nr'],
+        'bon_nr': df['bon_nr'],
+        'zeitpunkt': zeitpunkt.dt.strftime('%Y-%m-%d %H:%M:%S.%f'),
+        'datum': zeitpunkt.dt.strftime('%Y-%m-%d'),
+        'zahlart': klassifiziere(texte),
+        'betrag': df['preis_gesamt'].astype(float).round(2),
+        'text': texte.str.slice(0, 255)
+    })
+    df_za['karte'] = df_za['zahlart'].isin(KARTENZAHLARTEN).astype(int)
+    return df_za[list(SPALTEN)]
+
+
+def schreibe_zahlungen(conn: Connection, df_journal: pd.DataFrame) -> int:
+    '''
+    Schreibt die Zahlungszeilen aus den Kassenjournalzeilen (Betraege dezimal) nach 'zahlungen_t'.
+    Schluessel ist der Hash der Journalzeile, bereits vorhandene Zahlungen bleiben unveraendert.
+    Liefert die Anzahl neuer Zahlungen.
+    '''
+    df_za = zahlungen_aus_journal(df_journal, lies_hash_binaer(conn))
+    if df_za.empty:
+        return 0
+    df_za = skaliere(df_za, 'zahlungen_t', lies_betrag_ganzzahl(conn))
+    sql = f'''
+    INSERT OR IGNORE INTO zahlungen_t ({', '.join(SPALTEN)})
+    VALUES ({', '.join(':' + s for s in SPALTEN)})
+    '''
+    return conn.execute(text(sql), df_za.to_dict('records')).rowcount
+
+
+def uebernimm_bestand(conn: Connection) -> None:
+    '''Migration: uebernimmt die Zahlungen aus dem gesamten Kassenjournal'''
+    ganzzahl = lies_betrag_ganzzahl(conn)
+    for df in pd.read_sql_query(text(SQL_JOURNAL), conn, params={'pos_typ': POS_TYP_ZAHLUNG}, chunksize=50_000):
+        schreibe_zahlungen(conn, entskaliere(df, 'kassenjournal_t', ganzzahl))
+
+
+class Zahlungen():
+    '''Auswertungen ueber 'zahlungen_t' '''
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    def kartenzahlungen(self, von: date, bis: date, je: str = 'tag') -> pd.DataFrame:
+        '''
+        Liefert Anzahl und Summe der Kartenzahlungen zwischen 'von' und 'bis' (einschliesslich)
+        je Zahlart und Tag ('tag') oder Monat ('monat'). Spalten: zeitraum, zahlart, anzahl, betrag.
+        '''
+        zeitraum = {'tag': 'z.datum', 'monat': "substr(z.datum, 1, 7)"}[je]
+        betrag = sql_dezimal('SUM(z.betrag)', CENT, self.db_manager.betrag_ganzzahl)
+        sql = f'''
+        SELECT
+            {zeitraum} AS zeitraum,
+            z.zahlart,
+            COUNT(*) AS anzahl,
+            ROUND({betrag}, 2) AS betrag
+
+        FROM zahlungen_t AS z
+
+        WHERE z.karte = 1
+            AND z.datum BETWEEN :von AND :bis
+
+        GROUP BY 1, 2
+
+        ORDER BY 1, 2
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            df = pd.read_sql_query(text(sql), conn, params={
+                'von': von.strftime('%Y-%m-%d'), 'bis': bis.strftime('%Y-%m-%d')})
+        conn.close()
+        return df
+
+    def je_zahlart(self, von: date, bis: date) -> pd.DataFrame:
+        '''Liefert Anzahl und Summe aller Zahlungen je Zahlart zwischen 'von' und 'bis' (einschliesslich)'''
+        betrag = sql_dezimal('SUM(z.betrag)', CENT, self.db_manager.betrag_ganzzahl)
+        sql = f'''
+        SELECT
+            z.zahlart,
+            z.karte,
+            COUNT(*) AS anzahl,
+            ROUND({betrag}, 2) AS betrag
+
+        FROM zahlungen_t AS z
+
+        WHERE z.datum BETWEEN :von AND :bis
+
+        GROUP BY z.zahlart, z.karte
+
+        ORDER BY betrag DESC
+        '''
+        conn = self.db_manager.get_engine().connect()
+        with conn:
+            df = pd.read_sql_query(text(sql), conn, params={
+                'von': von.strftime('%Y-%m-%d'), 'bis': bis.strftime('%Y-%m-%d')})
+        conn.close()
+        return df
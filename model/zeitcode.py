@@ -0,0 +1,76 @@
+'''
+Ganzzahlige Tagesnummern. Die Tage stehen als ISO-Text ('YYYY-MM-DD') in den Tabellen, fuer
+Zeitraeume tragen Kalender, Bons und die Tagesverdichtung der Umsaetze zusaetzlich 'tag_nr', die
+Anzahl Tage seit dem 01.01.1970 (tag_nr * 86400 sind also die Epochensekunden um Mitternacht).
+Abfragen filtern und verbinden ueber diese Spalte als Bereichssuche im Index, statt Texte zu
+vergleichen oder je Zeile mit date()/strftime() umzurechnen. Die Umrechnung geschieht vorher
+mit 'tag_nr' bzw. danach mit 'als_iso'.
+'''
+from datetime import date, timedelta
+from typing import Dict, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Connection, text
+
+EPOCHE = date(1970, 1, 1)
+'''Tag 0 der Tagesnummern'''
+
+TAG_NR_SPALTEN: Dict[str, str] = {
+    'kalender_t': 'datum',
+    'kassenbons_t': 'bon_datum',
+    'umsatz_tag_artikel_t': 'bon_datum'
+}
+'''Tabelle mit Spalte 'tag_nr' -> Spalte des Tages als Text'''
+
+SQL_TAG_NR = 'CAST(julianday(date({spalte})) - 2440587.5 AS INTEGER)'
+'''
+SQL-Ausdruck fuer die Tagesnummer eines ISO-Datums (Julianischer Tag des 01.01.1970 um 0 Uhr). date()
+schneidet die Uhrzeit vorher ab, CAST rundet vor 1970 sonst zur 0 hin auf den Folgetag.
+'''
+
+
+def tag_nr(tag: Union[date, str]) -> int:
+    '''Tagesnummer eines Datums oder ISO-Textes'''
+    if isinstance(tag, str):
+        tag = date.fromisoformat(tag[:10])
+    return (tag - EPOCHE).days
+
+
+def datum(nummer: int) -> date:
+    '''Datum zu einer Tagesnummer'''
+    return EPOCHE + timedelta(days=int(nummer))
+
+
+def tag_nummern(werte: pd.Series) -> np.ndarray:
+    '''Tagesnummern einer Spalte mit Daten oder ISO-Texten als int64-Array'''
+    return pd.to_datetime(werte).to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+
+def als_iso(nummern) -> np.ndarray:
+    '''ISO-Texte ('YYYY-MM-DD') zu Tagesnummern'''
+    return np.asarray(nummern, dtype=np.int64).astype('datetime64[D]').astype(str)
+
+
+def ergaenze_tag_nr(conn: Connection) -> int:
+    '''Traegt die fehlenden Tagesnummern in allen Tabellen aus TAG_NR_SPALTEN nach, liefert die Anzahl'''
+    zeilen = 0
+    for tabelle, spalte in TAG_NR_SPALTEN.items():
+        zeilen += conn.execute(text(f'''
+            UPDATE {tabelle}
+            SET tag_nr = {SQL_TAG_NR.format(spalte=spalte)}
+
+            WHERE tag_nr IS NULL
+            ''')).rowcount
+    return zeilen
+
+
+def erweitere_tabellen(conn: Connection) -> None:
+    '''Migration: ergaenzt 'tag_nr' samt Index in bestehenden Tabellen und berechnet alle Tagesnummern'''
+    for tabelle in TAG_NR_SPALTEN:
+        vorhanden = [zeile[1] for zeile in conn.execute(text(f'PRAGMA table_info({tabelle})'))]
+        if 'tag_nr' not in vorhanden:
+            conn.execute(text(f'ALTER TABLE {tabelle} ADD COLUMN tag_nr INTEGER'))
+        eindeutig = 'UNIQUE ' if tabelle == 'kalender_t' else ''
+        conn.execute(text(f'CREATE {eindeutig}INDEX IF NOT EXISTS ix_{tabelle}_tag_nr ON {tabelle} (tag_nr)'))
+    ergaenze_tag_nr(conn)
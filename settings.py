@@ -2,9 +2,9 @@ from configparser import ConfigParser
 import locale
 import os
 from pathlib import Path
-from tkinter.filedialog import asksaveasfilename
-from typing import Mapping, Tuple
+from typing import List, Mapping, Tuple
 from model.db_manager import DbManager
+from model.schema import aktualisiere_schema
 
 BASEDIR = str(Path(__file__).parent)
 IMGDIR = str(Path(BASEDIR) / 'res' / 'img')
@@ -49,10 +49,15 @@ def check_configfile() -> None:
     cfg_parser = ConfigParser()
     cfg_parser.read(CONFIG_FILE)
 
-    if 'datenbank' in cfg_parser.sections():
+    if 'datenbank' in cfg_parser.sections() and 'berichte' in cfg_parser.sections():
         return
 
-    cfg_parser.add_section('datenbank')
+    if not 'datenbank' in cfg_parser.sections():
+        cfg_parser.add_section('datenbank')
+    if not 'berichte' in cfg_parser.sections():
+        cfg_parser.add_section('berichte')
+        # Warengruppen kommagetrennt im Format 'WGR:UWGR', z.B. 1:0, 1:1
+        cfg_parser['berichte']['backwaren_wgr'] = ''
     with open(CONFIG_FILE, mode='w') as cfgfile:
         cfg_parser.write(cfgfile)
 
@@ -69,8 +74,21 @@ def get_dbconfig() -> str:
     return None
 
 
+def get_backwaren_wgr() -> List[str]:
+    '''Liefert die Warengruppen der Backwaren fuer die Bestellhilfe (Abschnitt 'berichte', Schluessel 'backwaren_wgr')'''
+
+    cfg_parser = ConfigParser()
+    cfg_parser.read(CONFIG_FILE)
+
+    if not 'berichte' in cfg_parser.sections():
+        return []
+    wgr = cfg_parser['berichte'].get('backwaren_wgr', '')
+    return [w.strip() for w in wgr.split(',') if w.strip()]
+
+
 def select_database() -> str:
     '''Ruft den Dialog zur Auswahl einer SQLITE-Datenbank auf'''
+    from tkinter.filedialog import asksaveasfilename
 
     cfg_parser = ConfigParser()
     cfg_parser.read(CONFIG_FILE)
@@ -92,7 +110,10 @@ def select_database() -> str:
     return filename
 
 
-def create_tables() -> None:
-    db_man = DbManager(get_dbconfig())
-    md = db_man.get_metadata()
-    md.create_all(db_man.get_engine())
+def create_tables(dbfile: str = None) -> None:
+    '''
+    Legt die fehlenden Tabellen in der konfigurierten bzw. der uebergebenen Datenbank an.
+    Ist das Schema bereits aktuell, wird nur dessen Version geprueft.
+    '''
+    db_man = DbManager(dbfile or get_dbconfig())
+    aktualisiere_schema(db_man)
@@ -0,0 +1,121 @@
+'''
+Misst den Programmstart: die Ladezeit jedes importierten Moduls und die Dauer der
+einzelnen Startphasen. Eingeschaltet wird die Messung mit dem Argument '--startprofil'
+oder der Umgebungsvariable DLSWWS_STARTPROFIL=1. Anders als 'python -X importtime'
+funktioniert das auch in der mit PyInstaller gebauten Anwendung.
+
+Das Modul verwendet nur die Standardbibliothek und muss vor allen anderen Modulen
+der Anwendung importiert werden.
+'''
+import builtins
+import os
+import sys
+import time
+from importlib.util import resolve_name
+from pathlib import Path
+from typing import Dict, List, TextIO, Tuple
+
+SCHALTER = '--startprofil'
+UMGEBUNGSVARIABLE = 'DLSWWS_STARTPROFIL'
+PROFIL_DATEI = str(Path('~/dlswws_startprofil.txt').expanduser().absolute())
+'''Ausgabe, wenn kein stderr vorhanden ist (PyInstaller-Build ohne Konsole)'''
+
+
+class StartProfil():
+    '''Erfasst Modul-Ladezeiten ueber einen Wrapper um '__import__' sowie benannte Startphasen'''
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.module: Dict[str, List[float]] = dict()
+        '''Modul -> [gesamt, eigen] in Sekunden'''
+        self.phasen: List[Tuple[str, float]] = []
+        self._letzte_marke = self.start
+        self._stapel: List[List[float]] = []
+        self._original_import = None
+
+    def starte(self) -> None:
+        '''Beginnt mit der Erfassung der Importe'''
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._importiere
+
+    def beende(self) -> None:
+        '''Beendet die Erfassung der Importe'''
+        if self._original_import:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def marke(self, phase: str) -> None:
+        '''Schliesst eine Startphase ab und merkt sich deren Dauer'''
+        jetzt = time.perf_counter()
+        self.phasen.append((phase, jetzt - self._letzte_marke))
+        self._letzte_marke = jetzt
+
+    def _importiere(self, name, globals=None, locals=None, fromlist=(), level=0):
+        '''Misst den Import, wenn das Modul noch nicht geladen ist'''
+        try:
+            modul = resolve_name('.' * level + name, (globals or {}).get('__package__')) if level else name
+        except (ImportError, ValueError):
+            modul = name
+        if modul in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        # [Dauer der untergeordneten Importe]
+        self._stapel.append([0.0])
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            dauer = time.perf_counter() - start
+            kinder = self._stapel.pop()[0]
+            if self._stapel:
+                self._stapel[-1][0] += dauer
+            werte = self.module.setdefault(modul, [0.0, 0.0])
+            werte[0] += dauer
+            werte[1] += dauer - kinder
+
+    def schreibe(self, ausgabe: TextIO, anzahl: int = 25) -> None:
+        '''Schreibt die Phasen, die Ladezeit je Paket und die langsamsten Module'''
+        gesamt = time.perf_counter() - self.start
+        ausgabe.write(f'Programmstart: {gesamt * 1000:.0f} ms\n\nPhasen:\n')
+        for phase, dauer in self.phasen:
+            ausgabe.write(f'  {phase:30} {dauer * 1000:8.1f} ms\n')
+
+        pakete: Dict[str, float] = dict()
+        for modul, (_, eigen) in self.module.items():
+            paket = modul.split('.')[0]
+            if paket in ('model', 'view', 'controller'):
+                paket = '.'.join(modul.split('.')[:2])
+            pakete[paket] = pakete.get(paket, 0.0) + eigen
+
+        ausgabe.write('\nLadezeit je Paket (ohne untergeordnete Pakete):\n')
+        for paket, dauer in sorted(pakete.items(), key=lambda p: p[1], reverse=True)[:anzahl]:
+            ausgabe.write(f'  {paket:30} {dauer * 1000:8.1f} ms\n')
+
+        ausgabe.write(f'\nLangsamste Importe (gesamt / eigen):\n')
+        for modul, (kumuliert, eigen) in sorted(self.module.items(), key=lambda m: m[1][0], reverse=True)[:anzahl]:
+            ausgabe.write(f'  {modul:40} {kumuliert * 1000:8.1f} ms {eigen * 1000:8.1f} ms\n')
+
+    def ausgeben(self) -> None:
+        '''Gibt das Profil auf stderr aus, ohne Konsole in die Datei PROFIL_DATEI'''
+        self.beende()
+        if sys.stderr:
+            self.schreibe(sys.stderr)
+            sys.stderr.flush()
+        else:
+            with open(PROFIL_DATEI, mode='wt') as datei:
+                self.schreibe(datei)
+
+
+def profil_aus_argumenten() -> StartProfil:
+    '''
+    Prueft Argumente und Umgebung auf den Schalter. Ist er gesetzt, wird er aus
+    sys.argv entfernt und ein laufendes StartProfil geliefert, sonst None.
+    '''
+    if SCHALTER in sys.argv:
+        sys.argv.remove(SCHALTER)
+    elif os.environ.get(UMGEBUNGSVARIABLE) != '1':
+        return None
+
+    profil = StartProfil()
+    profil.starte()
+    return profil
@@ -0,0 +1,117 @@
+'''
+Messung der Stichtagsabfragen (model.asof) auf einer synthetischen Artikelhistorie ueber
+mehrere Jahre. Aufruf:
+
+    python tests/bench_asof.py [anzahl_artikel] [jahre] [anzahl_verkaeufe]
+'''
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from model.asof import AsOf, index_name, verbinde_asof
+from model.db_manager import DbManager
+from model.schema import aktualisiere_schema
+
+
+def erzeuge_historie(db_man: DbManager, anzahl_artikel: int, jahre: int) -> None:
+    '''Legt Artikel an, deren Satellit sich im Schnitt alle drei Monate aendert'''
+    rng = np.random.default_rng(42)
+    start = date.today() - timedelta(days=365 * jahre)
+    hubs, sats = [], []
+    for i in range(anzahl_artikel):
+        art_nr = f'4{i:012d}'
+        hubs.append({'hash': f'h{i}', 'art_nr': art_nr, 'gueltig_adtm': start})
+        tage = np.sort(rng.choice(np.arange(1, 365 * jahre), size=rng.integers(1, 4 * jahre), replace=False))
+        grenzen = [start] + [start + timedelta(days=int(t)) for t in tage] + [date(2099, 12, 31)]
+        for v, (adtm, edtm) in enumerate(zip(grenzen[:-1], grenzen[1:])):
+            sats.append({'hash': f'h{i}', 'gueltig_adtm': adtm, 'gueltig_edtm': edtm,
+                         'gueltig': edtm.year == 2099, 'art_bez': f'Artikel {i} V{v}',
+                         'vk_brutto': round(float(rng.uniform(0.5, 20)), 2), 'wgr': f'{v % 9}:0'})
+
+    with db_man.get_engine().connect() as conn:
+        conn.execute(text('''
+            INSERT INTO hub_artikel_t (hash, gueltig_adtm, art_nr) VALUES (:hash, :gueltig_adtm, :art_nr)'''), hubs)
+        conn.execute(text('''
+            INSERT INTO sat_artikel_t (hash, gueltig_adtm, gueltig_edtm, gueltig, art_bez, vk_brutto, wgr)
+            VALUES (:hash, :gueltig_adtm, :gueltig_edtm, :gueltig, :art_bez, :vk_brutto, :wgr)'''), sats)
+        conn.commit()
+    print(f'{anzahl_artikel} Artikel, {len(sats)} Satelliteneintraege ueber {jahre} Jahre')
+
+
+def erzeuge_verkaeufe(anzahl_artikel: int, jahre: int, anzahl: int) -> pd.DataFrame:
+    '''Zufaellige Verkaeufe (art_nr, bon_datum) im Zeitraum der Historie'''
+    rng = np.random.default_rng(7)
+    start = np.datetime64(date.today() - timedelta(days=365 * jahre))
+    return pd.DataFrame({
+        'art_nr': [f'4{i:012d}' for i in rng.integers(0, anzahl_artikel, anzahl)],
+        'bon_datum': (start + rng.integers(0, 365 * jahre, anzahl).astype('timedelta64[D]')).astype('datetime64[s]')
+    })
+
+
+def sql_bereichsjoin(db_man: DbManager, df_verkaeufe: pd.DataFrame) -> pd.DataFrame:
+    '''Stichtag je Verkaufszeile per Bereichsbedingung in SQL'''
+    sql = '''
+    SELECT v.art_nr, v.bon_datum, s.art_bez, s.vk_brutto
+
+    FROM temp.verkaeufe_t AS v
+
+    JOIN hub_artikel_t AS h
+        ON	h.art_nr = v.art_nr
+
+    LEFT JOIN sat_artikel_t AS s
+        ON	s.hash = h.hash
+        AND s.gueltig_adtm <= v.bon_datum
+        AND s.gueltig_edtm > v.bon_datum
+    '''
+    with db_man.get_engine().connect() as conn:
+        df_verkaeufe.assign(bon_datum=df_verkaeufe['bon_datum'].dt.strftime('%Y-%m-%d')).to_sql(
+            'verkaeufe_t', conn, schema='temp', if_exists='replace', index=False)
+        df = pd.read_sql_query(text(sql), conn)
+        conn.execute(text('DROP TABLE temp.verkaeufe_t'))
+    return df
+
+
+def miss(titel: str, funktion, *args):
+    '''Fuehrt die Funktion aus und gibt die Laufzeit aus'''
+    beginn = time.perf_counter()
+    ergebnis = funktion(*args)
+    print(f'{titel:45} {time.perf_counter() - beginn:8.3f} s  {len(ergebnis):>9} Zeilen')
+    return ergebnis
+
+
+if __name__ == '__main__':
+    anzahl_artikel = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    jahre = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    anzahl_verkaeufe = int(sys.argv[3]) if len(sys.argv) > 3 else 500_000
+
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        db_man = DbManager(str(Path(verzeichnis) / 'bench_asof.db'))
+        aktualisiere_schema(db_man)
+        erzeuge_historie(db_man, anzahl_artikel, jahre)
+        df_verkaeufe = erzeuge_verkaeufe(anzahl_artikel, jahre, anzahl_verkaeufe)
+        stichtag = date.today() - timedelta(days=365 * jahre // 2)
+        asof = AsOf(db_man)
+
+        miss('Stichtag, SQL mit Gueltigkeitsindex', asof.gueltig_am, 'sat_artikel_t', stichtag, ['art_bez', 'vk_brutto'])
+        df_sql = miss('Verkaeufe, SQL mit Gueltigkeitsindex', sql_bereichsjoin, db_man, df_verkaeufe)
+        df_asof = miss('Verkaeufe, merge_asof', lambda: verbinde_asof(
+            df_verkaeufe, asof.versionen('sat_artikel_t', ['art_bez', 'vk_brutto']), 'bon_datum', ['art_nr']))
+        gleich = (sorted(zip(df_sql['art_nr'], df_sql['art_bez']))
+                  == sorted(zip(df_asof['art_nr'], df_asof['art_bez'])))
+        print(f"Ergebnisse SQL und merge_asof {'gleich' if gleich else 'UNTERSCHIEDLICH'}")
+
+        with db_man.get_engine().connect() as conn:
+            conn.execute(text(f'DROP INDEX {index_name("sat_artikel_t")}'))
+            conn.commit()
+        miss('Stichtag, SQL nur mit Index auf hash', asof.gueltig_am, 'sat_artikel_t', stichtag, ['art_bez', 'vk_brutto'])
+        miss('Verkaeufe, SQL nur mit Index auf hash', sql_bereichsjoin, db_man, df_verkaeufe)
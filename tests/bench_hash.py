@@ -0,0 +1,129 @@
+'''
+Vergleich der Speicherformen der Hashes (model.hash_modus) auf synthetischen Bons: Groesse der
+Datei, von Tabellen und Indizes sowie Laufzeit typischer Joins. Aufruf:
+
+    python tests/bench_hash.py [anzahl_bons] [anzahl_artikel]
+'''
+from pathlib import Path
+import shutil
+import sys
+import tempfile
+import time
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from model.db_manager import DbManager, hashe
+from model.hash_modus import speicherbelegung, stelle_um
+from model.schema import aktualisiere_schema
+
+TABELLEN = ('kassenbons_t', 'kassenbons_pos_t', 'hub_artikel_t', 'sat_artikel_t')
+
+ABFRAGEN = {
+    'Positionen je Tag': '''
+        SELECT b.bon_datum, SUM(p.preis_gesamt)
+        FROM kassenbons_pos_t AS p
+        JOIN kassenbons_t AS b ON b.hash = p.hash_bon
+        GROUP BY b.bon_datum
+        ''',
+    'Artikel mit Satellit': '''
+        SELECT COUNT(*), SUM(s.vk_brutto)
+        FROM hub_artikel_t AS h
+        JOIN sat_artikel_t AS s ON s.hash = h.hash AND s.gueltig = 1
+        ''',
+    'Positionen mit Bon und Artikel': '''
+        SELECT COUNT(*)
+        FROM kassenbons_pos_t AS p
+        JOIN kassenbons_t AS b ON b.hash = p.hash_bon
+        JOIN hub_artikel_t AS h ON h.art_nr = p.art_nr
+        JOIN sat_artikel_t AS s ON s.hash = h.hash AND s.gueltig = 1
+        '''
+}
+
+
+def erzeuge_daten(db_man: DbManager, anzahl_bons: int, anzahl_artikel: int) -> None:
+    '''Legt Artikel mit Satellit sowie Bons mit im Schnitt fuenf Positionen an'''
+    rng = np.random.default_rng(42)
+    art_nr = pd.Series([f'4{i:012d}' for i in range(anzahl_artikel)])
+    df_hub = pd.DataFrame({'hash': hashe(art_nr), 'art_nr': art_nr, 'gueltig_adtm': '2020-01-01'})
+    df_sat = pd.DataFrame({
+        'hash': df_hub['hash'], 'hash_diff': hashe(art_nr + ':1'), 'eintrag_ats': '2020-01-01 00:00:00.000000',
+        'gueltig_adtm': '2020-01-01', 'gueltig_edtm': '2099-12-31', 'gueltig': 1,
+        'art_bez': 'Artikel ' + art_nr, 'vk_brutto': rng.uniform(0.5, 20, anzahl_artikel).round(2)})
+
+    bon_nr = pd.Series(np.arange(anzahl_bons))
+    start = date(2022, 1, 1)
+    df_bons = pd.DataFrame({
+        'hash': hashe('1:' + bon_nr.astype(str)), 'kasse_nr': 1, 'bon_nr': bon_nr,
+        'bon_datum': [(start + timedelta(days=int(t))).isoformat() for t in rng.integers(0, 730, anzahl_bons)],
+        'bon_summe': 0.0})
+    anzahl_pos = rng.integers(1, 10, anzahl_bons)
+    pos_bon = np.repeat(np.arange(anzahl_bons), anzahl_pos)
+    pos = np.arange(len(pos_bon)) - np.repeat(np.cumsum(anzahl_pos) - anzahl_pos, anzahl_pos)
+    df_pos = pd.DataFrame({
+        'hash': hashe('1:' + pd.Series(pos_bon).astype(str) + ':' + pd.Series(pos).astype(str)),
+        'hash_bon': df_bons['hash'].to_numpy()[pos_bon], 'kasse_nr': 1, 'bon_nr': pos_bon, 'pos': pos,
+        'art_nr': art_nr.to_numpy()[rng.integers(0, anzahl_artikel, len(pos_bon))],
+        'menge': 1, 'preis_gesamt': rng.uniform(0.5, 20, len(pos_bon)).round(2)})
+    df_pos['hash_fuehrend'] = df_pos['hash']
+
+    with db_man.get_engine().connect() as conn:
+        for df, tabelle in ((df_hub, 'hub_artikel_t'), (df_sat, 'sat_artikel_t'),
+                            (df_bons, 'kassenbons_t'), (df_pos, 'kassenbons_pos_t')):
+            df.to_sql(tabelle, conn, if_exists='append', index=False, chunksize=50_000)
+        conn.commit()
+    print(f'{anzahl_artikel} Artikel, {anzahl_bons} Bons, {len(df_pos)} Positionen')
+
+
+def messe(dbfile: str) -> None:
+    '''Gibt Dateigroesse, Belegung der Tabellen und Indizes und Laufzeiten der Abfragen aus'''
+    db_man = DbManager(dbfile)
+    print(f"\n{'binaer' if db_man.hash_binaer else 'text'}: Datei {Path(dbfile).stat().st_size / 2**20:.1f} MB")
+    df = speicherbelegung(db_man)
+    df = df[df['tabelle'].isin(TABELLEN)]
+    summen = df.pivot_table(index='tabelle', columns='art', values='bytes', aggfunc='sum', fill_value=0) / 2**20
+    print(summen.round(2).to_string())
+
+    with db_man.get_engine().connect() as conn:
+        for name, sql in ABFRAGEN.items():
+            conn.execute(text(sql)).fetchall()
+            beginn = time.perf_counter()
+            for _ in range(3):
+                conn.execute(text(sql)).fetchall()
+            print(f'{name:32} {(time.perf_counter() - beginn) / 3 * 1000:8.1f} ms')
+
+        hashes = conn.execute(text('SELECT p.hash FROM kassenbons_pos_t AS p ORDER BY random() LIMIT 20000')).scalars().all()
+        beginn = time.perf_counter()
+        for h in hashes:
+            conn.execute(text('SELECT p.menge FROM kassenbons_pos_t AS p WHERE p.hash = :h'), {'h': h}).fetchall()
+        print(f"{'Einzelzugriff ueber hash':32} {(time.perf_counter() - beginn) / len(hashes) * 1e6:8.1f} us")
+    db_man.get_engine().dispose()
+
+
+if __name__ == '__main__':
+    anzahl_bons = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    anzahl_artikel = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        datei_text = str(Path(verzeichnis) / 'text.db')
+        datei_binaer = str(Path(verzeichnis) / 'binaer.db')
+        db_man = DbManager(datei_text)
+        aktualisiere_schema(db_man)
+        erzeuge_daten(db_man, anzahl_bons, anzahl_artikel)
+        with db_man.get_engine().connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text('VACUUM'))
+        db_man.get_engine().dispose()
+
+        shutil.copy(datei_text, datei_binaer)
+        beginn = time.perf_counter()
+        stelle_um(datei_binaer, binaer=True)
+        print(f'Umstellung auf binaer in {time.perf_counter() - beginn:.1f} s')
+
+        messe(datei_text)
+        messe(datei_binaer)
@@ -0,0 +1,171 @@
+'''
+Pruefung der Jahresarchive (model.archiv) auf einer temporaeren Datenbank mit zwei importierten
+Jahren. Aufruf mit pytest oder direkt:
+
+    python tests/test_archiv.py
+'''
+from pathlib import Path
+import sys
+import tempfile
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date, datetime
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from model import betrag_modus, hash_modus
+from model.archiv import archiviere_jahr, archivierte_jahre, haenge_an, pruefe_jahre
+from model.db_manager import DbManager
+from model.errors import DatenImportError
+from model.kunden_statistik import uebernimm_bestand
+from model.storno import StornoAbfrage
+from tests.testdaten import Bon, importiere_datei, neue_datenbank, schreibe_journal, zufalls_bons
+
+
+def importiere_jahre(verzeichnis: str) -> DbManager:
+    '''Datenbank mit den Bons der Jahre 2022 und 2023'''
+    rng = np.random.default_rng(49)
+    db_man = neue_datenbank(verzeichnis)
+    for jahr, erste_bon_nr in ((2022, 1000), (2023, 5000)):
+        bons = zufalls_bons(rng, date(jahr, 1, 1), 365, 300, erste_bon_nr)
+        datei = schreibe_journal(Path(verzeichnis) / f'kj_{jahr}.csv', bons)
+        importiere_datei(db_man, 'kassenjournal', datei, date(jahr, 12, 31))
+    return db_man
+
+
+def auswertungen(dbfile: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    '''Stornos beider Jahre und die aus allen Jahren neu berechnete Kundenstatistik'''
+    db_man = DbManager(dbfile)
+    df_stornos = StornoAbfrage(db_man).stornos(date(2022, 1, 1), date(2023, 12, 31))
+    with db_man.get_engine().connect() as conn:
+        db_man.haenge_archive_an(conn)
+        uebernimm_bestand(conn)
+        df_kunden = pd.read_sql_query(text('SELECT * FROM kunden_statistik_t ORDER BY kdnr'), conn)
+        conn.commit()
+    db_man.get_engine().dispose()
+    return df_stornos, df_kunden
+
+
+def test_umstellung_mit_archiv():
+    '''Nach dem Archivieren und beiden Umstellungen (hin und zurueck) bleiben die Auswertungen gleich'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        db_man = importiere_jahre(verzeichnis)
+        dbfile = db_man.dbfile
+        db_man.get_engine().dispose()
+        stornos, kunden = auswertungen(dbfile)
+        assert stornos['bon_datum'].str.startswith('2022').any()
+        assert stornos['bon_summe_storniert'].notna().all()
+
+        ergebnis = archiviere_jahr(DbManager(dbfile), 2022)
+        assert ergebnis.bons == 300
+
+        for binaer, ganzzahl in ((True, False), (True, True), (False, True), (False, False)):
+            hash_modus.stelle_um(dbfile, binaer)
+            betrag_modus.stelle_um(dbfile, ganzzahl)
+            stornos_danach, kunden_danach = auswertungen(dbfile)
+            pd.testing.assert_frame_equal(stornos_danach, stornos)
+            pd.testing.assert_frame_equal(kunden_danach, kunden)
+
+
+def test_archiv_in_anderer_form():
+    '''Ein Archiv, dessen Speicherform nicht zur Datenbank passt, wird nicht angehaengt'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        db_man = importiere_jahre(verzeichnis)
+        ergebnis = archiviere_jahr(db_man, 2022)
+        db_man.get_engine().dispose()
+        with DbManager(str(Path(verzeichnis) / ergebnis.datei)).get_engine().connect() as conn:
+            conn.execute(text("UPDATE einstellung_t SET wert = 'ganzzahl' WHERE name = 'betrag_modus'"))
+            conn.commit()
+
+        db_man = DbManager(db_man.dbfile)
+        with db_man.get_engine().connect() as conn:
+            try:
+                db_man.haenge_archive_an(conn)
+                assert False, 'Archiv in anderer Speicherform angehaengt'
+            except ValueError:
+                pass
+        db_man.get_engine().dispose()
+
+
+def test_archivieren_und_abfragen():
+    '''Die Sichten liefern nach dem Archivieren dieselben Zeilen, archivierte Jahre sind gesperrt'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        db_man = importiere_jahre(verzeichnis)
+        sql = 'SELECT COUNT(*), ROUND(SUM(bon_summe), 2), MIN(bon_abschluss) FROM {tabelle}'
+        with db_man.get_engine().connect() as conn:
+            vorher = {t: conn.execute(text(sql.format(tabelle=t))).one()
+                      for t in ('kassenbons_t', 'kassenjournal_t')}
+
+        ergebnis = archiviere_jahr(db_man, 2022)
+        assert Path(verzeichnis, ergebnis.datei).is_file()
+        with db_man.get_engine().connect() as conn:
+            assert archivierte_jahre(conn) == {2022: ergebnis.datei}
+            assert conn.execute(text("SELECT MIN(bon_datum) FROM kassenbons_t")).scalar() >= '2023-01-01'
+            # nur die Jahre des Zeitraums werden angehaengt
+            assert haenge_an(conn, date(2023, 1, 1), date(2023, 12, 31)) == []
+            assert conn.execute(text(sql.format(tabelle='jahre_kassenbons_t'))).one()[0] < vorher['kassenbons_t'][0]
+            assert haenge_an(conn, date(2022, 6, 1)) == [2022]
+            for tabelle in ('kassenbons_t', 'kassenjournal_t'):
+                assert conn.execute(text(sql.format(tabelle=f'jahre_{tabelle}'))).one() == vorher[tabelle]
+
+            pruefe_jahre(conn, [2023, 2024])
+            try:
+                pruefe_jahre(conn, [2022, 2023])
+                assert False, 'archiviertes Jahr nicht abgewiesen'
+            except DatenImportError:
+                pass
+
+        # Importe und eine erneute Archivierung des Jahres werden abgewiesen
+        datei = schreibe_journal(Path(verzeichnis) / 'kj_nachtrag.csv', [
+            Bon(1, 9000, datetime(2022, 12, 30, 10), '11', [('4000000000001', 1, 2.5)])])
+        for aktion in (lambda: importiere_datei(db_man, 'kassenjournal', datei),
+                       lambda: archiviere_jahr(db_man, 2022),
+                       lambda: archiviere_jahr(db_man, date.today().year)):
+            try:
+                aktion()
+                assert False, 'nicht abgewiesen'
+            except (DatenImportError, ValueError):
+                pass
+        db_man.get_engine().dispose()
+
+
+def test_storno_eines_archivierten_bons():
+    '''Ein Storno im Januar findet den Dezemberbon im Archiv, der Bon gilt in der Sicht als storniert'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        db_man = neue_datenbank(verzeichnis)
+        importiere_datei(db_man, 'kassenjournal', schreibe_journal(Path(verzeichnis) / 'kj_2022.csv', [
+            Bon(1, 700, datetime(2022, 12, 30, 17), '11', [('4000000000001', 2, 5.0)]),
+            Bon(1, 701, datetime(2022, 12, 30, 18), '12', [('4000000000002', 1, 3.0)]),
+        ]))
+        archiviere_jahr(db_man, 2022)
+
+        importiere_datei(db_man, 'kassenjournal', schreibe_journal(Path(verzeichnis) / 'kj_2023.csv', [
+            Bon(1, 702, datetime(2023, 1, 2, 9), '11', [('4000000000001', 2, 5.0)], storno_ref='700'),
+            Bon(1, 703, datetime(2023, 1, 2, 10), '13', [('4000000000003', 1, 1.0)], storno_ref='650'),
+        ]))
+        with db_man.get_engine().connect() as conn:
+            haenge_an(conn)
+            verweise = conn.execute(text('''
+                SELECT sl.bon_nr, b.bon_nr, b.netto FROM storno_link_t AS sl
+                LEFT JOIN jahre_kassenbons_t AS b ON b.hash = sl.hash_bon
+                ORDER BY sl.bon_nr''')).all()
+            assert verweise == [(702, 700, 0), (703, None, None)]
+            netto = dict(conn.execute(text('SELECT bon_nr, netto FROM jahre_kassenbons_t')).all())
+            assert netto == {700: 0, 701: 1, 702: 0, 703: 1}
+
+        df = StornoAbfrage(db_man).stornos(date(2023, 1, 1), date(2023, 1, 31))
+        assert df['bon_summe_storniert'].tolist()[0] == 10.0 and pd.isna(df['bon_summe_storniert'].tolist()[1])
+        db_man.get_engine().dispose()
+
+
+if __name__ == '__main__':
+    test_umstellung_mit_archiv()
+    test_archiv_in_anderer_form()
+    test_archivieren_und_abfragen()
+    test_storno_eines_archivierten_bons()
+    print('ok')
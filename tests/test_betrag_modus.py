@@ -0,0 +1,143 @@
+'''
+Pruefung der Umstellung der Betraege (model.betrag_modus) hin und zurueck auf einer temporaeren
+Datenbank mit Artikelstamm, Kassenjournal und Preissatelliten. Aufruf mit pytest oder direkt:
+
+    python tests/test_betrag_modus.py
+'''
+from pathlib import Path
+import sys
+import tempfile
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date, datetime
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from model import umsatz
+from model.asof import AsOf
+from model.betrag_modus import stelle_um
+from model.db_manager import CENT, GANZZAHL_SPALTEN, DbManager, skaliere
+from model.storno import StornoAbfrage
+from model.umsatz import UmsatzAbfrage
+from model.zahlungen import Zahlungen
+from tests.testdaten import Bon, importiere_datei, neue_datenbank, schreibe_artikel, schreibe_journal, zufalls_bons
+
+TABELLEN = ('kassenjournal_t', 'kassenbons_t', 'kassenbons_pos_t', 'zahlungen_t', 'sat_artikel_t', 'sat_pfand_t',
+            'sat_scs_liefart_t')
+'''Tabellen aus GANZZAHL_SPALTEN mit Daten, die Zwischentabellen sind nach dem Import leer'''
+
+VON, BIS = date(2023, 1, 1), date(2023, 3, 31)
+
+
+def fuelle(verzeichnis: str) -> str:
+    '''Datenbank mit Artikeln, Bons mit Bruchmengen und Stornos, Pfand und Einkaufspreisen'''
+    pfad = Path(verzeichnis)
+    db_man = neue_datenbank(verzeichnis)
+    artikel = [(f'40000000000{i:02d}', f'Artikel {i}', p) for i, p in enumerate([0.05, 0.99, 1.1, 2.49, 19.99] * 6)]
+    importiere_datei(db_man, 'artikel', schreibe_artikel(pfad / 'artikel.txt', artikel), date(2023, 1, 1))
+    bons = zufalls_bons(np.random.default_rng(47), date(2023, 1, 2), 60, 300, 1000, 0.05) + [
+        Bon(1, 2000, datetime(2023, 3, 10, 9), '11', [('4000000000003', 0.25, 2.49), ('4000000000001', 1.5, 0.99)]),
+        Bon(1, 2001, datetime(2023, 3, 10, 10), '12', [('4000000000003', 0.25, 2.49)], storno_ref='2000')]
+    importiere_datei(db_man, 'kassenjournal', schreibe_journal(pfad / 'kj.csv', bons), date(2023, 3, 31))
+    with db_man.get_engine().connect() as conn:
+        sat = '''
+            INSERT INTO {tabelle} (hash, hash_diff, eintrag_ats, gueltig_adtm, gueltig_edtm, gueltig, quelle, {spalte})
+            VALUES (:hash, :hash, '2023-01-01 00:00:00', '2023-01-01', '2099-12-31', 1, 'test', :wert)'''
+        conn.execute(text(sat.format(tabelle='sat_pfand_t', spalte='pfand_brutto')),
+                     [{'hash': f'p{i}', 'wert': w} for i, w in enumerate([0.08, 0.15, 0.25, 3.3])])
+        conn.execute(text(sat.format(tabelle='sat_scs_liefart_t', spalte='ek_netto')),
+                     [{'hash': f'l{i}', 'wert': w} for i, w in enumerate([0.001, 1.234, 0.675, 12.5, 7.0])])
+        conn.commit()
+    db_man.get_engine().dispose()
+    return db_man.dbfile
+
+
+def lies(db_man: DbManager, tabelle: str) -> pd.DataFrame:
+    '''Alle Zeilen der Tabelle so, wie sie gespeichert sind, in fester Reihenfolge'''
+    with db_man.get_engine().connect() as conn:
+        df = pd.read_sql_query(text(f'SELECT * FROM {tabelle}'), conn)
+    spalten = [s for s in df.columns if s not in GANZZAHL_SPALTEN[tabelle]]
+    return df.sort_values(spalten).reset_index(drop=True)
+
+
+def bestand(dbfile: str) -> Dict[str, pd.DataFrame]:
+    '''Gespeicherte Zeilen der Tabellen aus TABELLEN, Betraege und Mengen dezimal'''
+    db_man = DbManager(dbfile)
+    ergebnis = {t: db_man.entskaliere(lies(db_man, t), t).astype({s: float for s in GANZZAHL_SPALTEN[t]})
+                for t in TABELLEN}
+    db_man.get_engine().dispose()
+    return ergebnis
+
+
+def berichte(dbfile: str) -> Dict[str, pd.DataFrame]:
+    '''Auswertungen, die Betraege per sql_dezimal oder entskaliere lesen'''
+    db_man = DbManager(dbfile)
+    with db_man.get_engine().connect() as conn:
+        umsatz.uebernimm_bestand(conn)
+        conn.commit()
+    ergebnis = {
+        'zahlarten': Zahlungen(db_man).je_zahlart(VON, BIS),
+        'karten': Zahlungen(db_man).kartenzahlungen(VON, BIS, 'monat'),
+        'stornos': StornoAbfrage(db_man).stornos(VON, BIS),
+        'umsatz': UmsatzAbfrage(db_man).je_artikel('monat', VON, BIS),
+        'preise': AsOf(db_man).gueltig_am('sat_artikel_t', date(2023, 2, 1), ['vk_brutto']).sort_values('art_nr'),
+        'bon_summen': pd.DataFrame({'cent': [int(db_man.ganzzahlig(lies(db_man, 'kassenbons_t')['bon_summe'],
+                                                                   CENT).sum())]}),
+    }
+    db_man.get_engine().dispose()
+    return ergebnis
+
+
+def vergleiche(ist: Dict[str, pd.DataFrame], soll: Dict[str, pd.DataFrame], **optionen) -> None:
+    assert ist.keys() == soll.keys()
+    for name in soll:
+        pd.testing.assert_frame_equal(ist[name].reset_index(drop=True), soll[name].reset_index(drop=True),
+                                      obj=name, **optionen)
+
+
+def test_umstellung_hin_und_zurueck():
+    '''dezimal -> ganzzahl -> dezimal ist verlustfrei, die Auswertungen sind in beiden Formen gleich'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        dbfile = fuelle(verzeichnis)
+        db_man = DbManager(dbfile)
+        gespeichert = {t: lies(db_man, t) for t in TABELLEN}
+        db_man.get_engine().dispose()
+        werte, auswertungen = bestand(dbfile), berichte(dbfile)
+        assert all(len(df) for df in werte.values())
+        assert (werte['kassenbons_pos_t']['menge'] == 0.25).any()
+        assert auswertungen['stornos']['bon_summe_storniert'].notna().any()
+
+        assert stelle_um(dbfile, True)
+        assert not stelle_um(dbfile, True)
+        db_man = DbManager(dbfile)
+        assert db_man.betrag_ganzzahl
+        with db_man.get_engine().connect() as conn:
+            for tabelle in TABELLEN:
+                for spalte in GANZZAHL_SPALTEN[tabelle]:
+                    typen = conn.execute(text(f'SELECT DISTINCT typeof({spalte}) FROM {tabelle}')).scalars().all()
+                    assert set(typen) <= {'integer', 'null'}, (tabelle, spalte, typen)
+        for tabelle in TABELLEN:
+            # die gespeicherten ganzen Zahlen sind genau die skalierten Dezimalwerte
+            erwartet = skaliere(werte[tabelle], tabelle, True)
+            pd.testing.assert_frame_equal(lies(db_man, tabelle), erwartet, check_dtype=False, obj=tabelle)
+        db_man.get_engine().dispose()
+        vergleiche(bestand(dbfile), werte)
+        vergleiche(berichte(dbfile), auswertungen, check_dtype=False)
+
+        assert stelle_um(dbfile, False)
+        db_man = DbManager(dbfile)
+        assert not db_man.betrag_ganzzahl
+        for tabelle in TABELLEN:
+            pd.testing.assert_frame_equal(lies(db_man, tabelle), gespeichert[tabelle], obj=tabelle)
+        db_man.get_engine().dispose()
+        vergleiche(berichte(dbfile), auswertungen)
+
+
+if __name__ == '__main__':
+    test_umstellung_hin_und_zurueck()
+    print('ok')
@@ -0,0 +1,60 @@
+'''
+Pruefung der Caches (model.cache) ohne Datenbank. Aufruf mit pytest oder direkt:
+
+    python tests/test_cache.py
+'''
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model.cache import Artikel, ArtikelCache, GenerationsCache
+
+
+def artikel_cache(anzahl: int) -> ArtikelCache:
+    '''Cache mit 'anzahl' fest vorgegebenen Artikeln, ohne Datenbank'''
+    index = pd.Index([f'4{i:012d}' for i in range(anzahl)])
+    spalten = {f: np.array([f'{f} {i}' for i in range(anzahl)], dtype=object) for f in Artikel._fields}
+    spalten['art_nr'] = index.to_numpy(dtype=object)
+    cache = ArtikelCache(None)
+    cache._werte = dict(zip(index, range(anzahl))), index, spalten
+    cache._ist_veraltet = lambda: False
+    return cache
+
+
+def test_basis_ist_abstrakt():
+    try:
+        GenerationsCache(None)
+        assert False, 'GenerationsCache ohne _lade angelegt'
+    except TypeError:
+        pass
+
+
+def test_zaehler_mehrerer_threads():
+    '''Treffer und Fehlschlaege gehen bei gleichzeitigen Zugriffen nicht verloren'''
+    cache = artikel_cache(100)
+    art_nrn = pd.Series([f'4{i:012d}' for i in range(150)])
+
+    def greife_zu(_) -> None:
+        for art_nr in art_nrn:
+            cache.artikel(art_nr)
+        cache.attribute(art_nrn, ['art_bez'])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(greife_zu, range(40)))
+    statistik = cache.statistik
+    assert (statistik.treffer, statistik.fehlschlaege) == (40 * 2 * 100, 40 * 2 * 50)
+    assert cache.artikel('4000000000007').art_bez == 'art_bez 7'
+    assert cache.artikel('unbekannt') is None
+
+
+if __name__ == '__main__':
+    test_basis_ist_abstrakt()
+    test_zaehler_mehrerer_threads()
+    print('ok')
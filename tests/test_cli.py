@@ -0,0 +1,59 @@
+'''
+Pruefung der Kommandozeile (cli) mit einer temporaeren Datenbank und Logdatei. Aufruf mit pytest
+oder direkt:
+
+    python tests/test_cli.py
+'''
+from pathlib import Path
+import sys
+import tempfile
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from contextlib import redirect_stdout
+from datetime import datetime
+import io
+import json
+
+import cli
+import settings
+from tests.testdaten import Bon, schreibe_journal
+
+
+def test_fehler_mit_typ_und_traceback():
+    '''Ein Fehler erscheint mit seinem Typ in der Ausgabe und mit Traceback in der Logdatei'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        log_file, settings.LOG_FILE = settings.LOG_FILE, str(Path(verzeichnis) / 'dlswws.log')
+        try:
+            defekt = Path(verzeichnis) / 'defekt.csv'
+            defekt.write_text('Kasse;Bon\n1;2\n', encoding='utf8')
+            gut = schreibe_journal(Path(verzeichnis) / 'gut.csv', [
+                Bon(1, 1, datetime(2023, 3, 1, 10), '11', [('4000000000001', 1, 2.5)])])
+            argumente = ['--db', str(Path(verzeichnis) / 'test.db'), 'import', '--type', 'kassenjournal',
+                         '--export-date', '01.03.2023', '--ohne-wartung', '--weiter-bei-fehler', str(defekt), gut]
+
+            ausgabe = io.StringIO()
+            with redirect_stdout(ausgabe):
+                assert cli.main(argumente + ['--json']) == cli.EXIT_IMPORTFEHLER
+            ergebnisse = [json.loads(zeile) for zeile in ausgabe.getvalue().splitlines()]
+            assert [e['status'] for e in ergebnisse] == ['fehler', 'ok']
+            assert ergebnisse[0]['fehlertyp'] == 'ValueError'
+            assert ergebnisse[0]['fehler'].startswith('ValueError: ')
+            assert ergebnisse[1]['fehler'] is None and ergebnisse[1]['fehlertyp'] is None
+
+            log = Path(settings.LOG_FILE).read_text()
+            assert "mit Fehler beendet: ValueError: " in log
+            assert 'Traceback (most recent call last):' in log and 'load_file' in log
+
+            ausgabe = io.StringIO()
+            with redirect_stdout(ausgabe):
+                cli.main(argumente[:-1])
+            assert "defekt.csv': fehler (ValueError: " in ausgabe.getvalue()
+        finally:
+            settings.LOG_FILE = log_file
+
+
+if __name__ == '__main__':
+    test_fehler_mit_typ_und_traceback()
+    print('ok')
@@ -0,0 +1,100 @@
+'''
+Pruefung der Aufloesung von Mehrfach-EANs (model.ean_aufloesung) auf einer temporaeren Datenbank.
+Aufruf mit pytest oder direkt:
+
+    python tests/test_ean_aufloesung.py
+'''
+from pathlib import Path
+import sys
+import tempfile
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from model.db_manager import DbManager
+from model.ean_aufloesung import EanAufloesung
+from model.schema import aktualisiere_schema
+
+
+def lade(zuordnungen: List[Tuple[str, str, bool]]) -> Tuple[Dict[str, str], List[List[str]]]:
+    '''Legt die Zuordnungen (ean_m, ean_h, gueltig) an und liefert das Ergebnis von '_lade' samt Zyklen'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        db_man = DbManager(str(Path(verzeichnis) / 'test_ean.db'))
+        aktualisiere_schema(db_man)
+        with db_man.get_engine().connect() as conn:
+            for i, (ean_m, ean_h, gueltig) in enumerate(zuordnungen):
+                conn.execute(text('INSERT INTO hub_mean_t (hash, ean_m, id) VALUES (:hash, :ean_m, :id)'),
+                             {'hash': f'h{i}', 'ean_m': ean_m, 'id': i + 1})
+                conn.execute(text('INSERT INTO sat_mean_t (hash, hash_diff, gueltig, ean_h) VALUES (:hash, :diff, :gueltig, :ean_h)'),
+                             {'hash': f'h{i}', 'diff': f'd{i}', 'gueltig': gueltig, 'ean_h': ean_h})
+            conn.commit()
+            aufloesung = EanAufloesung(db_man)
+            zuordnung = aufloesung._lade(conn)
+        db_man.get_engine().dispose()
+    return zuordnung, aufloesung.zyklen
+
+
+def aufloesung_mit(zuordnung: Dict[str, str]) -> EanAufloesung:
+    '''Aufloesung mit fest vorgegebener Zuordnung, ohne Datenbank'''
+    aufloesung = EanAufloesung(None)
+    aufloesung._lade = lambda conn: zuordnung
+    aufloesung._ist_veraltet = lambda: False
+    aufloesung._werte = zuordnung
+    return aufloesung
+
+
+def test_kette():
+    '''A -> B -> C wird direkt auf C aufgeloest, ungueltige und Selbstzuordnungen zaehlen nicht'''
+    zuordnung, zyklen = lade([
+        ('B', 'C', True),
+        ('A', 'B', True),
+        ('C', 'X', False),
+        ('D', 'D', True),
+    ])
+    assert zuordnung == {'A': 'C', 'B': 'C'}
+    assert zyklen == []
+
+
+def test_zyklus_mit_zulauf():
+    '''Der Zyklus Q -> R -> P -> Q und sein Zulauf S -> T -> R zeigen auf die kleinste EAN P'''
+    zuordnung, zyklen = lade([
+        ('S', 'T', True),
+        ('T', 'R', True),
+        ('Q', 'R', True),
+        ('R', 'P', True),
+        ('P', 'Q', True),
+        ('U', 'V', True),
+    ])
+    assert zuordnung == {'P': 'P', 'Q': 'P', 'R': 'P', 'S': 'P', 'T': 'P', 'U': 'V'}
+    assert len(zyklen) == 1 and sorted(zyklen[0]) == ['P', 'Q', 'R']
+
+
+def test_aufloesen_serie():
+    '''Fehlende Werte bleiben leer, alle anderen wie mit 'aufloesen', Index und Name bleiben erhalten'''
+    zuordnung = {'A': 'C', 'B': 'C'}
+    eans = pd.Series(['A', None, 'X', 'B', np.nan, 'A', 'C'], index=range(10, 17), name='art_nr')
+    aufloesung = aufloesung_mit(zuordnung)
+    ergebnis = aufloesung.aufloesen_serie(eans)
+
+    assert ergebnis.index.equals(eans.index) and ergebnis.name == 'art_nr'
+    assert ergebnis.tolist() == ['C', None, 'X', 'C', None, 'C', 'C']
+    assert (aufloesung.treffer, aufloesung.fehlschlaege) == (3, 4)
+
+    einzeln = aufloesung_mit(zuordnung)
+    assert [einzeln.aufloesen(e) for e in eans.dropna()] == ergebnis.dropna().tolist()
+
+    leer = aufloesung_mit(zuordnung).aufloesen_serie(pd.Series([np.nan, None], dtype=object))
+    assert leer.isna().all()
+
+
+if __name__ == '__main__':
+    test_kette()
+    test_zyklus_mit_zulauf()
+    test_aufloesen_serie()
+    print('ok')
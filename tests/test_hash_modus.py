@@ -0,0 +1,126 @@
+'''
+Pruefung der Umstellung der Hashes (model.hash_modus) hin und zurueck auf einer temporaeren
+Datenbank mit Artikelstamm und Kassenjournal. Aufruf mit pytest oder direkt:
+
+    python tests/test_hash_modus.py
+'''
+from pathlib import Path
+import sys
+import tempfile
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date
+from typing import Dict
+
+import numpy as np
+from sqlalchemy import text
+
+from model.artikelsuche import Artikelsuche
+from model.db_manager import DbManager
+from model.hash_modus import stelle_um
+from tests.testdaten import importiere_datei, neue_datenbank, schreibe_artikel, schreibe_journal, zufalls_bons
+
+ABFRAGEN = {
+    'stornos': '''
+        SELECT s.bon_nr, b.bon_nr FROM storno_link_t AS sl
+        JOIN kassenbons_t AS s ON s.hash = sl.hash_storno
+        LEFT JOIN kassenbons_t AS b ON b.hash = sl.hash_bon
+        ORDER BY 1''',
+    'netto': 'SELECT b.bon_nr, b.netto FROM kassenbons_t AS b ORDER BY 1',
+    'zahlungen': '''
+        SELECT b.bon_nr, z.zahlart, z.karte, z.betrag FROM zahlungen_t AS z
+        JOIN kassenbons_t AS b ON b.hash = z.hash_bon
+        ORDER BY 1''',
+    'positionen': '''
+        SELECT b.bon_nr, p.pos, p.art_nr, p.menge FROM kassenbons_pos_t AS p
+        JOIN kassenbons_t AS b ON b.hash = p.hash_bon
+        ORDER BY 1, 2''',
+    'pit': '''
+        SELECT h.art_nr, p.datum, s.vk_brutto FROM pit_artikel_t AS p
+        JOIN hub_artikel_t AS h ON h.hash = p.hash
+        JOIN sat_artikel_t AS s ON s.hash = p.hash AND s.eintrag_ats = p.sat_eintrag_ats
+        ORDER BY 1, 2''',
+    'suchindex': '''
+        SELECT h.art_nr, f.art_bez FROM artikel_fts AS f
+        JOIN hub_artikel_t AS h ON h.hash = f.hash
+        ORDER BY 1''',
+}
+'''Inhalte, die ueber die Hashes verbunden sind, jeweils mit den fachlichen Schluesseln'''
+
+
+def artikel(preise: Dict[int, float]) -> list:
+    return [(f'40000000000{i:02d}', f'Artikel {i} {"Brot" if i % 3 == 0 else "Wurst"}', preise.get(i, 1.0 + i % 10))
+            for i in range(30)]
+
+
+def stand(dbfile: str) -> Dict[str, object]:
+    '''Zeilen je Tabelle, die Inhalte aus ABFRAGEN und die Treffer der Artikelsuche'''
+    db_man = DbManager(dbfile)
+    with db_man.get_engine().connect() as conn:
+        tabellen = conn.execute(text('''
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name NOT LIKE 'artikel_fts_%'
+                AND name NOT IN ('import_log_t', 'einstellung_t')''')).scalars().all()
+        ergebnis = {t: conn.execute(text(f'SELECT COUNT(*) FROM {t}')).scalar() for t in tabellen}
+        ergebnis.update({name: conn.execute(text(sql)).all() for name, sql in ABFRAGEN.items()})
+    ergebnis['suche'] = Artikelsuche(db_man).suche('Brot')
+    db_man.get_engine().dispose()
+    return ergebnis
+
+
+def test_umstellung_hin_und_zurueck():
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        pfad = Path(verzeichnis)
+        db_man = neue_datenbank(verzeichnis)
+        importiere_datei(db_man, 'artikel', schreibe_artikel(pfad / 'artikel_1.txt', artikel({})), date(2023, 1, 1))
+        journal = schreibe_journal(pfad / 'kj.csv', zufalls_bons(np.random.default_rng(45), date(2023, 1, 2), 40, 400, 1000, 0.05))
+        importiere_datei(db_man, 'kassenjournal', journal, date(2023, 2, 15))
+        artikel_2 = schreibe_artikel(pfad / 'artikel_2.txt', artikel({3: 9.99, 4: 0.5}))
+        importiere_datei(db_man, 'artikel', artikel_2, date(2023, 1, 20))
+        dbfile = db_man.dbfile
+        db_man.get_engine().dispose()
+
+        vorher = stand(dbfile)
+        assert vorher['stornos'] and vorher['zahlungen'] and vorher['suche']
+        assert vorher['sat_artikel_t'] == 32 and vorher['pit_artikel_t'] > 30
+
+        assert stelle_um(dbfile, True)
+        assert not stelle_um(dbfile, True)
+        assert stand(dbfile) == vorher
+        db_man = DbManager(dbfile)
+        assert db_man.hash_binaer
+        with db_man.get_engine().connect() as conn:
+            for tabelle, spalte in (('hub_artikel_t', 'hash'), ('sat_artikel_t', 'hash'), ('kassenbons_t', 'hash'),
+                                    ('kassenbons_pos_t', 'hash_bon'), ('zahlungen_t', 'hash_bon'),
+                                    ('storno_link_t', 'hash_storno'), ('pit_artikel_t', 'hash'), ('artikel_fts', 'hash')):
+                sql = f'SELECT DISTINCT typeof({spalte}) FROM {tabelle}'
+                assert conn.execute(text(sql)).scalars().all() == ['blob'], tabelle
+            assert conn.execute(text(
+                "SELECT sql LIKE '%WITHOUT ROWID%' FROM sqlite_master WHERE name = 'sat_artikel_t'")).scalar()
+
+        # erneute Importe treffen die umgestellten Hashes: keine neuen Bons, Hubs oder Satelliten
+        importiere_datei(db_man, 'kassenjournal', journal, date(2023, 2, 15))
+        importiere_datei(db_man, 'artikel', artikel_2, date(2023, 1, 25))
+        assert stand(dbfile) == vorher
+        importiere_datei(db_man, 'artikel', schreibe_artikel(pfad / 'artikel_3.txt', artikel({3: 9.99, 4: 0.75})),
+                         date(2023, 1, 30))
+        db_man.get_engine().dispose()
+        nachher = stand(dbfile)
+        assert (nachher['hub_artikel_t'], nachher['sat_artikel_t']) == (vorher['hub_artikel_t'], vorher['sat_artikel_t'] + 1)
+
+        assert stelle_um(dbfile, False)
+        assert stand(dbfile) == nachher
+        db_man = DbManager(dbfile)
+        assert not db_man.hash_binaer
+        with db_man.get_engine().connect() as conn:
+            assert conn.execute(text('SELECT DISTINCT typeof(hash) FROM kassenbons_t')).scalars().all() == ['text']
+        importiere_datei(db_man, 'kassenjournal', journal, date(2023, 2, 15))
+        db_man.get_engine().dispose()
+        assert stand(dbfile) == nachher
+
+
+if __name__ == '__main__':
+    test_umstellung_hin_und_zurueck()
+    print('ok')
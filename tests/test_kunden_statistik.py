@@ -0,0 +1,61 @@
+'''
+Pruefung der Besuchshaeufigkeit je Kunde (model.kunden_statistik). Aufruf mit pytest oder direkt:
+
+    python tests/test_kunden_statistik.py
+'''
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date
+import math
+
+import pandas as pd
+
+from model.db_manager import CENT
+from model.kunden_statistik import berechne_kunden_statistik
+
+STAND = date(2023, 3, 31)
+
+BONS = pd.DataFrame([
+    ('A', '2023-03-31', 0.1),
+    ('A', '2023-03-31', 0.2),
+    ('A', '2023-03-04', 10.0),
+    ('A', '2023-03-03', 4.99),
+    ('A', '2022-04-05', 1.01),
+    ('A', '2022-03-31', -3.0),
+    ('B', '2023-01-01', 7.5),
+], columns=['kdnr', 'bon_datum', 'bon_summe'])
+'''Kunde A an den Grenzen der Fenster (27/28, 360/365 Tage vor dem Stand), Kunde B mit einem Besuch'''
+
+
+def test_berechne_kunden_statistik():
+    df = berechne_kunden_statistik(BONS, STAND).set_index('kdnr')
+    a, b = df.loc['A'], df.loc['B']
+
+    assert (a['erster_besuch'], a['letzter_besuch'], a['stand_datum']) == ('2022-03-31', '2023-03-31', '2023-03-31')
+    assert (a['anz_besuche'], a['anz_bons']) == (5, 6)
+    # ganzzahlig summiert
+    assert a['umsatz'] == 13.3
+    # ein Fenster von n Wochen umfasst den Stand und die n * 7 - 1 Tage davor
+    assert (a['besuche_4w'], a['besuche_13w'], a['besuche_52w']) == (2, 3, 4)
+    assert a['mittlerer_abstand'] == 365 / 4
+
+    assert (b['anz_besuche'], b['anz_bons'], b['umsatz']) == (1, 1, 7.5)
+    assert (b['besuche_4w'], b['besuche_13w'], b['besuche_52w']) == (0, 1, 1)
+    assert math.isnan(b['mittlerer_abstand'])
+
+
+def test_ganzzahl():
+    '''Bonsummen in Cent liefern dasselbe Ergebnis'''
+    dezimal = berechne_kunden_statistik(BONS, STAND)
+    ganzzahl = berechne_kunden_statistik(BONS.assign(bon_summe=(BONS['bon_summe'] * CENT).round()), STAND, True)
+    pd.testing.assert_frame_equal(dezimal, ganzzahl)
+
+
+if __name__ == '__main__':
+    test_berechne_kunden_statistik()
+    test_ganzzahl()
+    print('ok')
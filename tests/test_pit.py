@@ -0,0 +1,116 @@
+'''
+Pruefung der Fortschreibung der PIT-Tabellen (model.pit) durch Artikel- und Journalimporte auf
+einer temporaeren Datenbank. Aufruf mit pytest oder direkt:
+
+    python tests/test_pit.py
+'''
+from pathlib import Path
+import sys
+import tempfile
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+from model import pit
+from model.db_manager import DbManager
+from tests.testdaten import Bon, importiere_datei, neue_datenbank, schreibe_artikel, schreibe_journal
+
+SQL_PIT_ARTIKEL = '''
+SELECT h.art_nr, p.datum, s.vk_brutto FROM pit_artikel_t AS p
+JOIN hub_artikel_t AS h ON h.hash = p.hash
+JOIN sat_artikel_t AS s ON s.hash = p.hash AND s.eintrag_ats = p.sat_eintrag_ats
+ORDER BY 1, 2
+'''
+
+
+def artikel(preise: Dict[int, float], anzahl: int = 10) -> list:
+    return [(f'40000000000{i:02d}', f'Artikel {i}', preise.get(i, 1.0 + i)) for i in range(anzahl)]
+
+
+def journal(verzeichnis: str, name: str, von: date, tage: int, erste_bon_nr: int) -> str:
+    '''Ein Bon je Tag ab 'von' '''
+    bons = [Bon(1, erste_bon_nr + i, datetime(von.year, von.month, von.day, 10) + timedelta(days=i), '11',
+                [('4000000000001', 1, 2.0)]) for i in range(tage)]
+    return schreibe_journal(Path(verzeichnis) / name, bons)
+
+
+def pit_stand(db_man: DbManager) -> List[Tuple]:
+    '''
+    PIT-Zeilen (art_nr, datum, vk_brutto). Prueft dabei, dass jede Zeile auf den am Tag gueltigen
+    Eintrag zeigt und die Tabelle einer vollstaendigen Neuberechnung entspricht.
+    '''
+    with db_man.get_engine().connect() as conn:
+        veraltet = conn.execute(text('''
+            SELECT COUNT(*) FROM pit_artikel_t AS p
+            LEFT JOIN sat_artikel_t AS s
+                ON	s.hash = p.hash
+                AND s.eintrag_ats = p.sat_eintrag_ats
+                AND p.datum >= s.gueltig_adtm
+                AND p.datum < s.gueltig_edtm
+            WHERE s.hash IS NULL''')).scalar()
+        assert veraltet == 0
+        stand = conn.execute(text(SQL_PIT_ARTIKEL)).all()
+        pit.uebernimm_bestand(conn)
+        assert conn.execute(text(SQL_PIT_ARTIKEL)).all() == stand
+        conn.rollback()
+    return stand
+
+
+def test_pit_nach_importen():
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        pfad = Path(verzeichnis)
+        db_man = neue_datenbank(verzeichnis)
+        importiere_datei(db_man, 'artikel', schreibe_artikel(pfad / 'artikel_1.txt', artikel({})), date(2023, 1, 1))
+        importiere_datei(db_man, 'kassenjournal', journal(verzeichnis, 'kj_1.csv', date(2023, 1, 2), 10, 100),
+                         date(2023, 1, 12))
+        stand = pit_stand(db_man)
+        assert len(stand) == 10 * 10
+        assert {datum for _, datum, _ in stand} == {str(date(2023, 1, 2) + timedelta(days=i)) for i in range(10)}
+
+        # Artikel 3 erhaelt eine neue Version, die alte wird zum 6.1. geschlossen, Artikel 10 ist neu
+        importiere_datei(db_man, 'artikel', schreibe_artikel(pfad / 'artikel_2.txt', artikel({3: 9.5}, 11)),
+                         date(2023, 1, 6))
+        stand = pit_stand(db_man)
+        assert len(stand) == 10 * 10 + 6
+        preise = {datum: vk for art_nr, datum, vk in stand if art_nr == '4000000000003'}
+        assert len(preise) == 10
+        assert all(vk == (4.0 if datum < '2023-01-06' else 9.5) for datum, vk in preise.items())
+        assert min(datum for art_nr, datum, _ in stand if art_nr == '4000000000010') == '2023-01-06'
+        with db_man.get_engine().connect() as conn:
+            assert conn.execute(text('''
+                SELECT s.gueltig_edtm, s.gueltig FROM sat_artikel_t AS s
+                JOIN hub_artikel_t AS h ON h.hash = s.hash
+                WHERE h.art_nr = '4000000000003' ORDER BY s.eintrag_ats''')).all() == [
+                    ('2023-01-06', 0), ('2099-12-31', 1)]
+
+        # unveraenderter Artikelstamm: nichts neu zu berechnen
+        importiere_datei(db_man, 'artikel', str(pfad / 'artikel_2.txt'), date(2023, 1, 8))
+        assert pit_stand(db_man) == stand
+
+        # neue Journaltage erhalten die dann gueltigen Versionen, erneuter Import aendert nichts
+        kj_2 = journal(verzeichnis, 'kj_2.csv', date(2023, 1, 12), 4, 200)
+        importiere_datei(db_man, 'kassenjournal', kj_2, date(2023, 1, 16))
+        stand = pit_stand(db_man)
+        assert len(stand) == 11 * 14 - 4
+        importiere_datei(db_man, 'kassenjournal', kj_2, date(2023, 1, 16))
+        assert pit_stand(db_man) == stand
+
+        # eine weitere Version ab dem 14.1. ersetzt die Zeilen der bereits berechneten Tage
+        importiere_datei(db_man, 'artikel', schreibe_artikel(pfad / 'artikel_3.txt', artikel({3: 7.25}, 11)),
+                         date(2023, 1, 14))
+        stand = pit_stand(db_man)
+        assert len(stand) == 11 * 14 - 4
+        preise = {datum: vk for art_nr, datum, vk in stand if art_nr == '4000000000003'}
+        assert [preise[tag] for tag in ('2023-01-05', '2023-01-06', '2023-01-13', '2023-01-14', '2023-01-15')] == [
+            4.0, 9.5, 9.5, 7.25, 7.25]
+        db_man.get_engine().dispose()
+
+
+if __name__ == '__main__':
+    test_pit_nach_importen()
+    print('ok')
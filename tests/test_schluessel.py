@@ -0,0 +1,115 @@
+'''
+Pruefung der Ersatzschluessel (model.schluessel) ueber mehrere Importe auf einer temporaeren
+Datenbank. Aufruf mit pytest oder direkt:
+
+    python tests/test_schluessel.py
+'''
+from pathlib import Path
+import sys
+import tempfile
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date
+from typing import Dict, Iterable
+
+import numpy as np
+from sqlalchemy import text
+
+from model.db_manager import DbManager
+from model.schema import pruefe_sqlite_version
+from model.schluessel import FREMDSCHLUESSEL, ID_TABELLEN
+from tests.testdaten import importiere_datei, neue_datenbank, schreibe_artikel, schreibe_journal, zufalls_bons
+
+
+def schreibe_kunden(pfad: Path, kdnrn: Iterable[str]) -> str:
+    zeilen = ['KDNR;Name;Rabattsatz'] + [f'{kdnr};Kunde {kdnr};0,00' for kdnr in kdnrn]
+    pfad.write_text('\n'.join(zeilen) + '\n', encoding='cp1252')
+    return str(pfad)
+
+
+def schreibe_warengruppen(pfad: Path) -> str:
+    zeilen = ['WGR_NR;UWGR-NR;Bezeichnung;MwSt.-KZ;Rabatt;FSKKZ', '1;0;WGR 1;9;J;N']
+    pfad.write_text('\n'.join(zeilen) + '\n', encoding='cp1252')
+    return str(pfad)
+
+
+def ids(db_man: DbManager) -> Dict[str, Dict[object, int]]:
+    '''Tabelle -> Primaerschluessel -> id'''
+    with db_man.get_engine().connect() as conn:
+        return {tabelle: dict(conn.execute(text(f'SELECT {schluessel}, id FROM {tabelle}')).all())
+                for tabelle, (schluessel, _) in ID_TABELLEN.items()}
+
+
+def test_sqlite_version():
+    pruefe_sqlite_version('3.33.0')
+    pruefe_sqlite_version('3.45.1')
+    for version in ('3.32.3', '3.8.11'):
+        try:
+            pruefe_sqlite_version(version)
+            assert False, f'SQLite {version} nicht abgewiesen'
+        except RuntimeError as e:
+            assert '3.33' in str(e) and version in str(e)
+
+
+def test_ids_ueber_zwei_importe():
+    '''Die Nummern sind dicht, bleiben bei weiteren Importen erhalten und die Fremdschluessel werden nachgetragen'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        pfad = Path(verzeichnis)
+        rng = np.random.default_rng(46)
+        db_man = neue_datenbank(verzeichnis)
+        artikel = [(f'40000000000{i:02d}', f'Artikel {i}', 1.0 + i) for i in range(30)]
+
+        # erster Stand: Artikel 20 bis 29 und die Kunden 14 und 15 fehlen noch im Stamm
+        importiere_datei(db_man, 'kunden', schreibe_kunden(pfad / 'kunden_1.csv', ['11', '12', '13']))
+        importiere_datei(db_man, 'kassenjournal', schreibe_journal(
+            pfad / 'kj_1.csv', zufalls_bons(rng, date(2023, 1, 2), 20, 150, 1000)), date(2023, 1, 31))
+        importiere_datei(db_man, 'artikel', schreibe_artikel(pfad / 'artikel_1.txt', artikel[:20]), date(2023, 1, 1))
+        vorher = ids(db_man)
+        with db_man.get_engine().connect() as conn:
+            assert conn.execute(text(
+                "SELECT COUNT(*) FROM kassenbons_pos_t WHERE art_nr >= '4000000000020' AND artikel_id IS NULL")).scalar()
+
+        importiere_datei(db_man, 'kassenjournal', schreibe_journal(
+            pfad / 'kj_2.csv', zufalls_bons(rng, date(2023, 1, 15), 30, 150, 2000)), date(2023, 2, 28))
+        importiere_datei(db_man, 'artikel', schreibe_artikel(pfad / 'artikel_2.txt', artikel), date(2023, 2, 1))
+        importiere_datei(db_man, 'kunden', schreibe_kunden(pfad / 'kunden_2.csv', ['11', '12', '13', '14', '15']))
+        importiere_datei(db_man, 'warengruppen', schreibe_warengruppen(pfad / 'wgr.csv'))
+        nachher = ids(db_man)
+
+        for tabelle, nummern in nachher.items():
+            assert sorted(nummern.values()) == list(range(1, len(nummern) + 1)), tabelle
+            assert vorher[tabelle].items() <= nummern.items(), tabelle
+        assert len(nachher['kassenbons_t']) == 300 and len(nachher['hub_artikel_t']) == 30
+
+        with db_man.get_engine().connect() as conn:
+            # neue Bons sind nach ihrem fachlichen Schluessel nummeriert
+            neu = conn.execute(text('''
+                SELECT b.id FROM kassenbons_t AS b
+                WHERE b.id > :max_id
+                ORDER BY b.bon_abschluss, b.kasse_nr, b.bon_nr'''), {'max_id': len(vorher['kassenbons_t'])}).scalars()
+            assert list(neu) == list(range(len(vorher['kassenbons_t']) + 1, 301))
+
+            for tabelle, fremdschluessel, spalte, ziel, ziel_spalte in FREMDSCHLUESSEL:
+                falsch, gesetzt = conn.execute(text(f'''
+                    SELECT
+                        SUM(t.{fremdschluessel} IS NOT z.id),
+                        SUM(t.{fremdschluessel} IS NOT NULL)
+                    FROM {tabelle} AS t
+                    LEFT JOIN {ziel} AS z
+                        ON	z.{ziel_spalte} = t.{spalte}''')).one()
+                assert falsch == 0 and gesetzt > 0, (tabelle, fremdschluessel)
+            # ohne Ziel bleiben nur Bons ohne Kundennummer und Positionen ohne Artikel (Zahlungen)
+            assert conn.execute(text(
+                "SELECT COUNT(*) FROM kassenbons_t WHERE kunde_id IS NULL AND kdnr NOT IN ('', '0')")).scalar() == 0
+            assert conn.execute(text(
+                "SELECT COUNT(*) FROM kassenbons_pos_t WHERE artikel_id IS NULL AND art_nr <> '-'")).scalar() == 0
+            assert conn.execute(text('SELECT COUNT(*) FROM kassenbons_pos_t WHERE bon_id IS NULL')).scalar() == 0
+        db_man.get_engine().dispose()
+
+
+if __name__ == '__main__':
+    test_sqlite_version()
+    test_ids_ueber_zwei_importe()
+    print('ok')
@@ -0,0 +1,100 @@
+'''
+Pruefung der Stornoverweise (model.storno) auf einer temporaeren Datenbank. Jeder Import legt seine
+Bons wie der Kassenjournal-Import in 'kassenbons_t' und 'temp_kassenbons_t' an. Aufruf mit pytest
+oder direkt:
+
+    python tests/test_storno.py
+'''
+from pathlib import Path
+import sys
+import tempfile
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Connection, text
+
+from model.db_manager import DbManager
+from model.schema import aktualisiere_schema
+from model.storno import aktualisiere_stornos
+
+Bon = Tuple[str, int, int, str, int]
+'''hash, kasse_nr, bon_nr, bon_abschluss, storno_ref'''
+
+
+def importiere(conn: Connection, bons: List[Bon]) -> int:
+    '''Importiert die Bons und loest die Stornos auf, liefert das Ergebnis von 'aktualisiere_stornos' '''
+    conn.execute(text('DELETE FROM temp_kassenbons_t'))
+    zeilen = [{'hash': h, 'kasse_nr': kasse, 'bon_nr': bon_nr, 'bon_abschluss': abschluss,
+               'bon_datum': abschluss[:10], 'storno_ref': ref} for h, kasse, bon_nr, abschluss, ref in bons]
+    for tabelle in ('kassenbons_t', 'temp_kassenbons_t') if zeilen else ():
+        conn.execute(text(f'''
+            INSERT INTO {tabelle} (hash, kasse_nr, bon_nr, bon_abschluss, bon_datum, storno_ref)
+            VALUES (:hash, :kasse_nr, :bon_nr, :bon_abschluss, :bon_datum, :storno_ref)
+            '''), zeilen)
+    anzahl = aktualisiere_stornos(conn)
+    conn.commit()
+    return anzahl
+
+
+def verweise(conn: Connection) -> Dict[str, str]:
+    '''Stornobon -> stornierter Bon aus 'storno_link_t' '''
+    return dict(conn.execute(text('SELECT sl.hash_storno, sl.hash_bon FROM storno_link_t AS sl')).all())
+
+
+def netto(conn: Connection) -> Dict[str, int]:
+    '''Bon -> netto'''
+    return dict(conn.execute(text('SELECT b.hash, b.netto FROM kassenbons_t AS b')).all())
+
+
+def mit_datenbank(test) -> None:
+    '''Fuehrt den Test mit einer Verbindung zu einer neuen Datenbank aus'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        db_man = DbManager(str(Path(verzeichnis) / 'test_storno.db'))
+        aktualisiere_schema(db_man)
+        with db_man.get_engine().connect() as conn:
+            test(conn)
+        db_man.get_engine().dispose()
+
+
+def test_juengster_bon_derselben_kasse():
+    '''Die Referenz zeigt auf den juengsten Bon mit der Nummer vor dem Storno auf derselben Kasse'''
+    def test(conn: Connection) -> None:
+        assert importiere(conn, [
+            ('alt', 1, 5, '2023-01-02 10:00:00', None),
+            ('treffer', 1, 5, '2023-03-01 09:00:00', None),
+            ('andere_kasse', 2, 5, '2023-03-01 11:00:00', None),
+            ('storno', 1, 6, '2023-03-01 12:00:00', 5),
+            ('spaeter', 1, 5, '2023-04-01 08:00:00', None),
+        ]) == 2
+        assert verweise(conn) == {'storno': 'treffer'}
+        assert netto(conn) == {'alt': 1, 'treffer': 0, 'andere_kasse': 1, 'storno': 0, 'spaeter': 1}
+    mit_datenbank(test)
+
+
+def test_spaeter_importierter_bon():
+    '''Fehlt der stornierte Bon, bleiben beide netto, bis er mit einem spaeteren Import kommt'''
+    def test(conn: Connection) -> None:
+        assert importiere(conn, [('storno', 3, 101, '2023-05-02 08:00:00', 77)]) == 0
+        assert verweise(conn) == {'storno': None}
+        assert netto(conn) == {'storno': 1}
+
+        # ein Import ohne den Bon aendert nichts
+        assert importiere(conn, [('sonstiger', 3, 102, '2023-05-02 09:00:00', None)]) == 0
+        assert verweise(conn) == {'storno': None}
+
+        assert importiere(conn, [('bon', 3, 77, '2023-05-01 18:00:00', None)]) == 2
+        assert verweise(conn) == {'storno': 'bon'}
+        assert netto(conn) == {'storno': 0, 'sonstiger': 1, 'bon': 0}
+
+        # ein erneuter Lauf markiert nichts doppelt
+        assert importiere(conn, []) == 0
+    mit_datenbank(test)
+
+
+if __name__ == '__main__':
+    test_juengster_bon_derselben_kasse()
+    test_spaeter_importierter_bon()
+    print('ok')
@@ -0,0 +1,62 @@
+'''
+Pruefung der Verdichtung des Kundenverkehrs auf Tag und Stunde (model.traffic). Aufruf mit pytest
+oder direkt:
+
+    python tests/test_traffic.py
+'''
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np
+import pandas as pd
+
+from model.db_manager import CENT, MILLI
+from model.traffic import berechne_traffic
+
+BONS = pd.DataFrame({
+    'bon_abschluss': ['2023-03-06 08:05:00', '2023-03-06 08:59:59', '2023-03-06 08:30:00',
+                      '2023-03-06 09:00:00', '2023-03-12 17:45:00', '2023-03-06 08:10:00'],
+    'bon_summe': [0.1, 0.2, 1.15, 5.0, -2.5, 0.7],
+    'kdnr': ['1001', '1001', '0', None, '', '1002'],
+    'artikel': [1.0, 0.25, 3.0, 2.5, None, 1.333],
+})
+'''Zwei Stunden am Montag, eine am Sonntag, Bons ohne Kunde mit kdnr '0', None und leer'''
+
+
+def test_berechne_traffic():
+    df = berechne_traffic(BONS)
+    assert df[['datum', 'stunde', 'wtag', 'bons', 'kunden']].values.tolist() == [
+        ['2023-03-06', 8, 1, 4, 2],
+        ['2023-03-06', 9, 1, 1, 0],
+        ['2023-03-12', 17, 7, 1, 0],
+    ]
+    # ganzzahlig summiert, 0.1 + 0.2 ist also genau 0.3
+    assert df['umsatz'].tolist() == [2.15, 5.0, -2.5]
+    assert df['artikel'].tolist() == [5.583, 2.5, 0.0]
+
+
+def test_speicherformen():
+    '''Betraege als Cent und Mengen als Tausendstel liefern dasselbe Ergebnis'''
+    rng = np.random.default_rng(11)
+    anzahl = 2000
+    df_bons = pd.DataFrame({
+        'bon_abschluss': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 30 * 86400, anzahl), unit='s'),
+        'bon_summe': rng.integers(-500, 20000, anzahl) / CENT,
+        'kdnr': rng.choice(['0', '', '11', '12', '13', '14'], anzahl),
+        'artikel': rng.integers(0, 20000, anzahl) / MILLI,
+    })
+    dezimal = berechne_traffic(df_bons)
+    ganzzahl = berechne_traffic(df_bons.assign(bon_summe=df_bons['bon_summe'] * CENT,
+                                               artikel=df_bons['artikel'] * MILLI), ganzzahl=True)
+    pd.testing.assert_frame_equal(dezimal, ganzzahl)
+    assert dezimal['bons'].sum() == anzahl
+    assert round(dezimal['umsatz'].sum(), 2) == round(df_bons['bon_summe'].sum(), 2)
+
+
+if __name__ == '__main__':
+    test_berechne_traffic()
+    test_speicherformen()
+    print('ok')
@@ -0,0 +1,102 @@
+'''
+Pruefung der Verbundkaeufe (model.warenkorb) gegen eine einfache Zaehlung der Paare mit
+itertools.combinations. Aufruf mit pytest oder direkt:
+
+    python tests/test_warenkorb.py
+'''
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+
+from model.warenkorb import inzidenzmatrix, kookkurrenz
+
+
+def zufalls_bons(rng: np.random.Generator, anzahl_bons: int, anzahl_artikel: int, max_laenge: int):
+    '''Paare (Bon, Artikel) mit doppelten Artikeln je Bon und Bons ohne Artikel'''
+    laengen = rng.integers(0, max_laenge + 1, anzahl_bons)
+    zeilen = np.repeat(np.arange(anzahl_bons), laengen)
+    spalten = rng.integers(0, anzahl_artikel, len(zeilen))
+    reihenfolge = rng.permutation(len(zeilen))
+    return zeilen[reihenfolge], spalten[reihenfolge]
+
+
+def erwartete_paare(zeilen: np.ndarray, spalten: np.ndarray, max_je_zeile: int) -> Counter:
+    '''Zaehlt die Paare (a < b) je Bon mit itertools.combinations'''
+    bons = {}
+    for zeile, spalte in zip(zeilen.tolist(), spalten.tolist()):
+        bons.setdefault(zeile, set()).add(spalte)
+    paare = Counter()
+    for artikel in bons.values():
+        if len(artikel) <= max_je_zeile:
+            paare.update(combinations(sorted(artikel), 2))
+    return paare
+
+
+def berechnete_paare(zeilen: np.ndarray, spalten: np.ndarray, anzahl_bons: int, anzahl_artikel: int,
+                     max_je_zeile: int) -> Counter:
+    indptr, indices = inzidenzmatrix(zeilen, spalten, anzahl_bons)
+    a, b, anzahl = kookkurrenz(indptr, indices, anzahl_artikel, max_je_zeile)
+    assert (a < b).all()
+    return Counter({(int(x), int(y)): int(n) for x, y, n in zip(a, b, anzahl)})
+
+
+def test_inzidenzmatrix():
+    '''Spalten je Zeile aufsteigend und ohne Doppelte, leere Zeilen haben keine Eintraege'''
+    rng = np.random.default_rng(1)
+    zeilen, spalten = zufalls_bons(rng, 200, 30, 8)
+    indptr, indices = inzidenzmatrix(zeilen, spalten, 200)
+    assert len(indptr) == 201
+    for zeile in range(200):
+        erwartet = sorted(set(spalten[zeilen == zeile].tolist()))
+        assert indices[indptr[zeile]:indptr[zeile + 1]].tolist() == erwartet
+
+
+def test_kookkurrenz():
+    '''Paare zufaelliger Bons wie mit itertools.combinations'''
+    rng = np.random.default_rng(2)
+    for anzahl_artikel, max_laenge in ((5, 6), (40, 12), (500, 30)):
+        zeilen, spalten = zufalls_bons(rng, 300, anzahl_artikel, max_laenge)
+        assert berechnete_paare(zeilen, spalten, 300, anzahl_artikel, 100) == \
+            erwartete_paare(zeilen, spalten, 100)
+
+
+def test_kookkurrenz_grenze():
+    '''Bons mit mehr als 'max_je_zeile' unterschiedlichen Artikeln bilden keine Paare'''
+    rng = np.random.default_rng(3)
+    zeilen, spalten = zufalls_bons(rng, 300, 50, 20)
+    for grenze in (0, 1, 5, 10):
+        assert berechnete_paare(zeilen, spalten, 300, 50, grenze) == erwartete_paare(zeilen, spalten, grenze)
+
+    # genau an der Grenze zaehlt der Bon noch, darueber nicht mehr
+    zeilen = np.array([0, 0, 0, 1, 1, 1, 1])
+    spalten = np.array([0, 1, 2, 0, 1, 2, 3])
+    assert berechnete_paare(zeilen, spalten, 2, 4, 3) == Counter({(0, 1): 1, (0, 2): 1, (1, 2): 1})
+
+
+def test_leerer_monat():
+    '''Ohne Positionen gibt es weder Eintraege noch Paare'''
+    leer = np.array([], dtype=np.int64)
+    indptr, indices = inzidenzmatrix(leer, leer, 0)
+    assert indptr.tolist() == [0] and len(indices) == 0
+    a, b, anzahl = kookkurrenz(indptr, indices, 0)
+    assert len(a) == len(b) == len(anzahl) == 0
+
+    # Bons ohne Artikel
+    indptr, indices = inzidenzmatrix(leer, leer, 3)
+    assert indptr.tolist() == [0, 0, 0, 0]
+    assert len(kookkurrenz(indptr, indices, 10)[2]) == 0
+
+
+if __name__ == '__main__':
+    test_inzidenzmatrix()
+    test_kookkurrenz()
+    test_kookkurrenz_grenze()
+    test_leerer_monat()
+    print('ok')
@@ -0,0 +1,147 @@
+'''
+Pruefung der Wartung (model.wartung) auf einer temporaeren Datenbank: Umstellung auf
+'auto_vacuum = INCREMENTAL' mit Schema-Version 17 und Auswahl der zu analysierenden Tabellen.
+Aufruf mit pytest oder direkt:
+
+    python tests/test_wartung.py
+'''
+from pathlib import Path
+import sys
+import tempfile
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date
+from importlib import import_module
+from unittest import mock
+import sqlite3
+
+import numpy as np
+from sqlalchemy import text
+
+from model import wartung
+from model.db_manager import DbManager
+from model.schema import SCHEMA_VERSION, aktualisiere_schema
+from model.wartung import ABWEICHUNG, AUTO_VACUUM_INKREMENTELL, analysiere, geaenderte_tabellen
+from tests.testdaten import importiere_datei, neue_datenbank, schreibe_journal, zufalls_bons
+
+
+def datenbank_version_16(verzeichnis: str) -> str:
+    '''Datenbank mit Bons im Stand von Schema-Version 16, also ohne auto_vacuum'''
+    db_man = neue_datenbank(verzeichnis)
+    bons = zufalls_bons(np.random.default_rng(50), date(2023, 1, 2), 30, 200, 1000)
+    importiere_datei(db_man, 'kassenjournal', schreibe_journal(Path(verzeichnis) / 'kj.csv', bons), date(2023, 2, 1))
+    db_man.get_engine().dispose()
+    conn = sqlite3.connect(db_man.dbfile, isolation_level=None)
+    conn.execute('PRAGMA auto_vacuum = NONE')
+    conn.execute('VACUUM')
+    conn.execute('PRAGMA user_version = 16')
+    assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+    conn.close()
+    return db_man.dbfile
+
+
+def zustand(dbfile: str) -> tuple:
+    '''Schema-Version, auto_vacuum und Anzahl Bons'''
+    conn = sqlite3.connect(dbfile)
+    ergebnis = (conn.execute('PRAGMA user_version').fetchone()[0], conn.execute('PRAGMA auto_vacuum').fetchone()[0],
+                conn.execute('SELECT COUNT(*) FROM kassenbons_t').fetchone()[0])
+    conn.close()
+    return ergebnis
+
+
+def test_migration_auf_version_17():
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        dbfile = datenbank_version_16(verzeichnis)
+        assert SCHEMA_VERSION == 17
+        db_man = DbManager(dbfile)
+        assert aktualisiere_schema(db_man)
+        db_man.get_engine().dispose()
+        assert zustand(dbfile) == (17, AUTO_VACUUM_INKREMENTELL, 200)
+        assert not aktualisiere_schema(DbManager(dbfile))
+
+
+def test_vacuum_mit_fehler():
+    '''Scheitert das VACUUM an einem offenen Lesezugriff, bleibt die Datenbank auf Version 16'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        dbfile = datenbank_version_16(verzeichnis)
+        leser = sqlite3.connect(dbfile)
+        original = wartung.text
+
+        def text_mit_leser(sql: str):
+            if sql == 'VACUUM':
+                # ein zweiter Prozess liest gerade, VACUUM bekommt keine exklusive Sperre
+                leser.execute('BEGIN')
+                leser.execute('SELECT COUNT(*) FROM kassenbons_t').fetchone()
+            return original(sql)
+
+        db_man = DbManager(dbfile)
+        with mock.patch.object(wartung, 'text', text_mit_leser):
+            try:
+                aktualisiere_schema(db_man)
+                assert False, 'VACUUM trotz Lesezugriff ausgefuehrt'
+            except Exception as e:
+                assert 'locked' in str(e)
+        db_man.get_engine().dispose()
+        leser.rollback()
+        leser.close()
+        assert zustand(dbfile) == (16, 0, 200)
+
+        # der naechste Start holt nur das VACUUM nach
+        db_man = DbManager(dbfile)
+        with mock.patch('model.schema.import_module', wraps=import_module) as lade:
+            assert aktualisiere_schema(db_man)
+        assert [aufruf.args[0] for aufruf in lade.call_args_list] == ['model.wartung']
+        db_man.get_engine().dispose()
+        assert zustand(dbfile) == (17, AUTO_VACUUM_INKREMENTELL, 200)
+
+
+def stat(conn, tabelle: str) -> str:
+    return conn.execute(text('SELECT stat FROM sqlite_stat1 WHERE tbl = :tabelle AND idx IS NULL'),
+                        {'tabelle': tabelle}).scalar()
+
+
+def test_geaenderte_tabellen():
+    '''Nur Tabellen, deren geschaetzte Zeilenzahl sich um mehr als ABWEICHUNG geaendert hat, werden analysiert'''
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        db_man = neue_datenbank(verzeichnis)
+        with db_man.get_engine().connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            for tabelle in ('t_mehr', 't_wenig', 't_geleert', 't_leer'):
+                conn.execute(text(f'CREATE TABLE {tabelle} (nr INTEGER, wert TEXT)'))
+            conn.execute(text('CREATE TABLE t_ohne_rowid (nr INTEGER PRIMARY KEY, wert TEXT) WITHOUT ROWID'))
+            fuege_ein = 'INSERT INTO {tabelle} (nr, wert) VALUES (:nr, :wert)'
+            for tabelle in ('t_mehr', 't_wenig', 't_geleert', 't_ohne_rowid'):
+                conn.execute(text(fuege_ein.format(tabelle=tabelle)), [{'nr': i, 'wert': str(i)} for i in range(100)])
+
+            geaendert = geaenderte_tabellen(conn)
+            assert {'t_mehr': 100, 't_wenig': 100, 't_geleert': 100, 't_ohne_rowid': None}.items() <= geaendert.items()
+            assert 't_leer' not in geaendert
+            # die Analyse speichert ihre eigenen Schaetzungen in 'einstellung_t', danach ist nichts mehr zu tun
+            for _ in range(3):
+                if not analysiere(conn):
+                    break
+            assert geaenderte_tabellen(conn) == {}
+            assert stat(conn, 't_mehr') == '100' and stat(conn, 't_leer') is None
+
+            grenze = int(ABWEICHUNG * 100)
+            conn.execute(text(fuege_ein.format(tabelle='t_mehr')),
+                         [{'nr': i, 'wert': str(i)} for i in range(100, 100 + grenze + 1)])
+            conn.execute(text(fuege_ein.format(tabelle='t_wenig')),
+                         [{'nr': i, 'wert': str(i)} for i in range(100, 100 + grenze)])
+            conn.execute(text('DELETE FROM t_geleert'))
+            conn.execute(text(fuege_ein.format(tabelle='t_ohne_rowid')), [{'nr': 100, 'wert': '100'}])
+            assert geaenderte_tabellen(conn) == {'t_mehr': 100 + grenze + 1, 't_geleert': 0}
+
+            assert analysiere(conn) == 2
+            assert stat(conn, 't_mehr') == str(100 + grenze + 1)
+            assert stat(conn, 't_wenig') == '100'
+            assert geaenderte_tabellen(conn) == {}
+        db_man.get_engine().dispose()
+
+
+if __name__ == '__main__':
+    test_migration_auf_version_17()
+    test_vacuum_mit_fehler()
+    test_geaenderte_tabellen()
+    print('ok')
@@ -0,0 +1,84 @@
+'''
+Pruefung der Zuordnung der Zahlungszeilen zu Zahlarten (model.zahlungen). Aufruf mit pytest oder
+direkt:
+
+    python tests/test_zahlungen.py
+'''
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from model.zahlungen import ZAHLART_SONSTIGE, ZAHLARTEN, klassifiziere, zahlungen_aus_journal
+
+
+def zahlart_einzeln(text: str) -> str:
+    '''Erste passende Zahlart mit einer Schleife ueber ZAHLARTEN'''
+    for zahlart, muster in ZAHLARTEN:
+        if re.search(muster, text or '', re.IGNORECASE):
+            return zahlart
+    return ZAHLART_SONSTIGE
+
+
+def test_klassifiziere():
+    '''Die erste passende Zahlart gilt, Woerter werden nur ganz erkannt'''
+    texte = pd.Series({
+        10: 'EC-Karte girocard',
+        11: 'Kreditkarte VISA',
+        12: 'Mastercard',
+        13: 'V PAY',
+        14: 'Gutschein 10 EUR',
+        15: 'BAR',
+        16: 'Rückgeld',
+        17: 'Barcode-Coupon',
+        18: 'Scheck',
+        19: None,
+        20: 'Gutschein mit girocard bezahlt',
+        21: 'Deckel',
+    })
+    ergebnis = klassifiziere(texte)
+    assert ergebnis.index.equals(texte.index) and ergebnis.name == 'zahlart'
+    assert ergebnis.tolist() == ['girocard', 'kreditkarte', 'kreditkarte', 'girocard', 'gutschein', 'bar', 'bar',
+                                 'gutschein', ZAHLART_SONSTIGE, ZAHLART_SONSTIGE, 'girocard', ZAHLART_SONSTIGE]
+    assert ergebnis.tolist() == [zahlart_einzeln(t) for t in texte]
+
+
+def test_klassifiziere_zufaellig():
+    '''Zusammengesetzte Texte wie mit der Schleife ueber die Zeilen'''
+    rng = np.random.default_rng(5)
+    woerter = np.array(['EC', 'girocard', 'Visa', 'AMEX', 'Bar', 'Barzahlung', 'Wertbon', 'Zahlung', 'Karte', ''])
+    texte = pd.Series([' '.join(rng.choice(woerter, 3)) for _ in range(500)])
+    assert klassifiziere(texte).tolist() == [zahlart_einzeln(t) for t in texte]
+
+
+def test_zahlungen_aus_journal():
+    '''Nur Zahlungszeilen, doppelte Texte einmal, Kartenzahlungen gekennzeichnet'''
+    df_journal = pd.DataFrame({
+        'hash': ['a', 'b', 'c'],
+        'kasse_nr': [1, 1, 2],
+        'bon_nr': [7, 7, 8],
+        'bon_abschluss': ['2023-03-01 10:15:00', '2023-03-01 10:15:00', '2023-03-02 18:00:00'],
+        'pos_typ': ['PLU', 'ZA', 'ZA'],
+        'art_bez': ['Brot', 'girocard', 'Bar'],
+        'infotext': [None, 'girocard', 'Rueckgeld'],
+        'preis_gesamt': [2.5, 2.5, -0.3],
+    })
+    df_za = zahlungen_aus_journal(df_journal)
+    assert df_za['hash'].tolist() == ['b', 'c']
+    assert df_za['text'].tolist() == ['girocard', 'Bar Rueckgeld']
+    assert df_za['zahlart'].tolist() == ['girocard', 'bar']
+    assert df_za['karte'].tolist() == [1, 0]
+    assert df_za['datum'].tolist() == ['2023-03-01', '2023-03-02']
+
+
+if __name__ == '__main__':
+    test_klassifiziere()
+    test_klassifiziere_zufaellig()
+    test_zahlungen_aus_journal()
+    print('ok')
@@ -0,0 +1,60 @@
+'''
+Pruefung der Tagesnummern (model.zeitcode) in Python, NumPy und SQLite. Aufruf mit pytest oder
+direkt:
+
+    python tests/test_zeitcode.py
+'''
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date, timedelta
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from model.zeitcode import SQL_TAG_NR, als_iso, datum, tag_nr, tag_nummern
+
+TAGE = [date(1970, 1, 1), date(1969, 12, 31), date(2000, 2, 29), date(2023, 3, 26), date(2023, 10, 29),
+        date(2024, 12, 31), date(2099, 12, 31)]
+'''Epoche, Tag davor, Schalttag, Umstellungen der Sommerzeit, Jahresende, Ende der Gueltigkeit'''
+
+
+def test_tag_nr():
+    assert tag_nr(date(1970, 1, 1)) == 0
+    assert tag_nr(date(1969, 12, 31)) == -1
+    assert tag_nr(date(2000, 3, 1)) - tag_nr(date(2000, 2, 28)) == 2
+    # Texte mit Uhrzeit zaehlen als ihr Tag
+    assert tag_nr('2023-03-26') == tag_nr('2023-03-26 23:59:59.999999') == tag_nr(date(2023, 3, 26))
+    for tag in TAGE:
+        assert datum(tag_nr(tag)) == tag
+        assert tag_nr(tag) * 86400 == pd.Timestamp(tag).timestamp()
+
+
+def test_als_iso():
+    nummern = [tag_nr(tag) for tag in TAGE]
+    assert als_iso(nummern).tolist() == [tag.isoformat() for tag in TAGE]
+    assert als_iso(np.array(nummern, dtype=np.int32)).tolist() == [tag.isoformat() for tag in TAGE]
+    assert als_iso([]).tolist() == []
+    assert tag_nummern(pd.Series([tag.isoformat() for tag in TAGE])).tolist() == nummern
+
+
+def test_sql_tag_nr():
+    '''Der SQL-Ausdruck liefert dieselben Nummern wie 'tag_nr', auch fuer Texte mit Uhrzeit'''
+    conn = sqlite3.connect(':memory:')
+    tage = [date(1990, 1, 1) + timedelta(days=i) for i in range(0, 60 * 365, 7)] + TAGE
+    for tag in tage:
+        for text in (tag.isoformat(), f'{tag.isoformat()} 23:59:59'):
+            sql = f"SELECT {SQL_TAG_NR.format(spalte='?')}"
+            assert conn.execute(sql, (text,)).fetchone()[0] == tag_nr(tag), text
+    conn.close()
+
+
+if __name__ == '__main__':
+    test_tag_nr()
+    test_als_iso()
+    test_sql_tag_nr()
+    print('ok')
@@ -0,0 +1,103 @@
+'''
+Testdaten fuer die Tests auf einer temporaeren Datenbank: Kassenjournale im Format des
+SCS-Exports, importiert wie mit der Kommandozeile (controller.import_lauf).
+'''
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from datetime import date, datetime, timedelta
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from controller.import_lauf import importer_klasse, importiere
+from model.db_manager import DbManager
+from model.schema import aktualisiere_schema
+
+KOPF_JOURNAL = ('Kassen-Nr.', 'Bon-Nr.', 'Zeitpunkt', 'Beginn', 'Verkäufer', 'Kunden-Nr.', 'Bon-Summe', 'Typ',
+                'Artikelnummer', 'Bezeichnung', 'Warengruppe', 'MwSt.-Satz', 'Mengenfaktor', 'Menge', 'Preis',
+                'Gesamt', 'Infotext', 'Stornoreferenz', 'TSE-Info')
+
+
+class Bon(NamedTuple):
+    '''Ein Bon des Kassenjournals, Positionen als (art_nr, menge, preis)'''
+    kasse_nr: int
+    bon_nr: int
+    zeitpunkt: datetime
+    kdnr: str
+    positionen: Sequence[Tuple[str, float, float]]
+    zahlart: str = 'Bar'
+    storno_ref: str = ''
+
+
+def _zahl(wert: float) -> str:
+    '''Zahl im Format des Exports (Dezimalkomma)'''
+    return f'{wert:.2f}'.replace('.', ',')
+
+
+def schreibe_journal(pfad: Path, bons: Sequence[Bon]) -> str:
+    '''Schreibt die Bons als Kassenjournal, je Bon die Artikelzeilen und eine Zahlungszeile'''
+    zeilen = [';'.join(KOPF_JOURNAL)]
+    for bon in bons:
+        summe = round(sum(menge * preis for _, menge, preis in bon.positionen), 2)
+        kopf = [bon.kasse_nr, bon.bon_nr, bon.zeitpunkt.strftime('%d.%m.%Y %H:%M:%S'),
+                (bon.zeitpunkt - timedelta(minutes=2)).strftime('%d.%m.%Y %H:%M:%S'), '3 | Anna', bon.kdnr, _zahl(summe)]
+        for art_nr, menge, preis in bon.positionen:
+            zeilen.append(';'.join(map(str, kopf + [
+                'VK | ART', art_nr, f'Artikel {art_nr}', '1:0 | WGR 1', '7,00', '', _zahl(menge), _zahl(preis),
+                _zahl(menge * preis), '', bon.storno_ref, 'TSE'])))
+        zeilen.append(';'.join(map(str, kopf + [
+            'VK | ZA', '-', bon.zahlart, 'fehlt', '0,00', '', '1,00', _zahl(summe), _zahl(summe), bon.zahlart,
+            bon.storno_ref, 'TSE'])))
+    pfad.write_text('\n'.join(zeilen) + '\n', encoding='utf8')
+    return str(pfad)
+
+
+def zufalls_bons(rng: np.random.Generator, von: date, tage: int, anzahl: int, erste_bon_nr: int,
+                 stornos: float = 0.05) -> List[Bon]:
+    '''
+    Zufaellige Bons auf Kasse 1 ueber 'tage' Tage ab 'von', aufsteigend nummeriert. Etwa der Anteil
+    'stornos' storniert einen der vorherigen Bons.
+    '''
+    zeitpunkte = sorted(datetime(von.year, von.month, von.day, 8) + timedelta(
+        days=int(tag), minutes=int(minute)) for tag, minute in zip(rng.integers(0, tage, anzahl),
+                                                                    rng.integers(0, 600, anzahl)))
+    bons = []
+    for i, zeitpunkt in enumerate(zeitpunkte):
+        positionen = [(f'40000000000{art:02d}', float(rng.integers(1, 4)), float(rng.integers(50, 1000)) / 100)
+                      for art in rng.choice(30, int(rng.integers(1, 5)), replace=False)]
+        storno_ref = str(erste_bon_nr + int(rng.integers(0, i))) if i > 0 and rng.random() < stornos else ''
+        bons.append(Bon(1, erste_bon_nr + i, zeitpunkt, str(rng.choice(['', '0', '11', '12', '13', '14', '15'])),
+                        positionen, str(rng.choice(['Bar', 'EC-Karte girocard', 'VISA Kreditkarte'])), storno_ref))
+    return bons
+
+
+KOPF_ARTIKEL = ('SCSPoolID', 'Strichcode', 'Index', 'Bezeichnung', 'Mengenfaktor', 'VKPreis', 'Preiseinheit', 'Kurzcode',
+                'Bontext', 'Mengeneinheit', 'Mengentyp', 'GPFaktor', 'WGR', 'UWGR', 'RabattKZ', 'PreisgebundenKZ',
+                'FSKKZ', 'Notizen')
+
+
+def schreibe_artikel(pfad: Path, artikel: Sequence[Tuple[str, str, float]]) -> str:
+    '''Schreibt den Artikelstamm (art_nr, art_bez, vk_brutto) im Format des Exports'''
+    zeilen = [';'.join(KOPF_ARTIKEL)]
+    for i, (art_nr, art_bez, vk_brutto) in enumerate(artikel):
+        zeilen.append(';'.join(map(str, [
+            i, art_nr, 0, art_bez, '1,000', _zahl(vk_brutto), 1, i, f'Bon {art_bez}', 'Stk', 'St', '1,000', 1, 0,
+            'J', 'N', 'N', f'Notiz {i}'])))
+    pfad.write_text('\n'.join(zeilen) + '\n', encoding='cp1252')
+    return str(pfad)
+
+
+def neue_datenbank(verzeichnis: str, name: str = 'test.db') -> DbManager:
+    '''Legt eine Datenbank mit aktuellem Schema im Verzeichnis an'''
+    db_man = DbManager(str(Path(verzeichnis) / name))
+    aktualisiere_schema(db_man)
+    return db_man
+
+
+def importiere_datei(db_man: DbManager, typ: str, datei: str, export_date: date = date(2024, 1, 1)) -> None:
+    '''Importiert eine Datei mit allen Stufen wie die Kommandozeile'''
+    importiere(importer_klasse(typ)(db_man, datei, export_date), db_man)
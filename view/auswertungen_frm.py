@@ -1,6 +1,11 @@
-from ttkbootstrap import Frame, LabelFrame, Label, Button, Entry, Separator
+from datetime import date, datetime
+from tkinter.filedialog import asksaveasfilename
+
+from ttkbootstrap import Frame, LabelFrame, Label, Button, DateEntry, Entry, Separator
 
 from controller.controller import Controller
+from model.log_level import LogLevel
+from settings import CONFIG_FILE, get_backwaren_wgr
 
 
 class AuswertungenFrame(Frame):
@@ -42,9 +47,91 @@ class AuswertungenFrame(Frame):
         self.btn_report_inventur_lieferartikel = Button(self._frm_auswertungen, text='Lieferantenartikel für Inventurnachbearb.', bootstyle='secondary')
         self.btn_report_inventur_lieferartikel.grid(row=120, column=0, sticky='WE', padx=5, pady=5)
 
+        # Stichtag der Inventur, vorbelegt mit dem Ende des Vorjahres
+        self.entry_inventur_stichtag = DateEntry(self._frm_auswertungen, dateformat='%d.%m.%Y', firstweekday=0,
+                                                 startdate=date(date.today().year - 1, 12, 31))
+        self.entry_inventur_stichtag.grid(row=120, column=1, sticky='W', padx=5, pady=5)
+
     def _register_bindings(self) -> None:
         '''registriert die Events'''
-        pass
+        self.btn_report_backwaren.configure(command=self.report_backwaren)
+        self.btn_report_inventur_artikeldatei.configure(command=self.report_inventur_artikeldatei)
+        self.btn_report_inventur_lieferartikel.configure(command=self.report_inventur_lieferartikel)
+
+    def report_backwaren(self) -> None:
+        '''Erstellt die Bestellhilfe Backwaren mit der Bedarfsprognose der naechsten Tage als Excel-Datei'''
+        wgr = get_backwaren_wgr()
+        if not wgr:
+            self.controller.log_message(
+                LogLevel.WARN, f"Es sind keine Warengruppen für Backwaren konfiguriert. Bitte in '{CONFIG_FILE}' "
+                "im Abschnitt [berichte] unter 'backwaren_wgr' eintragen, z.B. 'backwaren_wgr = 1:0, 1:1'")
+            return
+
+        datei = asksaveasfilename(
+            title='Bestellhilfe Backwaren speichern unter',
+            initialfile='bestellhilfe_backwaren.xlsx',
+            defaultextension='.xlsx',
+            filetypes=[('Excel-Datei', '*.xlsx')])
+        if not datei:
+            return
+
+        # erst hier laden, pandas und numpy werden beim Programmstart nicht benoetigt
+        from model.berichte import schreibe_bestellhilfe
+        from model.prognose import Bedarfsprognose
+
+        try:
+            df = Bedarfsprognose(self.controller.db_manager).berechne(wgr)
+            schreibe_bestellhilfe(df, datei)
+        except Exception as e:
+            self.controller.log_message(LogLevel.ERROR, f'Bestellhilfe Backwaren konnte nicht erstellt werden: {e}')
+            return
+        self.controller.log_message(LogLevel.INFO, f"Bestellhilfe Backwaren gespeichert: '{datei}'")
+
+    def report_inventur_artikeldatei(self) -> None:
+        '''Schreibt den aktuellen Artikelstamm mit Mehrfach-EANs und Preisen als Excel-Datei fuer die Inventur'''
+        datei = asksaveasfilename(
+            title='Artikeldatei für Inventur speichern unter',
+            initialfile='inventur_artikeldatei.xlsx',
+            defaultextension='.xlsx',
+            filetypes=[('Excel-Datei', '*.xlsx')])
+        if not datei:
+            return
+
+        from model.berichte import schreibe_artikeldatei
+
+        try:
+            anzahl = schreibe_artikeldatei(self.controller.db_manager, datei)
+        except Exception as e:
+            self.controller.log_message(LogLevel.ERROR, f'Artikeldatei für Inventur konnte nicht erstellt werden: {e}')
+            return
+        self.controller.log_message(LogLevel.INFO, f"Artikeldatei für Inventur mit {anzahl} Artikeln gespeichert: '{datei}'")
+
+    def report_inventur_lieferartikel(self) -> None:
+        '''Erstellt die Lieferantenartikel mit Einkaufspreisen zum Stichtag der Inventur als Excel-Datei'''
+        try:
+            stichtag = datetime.strptime(self.entry_inventur_stichtag.entry.get(), '%d.%m.%Y').date()
+        except ValueError:
+            self.controller.log_message(LogLevel.WARN, 'Bitte einen gültigen Stichtag (TT.MM.JJJJ) für die Inventur wählen')
+            return
+
+        datei = asksaveasfilename(
+            title='Lieferantenartikel für Inventur speichern unter',
+            initialfile=f'inventur_lieferantenartikel_{stichtag:%Y%m%d}.xlsx',
+            defaultextension='.xlsx',
+            filetypes=[('Excel-Datei', '*.xlsx')])
+        if not datei:
+            return
+
+        from model.berichte import schreibe_lieferantenartikel
+        from model.inventur import Inventur
+
+        try:
+            df = Inventur(self.controller.db_manager).lieferantenartikel(stichtag)
+            schreibe_lieferantenartikel(df, stichtag, datei)
+        except Exception as e:
+            self.controller.log_message(LogLevel.ERROR, f'Lieferantenartikel für Inventur konnten nicht erstellt werden: {e}')
+            return
+        self.controller.log_message(LogLevel.INFO, f"Lieferantenartikel zum {stichtag:%d.%m.%Y} gespeichert: '{datei}'")
 
     def show(self) -> None:
         '''Bringt den Frame in den Vordergrund'''
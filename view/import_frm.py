@@ -1,23 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime
+from queue import Empty, Queue
+from threading import Thread
 from tkinter import END, StringVar
+from typing import Tuple
 
-from ttkbootstrap import Button, Entry, Frame, Label, LabelFrame, DateEntry
+from ttkbootstrap import Button, Entry, Frame, Label, LabelFrame, DateEntry, Progressbar
 from ttkbootstrap.scrolled import ScrolledText
 
 from controller.controller import Controller
+from controller.import_lauf import importer_klasse, status_klasse
 from controller.job_control import ImportJobController
-from model.artikel import ArtikelImporter, ArtikelStatus
 from model.db_manager import DbManager
 from model.errors import DatenImportError
-from model.kassenjournal import KassenjournalImporter, KassenjournalStatus
-from model.kunden import KundenImporter, KundenStatus
-from model.lieferanten import LieferantenImporter, LieferantenStatus
+from model.fortschritt import Fortschritt
+from model.import_log import ImportLogStatus
 from model.log_level import LogLevel
-from model.mehrfach_ean import MehrfachEanImporter, MehrfachEanStatus
-from model.pfand import PfandImporter, PfandStatus
-from model.warengruppen import WarengruppenImporter, WarengruppenStatus
-from model.scs_lief_artikel import SCSLieferantenArtikelImporter, SCSLieferantenArtikelStatus
-from model.presseartikel import PresseArtikelImporter, PresseArtikelStatus
+
+
+STATUS_FELDER = (
+    ('kassenjournal', 'var_letzte_datei_kassenjournal', 'letzter_imp_kassenjournal'),
+    ('warengruppen', 'var_letzte_datei_warengruppen', 'letzter_imp_warengruppen'),
+    ('kunden', 'var_letzte_datei_kundendaten', 'letzter_imp_kundendaten'),
+    ('artikel', 'var_letzte_datei_scs_artikel', 'letzter_imp_scs_artikel'),
+    ('pfand', 'var_letzte_datei_pfanddaten', 'letzter_imp_pfanddaten'),
+    ('lieferanten', 'var_letzte_datei_lieferanten', 'letzter_imp_lieferanten'),
+    ('mehrfach-ean', 'var_letzte_datei_mean', 'letzter_imp_mean'),
+    ('lieferantenartikel', 'var_letzte_datei_scs_liefart', 'letzter_imp_scs_liefart'),
+    ('presseartikel', 'var_letzte_datei_presseartikel', 'letzter_imp_presseartikel')
+)
+'''(Importtyp, StringVar fuer das Datum der letzten Importdatei, StringVar fuer den Zeitpunkt des letzten Imports)'''
+
+STATUS_PLATZHALTER = 'wird ermittelt...'
+STATUS_THREADS = 4
 
 
 class ImportFrame(Frame):
@@ -31,6 +46,8 @@ class ImportFrame(Frame):
         self.application = application
         self.db_manager = db_man
         self.controls = set()
+        self._status_queue: Queue = None
+        self._status_erneut = False
         self._build_ui()
 
     def _build_ui(self) -> None:
@@ -58,7 +75,7 @@ class ImportFrame(Frame):
         self.btn_imp_kassenjournal.grid(
             row=1, column=0, sticky='WE', padx=5, pady=5)
 
-        self.var_letzte_datei_kassenjournal = StringVar(self._frm_import, value='noch nicht implementiert')
+        self.var_letzte_datei_kassenjournal = StringVar(self._frm_import)
         self.fld_letzte_datei_kassenjournal = Entry(
             self._frm_import, state='readonly', width='20', textvariable=self.var_letzte_datei_kassenjournal)
         self.fld_letzte_datei_kassenjournal.grid(
@@ -81,11 +98,11 @@ class ImportFrame(Frame):
 
         self.letzter_imp_warengruppen = StringVar(self._frm_import)
         self.fld_letzter_imp_warengruppen = Entry(self._frm_import, state='readonly', width=20, textvariable=self.letzter_imp_warengruppen)
-        self.fld_letzter_imp_warengruppen.grid(row=2, column=1, sticky='WE', padx=5, pady=5)
+        self.fld_letzter_imp_warengruppen.grid(row=2, column=2, sticky='WE', padx=5, pady=5)
 
-        self.var_letzte_datei_warengruppen = StringVar(self._frm_import, value='noch nicht implementiert')
+        self.var_letzte_datei_warengruppen = StringVar(self._frm_import)
         self.fld_letzte_datei_warengruppen = Entry(self._frm_import, state='readonly', width=20, textvariable=self.var_letzte_datei_warengruppen)
-        self.fld_letzte_datei_warengruppen.grid(row=2, column=2, sticky='WE', padx=5, pady=5)
+        self.fld_letzte_datei_warengruppen.grid(row=2, column=1, sticky='WE', padx=5, pady=5)
 
         self.btn_import_kundendaten = Button(self._frm_import, text='Kundendaten importieren', bootstyle='secondary', command=self.import_kundendaten)
         self.btn_import_kundendaten.grid(row=3, column=0, sticky='WE', padx=5, pady=5)
@@ -93,11 +110,11 @@ class ImportFrame(Frame):
 
         self.letzter_imp_kundendaten = StringVar(self._frm_import)
         self.fld_letzter_imp_kundendaten = Entry(self._frm_import, state='readonly', width=20, textvariable=self.letzter_imp_kundendaten)
-        self.fld_letzter_imp_kundendaten.grid(row=3, column=1, sticky='WE', padx=5, pady=5)
+        self.fld_letzter_imp_kundendaten.grid(row=3, column=2, sticky='WE', padx=5, pady=5)
 
-        self.var_letzte_datei_kundendaten = StringVar(self._frm_import, 'noch nicht implementiert')
+        self.var_letzte_datei_kundendaten = StringVar(self._frm_import)
         self.fld_letzte_datei_kundendaten = Entry(self._frm_import, state='readonly', width=20, textvariable=self.var_letzte_datei_kundendaten)
-        self.fld_letzte_datei_kundendaten.grid(row=3, column=2, sticky='WE', padx=5, pady=5)
+        self.fld_letzte_datei_kundendaten.grid(row=3, column=1, sticky='WE', padx=5, pady=5)
 
         self.btn_import_scsartikel = Button(
             self._frm_import, text='Schapfl-Artikelliste importieren', bootstyle='secondary', command=self.import_artikeldaten)
@@ -109,13 +126,13 @@ class ImportFrame(Frame):
         self.fld_letzter_imp_scs_artikel = Entry(
             self._frm_import, state='readonly', width='20', textvariable=self.letzter_imp_scs_artikel)
         self.fld_letzter_imp_scs_artikel.grid(
-            row=20, column=1, sticky='WE', padx=5, pady=5)
+            row=20, column=2, sticky='WE', padx=5, pady=5)
         
-        self.var_letzte_datei_scs_artikel = StringVar(self._frm_import, value='noch nicht implementiert')
+        self.var_letzte_datei_scs_artikel = StringVar(self._frm_import)
         self.fld_letzte_datei_scs_artikel = Entry(
             self._frm_import, state='readonly', width='20', textvariable=self.var_letzte_datei_scs_artikel)
         self.fld_letzte_datei_scs_artikel.grid(
-            row=20, column=2, sticky='WE', padx=5, pady=5)
+            row=20, column=1, sticky='WE', padx=5, pady=5)
         
         self.btn_import_pfanddaten = Button(self._frm_import, text='Pfanddaten importieren', bootstyle='secondary', command=self.import_pfanddaten)
         self.btn_import_pfanddaten.grid(row=21, column=0, sticky='WE', padx=5, pady=5)
@@ -123,11 +140,11 @@ class ImportFrame(Frame):
 
         self.letzter_imp_pfanddaten = StringVar(self._frm_import)
         self.fld_letzter_imp_pfanddaten = Entry(self._frm_import, state='readonly', width=20, textvariable=self.letzter_imp_pfanddaten)
-        self.fld_letzter_imp_pfanddaten.grid(row=21, column=1, sticky='WE', padx=5, pady=5)
+        self.fld_letzter_imp_pfanddaten.grid(row=21, column=2, sticky='WE', padx=5, pady=5)
         
-        self.var_letzte_datei_pfanddaten = StringVar(self._frm_import, value='noch nicht implementiert')
+        self.var_letzte_datei_pfanddaten = StringVar(self._frm_import)
         self.fld_letzte_datei_pfanddaten = Entry(self._frm_import, state='readonly', width=20, textvariable=self.var_letzte_datei_pfanddaten)
-        self.fld_letzte_datei_pfanddaten.grid(row=21, column=2, sticky='WE', padx=5, pady=5)
+        self.fld_letzte_datei_pfanddaten.grid(row=21, column=1, sticky='WE', padx=5, pady=5)
 
         self.btn_import_lieferanten = Button(self._frm_import, text='Lieferanten importieren', bootstyle='secondary', command=self.import_lieferanten)
         self.btn_import_lieferanten.grid(row=22, column=0, sticky='WE', padx=5, pady=5)
@@ -135,11 +152,11 @@ class ImportFrame(Frame):
 
         self.letzter_imp_lieferanten = StringVar(self._frm_import)
         self.fld_letzter_imp_lieferanten = Entry(self._frm_import, state='readonly', width=20, textvariable=self.letzter_imp_lieferanten)
-        self.fld_letzter_imp_lieferanten.grid(row=22, column=1, sticky='WE', padx=5, pady=5)
+        self.fld_letzter_imp_lieferanten.grid(row=22, column=2, sticky='WE', padx=5, pady=5)
 
-        self.var_letzte_datei_lieferanten = StringVar(self._frm_import, value='noch nicht implementiert')
+        self.var_letzte_datei_lieferanten = StringVar(self._frm_import)
         self.fld_letzte_datei_lieferanten = Entry(self._frm_import, state='readonly', width=20, textvariable=self.var_letzte_datei_lieferanten)
-        self.fld_letzte_datei_lieferanten.grid(row=22, column=2, sticky='WE', padx=5, pady=5)
+        self.fld_letzte_datei_lieferanten.grid(row=22, column=1, sticky='WE', padx=5, pady=5)
 
         self.btn_import_mean = Button(self._frm_import, text='Mehrfach-EAN importieren', bootstyle='secondary', command=self.import_mean)
         self.btn_import_mean.grid(row=23, column=0, sticky='WE', padx=5, pady=5)
@@ -147,11 +164,11 @@ class ImportFrame(Frame):
 
         self.letzter_imp_mean = StringVar(self._frm_import)
         self.fld_letzter_imp_mean = Entry(self._frm_import, state='readonly', width=20, textvariable=self.letzter_imp_mean)
-        self.fld_letzter_imp_mean.grid(row=23, column=1, sticky='WE', padx=5, pady=5)
+        self.fld_letzter_imp_mean.grid(row=23, column=2, sticky='WE', padx=5, pady=5)
 
-        self.var_letzte_datei_mean = StringVar(self._frm_import, value='noch nicht implementiert')
+        self.var_letzte_datei_mean = StringVar(self._frm_import)
         self.fld_letzte_datei_mean = Entry(self._frm_import, state='readonly', width=20, textvariable=self.var_letzte_datei_mean)
-        self.fld_letzte_datei_mean.grid(row=23, column=2, sticky='WE', padx=5, pady=5)
+        self.fld_letzte_datei_mean.grid(row=23, column=1, sticky='WE', padx=5, pady=5)
 
         self.btn_import_scs_liefart = Button(self._frm_import, text='Lieferantenartikel importieren', bootstyle='secondary', command=self.import_scs_liefart)
         self.btn_import_scs_liefart.grid(row=24, column=0, sticky='WE', padx=5, pady=5)
@@ -159,11 +176,11 @@ class ImportFrame(Frame):
 
         self.letzter_imp_scs_liefart = StringVar(self._frm_import)
         self.fld_letzter_imp_scs_liefart = Entry(self._frm_import, state='readonly', width=20, textvariable=self.letzter_imp_scs_liefart)
-        self.fld_letzter_imp_scs_liefart.grid(row=24, column=1, sticky='WE', padx=5, pady=5)
+        self.fld_letzter_imp_scs_liefart.grid(row=24, column=2, sticky='WE', padx=5, pady=5)
 
-        self.var_letzte_datei_scs_liefart = StringVar(self._frm_import, value='noch nicht implementiert')
+        self.var_letzte_datei_scs_liefart = StringVar(self._frm_import)
         self.fld_letzte_datei_scs_liefart = Entry(self._frm_import, state='readonly', width=20, textvariable=self.var_letzte_datei_scs_liefart)
-        self.fld_letzte_datei_scs_liefart.grid(row=24, column=2, sticky='WE', padx=5, pady=5)
+        self.fld_letzte_datei_scs_liefart.grid(row=24, column=1, sticky='WE', padx=5, pady=5)
 
         self.btn_import_presseartikel = Button(self._frm_import, text='Presseartikel importieren', bootstyle='secondary', command=self.import_presseartikel)
         self.btn_import_presseartikel.grid(row=25, column=0, sticky='WE', padx=5, pady=5)
@@ -171,11 +188,11 @@ class ImportFrame(Frame):
 
         self.letzter_imp_presseartikel = StringVar(self._frm_import)
         self.fld_letzter_imp_presseartikel = Entry(self._frm_import, state='readonly', width=20, textvariable=self.letzter_imp_presseartikel)
-        self.fld_letzter_imp_presseartikel.grid(row=25, column=1, sticky='WE', padx=5, pady=5)
+        self.fld_letzter_imp_presseartikel.grid(row=25, column=2, sticky='WE', padx=5, pady=5)
 
-        self.var_letzte_datei_presseartikel = StringVar(self._frm_import, value='noch nicht implementiert')
+        self.var_letzte_datei_presseartikel = StringVar(self._frm_import)
         self.fld_letzte_datei_presseartikel = Entry(self._frm_import, state='readonly', width=20, textvariable=self.var_letzte_datei_presseartikel)
-        self.fld_letzte_datei_presseartikel.grid(row=25, column=2, sticky='WE', padx=5, pady=5)
+        self.fld_letzte_datei_presseartikel.grid(row=25, column=1, sticky='WE', padx=5, pady=5)
 
         # --------------------------
 
@@ -183,26 +200,28 @@ class ImportFrame(Frame):
         self._frm_status.pack(fill='both', expand=True)
         self._frm_status.columnconfigure(1, weight=1)
 
+        self.var_fortschritt = StringVar(self._frm_status)
+        self.lbl_fortschritt = Label(self._frm_status, textvariable=self.var_fortschritt, width=60)
+        self.lbl_fortschritt.grid(row=0, column=0, sticky='W', padx=10, pady=(10, 0))
+
+        self.bar_fortschritt = Progressbar(self._frm_status, maximum=100, bootstyle='striped')
+        self.bar_fortschritt.grid(row=0, column=1, sticky='WE', padx=10, pady=(10, 0))
+
         self.fld_msg = ScrolledText(
             self._frm_status, height=10, width=100, state='disabled')
         self.fld_msg.grid(row=1, column=0, columnspan=2,
                           sticky='WE', padx=10, pady=10, ipadx=10, ipady=10)
 
+        self.btn_import_log = Button(
+            self._frm_status, text='Messwerte der letzten Importe anzeigen', bootstyle='secondary', command=self.schreibe_import_log)
+        self.btn_import_log.grid(row=2, column=0, sticky='W', padx=10, pady=(0, 10))
+
     def show(self) -> None:
         '''Bringt den Frame in den Vordergrund'''
         self.tkraise()
         if self.erste_anzeige:
             return
-        self.update_letzter_import_kj()
-        self.update_letzter_import_wgr()
-        self.update_letzter_import_kdn()
-        self.update_letzter_import_artikel()
-        self.update_letzter_import_pfand()
-        self.update_letzter_import_lieferanten()
-        self.update_letzter_import_mean()
-        self.update_letzter_import_scs_liefart()
-        self.update_letzter_import_presseartikel()
-        
+        self.aktualisiere_status()
         self.erste_anzeige = True
 
     def log_message(self, msg: str) -> None:
@@ -213,19 +232,26 @@ class ImportFrame(Frame):
 
     def done(self) -> None:
         '''Wird aufgerufen vom ImportJob, wenn die Verarbeitung abgeschlossen ist'''
-        self.update_letzter_import_kj()
-        self.update_letzter_import_wgr()
-        self.update_letzter_import_kdn()
-        self.update_letzter_import_artikel()
-        self.update_letzter_import_pfand()
-        self.update_letzter_import_lieferanten()
-        self.update_letzter_import_mean()
-        self.update_letzter_import_scs_liefart()
-        self.update_letzter_import_presseartikel()
+        self.aktualisiere_status()
 
         for ctrl in self.controls:
             ctrl.configure(state='normal')
 
+        self.bar_fortschritt.configure(value=0)
+        self.var_fortschritt.set('')
+
+    def zeige_fortschritt(self, fortschritt: Fortschritt) -> None:
+        '''Zeigt den Fortschritt der laufenden Importstufe mit Durchsatz und geschaetzter Restzeit an'''
+        self.bar_fortschritt.configure(value=fortschritt.anteil * 100)
+
+        text = f'{fortschritt.stufe}: {fortschritt.erledigt} von {fortschritt.gesamt} Zeilen'
+        if fortschritt.durchsatz:
+            text += f', {fortschritt.durchsatz:.0f} Zeilen/s'
+        if fortschritt.restzeit is not None:
+            minuten, sekunden = divmod(int(fortschritt.restzeit), 60)
+            text += f', Restzeit ca. {minuten}:{sekunden:02d}'
+        self.var_fortschritt.set(text)
+
     def import_kassenjournal(self) -> None:
         '''Importiert das Kassenjournal'''
 
@@ -235,7 +261,7 @@ class ImportFrame(Frame):
 
         try:
             job_controller = ImportJobController(
-                self.application, self, KassenjournalImporter, db_manager=self.db_manager)
+                self.application, self, importer_klasse('kassenjournal'), db_manager=self.db_manager)
 
             job_controller.exportdatum_ermitteln(self.entry_datum_export.entry.get())
             job_controller.importfile_ermitteln(
@@ -260,7 +286,7 @@ class ImportFrame(Frame):
 
         try:
             job_controller = ImportJobController(
-                self.application, self, WarengruppenImporter, db_manager=self.db_manager)
+                self.application, self, importer_klasse('warengruppen'), db_manager=self.db_manager)
 
             job_controller.exportdatum_ermitteln(self.entry_datum_export.entry.get())
             job_controller.importfile_ermitteln(
@@ -284,7 +310,7 @@ class ImportFrame(Frame):
 
         try:
             job_controller = ImportJobController(
-                self.application, self, KundenImporter, db_manager=self.db_manager)
+                self.application, self, importer_klasse('kunden'), db_manager=self.db_manager)
             
             job_controller.exportdatum_ermitteln(self.entry_datum_export.entry.get())
             job_controller.importfile_ermitteln(
@@ -308,7 +334,7 @@ class ImportFrame(Frame):
 
         try:
             job_controller = ImportJobController(
-                self.application, self, ArtikelImporter, db_manager=self.db_manager)
+                self.application, self, importer_klasse('artikel'), db_manager=self.db_manager)
 
             job_controller.exportdatum_ermitteln(self.entry_datum_export.entry.get())
             job_controller.importfile_ermitteln(
@@ -332,7 +358,7 @@ class ImportFrame(Frame):
 
         try:
             job_controller = ImportJobController(
-                self.application, self, PfandImporter, db_manager=self.db_manager)
+                self.application, self, importer_klasse('pfand'), db_manager=self.db_manager)
 
             job_controller.exportdatum_ermitteln(self.entry_datum_export.entry.get())
             job_controller.importfile_ermitteln(
@@ -356,7 +382,7 @@ class ImportFrame(Frame):
 
         try:
             job_controller = ImportJobController(
-                self.application, self, LieferantenImporter, db_manager=self.db_manager)
+                self.application, self, importer_klasse('lieferanten'), db_manager=self.db_manager)
 
             job_controller.exportdatum_ermitteln(self.entry_datum_export.entry.get())
             job_controller.importfile_ermitteln(
@@ -380,7 +406,7 @@ class ImportFrame(Frame):
 
         try:
             job_controller = ImportJobController(
-                self.application, self, MehrfachEanImporter, db_manager=self.db_manager)
+                self.application, self, importer_klasse('mehrfach-ean'), db_manager=self.db_manager)
 
             job_controller.exportdatum_ermitteln(self.entry_datum_export.entry.get())
             job_controller.importfile_ermitteln(
@@ -404,7 +430,7 @@ class ImportFrame(Frame):
 
         try:
             job_controller = ImportJobController(
-                self.application, self, SCSLieferantenArtikelImporter, db_manager=self.db_manager)
+                self.application, self, importer_klasse('lieferantenartikel'), db_manager=self.db_manager)
 
             job_controller.exportdatum_ermitteln(self.entry_datum_export.entry.get())
             job_controller.importfile_ermitteln(
@@ -428,7 +454,7 @@ class ImportFrame(Frame):
 
         try:
             job_controller = ImportJobController(
-                self.application, self, PresseArtikelImporter, db_manager=self.db_manager)
+                self.application, self, importer_klasse('presseartikel'), db_manager=self.db_manager)
 
             job_controller.exportdatum_ermitteln(self.entry_datum_export.entry.get())
             job_controller.importfile_ermitteln(
@@ -444,98 +470,70 @@ class ImportFrame(Frame):
             self.application.log_message(LogLevel.WARN, de.args[0])
             self.done()
 
-    def update_letzter_import_kj(self) -> None:
-        '''ermittelt und setzt das Datum den letzten Imports des Kassenjournals'''
-
-        letzte_aenderung = KassenjournalStatus(
-            self.application.db_manager).letzte_aenderung
-        if letzte_aenderung:
-            self.letzter_imp_kassenjournal.set(
-                letzte_aenderung.strftime('%d.%m.%Y %H:%M:%S'))
-        else:
-            self.letzter_imp_kassenjournal.set('Kein Import vorhanden')
-
-    def update_letzter_import_wgr(self) -> None:
-        '''ermittelt und setzt das Datum den letzten Imports der Warengruppen'''
-
-        letzte_datei = WarengruppenStatus(
-            self.application.db_manager).letzte_datei
-        if letzte_datei:
-            self.letzter_imp_warengruppen.set(
-                letzte_datei.strftime('%d.%m.%Y'))
-        else:
-            self.letzter_imp_warengruppen.set('Kein Import vorhanden')
-
-    def update_letzter_import_kdn(self) -> None:
-        '''ermittelt und setzt das Datum den letzten Imports der Kundendaten'''
-
-        letzte_aenderung = KundenStatus(
-            self.application.db_manager).letzte_datei
-        if letzte_aenderung:
-            self.letzter_imp_kundendaten.set(
-                letzte_aenderung.strftime('%d.%m.%Y'))
-        else:
-            self.letzter_imp_kundendaten.set('Kein Import vorhanden')
-
-    def update_letzter_import_artikel(self) -> None:
-        '''ermittelt und setzt das Datum den letzten Imports der Kundendaten'''
-
-        letzte_aenderung = ArtikelStatus(
-            self.application.db_manager).letzte_datei
-        if letzte_aenderung:
-            self.letzter_imp_scs_artikel.set(
-                letzte_aenderung.strftime('%d.%m.%Y'))
-        else:
-            self.letzter_imp_scs_artikel.set('Kein Import vorhanden')
-
-    def update_letzter_import_pfand(self) -> None:
-        '''ermittelt und setzt das Datum den letzten Imports der Pfanddaten'''
-
-        letzte_aenderung = PfandStatus(
-            self.application.db_manager).letzte_datei
-        if letzte_aenderung:
-            self.letzter_imp_pfanddaten.set(
-                letzte_aenderung.strftime('%d.%m.%Y'))
-        else:
-            self.letzter_imp_pfanddaten.set('Kein Import vorhanden')
-
-    def update_letzter_import_lieferanten(self) -> None:
-        '''ermittelt und setzt das Datum den letzten Imports der Lieferanten'''
-
-        letzte_aenderung = LieferantenStatus(
-            self.application.db_manager).letzte_datei
-        if letzte_aenderung:
-            self.letzter_imp_lieferanten.set(
-                letzte_aenderung.strftime('%d.%m.%Y'))
-        else:
-            self.letzter_imp_lieferanten.set('Kein Import vorhanden')
-
-    def update_letzter_import_mean(self) -> None:
-        '''ermittelt und setzt das Datum den letzten Imports der Mehrfach-EAN'''
-
-        letzte_aenderung = MehrfachEanStatus(
-            self.application.db_manager).letzte_datei
-        if letzte_aenderung:
-            self.letzter_imp_mean.set(
-                letzte_aenderung.strftime('%d.%m.%Y'))
-        else:
-            self.letzter_imp_mean.set('Kein Import vorhanden')
-
-    def update_letzter_import_scs_liefart(self) -> None:
-        '''ermittelt und setzt das Datum den letzten Imports der Schapfl-Lieferantenartikel'''
+    def aktualisiere_status(self) -> None:
+        '''
+        Ermittelt die Staende der Importe in einem Hintergrund-Thread, damit der Frame auch
+        bei grossen Datenbanken sofort erscheint. Bis das Ergebnis eines Importtyps vorliegt,
+        wird ein Platzhalter angezeigt.
+        '''
+        if self._status_queue:
+            # laeuft bereits, danach noch einmal ermitteln
+            self._status_erneut = True
+            return
 
-        letzte_aenderung = SCSLieferantenArtikelStatus(
-            self.application.db_manager).letzte_datei
-        if letzte_aenderung:
-            self.letzter_imp_scs_liefart.set(
-                letzte_aenderung.strftime('%d.%m.%Y'))
-        else:
-            self.letzter_imp_scs_liefart.set('Kein Import vorhanden')
+        for _, var_datei, var_import in STATUS_FELDER:
+            getattr(self, var_datei).set(STATUS_PLATZHALTER)
+            getattr(self, var_import).set(STATUS_PLATZHALTER)
+
+        self._status_queue = Queue()
+        Thread(target=self._ermittle_status, args=(self._status_queue,), daemon=True).start()
+        self.after(50, self._uebernimm_status)
+
+    def _ermittle_status(self, queue: Queue) -> None:
+        '''Laeuft im Hintergrund: fragt die Staende parallel ab und stellt sie sofort in die Queue'''
+        with ThreadPoolExecutor(max_workers=STATUS_THREADS) as pool:
+            abfragen = {pool.submit(self._lade_status, typ): (var_datei, var_import)
+                        for typ, var_datei, var_import in STATUS_FELDER}
+            for abfrage in as_completed(abfragen):
+                queue.put((abfragen[abfrage], abfrage.result()))
+        queue.put(None)
+
+    def _lade_status(self, typ: str) -> Tuple[str, str]:
+        '''Ermittelt Datum der letzten Importdatei und Zeitpunkt des letzten Imports als Text, greift nicht auf Tk zu'''
+        try:
+            status = status_klasse(typ)(self.db_manager)
+            letzte_datei, letzter_import = status.letzte_datei, status.letzter_import
+        except Exception as e:
+            return f'Fehler: {e}', f'Fehler: {e}'
+        if not letzter_import:
+            return 'Kein Import vorhanden', 'Kein Import vorhanden'
+        return (letzte_datei.strftime('%d.%m.%Y') if letzte_datei else 'unbekannt',
+                letzter_import.strftime('%d.%m.%Y %H:%M:%S'))
+
+    def _uebernimm_status(self) -> None:
+        '''Uebernimmt die bisher ermittelten Staende in die Felder, solange die Abfrage laeuft'''
+        while True:
+            try:
+                ergebnis = self._status_queue.get_nowait()
+            except Empty:
+                self.after(50, self._uebernimm_status)
+                return
+
+            if ergebnis is None:
+                break
+            (var_datei, var_import), (letzte_datei, letzter_import) = ergebnis
+            getattr(self, var_datei).set(letzte_datei)
+            getattr(self, var_import).set(letzter_import)
+
+        self._status_queue = None
+        if self._status_erneut:
+            self._status_erneut = False
+            self.aktualisiere_status()
 
     def schreibe_kj_status(self) -> None:
         '''ermittelt und schreibt Status-Infos zum Kassenjournal in das Statusfeld'''
 
-        monatsliste = KassenjournalStatus(self.application.db_manager).monate
+        monatsliste = status_klasse('kassenjournal')(self.application.db_manager).monate
         self.fld_msg.text.configure(state='normal')
 
         self.fld_msg.text.insert(
@@ -549,13 +547,20 @@ class ImportFrame(Frame):
         self.fld_msg.text.insert(END, f'\n')
         self.fld_msg.text.configure(state='disabled')
 
-    def update_letzter_import_presseartikel(self) -> None:
-        '''ermittelt und setzt das Datum den letzten Imports der Schapfl-Presseartikel'''
+    def schreibe_import_log(self) -> None:
+        '''schreibt die Messwerte der Stufen der letzten Importe in das Statusfeld'''
 
-        letzte_aenderung = PresseArtikelStatus(
-            self.application.db_manager).letzte_datei
-        if letzte_aenderung:
-            self.letzter_imp_presseartikel.set(
-                letzte_aenderung.strftime('%d.%m.%Y'))
+        laeufe = ImportLogStatus(self.application.db_manager).letzte_laeufe()
+        self.fld_msg.text.configure(state='normal')
+
+        self.fld_msg.text.insert(
+            END, f"{datetime.now().strftime('%d.%m.%Y %H:%M:%S')} - Messwerte der letzten Importe:\n")
+        if laeufe:
+            for lauf_ts, importer, datei, stufe, dauer, cpu_zeit, gelesen, geschrieben, peak in laeufe:
+                self.fld_msg.text.insert(
+                    END, f'  {lauf_ts[:19]} {importer} {stufe}: {dauer:.2f} s (CPU {cpu_zeit:.2f} s), '
+                    f'{gelesen} gelesen, {geschrieben} geschrieben, {peak / 1024 / 1024:.1f} MB - {datei}\n')
         else:
-            self.letzter_imp_presseartikel.set('Kein Import vorhanden')
\ No newline at end of file
+            self.fld_msg.text.insert(END, f'  Keine Messwerte vorhanden\n')
+        self.fld_msg.text.insert(END, f'\n')
+        self.fld_msg.text.configure(state='disabled')